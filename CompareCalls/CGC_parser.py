@@ -6,7 +6,7 @@
 #
 # Programmer:  Carol Zhou
 #
-# Last update:  16 October 2020
+# Last update:  18 October 2026
 #
 # Description:  This code inputs the name of a gene caller plus
 #    the gene-caller's output file, and outputs a properly formatted
@@ -19,6 +19,8 @@
 #    larger position number.  The strand ('+' or '-') determines 
 #    whether these numbers represent start or end positions in the
 #    script output file. 
+#    The parser may also be imported and called in-process, via
+#    ParseGeneCallFile(), as phate_genecallPhage.py does.
 #
 # Input Files:  For GeneMarkS, use the XXX.fasta.lst file; for
 #    Glimmer2, use the XXX.g2.coord file; and for Prodigal, use the
@@ -36,6 +38,8 @@
 #    ProcessGFF3()
 #    ProcessProdigal()
 #    ProcessPHANOTATE()
+#    ParseGeneCalls()
+#    ParseGeneCallFile()
 #
 ################################################################
 
@@ -97,8 +101,8 @@ tmpFile        = ""                  # will be path/filename to user's results d
 userOutdir     = ""   # In pipeline mode, extract user's output directory from input parameter specifying output file
 infile         = ""  # user provided
 USER_OUT_PROVIDED = False 
+RUNLOGOPEN        = False  # set if writing to user's results directory
 
-LOGFILE = open(logfile,"w")
 
 ##### PATTERNS
 
@@ -130,110 +134,6 @@ INPUT_STRING = "You may enter the name of a gene caller (e.g., Prodigal, GeneMar
 
 ACCEPTABLE_ARG_COUNT = (2,3,4)  # 2 if 'help'|'usage'|'input', or 3 if gene-caller and gene-caller.out, 4 if optional output file
 
-##### GET INPUT PARAMETERS
-
-geneCaller    = ""
-geneCallerOut = ""
-userOutfile   = ""
-userOutdir    = ""
-RUNLOGOPEN    = False
-
-if PHATE_PROGRESS:
-    print("CGC_parser says, Begin processing; gathering input parameters.")
-
-argCount = len(sys.argv)
-if argCount in ACCEPTABLE_ARG_COUNT:
-    match = re.search("help", sys.argv[1].lower())
-    if match:
-        print(HELP_STRING)
-        LOGFILE.close()
-        exit(0)
-    match = re.search("input", sys.argv[1].lower())
-    if match:
-        print(INPUT_STRING)
-        LOGFILE.close()
-        exit(0)
-    match = re.search("usage", sys.argv[1].lower())
-    if match:
-        print(USAGE_STRING)
-        LOGFILE.close()
-        exit(0)
-
-    # Capture name of gene caller and its output file
-    if argCount == 3 or argCount == 4:
-        geneCaller    = sys.argv[1].lower()  # case insensitive
-        geneCallerOut = sys.argv[2]
-    else:
-        print(USAGE_STRING)
-        LOGFILE.write("%s\n" % ("Incorrect number of command-line arguments provided"))
-        LOGFILE.close()
-        exit(0)
-    if argCount == 4:
-        USER_OUT_PROVIDED = True
-        userOutfile   = sys.argv[3]
-        userOutdir = os.path.dirname(userOutfile)
-else:
-    print(USAGE_STRING)
-    LOGFILE.write("%s\n" % ("Incorrect number of command-line arguments provided"))
-    LOGFILE.close()
-    exit(0)
-
-# Open file
-
-if PHATE_PROGRESS:
-    print("CGC_parser says, Checking files.")
-
-fileError = False
-
-if userOutdir != "":
-    try:
-        runlogfile = userOutdir + '/' + runlogFilename
-        RUNLOGFILE = open(runlogfile,"w")
-        RUNLOGOPEN = True
-    except IOError as e:
-        fileError = True
-        print(e)
-
-if userOutdir != "":
-    try:
-        tmpFile = userOutdir + '/' + tmpFilename
-        TMPFILE = open(tmpFile,"w")
-        TMPOPEN = True
-    except IOError as e:
-        fileError = True
-        print(e)
-
-try:
-    INFILE = open(geneCallerOut,"r")
-except IOError as e:
-    fileError = True
-    print(e)
-
-try:
-    if userOutdir == "":
-        outfile = './' + outFilename
-    else:
-        outfile = userOutdir + '/' + outFilename
-    OUTFILE = open(outfile,"w")
-except IOError as e:
-    fileError = True
-    print(e)
-
-if fileError:
-    print("CGC_parser says, ERROR: Check files.")
-    LOGFILE.write("%s%s\n" % ("ERROR: problem with input file:",geneCallerOut))
-    LOGFILE.close(); exit(0)
-    if RUNLOGOPEN:
-        RUNLOGFILE.write("%s%s%s\n" % ("ERROR: problem with input file:",geneCallerOut))
-        RUNLOGFILE.close(); exit(0)
-
-if USER_OUT_PROVIDED:
-    try:
-        USER_OUT = open(userOutfile,"w")
-    except IOError as e:
-        fileError = True
-        print(e)
-
 ##### FUNCTIONS
 
 def ProcessGenemark(fLines,OUT):
@@ -537,99 +437,186 @@ def ProcessPHANOTATE(fLines,OUT):      # SDSU code
                 OUT.write("%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % (geneNo,strand,leftEnd,rightEnd,str(length),contig,protein))
     return
 
-##### BEGIN MAIN 
-
-if PHATE_PROGRESS:
-    print("CGC_parser says, Parsing gene call outputs.")
-
-# First, determine which gene caller was used
-
-match_glimmer     = re.search(p_glimmer,geneCaller)
-match_genemark    = re.search(p_genemark,geneCaller)
-match_prodigal    = re.search(p_prodigal,geneCaller)
-match_rast        = re.search(p_rast,geneCaller)
-match_thea        = re.search(p_thea,geneCaller)
-match_phanotate   = re.search(p_phanotate,geneCaller)
-match_gff3        = re.search(p_gff3,geneCaller)
-match_genbank     = re.search(p_genbank,geneCaller)
-match_phate       = re.search(p_phate,geneCaller)
-match_custom      = re.search(p_custom,geneCaller)
-
-fileLines = INFILE.read().splitlines()
-
-if USER_OUT_PROVIDED:
-    USER_OUT.write("%s%s%s%s%s\n" % ('# ',geneCaller, " gene calls",", taken from file ",geneCallerOut))
-    USER_OUT.write("%s\n" % ("Gene No.\tStrand\tLeftEnd\tRightEnd\tLength\tContig\tProtein"))
-    if match_genemark:
-        #ProcessGenemark(fileLines,USER_OUT)  #*** use GFF3 for now; need to troubleshoot
-        ProcessGFF3(fileLines,USER_OUT)
-    elif match_glimmer:
-        ProcessGlimmer(fileLines,USER_OUT)
-    elif match_prodigal:
-        ProcessProdigal(fileLines,USER_OUT)
-    elif match_rast:
-        ProcessRAST(fileLines,USER_OUT)
-    elif match_phanotate:
-        ProcessPHANOTATE(fileLines,USER_OUT)
-    elif match_phate:
-        ProcessPHANOTATE(fileLines,USER_OUT)
-    elif match_phanotate:
-        ProcessPHANOTATE(fileLines,USER_OUT)
-    elif match_gff3:
-        ProcessGFF3(fileLines,USER_OUT)
-    elif match_genbank:
-        ProcessGFF3(fileLines,USER_OUT)  # Need to format genbank's protein fasta file as GFF3
-    elif match_custom:
-        CUSTOM_GFF = True
-        ProcessCustom(fileLines,USER_OUT) # Incoming format is pre-defined; may be same as GFFx, but not necessarily
+
+# Writes the cgc-formatted calls of the gene caller (named by geneCaller) found in fLines to OUT; returns False if caller not recognized
+def ParseGeneCalls(geneCaller,fLines,OUT):
+    geneCaller = geneCaller.lower()
+    if re.search(p_genemark,geneCaller):
+        #ProcessGenemark(fLines,OUT)  #*** use GFF3 for now; need to troubleshoot
+        ProcessGFF3(fLines,OUT)
+    elif re.search(p_glimmer,geneCaller):
+        ProcessGlimmer(fLines,OUT)
+    elif re.search(p_prodigal,geneCaller):
+        ProcessProdigal(fLines,OUT)
+    elif re.search(p_rast,geneCaller):
+        ProcessRAST(fLines,OUT)
+    elif re.search(p_phanotate,geneCaller):
+        ProcessPHANOTATE(fLines,OUT)
+    elif re.search(p_phate,geneCaller):
+        ProcessPHANOTATE(fLines,OUT)
+    elif re.search(p_gff3,geneCaller):
+        ProcessGFF3(fLines,OUT)
+    elif re.search(p_genbank,geneCaller):
+        ProcessGFF3(fLines,OUT)  # Need to format genbank's protein fasta file as GFF3
+    elif re.search(p_custom,geneCaller):
+        ProcessCustom(fLines,OUT) # Incoming format is pre-defined; may be same as GFFx, but not necessarily
     else:
         if PHATE_WARNINGS:
-            print ("CGC_parser says, WARNING: Cannot process unknown gene caller output file:", geneCaller)
+            print("CGC_parser says, WARNING: Cannot process unknown gene caller output file:", geneCaller)
         if RUNLOGOPEN:
             RUNLOGFILE.write("%s%s\n" % ("ERROR: Cannot process unknown gene caller output file:",geneCaller))
-    USER_OUT.write("%s\n" % ("# END"))
-
-else:
-    OUTFILE.write("%s%s%s%s%s\n" % ('# ',geneCaller, " gene calls",", taken from file ",geneCallerOut))
-    OUTFILE.write("%s\n" % ("Gene No.\tStrand\tLeftEnd\tRightEnd\tLength\tContig\tProtein"))
-    if match_genemark:
-        #ProcessGenemark(fileLines,OUTFILE)  #*** use GFF3 for now; need to troubleshoot
-        ProcessGFF3(fileLines,OUTFILE)
-    elif match_glimmer:
-        ProcessGlimmer(fileLines,OUTFILE)
-    elif match_prodigal:
-        ProcessProdigal(fileLines,OUTFILE)
-    elif match_rast:
-        ProcessRAST(fileLines,OUTFILE)
-    elif match_phanotate:
-        ProcessPHANOTATE(fileLines,OUTFILE)
-    elif match_phate:
-        ProcessPHANOTATE(fileLines,OUTFILE)
-    elif match_phanotate:
-        ProcessPHANOTATE(fileLines,OUTFILE)
-    elif match_gff3:
-        ProcessGFF3(fileLines,OUTFILE)
-    elif match_genbank:
-        ProcessGFF3(fileLines,OUTFILE)  # Need to format genbank's protein fasta file as GFF3
-    elif match_custom:
-        ProcessCustom(fileLines,OUTFILE) # Incoming format is pre-defined; may be same as GFFx, but not necessarily
+        return False
+    return True
+
+# In-process entry point (e.g., for phate_genecallPhage.py): converts geneCallerOut to cgc-formatted cgcFile
+def ParseGeneCallFile(geneCaller,geneCallerOut,cgcFile):
+    IN_H = open(geneCallerOut,"r")
+    fLines = IN_H.read().splitlines()
+    IN_H.close()
+    CGC_H = open(cgcFile,"w")
+    CGC_H.write("%s%s%s%s%s\n" % ('# ',geneCaller.lower(), " gene calls",", taken from file ",geneCallerOut))
+    CGC_H.write("%s\n" % ("Gene No.\tStrand\tLeftEnd\tRightEnd\tLength\tContig\tProtein"))
+    recognized = ParseGeneCalls(geneCaller,fLines,CGC_H)
+    CGC_H.write("%s\n" % ("# END"))
+    CGC_H.close()
+    return recognized
+
+##### SCRIPT (when run from the command line)
+
+if __name__ == "__main__":
+
+    LOGFILE = open(logfile,"w")
+
+    ##### GET INPUT PARAMETERS
+
+    geneCaller    = ""
+    geneCallerOut = ""
+    userOutfile   = ""
+    userOutdir    = ""
+    RUNLOGOPEN    = False
+
+    if PHATE_PROGRESS:
+        print("CGC_parser says, Begin processing; gathering input parameters.")
+
+    argCount = len(sys.argv)
+    if argCount in ACCEPTABLE_ARG_COUNT:
+        match = re.search("help", sys.argv[1].lower())
+        if match:
+            print(HELP_STRING)
+            LOGFILE.close()
+            exit(0)
+        match = re.search("input", sys.argv[1].lower())
+        if match:
+            print(INPUT_STRING)
+            LOGFILE.close()
+            exit(0)
+        match = re.search("usage", sys.argv[1].lower())
+        if match:
+            print(USAGE_STRING)
+            LOGFILE.close()
+            exit(0)
+
+        # Capture name of gene caller and its output file
+        if argCount == 3 or argCount == 4:
+            geneCaller    = sys.argv[1].lower()  # case insensitive
+            geneCallerOut = sys.argv[2]
+        else:
+            print(USAGE_STRING)
+            LOGFILE.write("%s\n" % ("Incorrect number of command-line arguments provided"))
+            LOGFILE.close()
+            exit(0)
+        if argCount == 4:
+            USER_OUT_PROVIDED = True
+            userOutfile   = sys.argv[3]
+            userOutdir = os.path.dirname(userOutfile)
     else:
-        if PHATE_WARNINGS:
-            print("CGC_parser says, WARNING: Cannot process unknown gene caller output file:", geneCaller)
+        print(USAGE_STRING)
+        LOGFILE.write("%s\n" % ("Incorrect number of command-line arguments provided"))
+        LOGFILE.close()
+        exit(0)
+
+    # Open file
+
+    if PHATE_PROGRESS:
+        print("CGC_parser says, Checking files.")
+
+    fileError = False
+
+    if userOutdir != "":
+        try:
+            runlogfile = userOutdir + '/' + runlogFilename
+            RUNLOGFILE = open(runlogfile,"w")
+            RUNLOGOPEN = True
+        except IOError as e:
+            fileError = True
+            print(e)
+
+    if userOutdir != "":
+        try:
+            tmpFile = userOutdir + '/' + tmpFilename
+            TMPFILE = open(tmpFile,"w")
+            TMPOPEN = True
+        except IOError as e:
+            fileError = True
+            print(e)
+
+    try:
+        INFILE = open(geneCallerOut,"r")
+    except IOError as e:
+        fileError = True
+        print(e)
+
+    try:
+        if userOutdir == "":
+            outfile = './' + outFilename
+        else:
+            outfile = userOutdir + '/' + outFilename
+        OUTFILE = open(outfile,"w")
+    except IOError as e:
+        fileError = True
+        print(e)
+
+    if fileError:
+        print("CGC_parser says, ERROR: Check files.")
+        LOGFILE.write("%s%s\n" % ("ERROR: problem with input file:",geneCallerOut))
+        LOGFILE.close(); exit(0)
         if RUNLOGOPEN:
-            RUNLOGFILE.write("%s%s\n" % ("ERROR: Cannot process unknown gene caller output file:",geneCaller))
-    OUTFILE.write("%s\n" % ("# END"))
-
-##### CLEAN UP
-
-INFILE.close()
-OUTFILE.close()
-if USER_OUT_PROVIDED:
-    USER_OUT.close()
-if RUNLOGOPEN:
-    RUNLOGFILE.write("%s\n" % ("Processing complete"))
-    RUNLOGFILE.close()
-LOGFILE.write("%s%s\n" % ("Processing complete at ", datetime.datetime.now()))
-LOGFILE.close()
-if PHATE_PROGRESS:
-    print("CGC_parser says, Processing complete.")
+            RUNLOGFILE.write("%s%s%s\n" % ("ERROR: problem with input file:",geneCallerOut))
+            RUNLOGFILE.close(); exit(0)
+
+    if USER_OUT_PROVIDED:
+        try:
+            USER_OUT = open(userOutfile,"w")
+        except IOError as e:
+            fileError = True
+            print(e)
+
+    ##### BEGIN MAIN 
+
+    if PHATE_PROGRESS:
+        print("CGC_parser says, Parsing gene call outputs.")
+
+    fileLines = INFILE.read().splitlines()
+
+    if USER_OUT_PROVIDED:
+        OUT_H = USER_OUT
+    else:
+        OUT_H = OUTFILE
+    OUT_H.write("%s%s%s%s%s\n" % ('# ',geneCaller, " gene calls",", taken from file ",geneCallerOut))
+    OUT_H.write("%s\n" % ("Gene No.\tStrand\tLeftEnd\tRightEnd\tLength\tContig\tProtein"))
+    ParseGeneCalls(geneCaller,fileLines,OUT_H)
+    OUT_H.write("%s\n" % ("# END"))
+
+    ##### CLEAN UP
+
+    INFILE.close()
+    OUTFILE.close()
+    if USER_OUT_PROVIDED:
+        USER_OUT.close()
+    if RUNLOGOPEN:
+        RUNLOGFILE.write("%s\n" % ("Processing complete"))
+        RUNLOGFILE.close()
+    LOGFILE.write("%s%s\n" % ("Processing complete at ", datetime.datetime.now()))
+    LOGFILE.close()
+    if PHATE_PROGRESS:
+        print("CGC_parser says, Processing complete.")
@@ -0,0 +1,340 @@
+#############################################
+# Name: cgp_allVsAll.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# All-vs-all engine for CompareGeneProfiles. Rather than blasting each genome pair in its own
+#    compareGeneProfiles_main.py process (4 blastn and 4 blastp runs per pair), the gene and protein
+#    sets of all genomes are concatenated into one gene and one protein database, and blasted once,
+#    in shards run in parallel. The combined hit table is then split into the per-pair hit files
+#    (genome1-genome2, genome2-genome1, and each genome against itself), in the same tabular format
+#    as the pairwise blast output, so that compareGeneProfiles_main.py (run with "-m allvsall")
+#    derives each pair's mutual-best, singular, loner, and paralog sets and writes its Results_ files.
+# In the combined fasta files, each header is prefixed with its genome's tag (e.g., "G3_"), which
+#    is removed when the hit table is split. The pairwise search settings are applied to each
+#    query's hits to each subject genome when the table is split:
+#    - E-values are rescaled from the combined database to the subject genome's size, and hits
+#      above EVALUE are dropped. The combined search is run with a correspondingly larger e-value
+#      cutoff, and with no limit on hits per query, so that no genome's hits are lost to another's.
+#    - Best-hit filtering (SCORE_EDGE, OVERHANG): a hit is dropped if its query range lies within
+#      that of a better hit to the same genome, extended by OVERHANG of that hit's length, and its
+#      bit score is lower by more than SCORE_EDGE.
+#    - Hits are limited to PARALOG_MAX per query against its own genome, and MAX_TARGET_SEQS per
+#      query against any other genome.
+# The results approximate those of the pairwise runs, but are not identical to them: blast's own
+#    e-values use the effective lengths of the database searched, and its best-hit filtering and
+#    hit limits are applied to HSPs during the search.
+#
+# Classes and methods:
+#     allVsAll
+#         addGenome
+#         concatenateFastas
+#         makeDatabases
+#         shardQuery
+#         performBlast
+#         filterHits
+#         splitHits
+#         run
+#     getSequenceFiles
+#     getPairHitFile
+#     formatEvalue
+#     blastShard
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import itertools
+from multiprocessing import Pool
+import cgp_blastAnalysis as blastAnalysis
+
+PIPELINE_OUTPUT_DIR = os.environ["PHATE_PIPELINE_OUTPUT_DIR"]
+ALL_VS_ALL_DIR      = os.path.join(PIPELINE_OUTPUT_DIR, "CGP_ALL_VS_ALL")
+
+# Blast parameters; must agree with those of cgp_compareGeneProfiles_main.py
+BLASTN_IDENTITY = os.environ["CGP_BLASTN"]
+EVALUE          = 1
+OUTPUT_FORMAT   = 7
+MAX_TARGET_SEQS = 1     # hits per query to each other genome
+PARALOG_MAX     = 5     # hits per query to its own genome
+SCORE_EDGE      = 0.05  # best-hit filtering, as -best_hit_score_edge
+OVERHANG        = 0.25  # best-hit filtering, as -best_hit_overhang
+
+# Columns of the tabular (-outfmt 7) hit table
+QUERY_START = 6
+QUERY_END   = 7
+EVALUE_COL  = 10
+BIT_SCORE   = 11
+
+GENE_FILE_SUFFIX    = "_cgp_gene.fnt"
+PROTEIN_FILE_SUFFIX = "_cgp_protein.faa"
+
+# Boolean control: verbosity
+
+PHATE_PROGRESS = False
+PHATE_MESSAGES = False
+PHATE_WARNINGS = False
+
+PHATE_PROGRESS_STRING = os.environ["PHATE_PHATE_PROGRESS"]
+PHATE_MESSAGES_STRING = os.environ["PHATE_PHATE_MESSAGES"]
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+
+if PHATE_PROGRESS_STRING.lower() == 'true':
+    PHATE_PROGRESS = True
+if PHATE_MESSAGES_STRING.lower() == 'true':
+    PHATE_MESSAGES = True
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+
+# Gene and protein fasta files written by compareGeneProfiles_main.py for a genome, given its annotation file
+def getSequenceFiles(annotationFile):
+    (pathRoot, fileName)  = os.path.split(annotationFile)
+    (pathHead, pathTail)  = os.path.split(pathRoot)
+    geneFile    = os.path.join(pathRoot, pathTail + GENE_FILE_SUFFIX)
+    proteinFile = os.path.join(pathRoot, pathTail + PROTEIN_FILE_SUFFIX)
+    return (geneFile, proteinFile)
+
+# Hit file for queries from queryFile against subjectFile ("blastn" or "blastp"), as split from the all-vs-all hit table
+def getPairHitFile(queryFile,subjectFile,program,workDir=ALL_VS_ALL_DIR):
+    queryRoot   = os.path.splitext(os.path.basename(queryFile))[0]
+    subjectRoot = os.path.splitext(os.path.basename(subjectFile))[0]
+    return os.path.join(workDir, queryRoot + "_" + subjectRoot + "_" + program + ".out")
+
+# Format a rescaled e-value for the pair hit files, as blast does in its reports
+def formatEvalue(evalue):
+    if evalue < 1.0e-180:
+        return "0.0"
+    if evalue < 1.0e-99:
+        return "%2.0e" % (evalue)
+    if evalue < 0.0009:
+        return "%3.0e" % (evalue)
+    if evalue < 0.1:
+        return "%4.3f" % (evalue)
+    if evalue < 1.0:
+        return "%3.2f" % (evalue)
+    if evalue < 10.0:
+        return "%2.1f" % (evalue)
+    return "%5.0f" % (evalue)
+
+# Blast one shard of the combined query against the combined database; run in a worker process
+def blastShard(kvargs):
+    if kvargs["program"] == "blastn":
+        command = "blastn -query " + kvargs["query"] + " -out " + kvargs["outfile"] + " -task blastn -db " + kvargs["database"] + \
+            " -evalue " + str(kvargs["evalue"]) + " -outfmt " + str(OUTPUT_FORMAT) + " -perc_identity " + str(BLASTN_IDENTITY) + \
+            " -max_target_seqs " + str(kvargs["maxTargetSeqs"]) + " -max_hsps 1"
+    else:
+        command = "blastp -query " + kvargs["query"] + " -out " + kvargs["outfile"] + " -task blastp -db " + kvargs["database"] + \
+            " -evalue " + str(kvargs["evalue"]) + " -outfmt " + str(OUTPUT_FORMAT) + \
+            " -max_target_seqs " + str(kvargs["maxTargetSeqs"]) + " -max_hsps 1"
+    if PHATE_MESSAGES:
+        print("cgp_allVsAll says, Running command:", command)
+    return os.system(command)
+
+class allVsAll(object):
+
+    def __init__(self,workDir=ALL_VS_ALL_DIR):
+        self.workDir      = workDir
+        self.geneFiles    = []  # gene fasta file of each genome, in order of tag
+        self.proteinFiles = []  # protein fasta file of each genome, in order of tag
+        self.tag2index    = {}  # genome tag (e.g., "G3") => index into file lists
+        self.lengths      = {}  # program => list of each genome's total sequence length (see concatenateFastas)
+        self.counts       = {}  # program => number of sequences in the combined database
+        os.makedirs(self.workDir, exist_ok=True)
+
+    def addGenome(self,geneFile,proteinFile):
+        if geneFile in self.geneFiles:
+            return
+        tag = "G" + str(len(self.geneFiles) + 1)
+        self.tag2index[tag] = len(self.geneFiles)
+        self.geneFiles.append(geneFile)
+        self.proteinFiles.append(proteinFile)
+
+    # Write the sequences of all genomes to one fasta file, with each header prefixed by its genome's tag.
+    # Returns the list of each genome's total sequence length, and the number of sequences written.
+    def concatenateFastas(self,fileList,combinedFile):
+        lengths = []; sequenceCount = 0
+        COMBINED_H = open(combinedFile,"w")
+        for index in range(0,len(fileList)):
+            tag = "G" + str(index + 1) + "_"
+            length = 0
+            FASTA_H = open(fileList[index],"r")
+            for fLine in FASTA_H:
+                if fLine.startswith('>'):
+                    COMBINED_H.write("%s%s%s" % ('>',tag,fLine[1:]))
+                    sequenceCount += 1
+                else:
+                    COMBINED_H.write("%s" % (fLine))
+                    length += len(fLine.strip())
+            FASTA_H.close()
+            lengths.append(length)
+        COMBINED_H.close()
+        return (lengths,sequenceCount)
+
+    def makeDatabases(self):
+        myBlast = blastAnalysis.blast()
+        self.combinedGeneFile    = os.path.join(self.workDir, "allVsAll" + GENE_FILE_SUFFIX)
+        self.combinedProteinFile = os.path.join(self.workDir, "allVsAll" + PROTEIN_FILE_SUFFIX)
+        (self.lengths["blastn"],self.counts["blastn"]) = self.concatenateFastas(self.geneFiles, self.combinedGeneFile)
+        (self.lengths["blastp"],self.counts["blastp"]) = self.concatenateFastas(self.proteinFiles, self.combinedProteinFile)
+        myBlast.makeBlastDB({"dbType" : "nucl", "filename" : self.combinedGeneFile})
+        myBlast.makeBlastDB({"dbType" : "prot", "filename" : self.combinedProteinFile})
+
+    # Split fasta file into shardCount files of about equal numbers of sequences; returns the list of shard files
+    def shardQuery(self,fastaFile,shardCount):
+        FASTA_H = open(fastaFile,"r")
+        records = FASTA_H.read().split('\n>')
+        FASTA_H.close()
+        records = [record.lstrip('>').rstrip('\n') for record in records if record.strip()]
+        shardCount = max(1, min(shardCount, len(records)))
+        shardFiles = []
+        for shard in range(0,shardCount):
+            shardFile = fastaFile + ".shard" + str(shard + 1)
+            SHARD_H = open(shardFile,"w")
+            for record in records[shard::shardCount]:
+                SHARD_H.write("%s%s\n" % ('>',record))
+            SHARD_H.close()
+            shardFiles.append(shardFile)
+        return shardFiles
+
+    # Blast the combined fasta against itself in shards, using up to threads processes; returns the combined hit file
+    def performBlast(self,program,threads):
+        if program == "blastn":
+            combinedFile = self.combinedGeneFile
+        else:
+            combinedFile = self.combinedProteinFile
+        shardFiles = self.shardQuery(combinedFile, threads)
+        shardArgs  = []
+        # E-values against the combined database are larger than against one genome by the ratio of their sizes;
+        # the cutoff allows for the smallest genome, and splitHits applies EVALUE to each genome's rescaled e-values
+        evalueCutoff = EVALUE * sum(self.lengths[program]) / max(1, min(self.lengths[program]))
+        for shardFile in shardFiles:
+            shardArgs.append({
+                "program"       : program,
+                "query"         : shardFile,
+                "database"      : combinedFile,
+                "outfile"       : shardFile + "." + program + ".out",
+                "evalue"        : evalueCutoff,
+                "maxTargetSeqs" : max(1, self.counts[program]),  # no limit; hits are limited per genome in splitHits
+                })
+        if threads > 1 and len(shardArgs) > 1:
+            blastPool = Pool(min(threads, len(shardArgs)))
+            results = blastPool.map(blastShard, shardArgs)
+            blastPool.close()
+            blastPool.join()
+        else:
+            results = [blastShard(kvargs) for kvargs in shardArgs]
+        for result in results:
+            if result != 0 and PHATE_WARNINGS:
+                print("cgp_allVsAll says, WARNING: A", program, "shard returned", result)
+
+        hitFile = os.path.join(self.workDir, "allVsAll_" + program + ".out")
+        HIT_H = open(hitFile,"w")
+        for kvargs in shardArgs:
+            SHARD_H = open(kvargs["outfile"],"r")
+            for hLine in SHARD_H:
+                HIT_H.write("%s" % (hLine))
+            SHARD_H.close()
+            os.remove(kvargs["outfile"])
+            os.remove(kvargs["query"])
+        HIT_H.close()
+        return hitFile
+
+    # Apply the pairwise search settings to one query's hits to one subject genome (lists of hit table fields,
+    # in blast's order, best first): rescale e-values to the subject genome and drop those above EVALUE, apply
+    # best-hit filtering, and keep at most hitLimit hits. Returns the hits kept.
+    def filterHits(self,hits,evalueScale,hitLimit):
+        keptHits = []
+        for fields in hits:
+            evalue = float(fields[EVALUE_COL]) * evalueScale
+            if evalue > EVALUE:
+                continue
+            queryStart = min(int(fields[QUERY_START]),int(fields[QUERY_END]))
+            queryEnd   = max(int(fields[QUERY_START]),int(fields[QUERY_END]))
+            bitScore   = float(fields[BIT_SCORE])
+            enveloped  = False
+            for keptFields in keptHits:
+                keptStart = min(int(keptFields[QUERY_START]),int(keptFields[QUERY_END]))
+                keptEnd   = max(int(keptFields[QUERY_START]),int(keptFields[QUERY_END]))
+                overhang  = OVERHANG * (keptEnd - keptStart + 1)
+                if keptStart - overhang <= queryStart and queryEnd <= keptEnd + overhang and \
+                    bitScore < float(keptFields[BIT_SCORE]) * (1.0 - SCORE_EDGE):
+                    enveloped = True
+                    break
+            if enveloped:
+                continue
+            fields[EVALUE_COL] = formatEvalue(evalue)
+            keptHits.append(fields)
+            if len(keptHits) >= hitLimit:
+                break
+        return keptHits
+
+    # Split the combined hit table into one hit file per (query genome, subject genome) pair
+    def splitHits(self,hitFile,program):
+        if program == "blastn":
+            fileList = self.geneFiles
+        else:
+            fileList = self.proteinFiles
+        genomeCount = len(fileList)
+        combinedLength = sum(self.lengths[program])
+        pairLines = {}  # (query index, subject index) => list of hit lines, with tags removed
+        for index1 in range(0,genomeCount):
+            for index2 in range(0,genomeCount):
+                pairLines[(index1,index2)] = []
+
+        # Blast lists each query's hits together; they are collected by subject genome, then filtered
+        queryKey  = None  # (query index, query header) of the hits being collected
+        queryHits = {}    # subject index => list of hit fields of this query, in blast's order
+        HIT_H = open(hitFile,"r")
+        for hLine in itertools.chain(HIT_H,[None]):  # None: end of table
+            if hLine is not None:
+                if hLine.startswith('#'):
+                    continue
+                fields = hLine.rstrip('\n').split('\t')
+                if len(fields) < 12:
+                    continue
+                (queryTag,fields[0])   = fields[0].split('_',1)
+                (subjectTag,fields[1]) = fields[1].split('_',1)
+                nextKey = (self.tag2index[queryTag],fields[0])
+            if queryKey is not None and (hLine is None or nextKey != queryKey):
+                queryIndex = queryKey[0]
+                for subjectIndex in queryHits:
+                    if queryIndex == subjectIndex:
+                        hitLimit = PARALOG_MAX
+                    else:
+                        hitLimit = MAX_TARGET_SEQS
+                    evalueScale = float(self.lengths[program][subjectIndex]) / combinedLength
+                    for keptFields in self.filterHits(queryHits[subjectIndex],evalueScale,hitLimit):
+                        pairLines[(queryIndex,subjectIndex)].append('\t'.join(keptFields))
+                queryHits = {}
+            if hLine is None:
+                break
+            queryKey = nextKey
+            subjectIndex = self.tag2index[subjectTag]
+            if subjectIndex not in queryHits:
+                queryHits[subjectIndex] = []
+            queryHits[subjectIndex].append(fields)
+        HIT_H.close()
+
+        for (index1,index2) in pairLines:
+            pairFile = getPairHitFile(fileList[index1], fileList[index2], program, self.workDir)
+            PAIR_H = open(pairFile,"w")
+            for pLine in pairLines[(index1,index2)]:
+                PAIR_H.write("%s\n" % (pLine))
+            PAIR_H.close()
+
+    # Build the combined databases, blast genes and proteins, and write the per-pair hit files
+    def run(self,threads=1):
+        if PHATE_PROGRESS:
+            print("cgp_allVsAll says, Comparing", len(self.geneFiles), "genomes all-vs-all using", threads, "blast processes")
+        if PHATE_WARNINGS:
+            print("cgp_allVsAll says, WARNING: All-vs-all results approximate, but are not identical to, those of pairwise comparison")
+        self.makeDatabases()
+        for program in ["blastn","blastp"]:
+            hitFile = self.performBlast(program, threads)
+            self.splitHits(hitFile, program)
+        if PHATE_PROGRESS:
+            print("cgp_allVsAll says, All-vs-all comparison complete; pair hit files are in", self.workDir)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+#############################################
+# Name: cgp_benchmarkHits.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Benchmark for the hit classification methods of cgp_blastAnalysis.blast: recordHits, compareHits
+#    (mutual best and singular hits), identifyLoners, and identifyParalogs. Synthetic genomes of
+#    <count> genes each are constructed, with hit tables between them (<count> x <count>) and
+#    against self, and each method is timed.
+#    With -reference, the results are also computed with the former nested-loop (quadratic)
+#    algorithms, timed, and checked to be identical.
+#
+# Usage:  python cgp_benchmarkHits.py [count] [-reference]   (count defaults to 10000)
+#
+# Methods:
+#    MakeGenome
+#    WriteHitFile
+#    ReferenceCompareHits
+#    ReferenceLoners
+#    ReferenceParalogs
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os
+import random
+import tempfile
+import time
+
+# This benchmark may be run outside of multiPhATE; the classification methods do not use these settings
+for variable in ["PHATE_KEGG_VIRUS_BASE_DIR","PHATE_NCBI_VIRUS_BASE_DIR","PHATE_PHANTOME_BASE_DIR","PHATE_NCBI_TAXON_DIR","PHATE_PVOGS_BASE_DIR","PHATE_BLAST_HOME","PHATE_EMBOSS_PHATE_HOME"]:
+    os.environ.setdefault(variable,"")
+for variable in ["PHATE_CLEAN_RAW_DATA","PHATE_PHATE_PROGRESS","PHATE_PHATE_MESSAGES","PHATE_PHATE_WARNINGS"]:
+    os.environ.setdefault(variable,"False")
+os.environ.setdefault("CGP_IDENTITY_CUTOFF","60")
+
+import cgp_fastaSequence as fastaSequence
+import cgp_blastAnalysis as blastAnalysis
+
+DEFAULT_COUNT   = 10000
+MUTUAL_FRACTION = 0.7   # fraction of genes whose best hit is reciprocated
+HIT_FRACTION    = 0.9   # fraction of genes having any hit in the other genome
+PARALOG_MAX     = 5
+
+parameters = {
+    "type"                        : "gene",
+    "geneMatchIdentity"           : 60,
+    "geneMatchCoverage"           : 60,
+    "paralogMatchIdentity"        : 60,
+    "paralogMatchCoverage"        : 60,
+    }
+
+# Returns a multiFasta object of count genes, named with prefix
+def MakeGenome(prefix,count):
+    genome = fastaSequence.multiFasta()
+    for i in range(0,count):
+        gene = fastaSequence.fasta()
+        gene.start  = i * 1000 + 1
+        gene.end    = i * 1000 + 900
+        gene.header = prefix + str(i + 1) + "/+/" + str(gene.start) + "/" + str(gene.end) + "/"
+        gene.contig = "contig1"
+        genome.fastaList.append(gene)
+    return genome
+
+def WriteHitFile(filename,hitPairs):
+    HIT_FILE = open(filename,"w")
+    HIT_FILE.write("%s\n" % ("# BLASTN synthetic hits"))
+    for (query,subject,identity) in hitPairs:
+        HIT_FILE.write("%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\n" % (query,subject,identity,"850","10","0","1","850","1","850","1e-100","1500"))
+    HIT_FILE.close()
+
+##### Former (quadratic) algorithms, for checking results
+
+def ReferenceCompareHits(inList1,inList2):
+    comparison = blastAnalysis.homology()
+    for hit1 in inList1.blastHits:
+        for hit2 in inList2.blastHits:
+            if hit1.subjectHeader == hit2.queryHeader and hit2.subjectHeader == hit1.queryHeader:
+                comparison.mutualBestHits["set1"].append(hit1)
+                comparison.mutualBestHits["set2"].append(hit2)
+            elif hit1.subjectHeader == hit2.queryHeader:
+                comparison.singularHits["set1"].append(hit1)
+            elif hit2.subjectHeader == hit1.queryHeader:
+                comparison.singularHits["set2"].append(hit2)
+    return comparison
+
+def ReferenceLoners(seqList,mutualHitList,singularHitList):
+    loners = []
+    for seq in seqList.fastaList:
+        hadahit = False
+        for hit in mutualHitList + singularHitList:
+            if seq.header == hit.queryHeader:
+                hadahit = True
+        if not hadahit:
+            loners.append(seq)
+    return loners
+
+def ReferenceParalogs(seqList,hits):
+    paralogs = []
+    for seq in seqList.fastaList:
+        for nextHit in hits.blastHits:
+            if seq.header == nextHit.queryHeader and nextHit.queryHeader != nextHit.subjectHeader:
+                paralogs.append((seq.header,nextHit.subjectHeader))
+    return paralogs
+
+##### Main
+
+count = DEFAULT_COUNT
+REFERENCE = False
+for argument in sys.argv[1:]:
+    if argument == "-reference":
+        REFERENCE = True
+    else:
+        count = int(argument)
+
+random.seed(1)
+genome1 = MakeGenome("g1_cds",count)
+genome2 = MakeGenome("g2_cds",count)
+headers1 = [gene.header for gene in genome1.fastaList]
+headers2 = [gene.header for gene in genome2.fastaList]
+
+# Genome 1 genes hit a permutation of genome 2 genes; genome 2 genes hit back (mutual), elsewhere (singular), or not at all
+permutation = list(range(0,count)); random.shuffle(permutation)
+hits12 = []; hits21 = []
+for i in range(0,count):
+    if random.random() < HIT_FRACTION:
+        hits12.append((headers1[i],headers2[permutation[i]],"95.0"))
+for i in range(0,count):
+    roll = random.random()
+    if roll < MUTUAL_FRACTION:
+        hits21.append((headers2[permutation[i]],headers1[i],"95.0"))
+    elif roll < HIT_FRACTION:
+        hits21.append((headers2[permutation[i]],headers1[random.randrange(count)],"95.0"))
+hits11 = []
+for i in range(0,count):
+    hits11.append((headers1[i],headers1[i],"100.0"))  # self hit
+    for j in range(0,random.randrange(PARALOG_MAX)):
+        hits11.append((headers1[i],headers1[random.randrange(count)],"80.0"))
+
+tempDir = tempfile.mkdtemp()
+hitFile12 = os.path.join(tempDir,"g1_g2.out"); WriteHitFile(hitFile12,hits12)
+hitFile21 = os.path.join(tempDir,"g2_g1.out"); WriteHitFile(hitFile21,hits21)
+hitFile11 = os.path.join(tempDir,"g1_g1.out"); WriteHitFile(hitFile11,hits11)
+
+myBlast = blastAnalysis.blast()
+print("cgp_benchmarkHits says, Genes per genome:", count, "; hits g1-g2:", len(hits12), "; g2-g1:", len(hits21), "; g1-g1:", len(hits11))
+
+startTime = time.time()
+hitList12 = myBlast.recordHits(hitFile12)
+hitList21 = myBlast.recordHits(hitFile21)
+hitList11 = myBlast.recordHits(hitFile11)
+print("   recordHits (3 files):  %.3f seconds" % (time.time() - startTime))
+
+startTime = time.time()
+comparison = myBlast.compareHits(hitList12,hitList21,parameters)
+print("   compareHits:           %.3f seconds" % (time.time() - startTime))
+
+startTime = time.time()
+comparison = myBlast.identifyLoners({"seqList1" : genome1, "seqList2" : genome2, "comparedHits" : comparison})
+print("   identifyLoners:        %.3f seconds" % (time.time() - startTime))
+
+startTime = time.time()
+paralogCount = myBlast.identifyParalogs(genome1,hitList11,parameters)
+print("   identifyParalogs:      %.3f seconds" % (time.time() - startTime))
+print("   mutual best:", len(comparison.mutualBestHits["set1"]), "; singular:", len(comparison.singularHits["set1"]), "/", len(comparison.singularHits["set2"]),
+      "; loners:", len(comparison.loners["set1"]), "/", len(comparison.loners["set2"]), "; paralogs:", paralogCount)
+
+if REFERENCE:
+    startTime = time.time()
+    reference = ReferenceCompareHits(hitList12,hitList21)
+    lonerList1 = ReferenceLoners(genome1,reference.mutualBestHits["set1"],reference.singularHits["set1"])
+    lonerList2 = ReferenceLoners(genome2,reference.mutualBestHits["set2"],reference.singularHits["set2"])
+    paralogList = ReferenceParalogs(genome1,hitList11)
+    print("   reference (nested loops): %.3f seconds" % (time.time() - startTime))
+    same = True
+    for hitType in ["mutualBestHits","singularHits"]:
+        for hitSet in ["set1","set2"]:
+            if [id(hit) for hit in getattr(comparison,hitType)[hitSet]] != [id(hit) for hit in getattr(reference,hitType)[hitSet]]:
+                same = False
+    if comparison.loners["set1"] != lonerList1 or comparison.loners["set2"] != lonerList2:
+        same = False
+    paralogList2 = []
+    for gene in genome1.fastaList:
+        for paralog in gene.paralogList:
+            paralogList2.append((gene.header,paralog.header))
+    if paralogList != paralogList2:
+        same = False
+    print("   results identical to reference:", same)
+
+for filename in [hitFile12,hitFile21,hitFile11]:
+    os.remove(filename)
+os.rmdir(tempDir)
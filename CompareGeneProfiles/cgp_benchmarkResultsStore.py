@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+#############################################
+# Name: cgp_benchmarkResultsStore.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Timing comparison for querying CGP results across many genome pairs (see cgp_resultsStore.py).
+#    Synthetic Results_ directories are written for <count> pairs, each with a postProcessCGPM.report
+#    of <genes> hits and a postProcessCGPM.log. The former query method (echo and grep into a scratch
+#    file, for each directory and each cds or hit type, then re-read) is timed against loading the
+#    reports into the results store, and against indexed lookups in the store: by cds, by hit type,
+#    and of the pairs that include a reference genome. The lines found by each method are checked
+#    to be the same.
+#
+# Usage:  python cgp_benchmarkResultsStore.py [count] [-genes n]   (count defaults to 300; genes to 3000)
+#
+# Methods:
+#    WriteSyntheticResults
+#    ReferenceQuery
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os
+import random
+import shutil
+import tempfile
+import time
+import cgp_resultsStore as resultsStore
+
+DEFAULT_COUNT = 300
+DEFAULT_GENES = 3000
+GENOME_COUNT  = 20
+QUERY_CDS     = ["5","12","1500"]
+HIT_TYPES     = [("genome1_mutual",0.6),("genome1_singular",0.15),("genome2_singular",0.1),("genome1_loner",0.08),("genome2_loner",0.07)]
+INTERPRETATIONS = ["Hit to reverse strand of sequence","Possible split gene call on genome","Possible extra or missing domain","Possible alternate start codon","Hits appear to overlap"]
+
+# Writes count Results_ directories to projectDir, each holding a postProcessCGPM.report of genes hits
+# and its postProcessCGPM.log; returns the list of directories
+def WriteSyntheticResults(projectDir,count,genes):
+    genomes = ["Strain" + str(i + 1).zfill(3) for i in range(0,GENOME_COUNT)]
+    directoryList = []
+    for i in range(0,count):
+        (genome1,genome2) = random.sample(genomes,2)
+        resultsDir = os.path.join(projectDir,"Results_" + str(i + 1).zfill(5))
+        os.mkdir(resultsDir)
+        directoryList.append(resultsDir)
+        geneFile1 = os.path.join("/genomes",genome1,genome1 + ".gene.fnt")
+        geneFile2 = os.path.join("/genomes",genome2,genome2 + ".gene.fnt")
+        LOG_H = open(os.path.join(resultsDir,"postProcessCGPM.log"),"w")
+        LOG_H.write("%s%s\n%s%s\n" % ("gene file #1: ",geneFile1,"gene file #2: ",geneFile2))
+        LOG_H.close()
+        REPORT_H = open(os.path.join(resultsDir,"postProcessCGPM.report"),"w")
+        REPORT_H.write("%s%s\n%s%s\n%s\n" % ("#gene file #1: ",geneFile1,"#gene file #2: ",geneFile2,"#GENE HITS"))
+        for position in range(0,genes):
+            genomeType = random.choices([hitType[0] for hitType in HIT_TYPES],[hitType[1] for hitType in HIT_TYPES])[0]
+            fields = [""] * (resultsStore.INTERPRETATION + 3)   # interpretation and 2 sequences
+            fields[resultsStore.POSITION] = str(position)
+            fields[resultsStore.GENOME_TYPE] = genomeType
+            if genomeType != "genome2_loner":
+                fields[resultsStore.G1HEADER] = "cds" + str(position + 1) + "/+/" + str(position * 900) + "/" + str(position * 900 + 800) + "/x"
+                fields[resultsStore.G1CONTIG] = "contig1"
+                fields[resultsStore.G1ANNOTATION] = "[annotation]"
+                fields[resultsStore.G1LENGTH] = "800"
+            if genomeType != "genome1_loner":
+                fields[resultsStore.G2HEADER] = "cds" + str(position + random.randrange(1,4)) + "/-/" + str(position * 900) + "/" + str(position * 900 + 810) + "/x"
+                fields[resultsStore.G2CONTIG] = "contig1"
+                fields[resultsStore.G2ANNOTATION] = "[annotation]"
+                fields[resultsStore.G2LENGTH] = "810"
+            fields[resultsStore.INTERPRETATION] = "; ".join(random.sample(INTERPRETATIONS,random.randrange(0,3)))
+            fields[-2] = fields[-1] = "ATG" * 270
+            REPORT_H.write("%s\t\n" % ('\t'.join(fields)))
+        REPORT_H.close()
+    return directoryList
+
+# The former query method: echo the pair's genomes and grep the pair's report into a scratch file,
+#    for each directory and each query string, then read the scratch file back
+def ReferenceQuery(directoryList,queryStrings,scratchFile):
+    os.system("> " + scratchFile)
+    for resultsDir in directoryList:
+        (genome1,genome2) = resultsStore.getLogGenomes(os.path.join(resultsDir,"postProcessCGPM.log"))
+        os.system("echo \'##### Querying directory\' " + resultsDir + " >> " + scratchFile)
+        os.system("echo \'# Gene Set 1 is\' " + genome1 + " >> " + scratchFile)
+        os.system("echo \'# Gene Set 2 is\' " + genome2 + " >> " + scratchFile)
+        for queryString in queryStrings:
+            os.system("grep \'" + queryString + "' " + resultsDir + "/postProcessCGPM.report >> " + scratchFile)
+    SCRATCH_H = open(scratchFile,"r")
+    fLines = SCRATCH_H.read().splitlines()
+    SCRATCH_H.close()
+    return ['\t'.join(line.split('\t')[0:resultsStore.INTERPRETATION + 1]) for line in fLines]
+
+##### Main
+
+count = DEFAULT_COUNT; genes = DEFAULT_GENES
+arguments = sys.argv[1:]
+while arguments:
+    argument = arguments.pop(0)
+    if argument == "-genes":
+        genes = int(arguments.pop(0))
+    else:
+        count = int(argument)
+
+random.seed(1)
+projectDir = tempfile.mkdtemp()
+print("cgp_benchmarkResultsStore says, Writing", count, "synthetic Results_ directories of", genes, "hits each")
+directoryList = WriteSyntheticResults(projectDir,count,genes)
+scratchFile = os.path.join(projectDir,"query.scratch")
+
+startTime = time.time()
+store = resultsStore.resultsStore(resultsStore.getStoreFile(directoryList[0]))
+for resultsDir in directoryList:
+    (genome1,genome2) = resultsStore.getLogGenomes(os.path.join(resultsDir,"postProcessCGPM.log"))
+    store.loadReport(os.path.join(resultsDir,"postProcessCGPM.report"),genome1,genome2)
+loadTime = time.time() - startTime
+print("   load %d reports into results store:   %8.2f s (%.1f ms per pair)" % (count,loadTime,loadTime * 1000 / count))
+
+startTime = time.time()
+currentCount = len([resultsDir for resultsDir in directoryList if store.isCurrent(os.path.join(resultsDir,"postProcessCGPM.report"))])
+print("   check %d reports are current:         %8.2f ms" % (currentCount,(time.time() - startTime) * 1000))
+
+# Each query, across all pairs: former method vs. indexed lookup
+queries = [("cds " + ",".join(QUERY_CDS),["cds" + cds + "/" for cds in QUERY_CDS]),("hit type genome2_loner",["genome2_loner"]),("hit type genome1_singular",["genome1_singular"])]
+for (queryName,queryStrings) in queries:
+    startTime = time.time()
+    referenceLines = ReferenceQuery(directoryList,queryStrings,scratchFile)
+    referenceTime = time.time() - startTime
+    startTime = time.time()
+    storeLines = []
+    for resultsDir in directoryList:
+        (pairId,report,reportSize,reportMtimeNs,genome1,genome2) = store.getPair(resultsDir)
+        storeLines.extend(["##### Querying directory " + resultsDir,"# Gene Set 1 is " + genome1,"# Gene Set 2 is " + genome2])
+        for queryString in queryStrings:
+            if queryString.startswith("cds"):
+                storeLines.extend(store.queryByCds(pairId,queryString[3:-1]))
+            else:
+                storeLines.extend(store.queryByHitType(pairId,queryString))
+    storeTime = time.time() - startTime
+    print("   query by %s: former %8.2f s, store %8.2f ms (%d lines); same lines: %s" % (queryName,referenceTime,storeTime * 1000,len(storeLines),referenceLines == storeLines))
+
+startTime = time.time()
+referencePairs = store.getReferencePairs("Strain001")
+hitCount = 0
+for pair in referencePairs:
+    hitCount += len(store.queryByHitType(pair[0],"genome1_loner" if pair[3] == "Strain001" else "genome2_loner"))
+print("   reference Strain001 loners: %d pairs, %d hits, %8.2f ms" % (len(referencePairs),hitCount,(time.time() - startTime) * 1000))
+
+store.close()
+shutil.rmtree(projectDir)
@@ -3,7 +3,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Date of last update:  9 December 2020
+# Date of last update:  18 October 2026
 #
 # Description:
 # Module comprising data structures and methods for blasting the genes and proteins
@@ -29,6 +29,7 @@
 #         printAll
 #         printAll2file
 #         printAll2file_tab
+#     indexHits
 #     blast
 #         identifyLoners
 #         identifyParalogs
@@ -598,6 +599,14 @@ class paralog(object):  #
         self.blastHit.printAll2file_tab(FILE_HANDLE)
         FILE_HANDLE.write("%s%s\n" % ("coverage:",self.coverage))
         
+###########################################################################################################
+# Index a list of hit objects by header ("queryHeader" or "subjectHeader"): header => list of hits, in list order
+def indexHits(hitObjectList,headerType):
+    hitIndex = {}
+    for nextHit in hitObjectList:
+        hitIndex.setdefault(getattr(nextHit,headerType),[]).append(nextHit)
+    return hitIndex
+
 ###########################################################################################################
 class blast(object):
 
@@ -630,29 +639,16 @@ class blast(object):
         lonerList1       = comparedHits.loners["set1"]
         lonerList2       = comparedHits.loners["set2"]
 
-        hadahit = False
+        # A sequence is a loner if it is not the query of any mutual or singular best hit
+        hitHeaders1 = set([hit.queryHeader for hit in mutualHitList1] + [hit.queryHeader for hit in singularHitList1])
         for seq in seqList1.fastaList:
-            for hit in mutualHitList1:  
-                if seq.header == hit.queryHeader:
-                    hadahit = True
-            for hit in singularHitList1:
-                if seq.header == hit.queryHeader:
-                    hadahit = True 
-            if not hadahit:
+            if seq.header not in hitHeaders1:
                 lonerList1.append(seq)
-            hadahit = False  # reset
 
-        hadahit = False
+        hitHeaders2 = set([hit.queryHeader for hit in mutualHitList2] + [hit.queryHeader for hit in singularHitList2])
         for seq in seqList2.fastaList:
-            for hit in mutualHitList2:
-                if seq.header == hit.queryHeader:
-                    hadahit = True
-            for hit in singularHitList2:
-                if seq.header == hit.queryHeader:
-                    hadahit = True
-            if not hadahit:
+            if seq.header not in hitHeaders2:
                 lonerList2.append(seq)
-            hadahit = False  # reset
         return comparedHits   # returns a homology object
  
     def identifyParalogs(self,inList1,inList2,kvargs):
@@ -681,9 +677,10 @@ class blast(object):
             return False
 
         # For each sequence, record any qualifying hits to other sequences in the genome 
+        queryIndex = indexHits(inList2.blastHits,"queryHeader")
         for seq in inList1.fastaList:
             qLength = abs(int(seq.start) - int(seq.end))
-            for nextHit in inList2.blastHits:  # check if it's a hit of seq against non-self seq
+            for nextHit in queryIndex.get(seq.header,[]):  # check if it's a hit of seq against non-self seq
                 seqContig = seq.contig
                 qSpan = abs(int(nextHit.queryStart) - int(nextHit.queryEnd))
                 try:
@@ -728,9 +725,17 @@ class blast(object):
         else:
             errorCode.append(1)
 
-        # Compare hits between 2 input hitList objects 
+        # Compare hits between 2 input hitList objects. Only hit2s whose query is hit1's subject, or whose
+        # subject is hit1's query, can match hit1; they are looked up by header, and visited in list order.
+        queryIndex2   = indexHits(inList2.blastHits,"queryHeader")
+        subjectIndex2 = indexHits(inList2.blastHits,"subjectHeader")
+        position2 = {}  # id(hit2) => position in inList2
+        for (i,hit2) in enumerate(inList2.blastHits):
+            position2[id(hit2)] = i
         for hit1 in inList1.blastHits:
-            for hit2 in inList2.blastHits: 
+            candidates = queryIndex2.get(hit1.subjectHeader,[]) + subjectIndex2.get(hit1.queryHeader,[])
+            candidates = sorted(set(candidates), key=lambda hit2: position2[id(hit2)])
+            for hit2 in candidates: 
                 if hit1.subjectHeader == hit2.queryHeader and hit2.subjectHeader == hit1.queryHeader:
                     newComparison.mutualBestHits["set1"].append(hit1)
                     newComparison.mutualBestHits["set2"].append(hit2)
@@ -748,13 +753,12 @@ class blast(object):
 
     def recordHits(self,filename):
         HIT_FILE = open(filename,"r")
-        newHitList = copy.deepcopy(self.blastHits) 
+        newHitList = hitList()
         fLines = HIT_FILE.read().splitlines()  # read lines into list, removing newlines
         for line in fLines:
-            match = re.search(p_comment, line)
-            if not match:
+            if not line.startswith('#'):
                 fields = line.split('\t')
-                newHit = copy.deepcopy(self.blastHit)
+                newHit = hit()
                 newHit.queryHeader     = fields[0]
                 newHit.subjectHeader   = fields[1]
                 newHit.identity        = fields[2]
@@ -0,0 +1,138 @@
+#############################################
+# Name: cgp_blastCache.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Content-addressed cache of per-genome blast results, shared by all pair jobs of a CGP run.
+#    Each genome's gene and protein blast databases, and its self-blast (paralog) hit table,
+#    depend only on the genome's sequence file and the blast parameters, so they are computed
+#    once and reused by every pair job that includes the genome, rather than N-1 times.
+#    A cache entry is a directory named by the sha256 of the sequence file contents plus the
+#    parameters. Pair jobs run as parallel processes (see cgp_wrapper.py), so an entry is built
+#    under an exclusive file lock, and is valid only once its "done" marker has been written.
+#
+# Classes and methods:
+#     blastCache
+#         computeKey
+#         getEntry
+#         getBlastDB
+#         getSelfHits
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import hashlib
+import shutil
+import fcntl
+
+PIPELINE_OUTPUT_DIR = os.environ["PHATE_PIPELINE_OUTPUT_DIR"]
+BLAST_CACHE_DIR     = os.path.join(PIPELINE_OUTPUT_DIR, "CGP_BLAST_CACHE")
+
+DONE_MARKER = "done"
+
+# Boolean control: verbosity
+
+PHATE_MESSAGES = False
+PHATE_WARNINGS = False
+
+PHATE_MESSAGES_STRING = os.environ["PHATE_PHATE_MESSAGES"]
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+
+if PHATE_MESSAGES_STRING.lower() == 'true':
+    PHATE_MESSAGES = True
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+
+# Blast parameters that determine a self-hit table (query and subject are the same sequence file)
+SELF_HIT_PARAMETERS = ["mtype","evalue","blastnIdentity","scoreEdge","maxTargetSeqs","overhang","outputFormat"]
+
+class blastCache(object):
+
+    def __init__(self,cacheDir=BLAST_CACHE_DIR):
+        self.cacheDir = cacheDir
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    # Key is the hash of the file's contents plus a parameter string
+    def computeKey(self,filename,parameterString):
+        digest = hashlib.sha256()
+        FILE_H = open(filename,"rb")
+        for block in iter(lambda: FILE_H.read(1048576), b''):
+            digest.update(block)
+        FILE_H.close()
+        digest.update(parameterString.encode('utf-8'))
+        return digest.hexdigest()
+
+    # Runs builder(entryDir) under an exclusive lock, unless another job has already built the entry
+    def getEntry(self,key,builder):
+        entryDir = os.path.join(self.cacheDir, key)
+        doneFile = os.path.join(entryDir, DONE_MARKER)
+        if os.path.exists(doneFile):
+            return entryDir
+        LOCK_H = open(os.path.join(self.cacheDir, key + ".lock"),"w")
+        fcntl.flock(LOCK_H, fcntl.LOCK_EX)  # wait for any job that is building this entry
+        try:
+            if not os.path.exists(doneFile):
+                if os.path.exists(entryDir):  # left incomplete by a failed job
+                    shutil.rmtree(entryDir)
+                os.makedirs(entryDir)
+                if builder(entryDir):
+                    DONE_H = open(doneFile,"w")
+                    DONE_H.close()
+                elif PHATE_WARNINGS:
+                    print("cgp_blastCache says, WARNING: Could not build cache entry", entryDir)
+            elif PHATE_MESSAGES:
+                print("cgp_blastCache says, Reusing cache entry built by another job:", entryDir)
+        finally:
+            fcntl.flock(LOCK_H, fcntl.LOCK_UN)
+            LOCK_H.close()
+        return entryDir
+
+    # Returns the cached copy of a sequence file, with its blast database built beside it
+    def getBlastDB(self,myBlast,kvargs):
+        filename = kvargs["filename"]
+        dbType   = kvargs["dbType"].lower()
+        key      = self.computeKey(filename, "makeblastdb:" + dbType)
+
+        def buildBlastDB(entryDir):
+            cachedFile = os.path.join(entryDir, os.path.basename(filename))
+            shutil.copyfile(filename, cachedFile)
+            result = myBlast.makeBlastDB({"dbType" : dbType, "filename" : cachedFile})
+            if result == 0:
+                return True
+            return False
+
+        entryDir = self.getEntry(key, buildBlastDB)
+        dbFile = os.path.join(entryDir, os.path.basename(filename))
+        if not os.path.exists(os.path.join(entryDir, DONE_MARKER)):  # fall back to building in place
+            myBlast.makeBlastDB(kvargs)
+            return filename
+        return dbFile
+
+    # Returns the cached self-hit table for the query (a cached blast database; see getBlastDB),
+    # then copies it to kvargs["outfile"], so that the job's results directory is complete
+    def getSelfHits(self,myBlast,kvargs):
+        query = kvargs["query"]
+        parameterString = "self:" + ':'.join([str(kvargs[parameter]) for parameter in SELF_HIT_PARAMETERS if parameter in kvargs])
+        key = self.computeKey(query, parameterString)
+        selfHitsName = "selfHits.out"
+
+        def buildSelfHits(entryDir):
+            selfArgs = kvargs.copy()
+            selfArgs["subject"] = query
+            selfArgs["outfile"] = os.path.join(entryDir, selfHitsName)
+            errorList = myBlast.performBlast(selfArgs)
+            for error in errorList:
+                if error != 0:
+                    return False
+            return True
+
+        entryDir = self.getEntry(key, buildSelfHits)
+        if not os.path.exists(os.path.join(entryDir, DONE_MARKER)):  # fall back to blasting in place
+            return myBlast.performBlast(kvargs)
+        shutil.copyfile(os.path.join(entryDir, selfHitsName), kvargs["outfile"])
+        return [0]
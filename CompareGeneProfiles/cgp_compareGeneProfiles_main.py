@@ -5,7 +5,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Last update: 16 October 2020
+# Last update: 18 October 2026
 #
 # Description:
 # This program compares the gene calls from 2 genomes and identifies genes that 
@@ -28,6 +28,8 @@
 #    Translate2protein
 #    ExtractGeneCalls
 #
+# Modes (-m): pair (default), prepare, allvsall; see CGP_MODES
+#
 ###################################################################
 # This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
 # THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
@@ -49,6 +51,9 @@ import cgp_fastaSequence as fastaSequence
 import cgp_annotation as annotation
 import cgp_genomeSequence as genomeSequence
 import cgp_blastAnalysis as blastAnalysis
+import cgp_blastCache as blastCache
+import cgp_allVsAll as allVsAll
+import cgp_resultsStore as resultsStore
 
 # Set messaging booleans
 
@@ -136,8 +141,12 @@ USAGE_STRING = "Usage:  compareGeneProfiles_main.py -g1 <genome1.fasta> -a1 <gen
 
 INPUT_STRING = "You may enter parameters interactively (via prompt) by typing: compareGeneProfiles_main.py -interactive\nYou will then be promted for the following required command-line parameters: \n   genome1.fasta\n   genome2.fasta\n   annotation1.gff\n   annotation2.gff\nOptionally, you may provide any/all of the following cutoff values as integers ranging from 0 to 100, with restrictions, by entering them at the command line prompt, or you may accept the defaults:\n   gene match sequence identity\n   gene match minumum coverage\n   gene similarity identity\n   gene similarity coverage\n   domain match identity\n   domain match coverage\n   domain similarity identity\n   domain similarity coverage\n   paralog match identity\n   paralog match coverage\n   paralog domain similarity identity\n   paralog domain similarity coverage\nType: compareGeneProfiles_main.py -interactive"   
 
-ACCEPTABLE_ARG_COUNT = (2,3,9,11) # 2 if "help", "input", or "interactive"; 9 if 4 files provided with command-line labels (ie, '-g1')
-                               # 3 if "config" mode; 11 if also including projectDirectory
+ACCEPTABLE_ARG_COUNT = (2,3,9,11,13) # 2 if "help", "input", or "interactive"; 9 if 4 files provided with command-line labels (ie, '-g1')
+                               # 3 if "config" mode; 11 if also including projectDirectory; 13 if also including mode (-m)
+
+# Modes (-m): "pair" (default) blasts the 2 genomes; "prepare" writes the genomes' gene and protein fasta files, then exits;
+# "allvsall" takes the blast hits from the all-vs-all hit table (see cgp_allVsAll.py and cgp_wrapper.py)
+CGP_MODES = ("pair","prepare","allvsall")
 
 ##### BLAST default parameters
 
@@ -161,6 +170,7 @@ rootFilename     = ""
 annotationFile1  = "" # a1
 annotationFile2  = "" # a2
 projectDirectory = "" # d
+cgpMode          = "pair" # m
 
 #### VARIABLES: files
 
@@ -449,7 +459,7 @@ if argCount in ACCEPTABLE_ARG_COUNT:
         configString = sys.argv[2]
         GetConfig(configString)
 
-    if argCount == 9 or argCount == 11:
+    if argCount == 9 or argCount == 11 or argCount == 13:
         if PHATE_PROGRESS:
             print ("cgp_compareGeneProfiles_main says, Reading input parameters")
         for i in range(argCount):
@@ -464,6 +474,8 @@ if argCount in ACCEPTABLE_ARG_COUNT:
             if sys.argv[i] == "-d":
                 files["projectDirectory"] = sys.argv[i+1]
                 BASE_DIR = files["projectDirectory"]
+            if sys.argv[i] == "-m":
+                cgpMode = sys.argv[i+1].lower()
         if PHATE_PROGRESS:
             print ("  genomeFile1 is", files["genomeFile1"])
             print ("  genomeFile2 is", files["genomeFile2"])
@@ -512,6 +524,9 @@ if not match:
 match = re.search(p_gff, files["annotationFile2"])
 if not match:
     fileError = True
+if cgpMode not in CGP_MODES:
+    print ("cgp_compareGeneProfiles says, ERROR: Unrecognized mode,", cgpMode)
+    fileError = True
 if fileError:
     print ("cgp_compareGeneProfiles says, ERROR: Check the formats of your input files:")  
     print ("  Genome file #1:         ", files["genomeFile1"])
@@ -577,7 +592,10 @@ today    = os.popen('date')
 if SERVER:
     fixTime = re.sub(':','',dateTime) # Remove ':' from dir name (else EMBOSS has trouble)
     newTime = re.sub('\.','_',fixTime) # Remove '.' from dir name
-    OUT_DIR = os.path.join(files["projectDirectory"], "Results_" + newTime + "/")  #
+    if cgpMode == "prepare":  # Not a Results_ directory, as there will be no results; removed on exit
+        OUT_DIR = os.path.join(files["projectDirectory"], "Prepare_" + newTime + "/")
+    else:
+        OUT_DIR = os.path.join(files["projectDirectory"], "Results_" + newTime + "/")  #
 else:
     OUT_DIR = "./"
 
@@ -607,6 +625,7 @@ LOG.write("%s%s\n" % ("annotation file #1: ",files["annotationFile1"]))
 LOG.write("%s%s\n" % ("annotation file #2: ",files["annotationFile2"]))
 LOG.write("%s%s\n" % ("user directory is: ",files["projectDirectory"]))
 LOG.write("%s%s\n" % ("outFile is: ",outFile))
+LOG.write("%s%s\n" % ("mode is: ",cgpMode))
 
 if PHATE_MESSAGES:
     print ("cgp_compareGeneProfiles_main says, Parameters are:")
@@ -842,6 +861,14 @@ if PHATE_PROGRESS:
     print("cgp_compareGeneProfiles says, Printing genome2 protein sequences to file,",printFastas2fileArgs["filename"])
 success = genome2.printFastas2file(printFastas2fileArgs)
 
+# In prepare mode, the gene and protein fasta files are all that is wanted
+if cgpMode == "prepare":
+    if PHATE_PROGRESS:
+        print("cgp_compareGeneProfiles_main says, Gene and protein fasta files prepared.")
+    LOG.close()
+    call(["rm", "-r", OUT_DIR])
+    exit(0)
+
 #########################################################################################################
 # Create blast databases for gene and protein multi-fasta files 
 #########################################################################################################
@@ -858,19 +885,28 @@ if PHATE_PROGRESS:
         print ("Creating blast databases for genome 1 and genome 2 gene sets...")
 
 myBlast = blastAnalysis.blast()                # Make blast object
+myBlastCache = blastCache.blastCache()         # Blast databases and self-hits are shared by all pair jobs
+
+if cgpMode == "allvsall":  # Hits come from the all-vs-all hit table; no databases are needed
+    BLAST_ON = False
+    files["geneDB1"]    = files["geneFile1"]
+    files["geneDB2"]    = files["geneFile2"]
+    files["proteinDB1"] = files["proteinFile1"]
+    files["proteinDB2"] = files["proteinFile2"]
+else:
+    # Each database is built once per sequence set, by whichever job needs it first
+    blastDBargs["dbType"] = "nucl"         # Set up for nucleotide blast
+    blastDBargs["filename"] = files["geneFile1"]
+    files["geneDB1"] = myBlastCache.getBlastDB(myBlast,blastDBargs)
+    blastDBargs["filename"] = files["geneFile2"]
+    files["geneDB2"] = myBlastCache.getBlastDB(myBlast,blastDBargs)
 
-blastDBargs["dbType"] = "nucl"         # Set up for nucleotide blast
-blastDBargs["filename"] = files["geneFile1"]
-myBlast.makeBlastDB(blastDBargs)
-blastDBargs["filename"] = files["geneFile2"]
-myBlast.makeBlastDB(blastDBargs)
-
-if PROTEIN:
-    blastDBargs["dbType"] = "prot"         # Set up for protein blast
-    blastDBargs["filename"] = files["proteinFile1"]
-    myBlast.makeBlastDB(blastDBargs)
-    blastDBargs["filename"] = files["proteinFile2"]
-    myBlast.makeBlastDB(blastDBargs)
+    if PROTEIN:
+        blastDBargs["dbType"] = "prot"         # Set up for protein blast
+        blastDBargs["filename"] = files["proteinFile1"]
+        files["proteinDB1"] = myBlastCache.getBlastDB(myBlast,blastDBargs)
+        blastDBargs["filename"] = files["proteinFile2"]
+        files["proteinDB2"] = myBlastCache.getBlastDB(myBlast,blastDBargs)
 
 if PHATE_PROGRESS:
     print ("cgp_compareGeneProfiles_main says, Blast database creation complete.")
@@ -911,7 +947,7 @@ files["protFile2_root"] = GetRootFile(files["proteinFile2"])
 if PHATE_PROGRESS:
     print ("Genome 1 genes against genome 2 genes...")
 blastArgs["query"]   = files["geneFile1"]
-blastArgs["subject"] = files["geneFile2"]
+blastArgs["subject"] = files["geneDB2"]
 blastArgs["maxTargetSeqs"] = 1 
 outfile = OUT_DIR + files["geneFile1_root"] + "_" + files["geneFile2_root"] + "_" + "blastn_" +\
     str(blastArgs["evalue"]) + "_" + str(blastArgs["blastnIdentity"]) + ".out"
@@ -929,7 +965,7 @@ if BLAST_ON:
 if PHATE_PROGRESS:
     print ("cgp_compareGeneProfiles_main says, Genome 2 genes against genome 1 genes...")
 blastArgs["query"]   = files["geneFile2"]
-blastArgs["subject"] = files["geneFile1"]
+blastArgs["subject"] = files["geneDB1"]
 blastArgs["maxTargetSeqs"] = MAX_TARGET_SEQS 
 outfile = OUT_DIR + files["geneFile2_root"] + "_" + files["geneFile1_root"] + "_" + "blastn_" +\
     str(blastArgs["evalue"]) + "_" + str(blastArgs["blastnIdentity"]) + ".out"
@@ -946,15 +982,15 @@ if BLAST_ON:
 
 if PHATE_PROGRESS:
     print ("cgp_compareGeneProfiles_main says, Genome 1 genes against self...")
-blastArgs["query"]   = files["geneFile1"]
-blastArgs["subject"] = files["geneFile1"]
+blastArgs["query"]   = files["geneDB1"]
+blastArgs["subject"] = files["geneDB1"]
 blastArgs["maxTargetSeqs"] = PARALOG_MAX 
 outfile = OUT_DIR + files["geneFile1_root"] + "_" + files["geneFile1_root"] + "_" + "blastn_" +\
     str(blastArgs["evalue"]) + "_" + str(blastArgs["blastnIdentity"]) + ".out"
 blastArgs["outfile"] = outfile
 files["g1_g1_blastn"] = outfile
 if BLAST_ON:
-    result = myBlast.performBlast(blastArgs)
+    result = myBlastCache.getSelfHits(myBlast,blastArgs)
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Result of blasting genes genome1-genome1:", result)
 
@@ -962,15 +998,15 @@ if BLAST_ON:
 
 if PHATE_PROGRESS:
     print ("cgp_compareGeneProfiles_main says, Genome 2 genes against self...")
-blastArgs["query"]   = files["geneFile2"]
-blastArgs["subject"] = files["geneFile2"]
+blastArgs["query"]   = files["geneDB2"]
+blastArgs["subject"] = files["geneDB2"]
 blastArgs["maxTargetSeqs"] = PARALOG_MAX 
 outfile = OUT_DIR + files["geneFile2_root"] + "_" + files["geneFile2_root"] + "_" + "blastn_" +\
     str(blastArgs["evalue"]) + "_" + str(blastArgs["blastnIdentity"]) + ".out"
 blastArgs["outfile"] = outfile
 files["g2_g2_blastn"] = outfile
 if BLAST_ON:
-    result = myBlast.performBlast(blastArgs)
+    result = myBlastCache.getSelfHits(myBlast,blastArgs)
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Result of blasting genes genome2-genome1:", result)
 
@@ -986,7 +1022,7 @@ if PROTEIN:
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Genome 1 proteins against genome 2 proteins...")
     blastArgs["query"]   = files["proteinFile1"]
-    blastArgs["subject"] = files["proteinFile2"]
+    blastArgs["subject"] = files["proteinDB2"]
     blastArgs["maxTargetSeqs"] = MAX_TARGET_SEQS 
     outfile = OUT_DIR + files["protFile1_root"] + "_" + files["protFile2_root"] + "_" + "blastp_" +\
         str(blastArgs["evalue"]) + "_" + str(blastArgs["blastpIdentity"]) + ".out"
@@ -1002,7 +1038,7 @@ if PROTEIN:
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles says, Genome 2 proteins against genome 1 proteins...")
     blastArgs["query"]   = files["proteinFile2"]
-    blastArgs["subject"] = files["proteinFile1"]
+    blastArgs["subject"] = files["proteinDB1"]
     blastArgs["maxTargetSeqs"] = MAX_TARGET_SEQS 
     outfile = OUT_DIR + files["protFile2_root"] + "_" + files["protFile1_root"] + "_" + "blastp_" +\
         str(blastArgs["evalue"]) + "_" + str(blastArgs["blastpIdentity"]) + ".out"
@@ -1017,15 +1053,15 @@ if PROTEIN:
  
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Genome 1 proteins against self...")
-    blastArgs["query"]   = files["proteinFile1"]
-    blastArgs["subject"] = files["proteinFile1"]
+    blastArgs["query"]   = files["proteinDB1"]
+    blastArgs["subject"] = files["proteinDB1"]
     blastArgs["maxTargetSeqs"] = PARALOG_MAX 
     outfile = OUT_DIR + files["protFile1_root"] + "_" + files["protFile1_root"] + "_" + "blastp_" +\
         str(blastArgs["evalue"]) + "_" + str(blastArgs["blastpIdentity"]) + ".out"
     blastArgs["outfile"] = outfile
     files["g1_g1_blastp"] = outfile
     if BLAST_ON:
-        result = myBlast.performBlast(blastArgs)
+        result = myBlastCache.getSelfHits(myBlast,blastArgs)
         if PHATE_PROGRESS:
             print ("cgp_compareGeneProfiles_main says, Result of blasting proteins genome1-genome1:", result)
  
@@ -1033,21 +1069,42 @@ if PROTEIN:
 
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Genome 2 proteins against self...")
-    blastArgs["query"]   = files["proteinFile2"]
-    blastArgs["subject"] = files["proteinFile2"]
+    blastArgs["query"]   = files["proteinDB2"]
+    blastArgs["subject"] = files["proteinDB2"]
     blastArgs["maxTargetSeqs"] = PARALOG_MAX 
     outfile = OUT_DIR + files["protFile2_root"] + "_" + files["protFile2_root"] + "_" + "blastp_" +\
         str(blastArgs["evalue"]) + "_" + str(blastArgs["blastpIdentity"]) + ".out"     #*** But blastp does not accept identity parameter !!!
     blastArgs["outfile"] = outfile
     files["g2_g2_blastp"] = outfile
     if BLAST_ON:
-        result = myBlast.performBlast(blastArgs)
+        result = myBlastCache.getSelfHits(myBlast,blastArgs)
         if PHATE_PROGRESS:
             print ("cgp_compareGeneProfiles_main says, Result of blasting proteins genome2-genome2:", result)
 
     if PHATE_PROGRESS:
         print ("cgp_compareGeneProfiles_main says, Blasting of protein sets complete.")
 
+### All-vs-all: copy this pair's hits from the all-vs-all hit files into the expected outfiles
+
+if cgpMode == "allvsall":
+    if PHATE_PROGRESS:
+        print ("cgp_compareGeneProfiles_main says, Taking hits from all-vs-all hit table...")
+    pairHitFiles = [  # (outfile key, query file, subject file, program)
+        ("g1_g2_blastn", files["geneFile1"],    files["geneFile2"],    "blastn"),
+        ("g2_g1_blastn", files["geneFile2"],    files["geneFile1"],    "blastn"),
+        ("g1_g1_blastn", files["geneFile1"],    files["geneFile1"],    "blastn"),
+        ("g2_g2_blastn", files["geneFile2"],    files["geneFile2"],    "blastn"),
+        ]
+    if PROTEIN:
+        pairHitFiles.extend([
+        ("g1_g2_blastp", files["proteinFile1"], files["proteinFile2"], "blastp"),
+        ("g2_g1_blastp", files["proteinFile2"], files["proteinFile1"], "blastp"),
+        ("g1_g1_blastp", files["proteinFile1"], files["proteinFile1"], "blastp"),
+        ("g2_g2_blastp", files["proteinFile2"], files["proteinFile2"], "blastp"),
+        ])
+    for (key,queryFile,subjectFile,program) in pairHitFiles:
+        call(["cp", allVsAll.getPairHitFile(queryFile,subjectFile,program), files[key]])
+
 #########################################################################################################
 # Parse blast output files; write hits to data structures 
 #########################################################################################################
@@ -1250,6 +1307,19 @@ REPORT.close()
 if PHATE_PROGRESS:
     print("cgp_compareGeneProfiles_main says, Report(s) created.")
 
+# Load the report into the results store, for queryCGPMresults.py; postProcessCGPM.py later replaces it
+# with the post-processed report
+
+try:
+    store = resultsStore.resultsStore(resultsStore.getStoreFile(OUT_DIR))
+    hitCount = store.loadReport(reportFile,files["genomeFile1"],files["genomeFile2"])
+    store.close()
+    LOG.write("%s%s\n" % ("Number of hits loaded into results store: ",hitCount))
+except Exception as e:
+    if PHATE_WARNINGS:
+        print("cgp_compareGeneProfiles_main says, WARNING: Could not load report into results store:", e)
+    LOG.write("%s%s\n" % ("Could not load report into results store: ",e))
+
 #######################################################################################################
 # Create paralog reports
 #######################################################################################################
@@ -6,7 +6,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou 
 #
-# Last update:  08 December 2020
+# Last update:  18 October 2026
 #
 # Description:
 # This program post-processes the output file produced by code
@@ -27,7 +27,9 @@
 #    genome sequence files (in multi-fasta format; -g1 and -g2)
 #    input report file generated by compareGeneProfiles_main.py
 #
-# Output: postProcessCGPM.report, containing report as described above
+# Output: postProcessCGPM.report, containing report as described above; the report is also
+#    loaded into the results store (see cgp_resultsStore.py), replacing the pair's
+#    compareGeneProfiles_main.report
 #
 ###################################################################
 # This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
@@ -35,6 +37,7 @@
 
 import sys, os, re, string, copy
 import fastaSequence
+import cgp_resultsStore as resultsStore
 
 # Boolean control
 PHATE_PROGRESS = False
@@ -530,4 +533,16 @@ if PHATE_PROGRESS:
     print("cgp_postProcessCGPM says, Post processing complete.")
 
 REPORT_FILE.close() 
+
+# Load the post-processed report into the results store, for queryCGPMresults.py
+try:
+    store = resultsStore.resultsStore(resultsStore.getStoreFile(os.path.dirname(os.path.abspath(files["outReportFile"]))))
+    hitCount = store.loadReport(files["outReportFile"],files["geneFile1"],files["geneFile2"])
+    store.close()
+    LOGFILE.write("%s%s\n" % ("Number of hits loaded into results store: ",hitCount))
+except Exception as e:
+    if PHATE_WARNINGS:
+        print("cgp_postProcessCGPM says, WARNING: Could not load report into results store:", e)
+    LOGFILE.write("%s%s\n" % ("Could not load report into results store: ",e))
+
 LOGFILE.close()
@@ -5,14 +5,22 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Last update:  16 October 2020
+# Last update:  18 October 2026
+#
+# Description:
+# Queries the results of compareGeneProfiles_main.py/postProcessCGPM.py across a list of Results_
+# directories, by cds number or by hit type, using the indexed results store (cgp_resultsStore.py).
+# Each pair's report is loaded into the store as the pair finishes; a directory whose report is
+# not in the store, or has changed since it was loaded, is loaded here before it is queried.
+# The post-processed report (postProcessCGPM.report) is queried, or compareGeneProfiles_main.report
+# if the pair has not been post-processed (no interpretations).
 #
 #################################################################
 # This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
 # THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
 
 import sys, os, re, string, copy
-import subprocess
+import cgp_resultsStore as resultsStore
 
 #DEBUG = True
 DEBUG = False
@@ -40,10 +48,11 @@ if PHATE_MESSAGES:
 
 inFile            = ""  # list of directories to query. By default all 'Results_' dirs in cwd are queried, but can be user designated subset 
 outFile           = os.path.join(CODE_BASE_DIR, "queryCGPMresults.user.out")   # default, but should be user designated
-queryFile         = os.path.join(CODE_BASE_DIR, "queryCGPMresults.query")     # holds intermediate results from grepping report file for genome_hitType
 logFile           = os.path.join(CODE_BASE_DIR, "queryCGPMresults.log")
 ppCGPM_logFile    = "postProcessCGPM.log"           # file by this name in each 'Results_' directory
 ppCGPM_reportFile = "postProcessCGPM.report"        # file by this name in each 'Results_' directory
+cgpm_logFile      = "compareGeneProfiles_main.log"  # used if the pair has not been post-processed
+cgpm_reportFile   = "compareGeneProfiles_main.report"
 LOGFILE = open(logFile,"w")
 LOGFILE.write("%s\n" % ("Begin log file"))
 
@@ -113,7 +122,7 @@ if PHATE_PROGRESS:
 
 ACCEPTABLE_ARG_COUNT = []  
 ACCEPTABLE_ARG_COUNT.append(2)      # if only argument is 'help' etc. 
-for x in xrange((MAX_PARAMS+1)*2):  # otherwise, arguments come in pairs (eg, -d <dirsList>)
+for x in range((MAX_PARAMS+1)*2):    # otherwise, arguments come in pairs (eg, -d <dirsList>)
     if x % 2 == 1:  # x is odd      # recall: sys.argv[0] is the code itself
         ACCEPTABLE_ARG_COUNT.append(x)
 
@@ -135,10 +144,10 @@ if argCount in ACCEPTABLE_ARG_COUNT:
             print (USAGE_STRING)
             exit(0)
     else:
-        for i in xrange(argCount):
+        for i in range(argCount):
             if sys.argv[i] == "-g":  # 1 or 2, for genome1 or genome2, and 3 for both, 0 for a single cds, regardless of hit type
                 if sys.argv[i+1] == "1" or sys.argv[i+1] == "2" or sys.argv[i+1] == "3" or sys.argv[i+1] == "0":
-                    genomeOrdering = sys.argv[i+1].lower()
+                    genomeOrdering = int(sys.argv[i+1])
                     GENOME = True
 
             if sys.argv[i] == "-s":  # 'nt' or 'aa', for gene or protein
@@ -249,7 +258,7 @@ if match:
     if PHATE_MESSAGES:
         print("cgp_queryCGPMresults says, Number of lines in input file with directories list is",numLines)
     LOGFILE.write("%s%s\n" % ("Number of lines in input file with directories list is ", numLines)) 
-    for i in xrange(0,numLines):
+    for i in range(0,numLines):
         line = fLines[i]
         match = re.search('baseDir',line)
         if match:
@@ -260,25 +269,21 @@ if match:
                 directoryList.append(line)
 
 else:  # If no infile w/dir names was provided, then assume Results dirs are in current working directory 
-    command = "ls . | grep \'Results_\'"  # Get list of Results directories in current directory
-    proc = subprocess.Popen([command], stdout=subprocess.PIPE, shell=True) 
-    (out, err) = proc.communicate()
-    if err:
-        print ("cgp_queryCGPMresults says, ERROR:", err)
-    out = out.rstrip()  # remove pesky terminal newline character
-    directoryList = out.split('\n')
+    for filename in sorted(os.listdir('.')):  # Get list of Results directories in current directory
+        if re.search('Results_',filename):
+            directoryList.append(filename)
 
 # Check directoryList
 if PHATE_PROGRESS:
     print ("cgp_queryCgPMresults says, directoryList is", directoryList)
 
 OUTFILE = open(outFile,"w")
-#QUERY_FILE = open(queryFile,"w")
 
 ##### Construct and run queries
 
-sysCommand = "> " + queryFile  # Reminder: queryFile holds intermediate results
-os.system(sysCommand)          # create or initialize query.out file 
+queryLines = []  # holds results of querying the store, by directory
+stores     = {}  # key = store file, value = resultsStore object; Results_ directories are normally all in one
+loadCount  = 0
 
 LOGFILE.write("%s\n" % ("Reading input directories and gathering information"))
 if PHATE_PROGRESS:
@@ -297,171 +302,87 @@ if PHATE_PROGRESS:
     print ("cgp_queryCGPMresults says, Processing Results directories...")
 for dir in directoryList:
     nextDir = baseDir + dir
-    nextLog = nextDir + "/" + ppCGPM_logFile
-    NEXT_LOG = open (nextLog,"r")
-    fLines = NEXT_LOG.read().splitlines()
-    for line in fLines:
-        match = re.search('#1',line)
-        if match:
-            columns = line.split(' ')
-            genome1 = columns[3]
-        match = re.search('#2',line)
-        if match:
-            columns = line.split(' ')
-            genome2 = columns[3]
-    NEXT_LOG.close()
-
-    #nextReport = nextDir + "/" + ppCGPM_reportFile
-    sysCommand = "echo \'##### Querying directory\' " + nextDir + " >> " + queryFile
-    os.system(sysCommand)
-    sysCommand = "echo \'# Gene Set 1 is\' " + genome1 + " >> " + queryFile
-    os.system(sysCommand)
-    sysCommand = "echo \'# Gene Set 2 is\' " + genome2 + " >> " + queryFile
-    os.system(sysCommand)
+    storeFile = resultsStore.getStoreFile(nextDir)
+    if storeFile not in stores:
+        stores[storeFile] = resultsStore.resultsStore(storeFile)
+    store = stores[storeFile]
+
+    # Load the pair's report into the store, unless it is there already
+    nextReport = os.path.join(nextDir, ppCGPM_reportFile)
+    nextLog    = os.path.join(nextDir, ppCGPM_logFile)
+    if not os.path.exists(nextReport):
+        nextReport = os.path.join(nextDir, cgpm_reportFile)
+        nextLog    = os.path.join(nextDir, cgpm_logFile)
+    if not store.isCurrent(nextReport):
+        try:
+            (genome1,genome2) = resultsStore.getLogGenomes(nextLog)
+            store.loadReport(nextReport,genome1,genome2)
+            loadCount += 1
+        except OSError as e:
+            print ("cgp_queryCGPMresults says, WARNING: Cannot load results for directory", nextDir, e)
+            LOGFILE.write("%s%s\n" % ("Cannot load results for directory ",nextDir))
+            continue
+    (pairId,report,reportSize,reportMtimeNs,genome1,genome2) = store.getPair(nextDir)
+
+    queryLines.append("##### Querying directory " + nextDir)
+    queryLines.append("# Gene Set 1 is " + genome1)
+    queryLines.append("# Gene Set 2 is " + genome2)
 
     if CDS and cdsList != []:
         for cds in cdsList:
-            nextCDS = "cds" + cds + "/"
-            sysCommand = "grep \'" + nextCDS + "' " + nextDir + "/" + "postProcessCGPM.report >> " + queryFile
-            os.system(sysCommand) 
+            queryLines.extend(store.queryByCds(pairId,cds))
     else:
         if ONE:
             queryString = "genome1_" + hitType  #
-            sysCommand = "grep \'" + queryString + "' " + nextDir + "/" + "postProcessCGPM.report >> " + queryFile
-            os.system(sysCommand)
+            queryLines.extend(store.queryByHitType(pairId,queryString))
         if TWO:
             queryString = "genome2_" + hitType  # 
-            sysCommand = "grep \'" + queryString + "' " + nextDir + "/" + "postProcessCGPM.report >> " + queryFile
-            os.system(sysCommand)
+            queryLines.extend(store.queryByHitType(pairId,queryString))
+
+for storeFile in stores:
+    stores[storeFile].close()
+LOGFILE.write("%s%s\n" % ("Number of directories loaded into results store: ",loadCount))
+if PHATE_MESSAGES:
+    print ("cgp_queryCGPMresults says, Number of directories loaded into results store:", loadCount)
 
 ##### Process raw query text and write to users output file
 
-fields = []  # holds column values from .report file
-POS            = 0
-GENOME_TYPE    = 1
-Q_START        = 2
-Q_END          = 3
-S_START        = 4
-S_END          = 5
-IDENTITY       = 6
-EVALUE         = 7
-QLS1           = 8
-G1HEADER       = 9
-G1CONTIG       = 10
-G1ANNOTATION   = 11
-G1GENE_START   = 12
-G1GENE_END     = 13
-G1STRAND       = 14
-QLS2           = 15
-G2HEADER       = 16
-G2CONTIG       = 17
-G2ANNOTATION   = 18
-G2GENE_START   = 19
-G2GENE_END     = 20
-G2STRAND       = 21
-G1COVERAGE     = 22
-G2COVERAGE     = 23
-ALIGN_LENGTH   = 24
-GAP_OPENS      = 25
-G1SPAN         = 26
-G1LENGTH       = 27
-G2SPAN         = 28
-G2LENGTH       = 29
-INTERPRETATION = 30
-G1SEQUENCE     = 31
-G2SEQUENCE     = 32
-
-### From postProcessCGPM.py:
-FLIP_STRAND_MSG     = "Hit to reverse strand of sequence"
-SPLIT_GENE_MSG      = "Possible split gene call on genome"
-MISSING_SEGMENT_MSG = "Possible extra or missing domain"
-ALTERNATE_START_MSG = "Possible alternate start codon"
-OVERLAPPING_HIT_MSG = "Hits appear to overlap"
-PARALOG_MSG         = "Could be paralog or gene duplication"
-START_CODON_MSG     = "Check start codon on gene from genome"
-ATG_CODON_MSG       = "Start codon is not ATG on gene from genome"
-
-QUERY_FILE = open(queryFile,"r")
-dataLine = ""
-EMPTY = "[]"  #*** For now, annotation fields are empty for protein entries
-fLines = QUERY_FILE.read().splitlines()
+# Interpretation to select mutual and singular hits by (the first requested), or "" for any
+interpretationMessage = ""
+if FLIP:
+    interpretationMessage = resultsStore.FLIP_STRAND_MSG
+elif SPLIT:
+    interpretationMessage = resultsStore.SPLIT_GENE_MSG
+elif XTRA:
+    interpretationMessage = resultsStore.MISSING_SEGMENT_MSG
+elif ALTERNATE:
+    interpretationMessage = resultsStore.ALTERNATE_START_MSG
+elif OVERLAP:
+    interpretationMessage = resultsStore.OVERLAPPING_HIT_MSG
+elif PARALOG:
+    interpretationMessage = resultsStore.PARALOG_MSG
+elif NOT_ATG:
+    interpretationMessage = resultsStore.ATG_CODON_MSG
+
+fLines = queryLines
 if PHATE_MESSAGES:
-    print ("cgp_queryCGPMresults says, Number of lines in query file: ", len(fLines))
+    print ("cgp_queryCGPMresults says, Number of lines in query results: ", len(fLines))
 
 if PHATE_PROGRESS:
     print("cpg_queryCGPMresults says, Selecting lines with query criteria.")
 count = 0
 for line in fLines:
-    DO_SELECT = False
     match = re.search('^#',line)
     if match:
         OUTFILE.write("%s\n" % (line))
     else:
         match = re.search('^\d',line)
         if match:
-            fields = line.split('\t')
-            dataLine = fields[POS]  # always record the position (1st field in tabbed data)
-            (genome,hitType) = fields[GENOME_TYPE].split('_')  # will need to determine which kind of hit this is
-            if fields[G1ANNOTATION] != EMPTY or fields[G2ANNOTATION] != EMPTY:  #*** Improve this: was skipping protein records
-                #if hitType == "mutual":  # always reported as genome1 hits
-                #dataLine = dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G1HEADER] + "\t" + fields[G1ANNOTATION]
-                #if hitType == "singular":
-
-                if hitType == "mutual" or hitType == "singular":
-                    dataLine = dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G1HEADER] + "\t" + fields[G1CONTIG] + "\t" + fields[G1ANNOTATION] + "\t" + fields[G2HEADER]
-                    dataLine = dataLine + "\t" + fields[G2CONTIG] + "\t" + fields[G2ANNOTATION] + "\tG1len=" + fields[G1LENGTH] + "\tG2len=" + fields[G2LENGTH]
-                    if FLIP:
-                        match = re.search(FLIP_STRAND_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif SPLIT:
-                        match = re.search(SPLIT_GENE_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif XTRA:
-                        match = re.search(MISSING_SEGMENT_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif ALTERNATE:
-                        match = re.search(ALTERNATE_START_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif OVERLAP:
-                        match = re.search(OVERLAPPING_HIT_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif PARALOG:
-                        match = re.search(PARALOG_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif NOT_ATG:
-                        match = re.search(ATG_CODON_MSG,fields[INTERPRETATION])
-                        if match:
-                            dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                            DO_SELECT = True
-                    elif ANY:
-                        dataLine = dataLine + "\t" + fields[INTERPRETATION]
-                        DO_SELECT = True
-                if hitType == "loner":
-                    if genome == "genome1":
-                        if fields[G1ANNOTATION] != EMPTY:  #*** improve this; was skipping protein records
-                            DO_SELECT = True 
-                            dataLine = dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G1HEADER] + "\t" + fields[G1CONTIG] + "\t" + fields[G1ANNOTATION] + "\tG1len=" + fields[G1LENGTH] 
-                    if genome == "genome2":
-                        if fields[G2ANNOTATION] != EMPTY:  #*** ditto
-                            DO_SELECT = True
-                            dataLine = dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G2HEADER] + "\t" + fields[G2CONTIG] + "\t" + fields[G2ANNOTATION] + "\tG2len=" + fields[G2LENGTH]
-                if DO_SELECT:
-                    OUTFILE.write("%s\n" % (dataLine))
-                    count += 1
+            dataLine = resultsStore.getQueryLine(line,interpretationMessage)
+            if dataLine != "":
+                OUTFILE.write("%s\n" % (dataLine))
+                count += 1
 print ("Number of hits in out file: ", count)
-QUERY_FILE.close()
 
 ##### Clean up
 
@@ -0,0 +1,260 @@
+#############################################
+# Name: cgp_resultsStore.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Indexed store (SQLite) of CGP pair reports, for querying results across many genome pairs.
+#    Each pair job loads its report into the store as the pair finishes: compareGeneProfiles_main.py
+#    loads compareGeneProfiles_main.report, and postProcessCGPM.py then replaces it with
+#    postProcessCGPM.report, which adds the interpretation of each hit. The store is a file in the
+#    directory holding the Results_ directories (the CGP project directory), shared by the pair jobs,
+#    which run as parallel processes (see cgp_wrapper.py); a pair is loaded in a single transaction.
+#    Each data line of a report is held through its interpretation (i.e., without the gene sequences that
+#    postProcessCGPM.py appends), indexed by pair and genome_hitType (e.g., genome1_loner),
+#    and by the cds numbers of its genome1 and genome2 headers (e.g., 12 for cds12/+/100/400/...), so
+#    that queryCGPMresults.py and summarizeCGPMresults.py look up hits rather than grep reports.
+#    A pair records the size and date of the report loaded; a report that has changed since it was
+#    loaded, or that was written before the store existed, is (re)loaded by queryCGPMresults.py.
+#
+# Classes and methods:
+#     getStoreFile
+#     getGenomeName
+#     getHeaderCds
+#     getLogGenomes
+#     isStoreFile
+#     getQueryLine
+#     resultsStore
+#         close
+#         getPair
+#         isCurrent
+#         loadReport
+#         queryByCds
+#         queryByHitType
+#         getPairs
+#         getReferencePairs
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import re
+import sqlite3
+
+RESULTS_STORE_FILE = "cgpResults.sqlite"   # in the directory holding the Results_ directories
+STORE_TIMEOUT      = 600                   # seconds to wait for another pair job's transaction
+SQLITE_MAGIC       = b'SQLite format 3\x00'
+
+# Fields of a report data line (see cgp_blastAnalysis.py, mergeAll; postProcessCGPM.py adds the interpretation)
+POSITION       = 0
+GENOME_TYPE    = 1
+G1HEADER       = 9
+G1CONTIG       = 10
+G1ANNOTATION   = 11
+G2HEADER       = 16
+G2CONTIG       = 17
+G2ANNOTATION   = 18
+G1LENGTH       = 27
+G2LENGTH       = 29
+INTERPRETATION = 30
+
+EMPTY = "[]"   #*** For now, annotation fields are empty for protein entries
+
+# Interpretations, from postProcessCGPM.py
+FLIP_STRAND_MSG     = "Hit to reverse strand of sequence"
+SPLIT_GENE_MSG      = "Possible split gene call on genome"
+MISSING_SEGMENT_MSG = "Possible extra or missing domain"
+ALTERNATE_START_MSG = "Possible alternate start codon"
+OVERLAPPING_HIT_MSG = "Hits appear to overlap"
+PARALOG_MSG         = "Could be paralog or gene duplication"
+START_CODON_MSG     = "Check start codon on gene from genome"
+ATG_CODON_MSG       = "Start codon is not ATG on gene from genome"
+
+p_dataLine  = re.compile(r'^\d')         # data lines begin with the sort position
+p_headerCds = re.compile(r'cds(\d+)/')   # e.g., cds12/+/100/400/...
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pair (
+    pairId        INTEGER PRIMARY KEY,
+    directory     TEXT UNIQUE NOT NULL,
+    report        TEXT NOT NULL,
+    reportSize    INTEGER NOT NULL,
+    reportMtimeNs INTEGER NOT NULL,
+    genomeFile1   TEXT NOT NULL,
+    genomeFile2   TEXT NOT NULL,
+    genome1       TEXT NOT NULL,
+    genome2       TEXT NOT NULL
+    );
+CREATE TABLE IF NOT EXISTS hit (
+    pairId     INTEGER NOT NULL,
+    lineNumber INTEGER NOT NULL,
+    genomeType TEXT NOT NULL,
+    g1Cds      TEXT,
+    g2Cds      TEXT,
+    line       TEXT NOT NULL
+    );
+CREATE INDEX IF NOT EXISTS hit_type  ON hit (pairId, genomeType, lineNumber);
+CREATE INDEX IF NOT EXISTS hit_g1Cds ON hit (pairId, g1Cds);
+CREATE INDEX IF NOT EXISTS hit_g2Cds ON hit (pairId, g2Cds);
+CREATE INDEX IF NOT EXISTS pair_genome1 ON pair (genome1);
+CREATE INDEX IF NOT EXISTS pair_genome2 ON pair (genome2);
+"""
+
+# Returns the store file for a Results_ directory: in the directory above it
+def getStoreFile(resultsDir):
+    return os.path.join(os.path.dirname(os.path.abspath(resultsDir)), RESULTS_STORE_FILE)
+
+# Returns the genome (strain) name for a genome or gene file: the name of the directory holding it
+def getGenomeName(genomeFile):
+    segments = genomeFile.split('/')
+    if len(segments) > 1:
+        return segments[-2]
+    return genomeFile
+
+# Returns the cds number in a gene header (e.g., '12' for cds12/+/100/400/...), or None
+def getHeaderCds(header):
+    match = re.search(p_headerCds, header)
+    if match:
+        return match.group(1)
+    return None
+
+# Returns the genome files of a pair, from the '#1' and '#2' lines of its log (compareGeneProfiles_main.log,
+# e.g., "genome file #1: <path>", or postProcessCGPM.log, "gene file #1: <path>")
+def getLogGenomes(logFile):
+    genomeFile1 = ""; genomeFile2 = ""
+    LOG_H = open(logFile,"r")
+    for line in LOG_H.read().splitlines():  # first of each; compareGeneProfiles_main.log also lists "annotation file #1: ..."
+        columns = line.split(' ')
+        if re.search('#1',line) and len(columns) > 3 and genomeFile1 == "":
+            genomeFile1 = columns[3]
+        if re.search('#2',line) and len(columns) > 3 and genomeFile2 == "":
+            genomeFile2 = columns[3]
+    LOG_H.close()
+    return (genomeFile1,genomeFile2)
+
+# Returns True if filename is a store (SQLite) file, rather than a text file such as a query output file
+def isStoreFile(filename):
+    try:
+        FILE_H = open(filename,"rb")
+        magic = FILE_H.read(len(SQLITE_MAGIC))
+        FILE_H.close()
+    except OSError:
+        return False
+    return magic == SQLITE_MAGIC
+
+# Returns a report data line as queryCGPMresults.py writes it to the user's output file, or "" if the line is
+# not selected. Lines with no annotation on either genome are not selected (this was skipping protein
+# records). A mutual or singular hit is selected only if its interpretation includes interpretationMessage
+# (one of the messages above), or for any interpretation if interpretationMessage is ""; loners are
+# selected regardless of interpretation
+def getQueryLine(line,interpretationMessage=""):
+    fields = line.split('\t')
+    if len(fields) <= INTERPRETATION:  # compareGeneProfiles_main.report has no interpretation
+        fields.extend([""] * (INTERPRETATION + 1 - len(fields)))
+    dataLine = fields[POSITION]  # always record the position (1st field in tabbed data)
+    (genome,hitType) = fields[GENOME_TYPE].split('_')
+    if fields[G1ANNOTATION] == EMPTY and fields[G2ANNOTATION] == EMPTY:
+        return ""
+    if hitType == "mutual" or hitType == "singular":
+        if interpretationMessage != "" and not re.search(interpretationMessage,fields[INTERPRETATION]):
+            return ""
+        dataLine = dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G1HEADER] + "\t" + fields[G1CONTIG] + "\t" + fields[G1ANNOTATION] + "\t" + fields[G2HEADER]
+        dataLine = dataLine + "\t" + fields[G2CONTIG] + "\t" + fields[G2ANNOTATION] + "\tG1len=" + fields[G1LENGTH] + "\tG2len=" + fields[G2LENGTH]
+        return dataLine + "\t" + fields[INTERPRETATION]
+    if hitType == "loner":
+        if genome == "genome1" and fields[G1ANNOTATION] != EMPTY:
+            return dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G1HEADER] + "\t" + fields[G1CONTIG] + "\t" + fields[G1ANNOTATION] + "\tG1len=" + fields[G1LENGTH]
+        if genome == "genome2" and fields[G2ANNOTATION] != EMPTY:
+            return dataLine + "\t" + fields[GENOME_TYPE] + "\t" + fields[G2HEADER] + "\t" + fields[G2CONTIG] + "\t" + fields[G2ANNOTATION] + "\tG2len=" + fields[G2LENGTH]
+    return ""
+
+class resultsStore(object):
+
+    def __init__(self,storeFile):
+        self.storeFile  = storeFile
+        self.connection = sqlite3.connect(storeFile,timeout=STORE_TIMEOUT,isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # pair jobs may load while others query
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    # Returns the store's record of a Results_ directory: (pairId, report, reportSize, reportMtimeNs,
+    # genomeFile1, genomeFile2), or None if the directory has not been loaded
+    def getPair(self,resultsDir):
+        cursor = self.connection.execute("SELECT pairId, report, reportSize, reportMtimeNs, genomeFile1, genomeFile2 FROM pair WHERE directory = ?",
+            (os.path.abspath(resultsDir),))
+        return cursor.fetchone()
+
+    # Returns True if reportFile, as it is now, is the report loaded for its Results_ directory
+    def isCurrent(self,reportFile):
+        pair = self.getPair(os.path.dirname(os.path.abspath(reportFile)))
+        if pair is None or pair[1] != os.path.basename(reportFile):
+            return False
+        try:
+            reportStat = os.stat(reportFile)
+        except OSError:
+            return False
+        return pair[2] == reportStat.st_size and pair[3] == reportStat.st_mtime_ns
+
+    # Loads a report into the store, replacing whatever was loaded for its Results_ directory; returns
+    # the number of hits (data lines) loaded
+    def loadReport(self,reportFile,genomeFile1,genomeFile2):
+        resultsDir = os.path.dirname(os.path.abspath(reportFile))
+        reportStat = os.stat(reportFile)   # before reading; a report written meanwhile is loaded again later
+        REPORT_H = open(reportFile,"r")
+        fLines = REPORT_H.read().splitlines()
+        REPORT_H.close()
+        hitList = []
+        for lineNumber in range(0,len(fLines)):
+            line = fLines[lineNumber]
+            if re.search(p_dataLine, line):
+                fields = line.split('\t')
+                if len(fields) <= G2HEADER:
+                    continue
+                hitList.append((lineNumber,fields[GENOME_TYPE],getHeaderCds(fields[G1HEADER]),getHeaderCds(fields[G2HEADER]),'\t'.join(fields[0:INTERPRETATION + 1])))
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("DELETE FROM hit WHERE pairId IN (SELECT pairId FROM pair WHERE directory = ?)", (resultsDir,))
+            self.connection.execute("DELETE FROM pair WHERE directory = ?", (resultsDir,))
+            cursor = self.connection.execute("INSERT INTO pair (directory, report, reportSize, reportMtimeNs, genomeFile1, genomeFile2, genome1, genome2) VALUES (?,?,?,?,?,?,?,?)",
+                (resultsDir,os.path.basename(reportFile),reportStat.st_size,reportStat.st_mtime_ns,genomeFile1,genomeFile2,getGenomeName(genomeFile1),getGenomeName(genomeFile2)))
+            pairId = cursor.lastrowid
+            self.connection.executemany("INSERT INTO hit (pairId, lineNumber, genomeType, g1Cds, g2Cds, line) VALUES (?,?,?,?,?,?)",
+                [(pairId,) + hit for hit in hitList])
+            self.connection.execute("COMMIT")
+        except:
+            self.connection.execute("ROLLBACK")
+            raise
+        return len(hitList)
+
+    # Returns the data lines of a pair in which cds (a number, as a string) is the genome1 or the genome2
+    # gene, in report order
+    def queryByCds(self,pairId,cds):
+        cursor = self.connection.execute("SELECT line FROM hit WHERE rowid IN (SELECT rowid FROM hit WHERE pairId = ? AND g1Cds = ? UNION SELECT rowid FROM hit WHERE pairId = ? AND g2Cds = ?) ORDER BY lineNumber",
+            (pairId,cds,pairId,cds))
+        return [row[0] for row in cursor]
+
+    # Returns the data lines of a pair whose genome_hitType begins with genomeType (e.g., genome1_loner,
+    # or genome1_ for all hits on genome1), in report order
+    def queryByHitType(self,pairId,genomeType):
+        cursor = self.connection.execute("SELECT line FROM hit WHERE pairId = ? AND genomeType >= ? AND genomeType < ? ORDER BY lineNumber",
+            (pairId,genomeType,genomeType + '\uffff'))
+        return [row[0] for row in cursor]
+
+    # Returns (pairId, genomeFile1, genomeFile2, genome1, genome2) for each pair in the store, in order of
+    # directory, as queryCGPMresults.py lists them (pair jobs load in whatever order they finish)
+    def getPairs(self):
+        cursor = self.connection.execute("SELECT pairId, genomeFile1, genomeFile2, genome1, genome2 FROM pair ORDER BY directory")
+        return cursor.fetchall()
+
+    # Returns (pairId, genomeFile1, genomeFile2, genome1, genome2) for each pair in which reference is
+    # genome1 or genome2, in order of directory
+    def getReferencePairs(self,reference):
+        cursor = self.connection.execute("SELECT pairId, genomeFile1, genomeFile2, genome1, genome2 FROM pair WHERE pairId IN (SELECT pairId FROM pair WHERE genome1 = ? UNION SELECT pairId FROM pair WHERE genome2 = ?) ORDER BY directory",
+            (reference,reference))
+        return cursor.fetchall()
@@ -6,7 +6,7 @@
 #
 # Programmer: Carol E. Zhou
 #
-# Last Update: 16 October 2020
+# Last Update: 18 October 2026
 #
 # Description:  This program parses a data file produced by queryCGPMresults.py,
 #   which contains a slice through output generated by compareGeneProfiles_main.py
@@ -15,6 +15,9 @@
 #   summarizeCGPMresults.py extracts the genecall information for a designated reference
 #   and lists it (one gene call per line) along with the corresponding (matching) gene
 #   call information for the other strains/species against which PAK1 was compared.
+#   In place of the query file, the results store (cgpResults.sqlite, in the directory holding the
+#   Results_ directories; see cgp_resultsStore.py) may be given; the reference genome's hits are then
+#   looked up in the store, as if all of the Results_ directories had been queried.
 #
 ################################################################
 # This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
@@ -26,6 +29,7 @@ import copy
 from time import strftime
 from time import gmtime
 import os
+import cgp_resultsStore as resultsStore
 
 # Set messaging booleans
 PHATE_PROGRESS = False
@@ -88,9 +92,9 @@ LENGTH         = int(5)
 
 HELP_STRING = "This script takes as input the name of a reference genome (ie, \'Sterne\') plus a file generated by queryCGPMresults.py, and produces output comprising genetic feature records for each genetic feature selected from the query. For each genetic feature of interest, the corresponding feature is identified for each genome that was compared. Fields displayed are: genome, header, annotation, length, and interpretation.  For more information, type: python summarizeCGPMresults.py usage|input\n"
 
-USAGE_STRING = "Usage: summarizeCGPMresults.py <referenceGenome> <infile> <outfile>\nOutfile is optional. Default output file is summarizeCGPMresults.out"
+USAGE_STRING = "Usage: summarizeCGPMresults.py <referenceGenome> <infile> <outfile>\nOutfile is optional. Default output file is summarizeCGPMresults.out\nInfile may be the results store, cgpResults.sqlite, in place of a query file"
 
-INPUT_STRING = "Input: name of reference genome (ie, \'Sterne\') plus file containing query results generated by code queryCGPMresults.py. Caution: the reference genome should be spelled exactly as it is in the directory structure containing the comparison data sets.\n"
+INPUT_STRING = "Input: name of reference genome (ie, \'Sterne\') plus file containing query results generated by code queryCGPMresults.py, or the results store (cgpResults.sqlite). Caution: the reference genome should be spelled exactly as it is in the directory structure containing the comparison data sets.\n"
 
 ACCEPTABLE_ARG_COUNT = (3,4) # 4 if user is providing name of output file 
 
@@ -127,6 +131,35 @@ def GetGeneData(genomeNumber, fields, geneDataInstance):
     geneDataInstance["interpretation"] = fields[INTERPRETATION]
     return (geneDataInstance) 
 
+# Returns lines as from a query of all directories in the results store: each pair's genomes, and, for
+# pairs that include the reference, the reference's loners, or else its mutual and singular hits
+def GetStoreLines(reference,storeFile):
+    lines = []
+    store = resultsStore.resultsStore(storeFile)
+    referencePairs = {}  # key = pairId
+    for pair in store.getReferencePairs(reference):
+        referencePairs[pair[0]] = pair
+    for (pairId,genomeFile1,genomeFile2,genome1,genome2) in store.getPairs():
+        lines.append("# Gene Set 1 is " + genomeFile1)
+        lines.append("# Gene Set 2 is " + genomeFile2)
+        if pairId not in referencePairs:
+            continue
+        genomeTypes = []
+        if LONER:
+            if genome1 == reference:
+                genomeTypes.append("genome1_loner")
+            if genome2 == reference:
+                genomeTypes.append("genome2_loner")
+        else:
+            genomeTypes = ["genome1_mutual","genome1_singular","genome2_mutual","genome2_singular"]
+        for genomeType in genomeTypes:
+            for line in store.queryByHitType(pairId,genomeType):
+                queryLine = resultsStore.getQueryLine(line)
+                if queryLine != "":
+                    lines.append(queryLine)
+    store.close()
+    return lines
+
 ##### GET INPUT PARAMETERS
 
 if PHATE_PROGRESS:
@@ -168,7 +201,12 @@ if PHATE_PROGRESS:
     print("cgp_summarizeCGPMresults says, Opening files...")
 
 try:
-    INFILE = open(infile,"r")
+    if resultsStore.isStoreFile(infile):
+        fLines = GetStoreLines(reference,infile)
+    else:
+        INFILE = open(infile,"r")
+        fLines = INFILE.read().splitlines()
+        INFILE.close()
 except IOError as e:
     fileError = True
     print (e)
@@ -195,8 +233,10 @@ junk      = ""
 cdsNumber = 0
 
 referenceGeneList    = []  # will capture a non-redundant list of genes from input data
+referenceGeneIndex   = {}  # key = header, value = index of header in referenceGeneList
 referenceHomologList = []  # will hold the lists of compared-genome genetic features data, indexed by order corresponding to referenceGeneList
 comparedGenomesList  = []  # holds a non-redundant list of genomes that were compared to reference
+comparedGenomesIndex = {}  # key = genome, value = index of genome in comparedGenomesList
 geneExclusions       = {}  # key = header, value = exclusionList object 
 exclusionList        = []  # holds list of genomes that reference gene is unique with respect to
 geneAnnotation       = {}  # holds annotations for genes, key is compoundKey = header // contig
@@ -228,7 +268,6 @@ homologData = {}  # holds a set of geneData objects
 if PHATE_PROGRESS:
     print("cgp_summarizeCGPMresults says, First pass: Collecting compared genomes and gene calls for reference genome into lists.")
 
-fLines = INFILE.read().splitlines()
 for line in fLines:
     match = re.search('Gene Set 1', line)        # Process each binary comparison
     words = []
@@ -237,8 +276,9 @@ for line in fLines:
         pathFile = words[PATH_FILE]
         segments = pathFile.split('/')           # Split apart fully qualified path/filename
         genome1  = segments[-2]                  # sub-dir name for this genome's data is in penultimate position
-        if genome1 not in comparedGenomesList:   # capture name of 1st compared genome
+        if genome1 not in comparedGenomesIndex:  # capture name of 1st compared genome
             if genome1 != reference:             # exclude reference from this list
+                comparedGenomesIndex[genome1] = len(comparedGenomesList)
                 comparedGenomesList.append(genome1)
     match = re.search('Gene Set 2', line)        # Process each binary comparison
     if match:                                    # Capture the 2nd genome in the pair
@@ -246,8 +286,9 @@ for line in fLines:
         pathFile = words[PATH_FILE]
         segments = pathFile.split('/')           # Split apart fully qualified path/filename
         genome2  = segments[-2]                  # sub-dir name for this genome's data is in penultimate position
-        if genome2 not in comparedGenomesList:   # capture name of 2nd compared genome
+        if genome2 not in comparedGenomesIndex:  # capture name of 2nd compared genome
             if genome2 != reference:             # exclude reference
+                comparedGenomesIndex[genome2] = len(comparedGenomesList)
                 comparedGenomesList.append(genome2)
 
     match = re.search('^\d', line)               # Compile a list of all genes from reference
@@ -256,21 +297,24 @@ for line in fLines:
         (genome, hitType) = fields[GENOME_TYPE].split('_')
         if genome1 == reference:                 # Unless genome1 or genome2 is reference, don't bother 
             if not LONER:
-                if fields[G1HEADER] not in referenceGeneList: # capture genetic feature / gene
+                if fields[G1HEADER] not in referenceGeneIndex: # capture genetic feature / gene
+                    referenceGeneIndex[fields[G1HEADER]] = len(referenceGeneList)
                     referenceGeneList.append(fields[G1HEADER])
             if LONER:  # add gene to list only if this is a genome1_loner record
                 if genome == 'genome1':
-                    if fields[HEADER] not in referenceGeneList:  
+                    if fields[HEADER] not in referenceGeneIndex:  
+                        referenceGeneIndex[fields[HEADER]] = len(referenceGeneList)
                         referenceGeneList.append(fields[HEADER])   #*** ??? compoundKey here?
         if genome2 == reference:                 # Unless genome1 or genome2 is reference, don't bother
             if not LONER:
-                if fields[G2HEADER] not in referenceGeneList: # capture genetic feature / gene
+                if fields[G2HEADER] not in referenceGeneIndex: # capture genetic feature / gene
+                    referenceGeneIndex[fields[G2HEADER]] = len(referenceGeneList)
                     referenceGeneList.append(fields[G2HEADER]) 
             if LONER:  # add gene to list only if this is a genome2_loner record
                 if genome == 'genome2':
-                    if fields[HEADER] not in referenceGeneList:
+                    if fields[HEADER] not in referenceGeneIndex:
+                        referenceGeneIndex[fields[HEADER]] = len(referenceGeneList)
                         referenceGeneList.append(fields[HEADER])
-INFILE.close()
 
 ### The following section is needed only for mutual and singular hits
 ### For each reference gene found, create a data record and insert into a list in same order 
@@ -303,9 +347,6 @@ if not LONER:  # For mutual and singular hit data
 if PHATE_PROGRESS:
     print("cgp_summarizeCGPMresults says, Second pass: Completing geneData record based on infile data.")
 
-INFILE = open(infile,"r")
-fLines = INFILE.read().splitlines()
-
 if LONER:  # For detected unique genes on reference genome
 
     # First, create an empty exclusion list for each reference gene
@@ -391,7 +432,7 @@ if not LONER:  # For mutual and singular hit data, record for each reference gen
             if genome1 == reference:  # Unless genome1 or genome2 is reference, don't bother
                 otherGenome = genome2 
                 #*** Note: indexing by header is not necessarily unique (ie could be cds, start, end all same on different contigs, though highly unlikely)
-                insertionPoint = referenceGeneList.index(fields[G1HEADER])  # get array index; corresponding locations!
+                insertionPoint = referenceGeneIndex[fields[G1HEADER]]  # get array index; corresponding locations!
 
                 #*** Commented out code replaces redundant code below, but needs testing first !!!
                 # Get Genome 1 data, put to reference data frame
@@ -432,7 +473,7 @@ if not LONER:  # For mutual and singular hit data, record for each reference gen
 
             elif genome2 == reference:  # Unless genome1 or genome2 is reference, don't bother
                 otherGenome = genome1
-                insertionPoint = referenceGeneList.index(fields[G2HEADER])  # get array index; corresponding locations!
+                insertionPoint = referenceGeneIndex[fields[G2HEADER]]  # get array index; corresponding locations!
 
                 # Get Genome 2 data, put to reference data frame
                 # referenceGeneData = GetGeneData(2,fields,referenceGeneData)
@@ -477,7 +518,7 @@ if not LONER:  # For mutual and singular hit data, record for each reference gen
         print("cgp_summarizeCGPMresults says, Number of entries in referneceGeneList",len(referenceGeneList))
     OUTFILE.write("%s%s\n" % ("Number of entries in referenceGeneList",len(referenceGeneList)))
     OUTFILE.write("%s\n" % ("Genome\tHeader\tAnnotation\tLength\tInterpretation"))
-    for i in xrange(0,listSize-1):
+    for i in range(0,listSize-1):
         OUTFILE.write("%s%s\n" % ("Gene No. ", i+1))
         if "header" in referenceHomologList[i][reference]:   #
             header = referenceHomologList[i][reference]["header"]
@@ -505,6 +546,8 @@ if LONER:  # Print out a list of reference genome loners and the compared genome
     if PHATE_PROGRESS:
         print("cgp_summarizeCGPMresults says, Alphabetizing compared genomes list and writing header lines to output file.") 
     comparedGenomesList.sort()
+    for i in range(0,len(comparedGenomesList)):
+        comparedGenomesIndex[comparedGenomesList[i]] = i
     OUTFILE.write("%s\t%s\t%s\t%s" % ("Reference genetic feature","Start","Contig","Annotation"))
     for genome in comparedGenomesList:
         OUTFILE.write("\t%s" % (genome))
@@ -515,12 +558,12 @@ if LONER:  # Print out a list of reference genome loners and the compared genome
         print("cgp_summarizeCGPMresults says, Writing chart of reference genes vs. compared genomes.")
     for header in geneExclusions:
         printArray = []
-        for j in xrange(0,len(comparedGenomesList)):
+        for j in range(0,len(comparedGenomesList)):
              printArray.append('')
         (contig,annotation) = geneAnnotation[header].split('_/_')
         OUTFILE.write("%s\t%s\t%s\t%s" % (header,starts[header],contig,annotation))
         for genome in geneExclusions[header]:
-            i = comparedGenomesList.index(genome)
+            i = comparedGenomesIndex[genome]
             printArray[i] = 'X'
         #OUTFILE.write("%s" % printArray)
         for item in printArray:
@@ -529,7 +572,6 @@ if LONER:  # Print out a list of reference genome loners and the compared genome
             
 ##### CLEAN UP
 
-INFILE.close()
 OUTFILE.close()
 dateTime = "0:0:0:0:0:0"
 dateTime = strftime("%Y:%m:%d::%H:%M:%S", gmtime())  # get time down to seconds
@@ -5,7 +5,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Last Update: 9 December 2020
+# Last Update: 18 October 2026
 #
 # Description:
 # This script uses a config file to run compareGeneProfiles.py
@@ -47,8 +47,14 @@
 # There is one set of the above input parameters for each comparison
 # to be run.
 #
+# If CGP_ALL_VS_ALL is 'True', the pairs are not blasted separately. Instead, compareGeneProfiles_main.py
+# first writes each genome's gene and protein fasta files (-m prepare), then all genomes are blasted at
+# once (see cgp_allVsAll.py), and each pair is compared from the all-vs-all hit table (-m allvsall).
+# The results approximate those of the pairwise blasts (see cgp_allVsAll.py).
+#
 # Method:
 #    cgp_threaded
+#    runCommands
 #
 #################################################################
 # This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
@@ -58,11 +64,16 @@ import sys, os, re, string, copy
 import time
 from subprocess import call
 from multiprocessing import Pool
+import cgp_allVsAll as allVsAll
 
 ##### CONFIGURABLES
 CODE_BASE_DIR              = os.environ["CGP_CODE_BASE_DIR"]
 PHATE_PIPELINE_OUTPUT_DIR  = os.environ["PHATE_PIPELINE_OUTPUT_DIR"]
 COMPARE_GENE_PROFILES_CODE = os.path.join(CODE_BASE_DIR, "cgp_compareGeneProfiles_main.py")  # use current stable version or modify constant
+CGP_ALL_VS_ALL_STRING      = os.environ["CGP_ALL_VS_ALL"]
+CGP_ALL_VS_ALL = False
+if CGP_ALL_VS_ALL_STRING.lower() == 'true':
+    CGP_ALL_VS_ALL = True
 
 # Set messaging booleans
 PHATE_PROGRESS = False
@@ -191,6 +202,44 @@ def cgp_threaded(command):
     print(f'cgp_wrapper says, Running {command} on PID {os.getpid()}')
     result = os.system(command)
 
+##### Run a list of commands, in parallel if threading is on
+def runCommands(commandList):
+    if THREADING_ON:
+        cgp_pool = Pool(int(float(cgpThreads)))
+        cgp_pool.map(cgp_threaded, commandList)
+        cgp_pool.close()
+    else:
+        for command in commandList:
+            os.system(command)
+
+##### All-vs-all mode: write each genome's gene and protein fasta files, then blast all genomes at once
+
+if CGP_ALL_VS_ALL and __name__ == '__main__':
+    if PHATE_PROGRESS:
+        print ("cgp_wrapper says, Preparing genomes for all-vs-all comparison....")
+    LOGFILE.write("%s\n" % ("All-vs-all mode is on; results approximate those of pairwise comparison"))
+    myAllVsAll = allVsAll.allVsAll()
+    preparedGenomes = []; commandList = []
+    for fileSet in inFileList:  # Prepare each genome once, using as few pairs as needed to cover all genomes
+        directory = fileSet["dir"]
+        genome1   = os.path.join(directory, fileSet["g1"])
+        genome2   = os.path.join(directory, fileSet["g2"])
+        annot1    = os.path.join(directory, fileSet["a1"])
+        annot2    = os.path.join(directory, fileSet["a2"])
+        if genome1 in preparedGenomes and genome2 in preparedGenomes:
+            continue
+        preparedGenomes.extend([genome1,genome2])
+        nextCommand = "python " + COMPARE_GENE_PROFILES_CODE + " -g1 " + genome1 + " -g2 " + genome2 + " -a1 " + annot1 + " -a2 " + annot2 + " -d " + projectDirectory + " -m prepare"
+        commandList.append(nextCommand)
+    LOGFILE.write("%s%s\n" % ("Prepare commands: ",commandList))
+    runCommands(commandList)
+    for fileSet in inFileList:
+        for annot in (fileSet["a1"],fileSet["a2"]):
+            (geneFile,proteinFile) = allVsAll.getSequenceFiles(os.path.join(fileSet["dir"], annot))
+            myAllVsAll.addGenome(geneFile,proteinFile)
+    myAllVsAll.run(max(1,int(float(cgpThreads))))
+    LOGFILE.write("%s%s\n" % ("All-vs-all hit files written to ",myAllVsAll.workDir))
+
 ##### For each set, execute compareGeneProfiles_main.py
 
 currentTime = int(time.time())
@@ -209,6 +258,8 @@ if THREADING_ON:
         annot1    = fileSet["a1"]; annot1  = os.path.join(directory, annot1)
         annot2    = fileSet["a2"]; annot2  = os.path.join(directory, annot2)
         nextCommand = "python " + COMPARE_GENE_PROFILES_CODE + " -g1 " + genome1 + " -g2 " + genome2 + " -a1 " + annot1 + " -a2 " + annot2 + " -d " + projectDirectory
+        if CGP_ALL_VS_ALL:
+            nextCommand += " -m allvsall"
         commandList.append(nextCommand)
     if __name__ == '__main__':
         LOGFILE.write("%s%s" % ("cgp_wrapper / __main__: List of commands: ",commandList))
@@ -231,7 +282,11 @@ else:
         LOGFILE.write("%s%s\n" % ("-a1 annot1:  ",annot1))
         LOGFILE.write("%s%s\n" % ("-a2 annot2:  ",annot2))
         LOGFILE.write("%s%s\n" % ("-d  userDir: ",projectDirectory))
-        call(["python",COMPARE_GENE_PROFILES_CODE,"-g1",genome1,"-g2",genome2,"-a1",annot1,"-a2",annot2,"-d",projectDirectory])
+        if CGP_ALL_VS_ALL:
+            LOGFILE.write("%s\n" % ("-m  mode:    allvsall"))
+            call(["python",COMPARE_GENE_PROFILES_CODE,"-g1",genome1,"-g2",genome2,"-a1",annot1,"-a2",annot2,"-d",projectDirectory,"-m","allvsall"])
+        else:
+            call(["python",COMPARE_GENE_PROFILES_CODE,"-g1",genome1,"-g2",genome2,"-a1",annot1,"-a2",annot2,"-d",projectDirectory])
 
 currentTime = int(time.time())
 LOGFILE.write("%s%s%s%s\n" % ("Execution complete. ",count," jobs completed at ",currentTime))
@@ -0,0 +1,118 @@
+##########################################################################
+#
+# Name:  module dbPrep_accessionResolver
+#
+# Programmer:  C. E. Zhou
+#
+# Last update:  18 October 2026
+#
+# Description:  Resolves a set of wanted sequence accessions (e.g., the peptide members of the
+#    pVOGs) against a source fasta file (e.g., NCBI viral proteins, or all of NR), in a single
+#    streaming pass over the source. The wanted accessions are held in a dictionary; each header
+#    of the source is split into its identifiers, which are looked up in the dictionary, so the
+#    cost is one pass over the source, however many accessions are wanted. Only the sequences of
+#    wanted accessions are kept in memory.
+#    Identifiers of a header are the first word of each title (NR joins the titles of identical
+#    sequences with ctrl-A), its '|'-separated fields (e.g., gi|123|ref|YP_009137137.1|), and each
+#    of these without its version (YP_009137137), so that an accession given with or without its
+#    version is found. Each accession resolves to the first sequence in the source having it.
+#
+# Classes and Methods
+#    getHeaderAccessions
+#    accessionResolver
+#       addAccession
+#       resolve
+#       getTags
+#       writeResolvedFastas
+#       getMissingAccessions
+#       getFoundCount
+#       getMissingCount
+#
+#########################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+TITLE_SEPARATOR = '\x01'   # NR separates the titles of identical sequences with ctrl-A
+
+# Returns the identifiers in a fasta header (without the '>'), in order, without repeats
+def getHeaderAccessions(header):
+    accessionList = []
+    for title in header.split(TITLE_SEPARATOR):
+        words = title.split()
+        if not words:
+            continue
+        for identifier in [words[0]] + words[0].split('|'):
+            (unversioned,dot,version) = identifier.rpartition('.')  # version suffix, e.g., .1 of YP_009137137.1
+            for accession in [identifier,unversioned if version.isdigit() else ""]:
+                if accession != "" and accession not in accessionList:
+                    accessionList.append(accession)
+    return accessionList
+
+class accessionResolver(object):
+
+    def __init__(self):
+        self.accessionTags   = {} # key=wanted accession, value=list of tags (e.g., pVOG identifiers), in order added
+        self.foundAccessions = {} # key=accession, value=header of the sequence it resolved to
+
+    # Add a wanted accession, with an optional tag (e.g., the pVOG of which the accession is a member)
+    def addAccession(self,accession,tag=""):
+        if accession not in self.accessionTags:
+            self.accessionTags[accession] = []
+        if tag != "" and tag not in self.accessionTags[accession]:
+            self.accessionTags[accession].append(tag)
+        return
+
+    # Generator: streams the source fasta file once, yielding (header, sequence, tagList) for each
+    # sequence to which one or more wanted accessions resolve; header is without the '>', and
+    # tagList holds the tags of all those accessions
+    def resolve(self,fastaFile_h):
+        self.foundAccessions = {}
+        header = None; matchList = []; sequence = []
+        for fLine in fastaFile_h:
+            if fLine.startswith('>'):
+                if matchList:
+                    yield (header,''.join(sequence),self.getTags(matchList))
+                header = fLine[1:].rstrip('\r\n')
+                matchList = []; sequence = []
+                for accession in getHeaderAccessions(header):
+                    if accession in self.accessionTags and accession not in self.foundAccessions:
+                        self.foundAccessions[accession] = header
+                        matchList.append(accession)
+            elif matchList:
+                sequence.append(fLine.strip())
+        if matchList:
+            yield (header,''.join(sequence),self.getTags(matchList))
+
+    # Returns the tags of the accessions in matchList, without repeats
+    def getTags(self,matchList):
+        tagList = []
+        for accession in matchList:
+            for tag in self.accessionTags[accession]:
+                if tag not in tagList:
+                    tagList.append(tag)
+        return tagList
+
+    # Streams the source fasta file, writing each resolved sequence with its tags prefixed to the header
+    # (e.g., >VOG0334|VOG1202|YP_009137137.1 ...); returns the number of sequences written
+    def writeResolvedFastas(self,fastaFile_h,outFile_h,case=""):
+        count = 0
+        for (header,sequence,tagList) in self.resolve(fastaFile_h):
+            tagString = ''
+            for tag in tagList:
+                tagString += tag + '|'
+            if case.lower() == "lower":
+                sequence = sequence.lower()
+            outFile_h.write("%s%s%s\n%s\n" % ('>',tagString,header,sequence))
+            count += 1
+        return count
+
+    # Returns the wanted accessions that were not found in the last pass, in the order added
+    def getMissingAccessions(self):
+        return [accession for accession in self.accessionTags if accession not in self.foundAccessions]
+
+    def getFoundCount(self):
+        return len(self.foundAccessions)
+
+    def getMissingCount(self):
+        return len(self.accessionTags) - len(self.foundAccessions)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+#############################################
+# Name: dbPrep_benchmarkVogTagging.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Timing comparison for VOG tagging (dbPrep_vog.VOGs): loading the VOG map (loadVOGs), mapping
+#    accessions to VOGs (mapAccessions2VOGs), and writing the VOG-tagged gene and protein fasta
+#    files (writeVOGtaggedFastaFile).
+#    Given a VOGs directory (e.g., ../Databases/VOGs/), the downloaded release files are used:
+#    vog.members.tsv, vog.genes.all.fa, vog.proteins.all.fa; otherwise a synthetic release of <count>
+#    VOGs is written to a temporary directory.
+#    The former algorithm (a list of fasta objects, scanned for every accession and for every input
+#    sequence) is quadratic and takes hours on a full release, so it is timed on the first <sample>
+#    VOGs and the sequences of their accessions; its time on the full release is extrapolated from
+#    the sample. The tagged output of the former and current algorithms is checked on the sample.
+#
+# Usage:  python dbPrep_benchmarkVogTagging.py [VOGsDir | count] [-sample n]   (count defaults to 30000; sample to 500)
+#
+# Methods:
+#    WriteSyntheticRelease
+#    ReferenceTagging
+#    TagFile
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os
+import random
+import shutil
+import tempfile
+import time
+import dbPrep_vog
+
+DEFAULT_COUNT     = 30000
+DEFAULT_SAMPLE    = 500
+MEMBERS_MAX       = 20     # accessions per synthetic VOG: 1 to MEMBERS_MAX
+SHARED_FRACTION   = 0.02   # fraction of accessions that are members of a second VOG
+UNMAPPED_FRACTION = 0.2    # fraction of sequences in the fasta files that are not in any VOG
+LINE_LENGTH       = 60
+
+# Writes vog.members.tsv, vog.genes.all.fa, and vog.proteins.all.fa for count VOGs to directory
+def WriteSyntheticRelease(directory,count):
+    accnList = []
+    MAP_H = open(os.path.join(directory,"vog.members.tsv"),"w")
+    MAP_H.write("%s\n" % ("#GroupName\tProteinCount\tSpeciesCount\tFunctionalCategory\tProteinIDs"))
+    for i in range(0,count):
+        members = []
+        for j in range(0,random.randrange(1,MEMBERS_MAX + 1)):
+            if accnList and random.random() < SHARED_FRACTION:
+                members.append(random.choice(accnList))
+            else:
+                accn = str(random.randrange(10000,2000000)) + ".YP_" + str(len(accnList) + 1).zfill(9) + ".1"
+                accnList.append(accn)
+                members.append(accn)
+        MAP_H.write("%s\t%s\t%s\t%s\t%s\n" % ("VOG" + str(i + 1).zfill(5),len(members),len(members),"Xu",','.join(members)))
+    MAP_H.close()
+    headers = accnList + ["unmapped_" + str(i + 1) + ".1" for i in range(0,int(len(accnList) * UNMAPPED_FRACTION))]
+    random.shuffle(headers)
+    for (filename,alphabet,length) in [("vog.genes.all.fa","ACGT",900),("vog.proteins.all.fa","ACDEFGHIKLMNPQRSTVWY",300)]:
+        pool = ''.join([random.choice(alphabet) for k in range(0,100000)])  # sequences are slices of a random pool
+        FASTA_H = open(os.path.join(directory,filename),"w")
+        for header in headers:
+            offset = random.randrange(0,len(pool) - length)
+            sequence = pool[offset:offset + length]
+            FASTA_H.write("%s%s\n" % ('>',header))
+            for k in range(0,length,LINE_LENGTH):
+                FASTA_H.write("%s\n" % (sequence[k:k + LINE_LENGTH]))
+        FASTA_H.close()
+
+# The former algorithm: non-redundant list of accessions, each tagged by scanning the list for every
+#    accession of every VOG; each input sequence is then written by scanning the list for its header
+def ReferenceTagging(VOGlist,fastaLines):
+    accnList = []
+    for vog in VOGlist:
+        for accn in vog.accnList:
+            if accn not in accnList:
+                accnList.append(accn)
+    fastaList = [[accn,""] for accn in accnList]   # [header,customHeader]
+    for vog in VOGlist:
+        for accn in vog.accnList:
+            for fasta in fastaList:
+                if fasta[0] == accn:
+                    fasta[1] += vog.VOGid + '|'
+    outLines = []
+    header = None; sequence = ""
+    for fLine in fastaLines + ['>']:
+        if fLine.startswith('>'):
+            if header is not None:
+                for fasta in fastaList:
+                    if fasta[0] == header:
+                        outLines.append('>' + fasta[1] + fasta[0] + '\n' + sequence + '\n')
+            header = fLine[1:]; sequence = ""
+        else:
+            sequence += fLine
+    return ''.join(outLines)
+
+# Writes the VOG-tagged version of inFile to outFile; returns seconds elapsed
+def TagFile(myVog,inFile,outFile,seqType):
+    startTime = time.time()
+    IN_H = open(inFile,"r"); OUT_H = open(outFile,"w")
+    myVog.writeVOGtaggedFastaFile(IN_H,OUT_H,seqType)
+    IN_H.close(); OUT_H.close()
+    return time.time() - startTime
+
+##### Main
+
+count = DEFAULT_COUNT; sample = DEFAULT_SAMPLE; vogDir = ""
+arguments = sys.argv[1:]
+while arguments:
+    argument = arguments.pop(0)
+    if argument == "-sample":
+        sample = int(arguments.pop(0))
+    elif os.path.isdir(argument):
+        vogDir = argument
+    else:
+        count = int(argument)
+
+random.seed(1)
+tempDir = tempfile.mkdtemp()
+if vogDir == "":
+    print("dbPrep_benchmarkVogTagging says, Writing a synthetic VOG release of", count, "VOGs")
+    vogDir = tempDir
+    WriteSyntheticRelease(vogDir,count)
+mapFile = os.path.join(vogDir,"vog.members.tsv")
+
+myVog = dbPrep_vog.VOGs()
+startTime = time.time()
+MAP_H = open(mapFile,"r")
+myVog.loadVOGs(MAP_H)
+MAP_H.close()
+loadTime = time.time() - startTime
+startTime = time.time()
+myVog.mapAccessions2VOGs()
+mapTime = time.time() - startTime
+print("   VOGs: %d  accessions: %d" % (myVog.getVogCount(),len(myVog.accnVogMap)))
+print("   loadVOGs:             %8.2f s" % (loadTime))
+print("   mapAccessions2VOGs:   %8.2f s" % (mapTime))
+tagTime = 0.0
+for (filename,seqType) in [("vog.genes.all.fa","gene"),("vog.proteins.all.fa","protein")]:
+    seconds = TagFile(myVog,os.path.join(vogDir,filename),os.path.join(tempDir,filename + ".tagged"),seqType)
+    print("   writeVOGtaggedFastaFile (%s): %8.2f s" % (filename,seconds))
+    tagTime += seconds
+currentTime = loadTime + mapTime + tagTime
+print("   current, full release:              %10.2f s" % (currentTime))
+
+# Former algorithm on a sample: the first sample VOGs, and the protein sequences of their accessions
+sampleVogs = myVog.VOGlist[0:sample]
+sampleAccns = set([accn for vog in sampleVogs for accn in vog.accnList])
+sampleLines = []; keep = False
+PROTEIN_H = open(os.path.join(vogDir,"vog.proteins.all.fa"),"r")
+for pLine in PROTEIN_H:
+    pLine = pLine.rstrip('\r\n')
+    if pLine.startswith('>'):
+        keep = pLine[1:] in sampleAccns
+    if keep:
+        sampleLines.append(pLine)
+PROTEIN_H.close()
+startTime = time.time()
+referenceOutput = ReferenceTagging(sampleVogs,sampleLines)
+referenceTime = time.time() - startTime
+
+sampleVog = dbPrep_vog.VOGs()
+sampleVog.VOGlist = sampleVogs
+sampleVog.mapAccessions2VOGs()
+sampleIn = os.path.join(tempDir,"sample.fa"); sampleOut = os.path.join(tempDir,"sample.tagged.fa")
+SAMPLE_H = open(sampleIn,"w"); SAMPLE_H.write("%s\n" % ('\n'.join(sampleLines))); SAMPLE_H.close()
+TagFile(sampleVog,sampleIn,sampleOut,"protein")
+SAMPLE_H = open(sampleOut,"r"); currentOutput = SAMPLE_H.read(); SAMPLE_H.close()
+
+# Both phases of the former algorithm scale with (accessions x accessions); both fasta files are tagged
+scale = (float(len(myVog.accnVogMap)) / max(1,len(sampleAccns))) ** 2
+print("   former, sample of %d VOGs (%d accessions): %10.2f s" % (len(sampleVogs),len(sampleAccns),referenceTime))
+print("   former, full release (extrapolated):  %10.0f s (%.1f days)" % (referenceTime * scale * 2,referenceTime * scale * 2 / 86400))
+print("   tagged output identical on sample:", referenceOutput == currentOutput)
+
+shutil.rmtree(tempDir)
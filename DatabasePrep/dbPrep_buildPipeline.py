@@ -0,0 +1,294 @@
+##########################################################################
+#
+# Name:  module dbPrep_buildPipeline
+#
+# Programmer:  C. E. Zhou
+#
+# Last update:  18 October 2026
+#
+# Description:  Incremental, parallel building of the multiPhATE databases (see dbPrep_getDBs.py).
+#    Each database is a build task: a directory, its source files (downloaded archives or fasta
+#    files, given as glob patterns), the shell commands that build it from the sources (unpacking,
+#    concatenation, makeblastdb, hmmpress, header extraction, taxonomy indexing), and the output
+#    files that the commands produce (also glob patterns, e.g., nr*.pin for the volumes of nr).
+#    Source files are fingerprinted (size, modification time, and sha256 checksum); a task whose
+#    sources, version, and commands are unchanged since its last successful build, and whose
+#    outputs all exist, is skipped. The remaining tasks are run on a pool of processes, since the
+#    databases are independent of one another.
+#    Sources may be fetched from the internet or, to work offline, copied from a local mirror
+#    directory that holds the same files as the download sites (see fetchFile).
+#
+#    The manifest, Databases/dbPrep_manifest.json, records for each database its version, the
+#    fingerprints of its sources, the size and modification time of its outputs, the date of the
+#    build, and a cache key: a sha256 over the database name, version, build commands, and source
+#    checksums. The cache key identifies the content of the database, so the annotation stage
+#    (SequenceAnnotation/phate_annotationCache.py) uses it in place of file dates: results are
+#    reused after an unchanged database is re-fetched or copied, and not after it is changed.
+#
+# Classes and Methods
+#    fingerprintFile
+#    getCacheKey
+#    expandPatterns
+#    fetchFile
+#    fetchBlastDatabase
+#    runBuildTask
+#    runBuildTasks
+#    buildTask
+#       setParameters
+#       getParameters
+#       getSourceFiles
+#    manifest
+#       load
+#       getSourceFingerprints
+#       isCurrent
+#       record
+#       write
+#
+#########################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import datetime
+import subprocess
+from multiprocessing import Pool
+
+MANIFEST_FILENAME = "dbPrep_manifest.json"   # in the Databases/ directory
+HASH_BLOCK_SIZE   = 1024 * 1024              # bytes read at a time for checksums
+
+VERBOSE = False
+if "dbPrep_VERBOSE" in os.environ.keys():
+    if os.environ["dbPrep_VERBOSE"] == 'True':
+        VERBOSE = True
+
+##### FUNCTIONS ###########################################################
+
+# Returns the size, modification time, and sha256 checksum of a file. If previous (a fingerprint
+# recorded earlier for the same file) has the same size and modification time, its checksum is
+# reused rather than reading the file again
+def fingerprintFile(filename,previous=None):
+    fileStat = os.stat(filename)
+    fingerprint = {
+        "size"     : fileStat.st_size,
+        "mtime_ns" : fileStat.st_mtime_ns,
+        "sha256"   : "",
+        }
+    if previous and previous.get("size") == fingerprint["size"] and previous.get("mtime_ns") == fingerprint["mtime_ns"]:
+        fingerprint["sha256"] = previous["sha256"]
+        return fingerprint
+    checksum = hashlib.sha256()
+    FILE_H = open(filename,'rb')
+    block = FILE_H.read(HASH_BLOCK_SIZE)
+    while block:
+        checksum.update(block)
+        block = FILE_H.read(HASH_BLOCK_SIZE)
+    FILE_H.close()
+    fingerprint["sha256"] = checksum.hexdigest()
+    return fingerprint
+
+# Cache key of a database build: identifies its version, how it was built, and the content of its sources
+def getCacheKey(name,version,commands,sourceFingerprints):
+    keyString = '\t'.join([name,version] + commands)
+    for filename in sorted(sourceFingerprints.keys()):
+        keyString += '\t' + filename + ':' + sourceFingerprints[filename]["sha256"]
+    return hashlib.sha256(keyString.encode('utf-8')).hexdigest()
+
+# Returns the files in directory matching the glob patterns, relative to directory, sorted, without repeats
+def expandPatterns(directory,patterns):
+    fileList = []
+    for pattern in patterns:
+        for filename in glob.glob(os.path.join(directory,pattern)):
+            if os.path.isfile(filename):
+                fileList.append(os.path.relpath(filename,directory))
+    return sorted(set(fileList))
+
+# Fetch the file at url into directory. With a mirror directory, the file of the same name is copied
+# from the mirror (if newer than the local copy) rather than downloaded; otherwise wget downloads it
+# only if the remote file is newer than the local copy (-N). Returns True if the file is in place
+def fetchFile(url,directory,mirrorDir=""):
+    filename = os.path.basename(url)
+    localFile = os.path.join(directory,filename)
+    if mirrorDir != "":
+        mirrorFile = os.path.join(mirrorDir,filename)
+        if not os.path.isfile(mirrorFile):
+            print("dbPrep_buildPipeline says, WARNING: File",filename,"is not in the mirror directory",mirrorDir)
+            return os.path.isfile(localFile)
+        if not os.path.isfile(localFile) or os.stat(mirrorFile).st_mtime_ns > os.stat(localFile).st_mtime_ns \
+            or os.stat(mirrorFile).st_size != os.stat(localFile).st_size:
+            print("dbPrep_buildPipeline says, Copying",filename,"from mirror directory",mirrorDir)
+            shutil.copy2(mirrorFile,localFile)  # keeps the modification time, so an unchanged file is not checksummed again
+        return True
+    print("dbPrep_buildPipeline says, Downloading",url)
+    result = subprocess.call('wget -N "' + url + '"',shell=True,cwd=directory)
+    if result != 0:
+        print("dbPrep_buildPipeline says, WARNING: Download of",url,"was unsuccessful")
+    return os.path.isfile(localFile)
+
+# Fetch the archives (and their .md5 files) of an NCBI preformatted blast database (e.g., refseq_protein)
+# into directory: copied from the mirror directory if given, otherwise by update_blastdb.pl, which
+# downloads only the archives that have changed. Returns True if any archive is in place
+def fetchBlastDatabase(databaseName,directory,blastPath="",mirrorDir=""):
+    pattern = databaseName + "*.tar.gz*"
+    if mirrorDir != "":
+        mirrorList = expandPatterns(mirrorDir,[pattern])
+        if not mirrorList:
+            print("dbPrep_buildPipeline says, WARNING: No",databaseName,"archives are in the mirror directory",mirrorDir)
+        for filename in mirrorList:
+            fetchFile(os.path.join(mirrorDir,filename),directory,mirrorDir)
+    else:
+        print("dbPrep_buildPipeline says, Downloading",databaseName,"with update_blastdb.pl")
+        result = subprocess.call(blastPath + "update_blastdb.pl " + databaseName,shell=True,cwd=directory)
+        if result != 0:
+            print("dbPrep_buildPipeline says, WARNING: update_blastdb.pl",databaseName,"was unsuccessful; please check the location of your blast executables")
+    return len(expandPatterns(directory,[databaseName + "*.tar.gz"])) > 0
+
+# Run the commands of one build task (a buildTask's parameters), in order, in the task's directory;
+# stops at the first command that fails. Returns (name, success, seconds)
+def runBuildTask(kvargs):
+    startTime = time.time()
+    success = True
+    for command in kvargs["commands"]:
+        if VERBOSE:
+            print("dbPrep_buildPipeline says, Building",kvargs["name"],"; command is",command)
+        result = subprocess.call(command,shell=True,cwd=kvargs["directory"])
+        if result != 0:
+            print("dbPrep_buildPipeline says, WARNING: Building",kvargs["name"],"failed; command was:",command)
+            success = False
+            break
+    return (kvargs["name"],success,time.time() - startTime)
+
+# Run the build tasks on a pool of up to threads processes; in order, one at a time, if threads <= 1.
+# Returns the list of (name, success, seconds), in the order of taskList
+def runBuildTasks(taskList,threads):
+    parameterSets = [task.getParameters() for task in taskList]
+    if threads > 1 and len(parameterSets) > 1:
+        buildPool = Pool(min(threads,len(parameterSets)))
+        results = buildPool.map(runBuildTask,parameterSets)
+        buildPool.close()
+        buildPool.join()
+    else:
+        results = [runBuildTask(parameterSet) for parameterSet in parameterSets]
+    return results
+
+##### CLASSES #############################################################
+
+class buildTask(object):
+
+    def __init__(self):
+        self.name      = ""   # e.g., "VOGs"; key in the manifest
+        self.version   = ""   # e.g., "vog99"; a new version is rebuilt even if its sources look the same
+        self.directory = ""   # directory in which the sources are found and the commands are run
+        self.sources   = []   # glob patterns of source files, relative to directory
+        self.outputs   = []   # glob patterns of files produced by the commands, relative to directory
+        self.commands  = []   # shell commands that build the database from its sources
+
+    def setParameters(self,kvargs):
+        if "name" in kvargs.keys():
+            self.name = kvargs["name"]
+        if "version" in kvargs.keys():
+            self.version = kvargs["version"]
+        if "directory" in kvargs.keys():
+            self.directory = kvargs["directory"]
+        if "sources" in kvargs.keys():
+            self.sources = kvargs["sources"]
+        if "outputs" in kvargs.keys():
+            self.outputs = kvargs["outputs"]
+        if "commands" in kvargs.keys():
+            self.commands = kvargs["commands"]
+        return
+
+    def getParameters(self):
+        return {
+            "name"      : self.name,
+            "version"   : self.version,
+            "directory" : self.directory,
+            "sources"   : self.sources,
+            "outputs"   : self.outputs,
+            "commands"  : self.commands,
+            }
+
+    def getSourceFiles(self):
+        return expandPatterns(self.directory,self.sources)
+
+class manifest(object):
+
+    def __init__(self,dbDir):
+        self.filename = os.path.join(dbDir,MANIFEST_FILENAME)
+        self.entries  = {}  # key=database name, value=manifest entry (see record)
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if os.path.isfile(self.filename):
+            try:
+                MANIFEST_H = open(self.filename,'r')
+                self.entries = json.load(MANIFEST_H)["databases"]
+                MANIFEST_H.close()
+            except (ValueError,KeyError,OSError) as e:
+                print("dbPrep_buildPipeline says, WARNING: Could not read manifest",self.filename,"; all databases will be built:",e)
+                self.entries = {}
+        return
+
+    # Fingerprint each source file of task, reusing the checksums recorded for files that are unchanged in size and date
+    def getSourceFingerprints(self,task):
+        previousFingerprints = {}
+        if task.name in self.entries:
+            previousFingerprints = self.entries[task.name]["sources"]
+        fingerprints = {}
+        for filename in task.getSourceFiles():
+            fingerprints[filename] = fingerprintFile(os.path.join(task.directory,filename),previousFingerprints.get(filename))
+        return fingerprints
+
+    # A task is current if it has been built from the same sources, version, and commands, and its outputs exist
+    def isCurrent(self,task,sourceFingerprints):
+        if task.name not in self.entries or not sourceFingerprints:
+            return False
+        entry = self.entries[task.name]
+        if entry["version"] != task.version or entry["commands"] != task.commands:
+            return False
+        if sorted(entry["sources"].keys()) != sorted(sourceFingerprints.keys()):
+            return False
+        for filename in sourceFingerprints:
+            if entry["sources"][filename]["sha256"] != sourceFingerprints[filename]["sha256"]:
+                return False
+        for pattern in task.outputs:
+            if not expandPatterns(task.directory,[pattern]):
+                return False
+        return True
+
+    def record(self,task,sourceFingerprints):
+        outputs = {}
+        for filename in expandPatterns(task.directory,task.outputs):
+            outputFile = os.path.join(task.directory,filename)
+            fileStat = os.stat(outputFile)
+            outputs[filename] = {
+                "path"     : os.path.abspath(outputFile),
+                "size"     : fileStat.st_size,
+                "mtime_ns" : fileStat.st_mtime_ns,
+                }
+        self.entries[task.name] = {
+            "version"   : task.version,
+            "directory" : os.path.abspath(task.directory),
+            "sources"   : sourceFingerprints,
+            "outputs"   : outputs,
+            "commands"  : task.commands,
+            "built"     : datetime.datetime.now().isoformat(timespec='seconds'),
+            "cacheKey"  : getCacheKey(task.name,task.version,task.commands,sourceFingerprints),
+            }
+        return
+
+    # Write to a temporary file, then move it into place, so that a partial manifest is never read
+    def write(self):
+        tempFile = self.filename + ".tmp"
+        MANIFEST_H = open(tempFile,'w')
+        json.dump({"databases" : self.entries},MANIFEST_H,indent=1,sort_keys=True)
+        MANIFEST_H.write("\n")
+        MANIFEST_H.close()
+        os.replace(tempFile,self.filename)
+        return
@@ -58,8 +58,7 @@ PVOG_LIB_DIR          = PVOG_BASE_DIR + "Allvogtables/"
 
 # Import PhATE Modules
 
-import dbPrep_annotation
-import dbPrep_fastaSequence
+import dbPrep_accessionResolver
 import dbPrep_pVOG
 
 # Open Files
@@ -71,16 +70,6 @@ PVOG_MISSING_PROTEINS_H = open(PVOG_MISSING_PROTEINS, 'w')
 LOG_H                   = open(LOG, 'w')
 LOG_H.write("%s%s\n" % ("Processing began at ",datetime.datetime.now()))
 
-# Capture fastas from ncbi phage fasta file
-
-if CHATTY:
-    print("Reading ncbi phage fasta file")
-ncbiPhageSeqs = dbPrep_fastaSequence.multiFasta()
-fastaLines = NCBI_PHAGE_FAA_H.read().splitlines()
-ncbiPhageSeqs.addFastas(fastaLines,'aa')
-if CHATTY:
-    print("done!")
-
 # Read in the pVOG identifiers and their associated accession numbers
 
 if CHATTY:
@@ -95,48 +84,37 @@ LOG_H.write("%s%s%s\n" % ("There are ",len(pVOGdb.pVOGlist)," pVOGs"))
 accessionCount = pVOGdb.getAccessionCount()
 LOG_H.write("%s%s\n" % ("The total number of accessions is ",accessionCount))
 
-# Visit each pVOG and find the fasta sequence that corresponds to each member accession
-# Modify the header of each identified fasta to reflect its membership in the pVOG cluster
+# Register each pVOG member accession (approx 200k of them), tagged with its pVOG identifier;
+# an accession that is a member of several pVOGs is tagged with each of them
 
-if CHATTY:
-    print("Searching sequences for each pVOG-associated accession")
-
-# Create a fasta object (to be replicated as needed)
-nextFasta = dbPrep_fastaSequence.fasta()
-
-# For each pVOG, get its associated peptide accessions, then
-# Find that fasta in the ncbi database subset, and 
-# Tag the fasta header with the pVOG information
+resolver = dbPrep_accessionResolver.accessionResolver()
 accnCount = 0
 for pVOG in pVOGdb.pVOGlist:
-    foundCount = 0; missingCount = 0; missingList = []
-    for accession in pVOG.accessionList:                            # For each accession (approx 200k of them, members of pVOG groups)
+    for accession in pVOG.accessionList:
         accnCount += 1
-        if CHATTY:
-            print("Processing pVOG", pVOG.pVOGid, "and accession", accession)
-        LOG_H.write("%s%s%s%s\n" % ("Processing pVOG ",pVOG.pVOGid," and accession ",accession))
-        nextFasta = ncbiPhageSeqs.findStringInHeader(accession)     # Search sequence headers in phage/virus database; find this accn, if exists
-        if nextFasta:
-            nextFasta.pVOGassociationList.append(pVOG.pVOGid)       # Record this pVOG association
-            pVOGstring = ""
-            for pVOGidentifier in nextFasta.pVOGassociationList:
-                pVOGstring += pVOGidentifier + '|'                  # Construct new header containing each associated pVOG
-            nextFasta.customHeader = pVOGstring + nextFasta.header  # Update the custom header to reflect multiple pVOG membership
-            if len(nextFasta.pVOGassociationList) > 1:
-                LOG_H.write("%s%s%s%s\n" % ("NOTE: Fasta associated with multiple pVOGs: ", len(nextFasta.pVOGassociationList), "pVOGs:", nextFasta.pVOGassociationList))
-                LOG_H.write("%s%s\n" % ("   header is: ", nextFasta.customHeader))
-            foundCount += 1
-        else:
-            if accession not in missingList:
-                missingList.append(accession)
-                missingCount += 1
-                PVOG_MISSING_PROTEINS_H.write("%s%s\n" % ("No pVOG found for accession ", accession))
-if CHATTY:
-    print("pVOG accession sequences have been tagged")
-# Write the pVOG-tagged fastas to file
+        if DEBUG:
+            LOG_H.write("%s%s%s%s\n" % ("Processing pVOG ",pVOG.pVOGid," and accession ",accession))
+        resolver.addAccession(accession,pVOG.pVOGid)
+
+# In one pass over the ncbi phage fasta file, find the fasta sequence that corresponds to each
+# member accession, and write it with its header tagged with the pVOG(s) of which it is a member
+
 if CHATTY:
-    print("Writing pVOG-tagged fasta sequences to file")
-ncbiPhageSeqs.printMultiFasta2file_custom(PVOG_TAGGED_PROTEINS_H)
+    print("Searching ncbi phage fasta file for pVOG-associated accessions; writing pVOG-tagged fasta sequences to file")
+foundCount = 0
+for (header,sequence,pVOGassociationList) in resolver.resolve(NCBI_PHAGE_FAA_H):
+    pVOGstring = ""
+    for pVOGidentifier in pVOGassociationList:
+        pVOGstring += pVOGidentifier + '|'                      # Construct new header containing each associated pVOG
+    customHeader = pVOGstring + header
+    if len(pVOGassociationList) > 1:
+        LOG_H.write("%s%s%s%s\n" % ("NOTE: Fasta associated with multiple pVOGs: ", len(pVOGassociationList), "pVOGs:", pVOGassociationList))
+        LOG_H.write("%s%s\n" % ("   header is: ", customHeader))
+    PVOG_TAGGED_PROTEINS_H.write("%s%s\n%s\n" % ('>',customHeader,sequence.lower()))
+    foundCount += 1
+for accession in resolver.getMissingAccessions():
+    PVOG_MISSING_PROTEINS_H.write("%s%s\n" % ("No pVOG found for accession ", accession))
+missingCount = resolver.getMissingCount()
 if CHATTY:
     print("done!")
 
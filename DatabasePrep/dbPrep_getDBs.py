@@ -5,10 +5,20 @@
 #
 # programmer:  C. E. Zhou
 #
-# Most recent update:  19 October 2020
+# Most recent update:  18 October 2026
 #
 # Summary:  This script facilitates the downloading of databases to be used with multiPhATE.
 #
+# Usage:  python dbPrep_getDBs.py [-mirror <directory>] [-threads <n|ALL>] [-force]
+#    -mirror:   copy source files from a local directory holding the downloaded files, instead of
+#               downloading them (for working offline); may also be set by env dbPrep_MIRROR_DIR
+#    -threads:  number of databases to build concurrently (default: all available cpus)
+#    -force:    rebuild the selected databases even if their source files are unchanged
+#
+# Source files are fingerprinted, and a database is rebuilt only if its sources, version, or build
+#    commands have changed since it was last built. Database versions and checksums are recorded in
+#    Databases/dbPrep_manifest.json (see dbPrep_buildPipeline.py).
+#
 # Programmer's Notes:
 # 1) update_blastdb.pl --showall <to see which databases are available>
 #
@@ -18,6 +28,7 @@
 # THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.pdf FOR DETAILS.
 
 import os, sys, re, time, datetime
+import dbPrep_buildPipeline
 #from ftplib import FTP
 from pathlib import Path
 
@@ -32,9 +43,41 @@ REMOTE = False
 # Verbose will write voluminous progress to console, keeping user process non-idle during long computations.
 VERBOSE = False 
 
+# Build control; see Usage above
+MIRROR_DIR    = os.environ.get("dbPrep_MIRROR_DIR","")  # local directory holding copies of the source files
+BUILD_THREADS = os.cpu_count()                          # number of databases to build concurrently
+FORCE_BUILD   = False                                   # rebuild databases even if their sources are unchanged
+
 CODE_BASE = "dbPrep_getDBs"
 CODE_NAME = CODE_BASE + ".py"
 
+# Read command-line options
+arguments = sys.argv[1:]
+while arguments:
+    argument = arguments.pop(0)
+    if argument == "-mirror" and arguments:
+        MIRROR_DIR = arguments.pop(0)
+    elif argument == "-threads" and arguments:
+        threads = arguments.pop(0)
+        if threads.lower() == 'all':
+            BUILD_THREADS = os.cpu_count()
+        elif threads.isdigit() and int(threads) > 0:
+            BUILD_THREADS = int(threads)
+        else:
+            print ("WARNING: Invalid -threads value,",threads,"; using",BUILD_THREADS)
+    elif argument == "-force":
+        FORCE_BUILD = True
+    else:
+        print ("Usage: python " + CODE_NAME + " [-mirror <directory>] [-threads <n|ALL>] [-force]")
+        exit()
+if MIRROR_DIR != "":
+    if os.path.isdir(MIRROR_DIR):
+        MIRROR_DIR = os.path.abspath(MIRROR_DIR)
+        print ("Source files will be copied from local mirror directory",MIRROR_DIR)
+    else:
+        print ("ERROR: Mirror directory",MIRROR_DIR,"does not exist")
+        exit()
+
 # OPEN LOG FILES
 # Open Log file
 logFile = './' + CODE_BASE + '.log'
@@ -172,8 +215,9 @@ vogHmms_filename                 = "vog.hmm.tar.gz"
 vogHmms_filename_tar             = "vog.hmm.tar"
 vogMembers_filename              = "vog.members.tsv.gz"
 vogFunctionalCategories_filename = "vog_functional_categories.txt"
-pvogHmms_filename                = "pvog.hmm.tar.gz"
-pvogHmms_filename_tar            = "pvog.hmm.tar"
+pvogHmms_filename                = "AllvogHMMprofiles.tar.gz"
+pvogHmms_filename_tar            = "AllvogHMMprofiles.tar"
+pvogHmmsSubDir                   = "AllvogHMMprofiles"
 
 # Filenames for processed data
 ncbiVirusGenomes                 = "ncbiVirusGenomes.fasta"
@@ -181,11 +225,15 @@ ncbiVirusProteins                = "ncbiVirusProteins.faa"
 refseqProteins                   = "refseq_protein"
 swissprotProteins                = "swissprot"
 nrProteins                       = "nr"
-phantomeProteins                 = "Phantome_Phage_Genes.faa"
+phantomeProteins                 = "Phantome_Phage_genes.faa"
+phantomeHeaders                  = "Phantome_Phage_genes.faa.headers"
 pvogProteins                     = "pVOGs.faa"
+pvogHeaders                      = "pVOGs.headers.lst"
 pvogProteinHmms                  = "AllvogHMMprofiles/PVOGsHmmProfilesDB.hmm"
 vogGenes                         = "vog.genes.tagged.all.fa"
 vogProteins                      = "vog.proteins.tagged.all.fa"
+vogGeneHeaders                   = "vog.gene.headers.lst"
+vogProteinHeaders                = "vog.protein.headers.lst"
 vogProteinHmms                   = "VOGsHmmProfilesDB.hmm"
 
 # Create database directories, if they don't already exist
@@ -508,764 +556,247 @@ elif INTERACTIVE:
 
 ##############################################################################
 ##############################################################################
-
-# Install NCBI_VIRUS_GENOME
+# Fetch the source files of each selected database, then build the databases whose sources have
+# changed since they were last built (see dbPrep_buildPipeline.py). Downloaded archives are kept,
+# so that they can be fingerprinted and so that unchanged files are not downloaded again.
+
+myManifest = dbPrep_buildPipeline.manifest(dbDir)
+taskList   = []   # build tasks of the selected databases
+
+# Each task is given as parameters for a dbPrep_buildPipeline.buildTask
+def addTask(kvargs):
+    task = dbPrep_buildPipeline.buildTask()
+    task.setParameters(kvargs)
+    taskList.append(task)
+
+# Commands to extract each file in an archive's directories, and concatenate them into one fasta file
+def concatenateArchiveCommands(archive,fastaFile,excludeDir=""):
+    commands = [
+        "rm -rf Download/unpacked && mkdir Download/unpacked",
+        "tar -xzf Download/" + archive + " -C Download/unpacked",
+        ]
+    if excludeDir != "":
+        commands.append("rm -rf Download/unpacked/" + excludeDir)
+    commands.append("find Download/unpacked -mindepth 2 -type f -print0 | sort -z | xargs -0 cat > " + fastaFile)
+    commands.append("rm -rf Download/unpacked")
+    return commands
+
+# Commands to concatenate the hmm files (named *VOG*) under directory, and format them for hmmscan
+def pressHmmsCommands(directory,hmmFile):
+    tempFile = os.path.basename(hmmFile) + ".tmp"  # kept out of directory, so it is not taken for an hmm file
+    return [
+        "find " + directory + " -type f -name '*VOG*' -print0 | sort -z | xargs -0 cat > " + tempFile,
+        "find " + directory + " -type f -name '*VOG*' -delete",
+        "mv " + tempFile + " " + hmmFile,
+        "hmmpress -f " + hmmFile + " || (hmmconvert " + hmmFile + " > " + hmmFile + ".tmp && mv " + hmmFile + ".tmp " + hmmFile + " && hmmpress -f " + hmmFile + ")",
+        "rm " + hmmFile,
+        ]
+
+# Commands to unpack the archives of an NCBI preformatted blast database
+def unpackBlastDatabaseCommands(databaseName):
+    return ["for archive in " + databaseName + "*.tar.gz; do gunzip -c $archive | tar xopf - || exit 1; done"]
 
 if NCBI_VIRUS_GENOME:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NCBI VIRUS GENOME download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(ncbiGenomeDownloadDir)
-
-    # Download directories containing virus genome fasta files
-    try:
-        print ("Downloading NCBI Genome fasta files.")
-        print ("This may take a while...")
-        command = "wget " + virGenome_httpAddr
-        success = os.system(command)
-    except:
-        print ("WARNING: Command " + command + " failed.")
-
-    # Untar the file
-    try:
-        print ("Uncompressing downloaded file, ",virGenomeFile_gz)
-        command = "gunzip " + virGenomeFile_gz
-        success = os.system(command)
-        print ("gunzip success: ",success)
-        command = "tar -xvf " + virGenomeFile_tar
-        success = os.system(command)
-        print ("tar success: ",success)
-    except:
-        print ("WARNING: Uncompression of genome fasta file was unsuccessful.")
-
-    # Read in a list of the directories
-    try:
-        print ("Listing directories and concatenating fasta files.")
-        dirList = os.listdir(r'./')
-        for directory in dirList:
-            if os.path.isdir(directory):
-                command = "ls " + directory + " > ./fileList.out"
-                success = os.system(command)
-                if os.path.isfile("./fileList.out"):
-                    FILELIST_H = open("./fileList.out",'r')
-                    fLines = FILELIST_H.read().splitlines()
-                    for fLine in fLines:
-                        nextFile = os.path.join(directory,fLine)
-                        command = "cat " + nextFile + " >> " + ncbiVirusGenomes
-                        success = os.system(command)
-                        command = "rm " + nextFile  # Remove file once we are done with it
-                        success = os.system(command)
-                else:
-                    print ("Problem with fileList.out")
-                command = "rmdir " + directory  # Remove directory once we are done with it
-                success = os.system(command)
-        print ("Concatenation is complete!")
-    except:
-        print ("WARNING: Concatenation failed.")
-
-    # Move consolidated fasta file up one directory
-    try:
-        print ("Moving ",ncbiVirusGenomes," to ",ncbiGenomeDir," directory")
-        command = "mv ./ncbiVirusGenomes.fasta ../."
-        success = os.system(command)
-    except:
-        print ("WARNING: Cannot move ncbiVirusGenomes.fastaile to directory ",ncbiGenomeDir)
-
-    # Before leaving the Download directory, remove the ncbi downloaded file
-    try:
-        print ("Removing the NCBI Virus Genome compressed file that we downloaded.")
-        command = "rm " + virGenomeFile_tar
-        success = os.system(command)
-        command = "rm fileList.out"
-        success = os.system(command)
-    except:
-        print ("WARNING: Problem removing ",ncbiVirusGenomes," or fileList.out file.")
-
-    os.chdir(ncbiGenomeDir)  # Change to NCBI/Virus_Genome directory
-
-    # Download the accession2taxid file
-    try:
-        print ("Downloading the accession2taxid file from ",accn2taxid_fileAddr)
-        command = "wget " + accn2taxid_fileAddr
-        success = os.system(command)
-    except:
-        print ("WARNING: Download of the accession2taxid file failed.")
-
-    try:
-        print ("Unpacking accession2taxid.")
-        command = "gunzip " + accn2taxid_file_gz
-        success = os.system(command)
-        print ("accn2taxid file has been unzipped.")
-    except:
-        print ("WARNING: Unpacking of accession2taxid failed.")
-
-    # Finally, format the Virus Genome database for blast
-    try:
-        print ("Formatting Virus Genome database for blast.")
-        command = "makeblastdb -dbtype nucl -in " + ncbiVirusGenomes
-        success = os.system(command)
-        print ("Formatting complete.")
-    except:
-        print ("WARNING: Formatting of Virus Genome database for blast failed.")
-
-    # And last but not least, remove the Download directory
-    try:
-        print ("Removing the Download/ directory.")
-        command = "rmdir Download/"
-        success = os.system(command)
-    except:
-        print ("WARNING: Cound not remove the Download/ directory.")
-
-    os.chdir(cwd)  # Return to home directory
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NCBI Virus Genome download finish processing at ",myTime))
-    LOG_H.flush()
-
-##############################################################################
-# Install NCBI VIRUS PROTEIN database
+    print ("Fetching NCBI Virus Genome fasta files and the accession2taxid file.")
+    dbPrep_buildPipeline.fetchFile(virGenome_httpAddr,ncbiGenomeDownloadDir,MIRROR_DIR)
+    addTask({
+        "name"      : "NCBI_Virus_Genome",
+        "directory" : ncbiGenomeDir,
+        "sources"   : [os.path.join("Download",virGenomeFile_gz)],
+        "outputs"   : [ncbiVirusGenomes,ncbiVirusGenomes + ".nin"],
+        "commands"  : concatenateArchiveCommands(virGenomeFile_gz,ncbiVirusGenomes) + [
+            blastPath + "makeblastdb -dbtype nucl -in " + ncbiVirusGenomes,
+            ],
+        })
+    # Index the accession2taxid file, so taxonomy lookups need not scan it
+    dbPrep_buildPipeline.fetchFile(accn2taxid_fileAddr,ncbiGenomeDir,MIRROR_DIR)
+    addTask({
+        "name"      : "NCBI_accession2taxid",
+        "directory" : ncbiGenomeDir,
+        "sources"   : [accn2taxid_file_gz],
+        "outputs"   : [accn2taxid_file + ".sqlite"],
+        "commands"  : [
+            "gunzip -c " + accn2taxid_file_gz + " > " + accn2taxid_file,
+            "python3 " + os.path.join(cwd,"dbPrep_taxonIndex.py") + " " + accn2taxid_file,
+            ],
+        })
 
 if NCBI_VIRUS_PROTEIN:
-
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NCBI Virus Protein download begin processing at ",myTime))
-    LOG_H.flush()
- 
-    os.chdir(ncbiProteinDownloadDir)
-
-    # Download directories containing virus peptide fasta files
-    try:
-        print ("Downloading NCBI Virus peptide fasta files.")
-        print ("This may take a while...")
-        command = "wget " + virProtein_httpAddr
-        success = os.system(command)
-    except:
-        print ("WARNING: Command " + command + " failed.")
-
-    # Uncompress the downloaded file
-    try:
-        print ("Uncompressing NCBI Virus Protein gz file.")
-        command = "gunzip " + virProteinFile_gz
-        success = os.system(command)
-        command = "tar -xvf " + virProteinFile_tar
-        success = os.system(command)
-        print ("Virus protein data is now uncompressed.")
-    except:
-        print ("WARNING: Uncompression of file failed.")
-
-    # Remove the DBV/ directory from download
-    # This appears to hold peptides from raw Prokka gene-call predictions
-    try:
-        print ("Removing the DBV/ subdirectory, which we do not need.")
-        command = "rm -r DBV/"
-        success = os.system(command)
-        print ("DBV/ has been removed.")
-    except:
-        print ("WARNING: DBV directory removal failed.")
-
-    # Read in a list of the directories
-    try:
-        print ("Listing directories and concatenating fasta files.")
-        dirList = os.listdir(r'./')
-        for directory in dirList:
-            if os.path.isdir(directory):
-                command = "ls " + directory + " > ./fileList.out"
-                success = os.system(command)
-                if os.path.isfile("./fileList.out"):
-                    FILELIST_H = open("./fileList.out",'r')
-                    fLines = FILELIST_H.read().splitlines()
-                    for fLine in fLines:
-                        nextFile = os.path.join(directory,fLine)
-                        command = "cat " + nextFile + " >> " + ncbiVirusProteins
-                        success = os.system(command)
-                        command = "rm " + nextFile  # Remove file once done with it
-                        success = os.system(command)
-                else:
-                    print ("Problem with fileLine.out")
-                command = "rmdir " + directory  # Remove directory once done with it
-                success = os.system(command)  
-        print ("Concatenation is complete!")
-    except:
-        print ("WARNING: Listing and concatenating files failed.")
-
-    # Move consolidated fasta file up one directory
-    try:
-        print ("Moving ",ncbiVirusProteins," to ",ncbiProteinDir," directory")
-        command = "mv ./ncbiVirusProteins.faa ../."
-        success = os.system(command)
-    except:
-        print ("WARNING: Cannot move ncbiVirusProteins.faa file to directory ",ncbiProteinDir)
-   
-    # Before leaving the Download directory, remove the ncbi downloaded file
-    try:
-        print ("Removing the NCBI Virus Genome compressed file that we downloaded.")
-        command = "rm " + virProteinFile_tar
-        success = os.system(command)
-        command = "rm fileList.out"
-        success = os.system(command)
-        command = "rm ls.out"
-        success = os.system(command)
-    except:
-        print ("WARNING: Problem removing ",ncbiVirusProteins," or fileList.out file.")
-
-    os.chdir(ncbiProteinDir)  # Change to NCBI/Virus_Protein directory
-
-    # Finally, format the Virus Protein database for blast
-    try:
-        print ("Formatting Virus Protein database for blast.")
-        command = "makeblastdb -dbtype prot -in " + ncbiVirusProteins
-        success = os.system(command)
-        print ("Formatting complete.")
-    except:
-        print ("WARNING: Formatting of Virus Protein database for blast failed.")
-
-    # And last but not least, remove the Download directory
-    try:
-        print ("Removing the Download/ directory.")
-        command = "rmdir Download/"
-        success = os.system(command)
-    except:
-        print ("WARNING: Cound not remove the Download/ directory.")
-
-    os.chdir(cwd)  # Return to home directory
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NCBI Virus Protein download finish processing at ",myTime))
-    LOG_H.flush()
-
-##############################################################################
-# Install REFSEQ PROTEIN database
+    print ("Fetching NCBI Virus Protein fasta files.")
+    dbPrep_buildPipeline.fetchFile(virProtein_httpAddr,ncbiProteinDownloadDir,MIRROR_DIR)
+    # The DBV/ directory holds peptides from raw Prokka gene-call predictions, which we do not need
+    addTask({
+        "name"      : "NCBI_Virus_Protein",
+        "directory" : ncbiProteinDir,
+        "sources"   : [os.path.join("Download",virProteinFile_gz)],
+        "outputs"   : [ncbiVirusProteins,ncbiVirusProteins + ".pin"],
+        "commands"  : concatenateArchiveCommands(virProteinFile_gz,ncbiVirusProteins,"DBV") + [
+            blastPath + "makeblastdb -dbtype prot -in " + ncbiVirusProteins,
+            ],
+        })
 
 if REFSEQ_PROTEIN:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("REFSEQ PROTEIN download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(refseqProteinDir)
- 
-    filename_root = "refseq_protein"
-    try:
-        print ("Downloading NCBI Refseq Protein database.")
-        print ("This may take a while...")
-        command = blastPath + "update_blastdb.pl" + ' ' + "refseq_protein"
-        success = os.system(command)
-        print ("NCBI Refseq Protein database download complete.")
-    except BlastError:  
-        print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    print ("Unpacking files...")
-    try:
-        command = "ls > ls.out"
-        success = os.system(command)
-        ls_h = open("ls.out",'r')
-        files = ls_h.read().splitlines()
-        for filename in files:
-            if not re.search('md5', filename):
-                command = "gunzip -c " + filename + " | tar xopf -"
-                success = os.system(command)
-        ls_h.close()
-    except Exception:
-        print ("WARNING: Error encountered in unpacking files")
-
-    # Clean up direcgtory
-    try:
-        print ("Cleaning up directory")
-        command = "rm ls.out"
-        success = os.system(command)
-        command = "rm *tar.gz*"
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not remove unneeded files.")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("REFSEQ PROTEIN download finish processing at ",myTime))
-    LOG_H.flush()
-
-##############################################################################
-# Install SWISSPROT database
+    print ("Fetching NCBI Refseq Protein database; this may take a while...")
+    dbPrep_buildPipeline.fetchBlastDatabase(refseqProteins,refseqProteinDir,blastPath,MIRROR_DIR)
+    addTask({
+        "name"      : "Refseq_Protein",
+        "directory" : refseqProteinDir,
+        "sources"   : [refseqProteins + "*.tar.gz"],
+        "outputs"   : [refseqProteins + "*.pin"],
+        "commands"  : unpackBlastDatabaseCommands(refseqProteins),
+        })
 
 if SWISSPROT:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Swissprot download begin processing at ",myTime))
-    LOG_H.flush()
- 
-    os.chdir(swissprotDir)
-
-    try:
-        print("Downloading Swissprot fasta sequences")
-        command = "wget " + swissprotUniprot_httpAddr
-        success = os.system(command)
-    except:
-        print("WARNING: Download of Swissprot fasta sequences failed.")
-
-    try:
-        command = "gunzip " + swissprotDBfile_gz
-        success = os.system(command)
-    except:
-        print("WARNING: Could not unzip swissprot fasta file.")
-
-    # Rename the swissprot fasta files
-    try:
-        command = "mv " + swissprotDBfile + ' ' + swissprotFastaFilename
-        success = os.system(command)
-    except:
-        print("WARNING: Cound not rename swissprot fasta file.")
-
-    # Download the swissprot blast database (already formatted)
-    try:
-        print ("Downloading Swissprot blast database.")
-        print ("This may take a while...")
-        command = blastPath + "update_blastdb.pl" + ' ' + "swissprot"
-        success = os.system(command)
-        print ("Swissprot database download complete.")
-    except BlastError:
-        print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    print ("Unpacking files...")
-    try:
-        command = "ls > ls.out"
-        success = os.system(command)
-        ls_h = open("ls.out",'r')
-        files = ls_h.read().splitlines()
-        for filename in files:
-            if not re.search('md5', filename) and not re.search('ls\.out', filename):
-                command = "gunzip -c " + filename + " | tar xopf -"
-                success = os.system(command)
-        ls_h.close()
-    except Exception:
-        print ("WARNING: Error encountered in unpacking files")
-
-    # Remove unneeded files
-    try:
-        print ("Removing unneeded files.")
-        command = "rm *tar.gz*"
-        success = os.system(command)
-        command = "rm ls.out"
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not remove unneeded files.")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Swissprot download finish processing at ",myTime))
-    LOG_H.flush()
-
-##############################################################################
-# Install NR database
+    print ("Fetching Swissprot fasta sequences and blast database.")
+    dbPrep_buildPipeline.fetchFile(swissprotUniprot_httpAddr,swissprotDir,MIRROR_DIR)
+    dbPrep_buildPipeline.fetchBlastDatabase(swissprotProteins,swissprotDir,blastPath,MIRROR_DIR)
+    addTask({
+        "name"      : "Swissprot",
+        "directory" : swissprotDir,
+        "sources"   : [swissprotDBfile_gz,swissprotProteins + "*.tar.gz"],
+        "outputs"   : [swissprotFastaFilename,swissprotProteins + "*.pin"],
+        "commands"  : ["gunzip -c " + swissprotDBfile_gz + " > " + swissprotFastaFilename] + unpackBlastDatabaseCommands(swissprotProteins),
+        })
 
 if NR:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NR download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(nrDir)
-
-    # Download NR database and format for blast
-    try:
-        print ("Downloading NR database.")
-        print ("This may take a long time...")
-        command = blastPath + "update_blastdb.pl --decompress nr"
-        success = os.system(command)
-        print ("NR database download complete.")
-    except BlastError:
-        print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    # Clean up
-    try:
-        print ("Cleaning up directory.")
-        command = "rm *tar.gz*"
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not remove unneeded files.")
+    print ("Fetching NR database; this may take a long time...")
+    dbPrep_buildPipeline.fetchBlastDatabase(nrProteins,nrDir,blastPath,MIRROR_DIR)
+    addTask({
+        "name"      : "NR",
+        "directory" : nrDir,
+        "sources"   : [nrProteins + "*.tar.gz"],
+        "outputs"   : [nrProteins + "*.pin"],
+        "commands"  : unpackBlastDatabaseCommands(nrProteins),
+        })
 
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("NR download finish processing at ",myTime))
-    LOG_H.flush()
- 
-    os.chdir(cwd)
-
-##############################################################################
-# Install VOG databases
-# 
 if VOGS:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Vogs download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(VOGsDir)
-
-    # First, download the sequences
-    OK2FORMAT4VOG = False
-    MEMBERS = False; ANNOTATIONS = False
-    GENES   = False; PROTEINS    = False
-    CATEGORIES  = False
-    try:
-        print ("Downloading and unzipping VOGS database files.")
-        try:
-            command = 'wget -O ' + vogMembers_filename + ' "' + VOG_DOWNLOAD_URL + vogMembers_filename + '"' 
-            success = os.system(command)
-            command = 'gunzip ' + vogMembers_filename
-            success = os.system(command)
-            MEMBERS = True
-        except:
-            print ("WARNING: Download of vog members file unsuccessful")
-
-        try:
-            command = 'wget -O ' + vogAnnotations_filename + ' "' + VOG_DOWNLOAD_URL + vogAnnotations_filename + '"'
-            success = os.system(command)
-            command = 'gunzip ' + vogAnnotations_filename
-            success = os.system(command)
-            ANNOTATIONS = True
-        except:
-            print ("WARNING: Download of vog annotations file unsuccessful")
-
-        try:
-            command = 'wget -O ' + vogGenes_filename + ' "' + VOG_DOWNLOAD_URL + vogGenes_filename + '"'
-            success = os.system(command)
-            command = 'gunzip ' + vogGenes_filename
-            success = os.system(command)
-            GENES = True
-        except:
-            print ("WARNING: Download of vog genes fasta file unsuccessful")
-
-        try:
-            command = 'wget -O ' + vogProteins_filename + ' "' + VOG_DOWNLOAD_URL + vogProteins_filename + '"'
-            success = os.system(command)
-            command = 'gunzip ' + vogProteins_filename
-            success = os.system(command)
-            PROTEINS = True
-        except:
-            print ("WARNING: Download of vog proteins fasta file unsuccessful")
-
-        try:
-            command = 'wget -O ' + vogFunctionalCategories_filename + ' "' + VOG_DOWNLOAD_URL + vogFunctionalCategories_filename + '"'
-            success = os.system(command)
-            CATEGORIES = True
-        except:
-            print ("WARNING: Download of vog members file unsuccessful")
-
-        if MEMBERS and ANNOTATIONS and GENES and PROTEINS and CATEGORIES:
-            print ("VOGS database files download complete.")
-            OK2FORMAT4VOG = True
-        else:
-            print ("WARNING: Not all data files were successfully downloaded.")
-    except:
-        print("WARNING: Downloading of VOG file(s) failed") 
-
-    # Next, reformat sequence headers with VOG identifiers
-    OK2FORMAT4BLAST = False
-    os.chdir(cwd)
-    if OK2FORMAT4VOG:
-        try:
-            # The dbPrep_vogTagFastas.py code will tag gene and protein sequence headers
-            print ("Reformatting sequence headers with VOG identifiers.")
-            print ("This may take a long time (perhap hours).")
-            try:
-                command = "python3 dbPrep_vogTagFastas.py " + VOGsDir 
-                success = os.system(command)
-                OK2FORMAT4BLAST = True
-            except:
-                command = "python dbPrep_vogTagFastas.py " + VOGsDir
-                success = os.system(command)
-                OK2FORMAT4BLAST = True
-        except:
-            print ("WARNING: Reformatting of sequence headers unsuccessful.")
-    os.chdir(VOGsDir)
-
-    # Last, format the sequences for blast
-    if OK2FORMAT4BLAST:
-        try:
-            print ("Formatting VOGs protein database for blast.")
-            command = blastPath + "makeblastdb -dbtype prot -in vog.proteins.tagged.all.fa"
-            success = os.system(command)
-            print ("done")
-        except BlastError:
-            print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-        try:
-            print ("Formatting VOGs gene database for blast.")
-            command = blastPath + "makeblastdb -dbtype nucl -in vog.genes.tagged.all.fa"
-            success = os.system(command)
-            print ("done")
-        except BlastError:
-            print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Vogs download finish processing at ",myTime))
-    LOG_H.flush()
-
-##### Install VOG HMMS
+    print ("Fetching VOGs database files.")
+    vogFileList = [vogMembers_filename,vogAnnotations_filename,vogGenes_filename,vogProteins_filename,vogFunctionalCategories_filename]
+    for vogFile in vogFileList:
+        if not dbPrep_buildPipeline.fetchFile(VOG_DOWNLOAD_URL + vogFile,VOGsDir,MIRROR_DIR):
+            print ("WARNING: Download of VOG file",vogFile,"unsuccessful")
+    # The dbPrep_vogTagFastas.py code tags gene and protein sequence headers with VOG identifiers
+    addTask({
+        "name"      : "VOGs",
+        "version"   : "vog" + VOG_VERSION,
+        "directory" : VOGsDir,
+        "sources"   : vogFileList,
+        "outputs"   : [vogGenes,vogProteins,vogGenes + ".nin",vogProteins + ".pin",vogGeneHeaders,vogProteinHeaders],
+        "commands"  : [
+            "gunzip -c " + vogMembers_filename     + " > " + vogMembers_filename[:-3],
+            "gunzip -c " + vogAnnotations_filename + " > " + vogAnnotations_filename[:-3],
+            "gunzip -c " + vogGenes_filename       + " > " + vogGenes_filename[:-3],
+            "gunzip -c " + vogProteins_filename    + " > " + vogProteins_filename[:-3],
+            "python3 " + os.path.join(cwd,"dbPrep_vogTagFastas.py") + " " + VOGsDir,
+            blastPath + "makeblastdb -dbtype prot -in " + vogProteins,
+            blastPath + "makeblastdb -dbtype nucl -in " + vogGenes,
+            "grep '>' " + vogGenes    + " > " + vogGeneHeaders,
+            "grep '>' " + vogProteins + " > " + vogProteinHeaders,
+            ],
+        })
 
 if VOG_HMMS:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Vog Hmms download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(VOGhmmsDir)
-
-    # Download VOG Hmms, unpack, concatenate, and format for hmm search
-    try:
-        command = 'wget -O ' + vogHmms_filename + ' "' + VOG_DOWNLOAD_URL + vogHmms_filename + '"'
-        success = os.system(command)
-        command = 'gunzip ' + vogHmms_filename
-        success = os.system(command)
-        command = 'tar -xvf ' + vogHmms_filename_tar
-        success = os.system(command)
-        HMMS = True
-    except:
-        print ("WARNING: Download of vog hmms file unsuccessful")
-
-    if HMMS:
-        try:
-            print ("Concatenating individual hmm files into one.")
-            command = "ls > ./fileList.out"
-            success = os.system(command)
-            FILELIST_H = open("fileList.out",'r')
-            fLines = FILELIST_H.read().splitlines()
-            for fLine in fLines:
-                if os.path.isfile(fLine):
-                    print ("Processing fLine ",fLine)
-                    match = re.search("VOG",fLine)
-                    if match:
-                        command = "cat " + fLine + " >> VOGsHmmProfilesDB.hmm"
-                        success = os.system(command)
-                        command = "rm " + fLine
-                        success = os.system(command)
-                else:
-                    print ("Next item is not a file:",fLine)
-            print ("Concatenation is complete.")
-        except:
-            print ("WARNING: Concatenation failed.")
-       
-        # Format VOG HMMs
-        try:
-            try:
-                print ("Formatting VOG HMM file.")
-                command = "hmmpress VOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                print ("Formatting complete.")
-            except:
-                command = "hmmconvert VOGsHmmProfilesDB.hmm VOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                command = "hmmpress VOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                print ("Formatting complete.")
-        except:
-            print ("WARNING: Formatting of VOG HMM file unsuccessful.")
-
-        # Clean up the directory
-        try:
-            print ("Cleaning up unneeded files from the directory.")
-            command = "rm fileList.out"
-            success = os.system(command)
-            command = "rm vog.hmm.tar"
-            success = os.system(command)
-            command = "rm VOGsHmmProfilesDB.hmm"
-            success = os.system(command)
-            print ("Directory cleanup completed.")
-        except:
-            print ("WARNING: Something went wrong cleaning up the VOG HMM directory.")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Vog Hmms download finish processing at ",myTime))
-    LOG_H.flush()
-
-##############################################################################
-# Prepare PVOG HMMs
+    print ("Fetching VOG HMMs.")
+    dbPrep_buildPipeline.fetchFile(VOG_DOWNLOAD_URL + vogHmms_filename,VOGhmmsDir,MIRROR_DIR)
+    addTask({
+        "name"      : "VOG_HMMs",
+        "version"   : "vog" + VOG_VERSION,
+        "directory" : VOGhmmsDir,
+        "sources"   : [vogHmms_filename],
+        "outputs"   : [vogProteinHmms + ".h3m"],
+        "commands"  : ["rm -rf unpacked && mkdir unpacked && tar -xzf " + vogHmms_filename + " -C unpacked"] +
+            pressHmmsCommands("unpacked",vogProteinHmms) + ["rm -rf unpacked"],
+        })
 
 if PVOG_HMMS:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("pVog Hmms download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(pVOGhmmsDir)
-
-    # Download Pvog Hmms, unpack, concatenate, and format for hmm search
-    HMMS = False
-    try:
-        print ("Downloading PVOG HMM profiles file.")
-        command = 'wget "' + pvogHmm_httpAddr + '"'
-        success = os.system(command)
-        print ("gunzip")
-        command = 'gunzip AllvogHMMprofiles.tar.gz'
-        success = os.system(command)
-        print ("tar")
-        command = 'tar -xvf AllvogHMMprofiles.tar'
-        success = os.system(command)
-        HMMS = True
-    except:
-        print ("WARNING: Download of PVOG HMM Profiles database unsuccessful.")
-  
-    if HMMS:
-        pVOGhmmsSubDir = "AllvogHMMprofiles/"
-        os.chdir(pVOGhmmsSubDir)
-        try:
-            print ("Concatenating individual hmm files into one.")
-            command = "ls > ./fileList.out"
-            success = os.system(command)
-            FILELIST_H = open("fileList.out",'r')
-            fLines = FILELIST_H.read().splitlines()
-            for fLine in fLines:
-                if os.path.isfile(fLine):
-                    print ("Processing fLine ",fLine)
-                    match = re.search("VOG",fLine)
-                    if match:
-                        command = "cat " + fLine + " >> PVOGsHmmProfilesDB.hmm"
-                        success = os.system(command)
-                        command = "rm " + fLine
-                        success = os.system(command)
-                else:
-                    print ("Next item is not a file:",fLine)
-            print ("Concatenation is complete.")
-        except:
-            print ("WARNING: Concatenation failed.")
-
-        # Format PVOG HMMs
-        try:
-            try:
-                print ("Formatting PVOG HMM file.")
-                command = "hmmpress PVOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                print ("Formatting complete.")
-            except:  # Could be older format
-                command = "hmmconvert PVOGsHmmProfilesDB.hmm PVOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                command = "hmmpress PVOGsHmmProfilesDB.hmm"
-                success = os.system(command)
-                print ("Formatting complete.")
-        except:
-            print ("WARNING: Cound not format PVOG HMM file")
-
-        # Clean up the directory
-        try:
-            print ("Cleaning up unneeded files from the directory.")
-            command = "rm fileList.out"
-            success = os.system(command)
-            command = "rm PVOGsHmmProfilesDB.hmm"
-            success = os.system(command)
-            print ("Directory cleanup completed.")
-        except:
-            print ("WARNING: Something went wrong cleaning up the VOG HMM directory.")
-
-        os.chdir(pVOGhmmsDir)
-
-        # Clean up directory
-        try:
-            print ("Removing file(s) no longer needed.")
-            command = "rm AllvogHMMprofiles.tar"
-            success = os.system(command)
-            print ("Cleanup successful.")
-        except:
-            print ("WARNING: Could not clean up pVOGhmms dir")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Pvog Hmms downloading finish processing at ",myTime))
-    LOG_H.flush()
-
-################
-# Download and format CAZy sequence database and associated files
+    print ("Fetching PVOG HMM profiles.")
+    dbPrep_buildPipeline.fetchFile(pvogHmm_httpAddr,pVOGhmmsDir,MIRROR_DIR)
+    addTask({
+        "name"      : "pVOG_HMMs",
+        "directory" : pVOGhmmsDir,
+        "sources"   : [pvogHmms_filename],
+        "outputs"   : [pvogProteinHmms + ".h3m"],
+        "commands"  : ["rm -rf " + pvogHmmsSubDir + " && tar -xzf " + pvogHmms_filename] + pressHmmsCommands(pvogHmmsSubDir,pvogProteinHmms),
+        })
 
 if CAZY:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("CAZy download begin processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(CAZyDir)
-
-    # Download CAZy database files
-    try:
-        print ("Downloading ",cazyProteins)
-        command = 'wget "' + cazyProteins_httpAddr + '"'
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not download ",cazyProteins)
-
-    try:
-        print ("Downloading ",cazyFamActivities)
-        command = 'wget "' + cazyFamActivities_httpAddr + '"'
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not download ",cazyFamActivities)
-    """
-    try:
-        print ("Downloading ",cazyFamSubfamEC)
-        command = 'wget "' + cazyFamSubfamEC_httpAddr + '"'
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not download ",cazyFamSubfamEC)
-
-    try:
-        print ("Downloading ",cazyFamInfo)
-        command = 'wget "' + cazyFamInfo_httpAddr + '"'
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not download ",cazyFamInfo)
-
-    try:
-        print ("Downloading ",cazyPrWithEC)
-        command = 'wget "' + cazyPrWithEC_httpAddr + '"'
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not download ",cazyPrWithEC)
-    """
-    # Format CAZy protein database for Blast
-    try:
-        print ("Formatting CAZy protein database for blast.")
-        command = blastPath + "makeblastdb -dbtype prot -in " + cazyProteins  
-        success = os.system(command)
-    except:
-        print ("WARNING: Could not format CAZy protein database for blast.")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("CAZy download finish processing at ",myTime))
-    LOG_H.flush()
-    os.chdir(cwd)
-
-##############################################################################
-# Run makeblastdb on the Phantome and pVOGs databases
-
+    print ("Fetching CAZy database files.")
+    dbPrep_buildPipeline.fetchFile(cazyProteins_httpAddr,CAZyDir,MIRROR_DIR)
+    dbPrep_buildPipeline.fetchFile(cazyFamActivities_httpAddr,CAZyDir,MIRROR_DIR)
+    addTask({
+        "name"      : "CAZy",
+        "directory" : CAZyDir,
+        "sources"   : [cazyProteins,cazyFamActivities],
+        "outputs"   : [cazyProteins + ".pin"],
+        "commands"  : [blastPath + "makeblastdb -dbtype prot -in " + cazyProteins],
+        })
+
+# The Phantome and pVOGs sequence databases are provided in the multiPhATE distribution
 if PHANTOME:
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Phantome formatting begin processing at ",myTime))
-    LOG_H.flush()
- 
-    os.chdir(phantomeDir)
-    try:
-        print ("Formatting Phantome database for blast.")
-        command = blastPath + "makeblastdb -dbtype prot -in Phantome_Phage_genes.faa"
-        success = os.system(command)
-        print ("done")
-    except BlastError:
-        print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("Phantome formatting finish processing at ",myTime))
-    LOG_H.flush()
+    addTask({
+        "name"      : "Phantome",
+        "directory" : phantomeDir,
+        "sources"   : [phantomeProteins],
+        "outputs"   : [phantomeProteins + ".pin",phantomeHeaders],
+        "commands"  : [
+            blastPath + "makeblastdb -dbtype prot -in " + phantomeProteins,
+            "grep '>' " + phantomeProteins + " > " + phantomeHeaders,
+            ],
+        })
 
 if PVOGS:
+    addTask({
+        "name"      : "pVOGs",
+        "directory" : pVOGsDir,
+        "sources"   : [pvogProteins],
+        "outputs"   : [pvogProteins + ".pin",pvogHeaders],
+        "commands"  : [
+            blastPath + "makeblastdb -dbtype prot -in " + pvogProteins,
+            "grep '>' " + pvogProteins + " > " + pvogHeaders,
+            ],
+        })
+
+# Fingerprint the sources of each database; skip the databases that are unchanged since they were built
+buildList = []; sourceFingerprints = {}
+for task in taskList:
+    sourceFingerprints[task.name] = myManifest.getSourceFingerprints(task)
+    if not sourceFingerprints[task.name]:
+        print ("WARNING: No source files were found for database",task.name,"; it cannot be built")
+        LOG_H.write("%s%s\n" % ("No source files found for database ",task.name))
+    elif myManifest.isCurrent(task,sourceFingerprints[task.name]) and not FORCE_BUILD:
+        print ("Database",task.name,"is unchanged since it was built; skipping.")
+        LOG_H.write("%s%s\n" % ("Skipped unchanged database ",task.name))
+    else:
+        buildList.append(task)
+
+# Build the databases concurrently
+if buildList:
+    print ("Building",len(buildList),"database(s) using up to",BUILD_THREADS,"processes:",' '.join([task.name for task in buildList]))
+    print ("This may take a while...")
     myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("pVogs formatting begin processing at ",myTime))
+    LOG_H.write("%s%s\n" % ("Database builds begin processing at ",myTime))
     LOG_H.flush()
- 
-    os.chdir(pVOGsDir)
-    try:
-        print ("Formatting pVOGs database for blast.")
-        command = blastPath + "makeblastdb -dbtype prot -in pVOGs.faa"
-        success = os.system(command)
-        print ("done")
-    except BlastError:
-        print ("WARNING: Command " + command + " failed; please check the location of your blast executables")
-
-    os.chdir(cwd)
-    myTime = datetime.datetime.now()
-    LOG_H.write("%s%s\n" % ("pVogs formatting finish processing at ",myTime))
+    results = dbPrep_buildPipeline.runBuildTasks(buildList,BUILD_THREADS)
+    for i in range(0,len(results)):
+        (name,success,seconds) = results[i]
+        if success:
+            myManifest.record(buildList[i],sourceFingerprints[name])
+            print ("Database",name,"was built in",round(seconds),"seconds.")
+            LOG_H.write("%s%s%s%s%s\n" % ("Built database ",name," in ",round(seconds)," seconds"))
+        else:
+            print ("WARNING: Database",name,"was not built; see messages above.")
+            LOG_H.write("%s%s\n" % ("Build failed for database ",name))
+    myManifest.write()
+    print ("Database versions and checksums are recorded in",myManifest.filename)
     LOG_H.flush()
 
 #############################################################################
 
+myTime = datetime.datetime.now()
 print ("Done!")
 LOG_H.write("%s%s%s\n" % (CODE_NAME," end processing at ",myTime))
 LOG_H.flush()
 LOG_H.close()
-DATA_H.close()
 
 ##############################################################################
 ##############################################################################
@@ -6,7 +6,7 @@
 #
 # Programmer:  Carol Zhou
 #
-# Last Update: 19 October 2020
+# Last Update: 18 October 2026
 #
 # Description: This code captures the remaining 3% of pVOG sequences
 #    from the NR database, which could not be retrieved in the original
@@ -31,12 +31,9 @@
 #       contain 100% of the pVOG sequences, pulled from NR.
 #
 # Programmers Notes:
-#    NOTE:  As currently written, this code finds only the 1st ncbiID in
-#       the nr database, then 'skips' through the rest. Need to fix that
-#       (ie, figure out how the SeqIO is actually working.) Nevertheless,
-#       querying the 1st ncbiID required 1/2 hour, which means that the
-#       set of 5000 will require 3 months on a single mpath processor.
-#       !!! I need to find a better way.
+#    NOTE:  All of the wanted ncbiIDs are found in a single pass over the
+#       nr database (see dbPrep_accessionResolver.py), rather than one pass
+#       per ncbiID, so the run time is that of reading nr once.
 #    1) Filenames are coded as constants
 #    2) Only need to run this code one time (until update)
 #    3) This code only pulls the missing fasta sequences. The user must
@@ -56,7 +53,7 @@ import copy
 import time
 import datetime
 from subprocess import call 
-from Bio import SeqIO
+import dbPrep_accessionResolver
 
 # Control
 CHATTY = True
@@ -126,14 +123,19 @@ count = 0
 if CHATTY:
     print(pVOGwantedList)
 
-fastaSequences = SeqIO.parse(open(NR_FASTA_DB),'fasta')
+resolver = dbPrep_accessionResolver.accessionResolver()
 for ncbiID in pVOGwantedList:
-    count += 1
-    print(count, "Processing ncibID", ncbiID)
-    for seq in fastaSequences:
-        if seq.id == ncbiID:
-            print("Writing fasta sequence for", ncbiID)
-            SeqIO.write([seq], PVOG_MISSING_FASTAS_H, "fasta") 
+    resolver.addAccession(ncbiID)
+if CHATTY:
+    print("Searching nr for", len(pVOGwantedList), "ncbiIDs")
+NR_FASTA_DB_H = open(NR_FASTA_DB,'r')
+count = resolver.writeResolvedFastas(NR_FASTA_DB_H,PVOG_MISSING_FASTAS_H)
+NR_FASTA_DB_H.close()
+print("Wrote", count, "fasta sequences to", PVOG_MISSING_FASTAS)
+for ncbiID in resolver.getMissingAccessions():
+    LOG_H.write("%s%s\n" % ("No fasta sequence found in nr for ",ncbiID))
+LOG_H.write("%s%s\n" % ("Number of fasta sequences found = ",resolver.getFoundCount()))
+LOG_H.write("%s%s\n" % ("Number missing = ",resolver.getMissingCount()))
 
 print(pVOGwantedList)
 
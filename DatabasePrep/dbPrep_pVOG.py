@@ -4,7 +4,7 @@
 #
 # Programmer:  C. E. Zhou
 # 
-# Last Update: 19 October 2020
+# Last Update: 18 October 2026
 #
 # Description:  Handles data and processing for pVOG data type
 #
@@ -61,6 +61,7 @@ class pVOGs(object):
         self.version      = "unknown"
         self.pVOGlist     = []  # list of pVOG objects 
         self.accnList     = []  # non-redundant list of accessions; for pulling seqs from NR subset
+        self.accnSet      = set()  # accessions in accnList, for checking redundancy
         self.pVOGobj      = pVOG()
 
     def addPvogs(self,pVOGdir,logFile_h):  # Inputs the directory where pVOG library files reside
@@ -149,11 +150,13 @@ class pVOGs(object):
                             pVOG.pVOGrecordList.append(nextPvogRecord)
                             pVOG.accessionList.append(nextPvogRecord['peptideAccn'])
                             # Check for potential redundancy, an add current peptide accession to the cumulative non-redundant list accordingly
-                            if nextPvogRecord['peptideAccn'] in self.accnList:
+                            peptideAccn = nextPvogRecord['peptideAccn']
+                            if peptideAccn in self.accnSet:
                                 print("WARNING:  Redudancy encountered: peptideAccn", peptideAccn, "is already in the non-redundant list, filename", fileName)
                                 logFile_h.write("%s%s%s%s\n" % ("WARNING:  Redundancy encountered: peptideAccn ",peptideAccn," is already in the non-redundant list, file ",fileName))
                             else:
                                 self.accnList.append(peptideAccn)
+                                self.accnSet.add(peptideAccn)
                         else:
                             print("WARNING: Irregularity in pVOG library file:", fileName, "line", line, "pVOG", pVOG.pVOGid) 
                             logFile_h.write("%s%s%s%s%s%s\n" % ("WARNING:  Irregularity in pVOG library file ", fileName," line ",line," pVOG ",pVOG.pVOGid))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+###########################################################################
+#
+# Program: dbPrep_taxonIndex.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Most recent update: 18 October 2026
+#
+# Description: Builds an indexed lookup table from the NCBI accession2taxid
+#    file (nucl_gb.accession2taxid), so that PhATE can find the taxonomy id
+#    for a blast hit without scanning the (multi-gigabyte) file.
+#    The index is an SQLite database, written next to the accession2taxid
+#    file as nucl_gb.accession2taxid.sqlite, with a single table:
+#       accn2taxid(accession_version TEXT PRIMARY KEY, taxid INTEGER)
+#    Lookup is by accession.version (e.g., NC_005056.1); an accession without
+#    version is resolved by a range query on the same key (see phate_taxonomy.py).
+#
+#    The accession2taxid file has a header line, then one line per accession:
+#       accession<\t>accession.version<\t>taxid<\t>gi
+#
+# Usage: python dbPrep_taxonIndex.py <path/to/nucl_gb.accession2taxid> [path/to/indexFile]
+#
+###########################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os, sys, datetime
+import sqlite3
+
+# CONSTANTS
+INDEX_EXTENSION = ".sqlite"  # index file is <accession2taxid file> + INDEX_EXTENSION
+INSERT_CHUNK    = 100000     # number of rows to insert per executemany call
+
+ACCESSION_VERSION_INDEX = 1  # column holding accession.version
+TAXID_INDEX             = 2  # column holding the taxonomy id
+
+##### FUNCTIONS ###########################################################
+
+# Generator of (accession.version, taxid) rows, read from the accession2taxid file
+def readAccession2taxid(accn2taxidFile):
+    accn2taxid_h = open(accn2taxidFile,'r')
+    for aLine in accn2taxid_h:
+        fields = aLine.rstrip('\n').split('\t')
+        if len(fields) <= TAXID_INDEX:
+            continue
+        if not fields[TAXID_INDEX].isdigit():  # skips the header line
+            continue
+        yield (fields[ACCESSION_VERSION_INDEX],int(fields[TAXID_INDEX]))
+    accn2taxid_h.close()
+
+# Build the index into a temporary file, then move it into place, so that a partial build is never used
+def buildTaxonIndex(accn2taxidFile,indexFile):
+    tempFile = indexFile + ".tmp"
+    if os.path.exists(tempFile):
+        os.remove(tempFile)
+    connection = sqlite3.connect(tempFile)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("CREATE TABLE accn2taxid (accession_version TEXT PRIMARY KEY, taxid INTEGER) WITHOUT ROWID")
+    rowCount = 0
+    chunk = []
+    for row in readAccession2taxid(accn2taxidFile):
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK:
+            connection.executemany("INSERT OR REPLACE INTO accn2taxid VALUES (?,?)",chunk)
+            rowCount += len(chunk)
+            chunk = []
+    if chunk:
+        connection.executemany("INSERT OR REPLACE INTO accn2taxid VALUES (?,?)",chunk)
+        rowCount += len(chunk)
+    connection.commit()
+    connection.close()
+    os.replace(tempFile,indexFile)
+    return rowCount
+
+##### MAIN ################################################################
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2 or len(sys.argv) > 3:
+        print ("Usage: python dbPrep_taxonIndex.py <path/to/nucl_gb.accession2taxid> [path/to/indexFile]")
+        exit(0)
+
+    accn2taxidFile = sys.argv[1]
+    if len(sys.argv) == 3:
+        indexFile = sys.argv[2]
+    else:
+        indexFile = accn2taxidFile + INDEX_EXTENSION
+
+    if not os.path.exists(accn2taxidFile):
+        print ("WARNING: accession2taxid file not found:",accn2taxidFile)
+        exit(0)
+
+    print ("Building taxonomy index",indexFile,"from",accn2taxidFile,"at",datetime.datetime.now())
+    print ("This may take a while.")
+    rowCount = buildTaxonIndex(accn2taxidFile,indexFile)
+    print ("Taxonomy index complete at",datetime.datetime.now(),"with",rowCount,"accessions.")
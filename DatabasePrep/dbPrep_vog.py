@@ -4,7 +4,7 @@
 #
 # Description:  Handles data and processing for VOG data type
 #
-# Last update:  19 October 2020
+# Last update:  18 October 2026
 #
 # Programmer:  C. E. Zhou
 #
@@ -13,8 +13,7 @@
 #       printAll
 #    VOGs
 #       tagVogFastas
-#       linkFastas2VOGs
-#       insertAccns
+#       mapAccessions2VOGs
 #       readParameters
 #       loadVogs
 #       loadAnnotations
@@ -31,11 +30,9 @@
 
 import os
 import re
-import copy
 import subprocess
 import timeit
 import datetime
-import dbPrep_fastaSequence
 
 #DEBUG = True
 DEBUG = False 
@@ -48,8 +45,6 @@ if "dbPrep_VERBOSE" in os.environ.keys():
 DO_GENE    = True
 DO_PROTEIN = True
 
-fastaObj = dbPrep_fastaSequence.fasta()
-
 class VOG(object):
     
     def __init__(self):
@@ -77,8 +72,7 @@ class VOGs(object):
         self.VOGgeneFastaFile       = ""           # vog.genes.all.fa
         self.VOGproteinFastaFile    = ""           # vog.proteins.all.fa
         self.VOGlist                = []           # list of VOG objects 
-        self.VOGobj                 = VOG()
-        self.fastaSet               = dbPrep_fastaSequence.multiFasta()  # using this class for headers only (no sequence)
+        self.accnVogMap             = {}           # key=accession (fasta header), value=VOG tag string, e.g., "VOG0334|VOG1202|"
         self.VOGgeneFastaOutFile    = ""
         self.VOGproteinFastaOutFile = ""
 
@@ -98,24 +92,19 @@ class VOGs(object):
         self.loadAnnotations(vogAnnot_h)
         vogAnnot_h.close()
 
-        # Insert sequence headers into fastaSet
-        print("dbPrep_vog says, Inserting accessions.")
-        self.insertAccns() 
-
-        # Link fasta objects to VOG identifiers; Add VOG identifiers to fasta headers
-        print("dbPrep_vog says, Linking fastas to VOGs. Please be patient. This may take a while...")
+        # Map each accession (fasta header) to its VOG identifiers
+        print("dbPrep_vog says, Mapping accessions to VOGs.")
         startTime = datetime.datetime.now()
-        self.linkFastas2VOGs()
+        self.mapAccessions2VOGs()
         endTime = datetime.datetime.now()
         executionTime = endTime - startTime
-        print("dbPrep_vog says, Whew! That took a long time: ",executionTime)
+        print("dbPrep_vog says, Mapped",len(self.accnVogMap),"accessions in",executionTime)
 
         # Identify sequences from files, modify headers, and write to new files.
 
         # Gene sequences
         if DO_GENE:
-            print("dbPrep_vog says, Adding gene sequences to fasta objects, from file", self.VOGgeneFastaFile)
-            print("dbPrep_vog says, Again, this may take a while...")
+            print("dbPrep_vog says, Writing VOG-tagged gene sequences, from file", self.VOGgeneFastaFile)
             vogInFile_h  = open(self.VOGgeneFastaFile,"r")
             vogOutFile_h = open(self.VOGgeneFastaOutFile,"w")
             startTime = datetime.datetime.now()
@@ -124,12 +113,11 @@ class VOGs(object):
             executionTime = endTime - startTime
             vogInFile_h.close()
             vogOutFile_h.close()
-            print("dbPrep_vog says, Finally...after this much time: ",executionTime)
+            print("dbPrep_vog says, Gene sequences were tagged in",executionTime)
 
         # Protein sequences
         if DO_PROTEIN:
-            print("dbPrep_vog says, Adding protein sequences to fasta objects, from file", self.VOGproteinFastaFile)
-            print("dbPrep_vog says, Yeah, this one is really slow too...")
+            print("dbPrep_vog says, Writing VOG-tagged protein sequences, from file", self.VOGproteinFastaFile)
             vogInFile_h  = open(self.VOGproteinFastaFile,"r")
             print("Opening self.VOGproteinFastaOutFile for write:",self.VOGproteinFastaOutFile)
             vogOutFile_h = open(self.VOGproteinFastaOutFile,"w")
@@ -139,37 +127,23 @@ class VOGs(object):
             executionTime = endTime - startTime
             vogInFile_h.close()
             vogOutFile_h.close()
-            print("dbPrep_vog says, That took a while too: ",executionTime)
+            print("dbPrep_vog says, Protein sequences were tagged in",executionTime)
 
         return
 
-    def linkFastas2VOGs(self):
-        for vog in self.VOGlist:
-            for accn in vog.accnList:
-                for fasta in self.fastaSet.fastaList:
-                    if fasta.header == accn:
-                        vogString = vog.VOGid + '|'
-                        fasta.customHeader += vogString
-                        if VERBOSE:
-                            print("dbPrep_vog says, Tagging ",fasta.customHeader)
-        return
-
-    def insertAccns(self):
-        # Create a non-redundant list of accessions (also fasta headers)
-        accnList = []
+    # Build the accession-to-VOG map in one pass over the VOGs; an accession in several VOGs
+    # is tagged with each of them, in the order the VOGs occur in the map file
+    def mapAccessions2VOGs(self):
+        self.accnVogMap = {}
         for vog in self.VOGlist:
+            vogString = vog.VOGid + '|'
             for accn in vog.accnList:
-                if accn not in accnList:
-                    accnList.append(accn)
-                    if VERBOSE:
-                        print("dbPrep_vog says, Appending accession ",accn)
-        # For each accession, create a fasta object and add it to the fasta set
-        for accn in accnList:
-            newFasta = copy.deepcopy(fastaObj)
-            newFasta.header = accn
-            self.fastaSet.fastaList.append(newFasta)
-        if VERBOSE:
-            print("dbPrep_vog says, Fasta list has been created.")
+                if accn in self.accnVogMap:
+                    self.accnVogMap[accn] += vogString
+                else:
+                    self.accnVogMap[accn] = vogString
+                if VERBOSE:
+                    print("dbPrep_vog says, Tagging ",self.accnVogMap[accn] + accn)
         return
 
     def readParameters(self,kvargs):
@@ -213,7 +187,7 @@ class VOGs(object):
                 fields = fLine.split('\t')
                 vogID  = fields[VOGID_COL]
                 accnListString = fields[ACCN_COL]
-                newVOGobj = copy.deepcopy(self.VOGobj)
+                newVOGobj = VOG()
                 newVOGobj.VOGid = vogID
                 accnList = accnListString.split(',')
                 for accn in accnList:
@@ -254,39 +228,38 @@ class VOGs(object):
         print("dbPrep_vog says, This many VOGs were found to have annotation:",annotCount)
         return
 
+    # Stream the input fasta file, writing each sequence that is mapped to a VOG with its VOG
+    # identifiers prefixed to the header; sequences not mapped to any VOG are dropped
     def writeVOGtaggedFastaFile(self,vogInFile_h,vogOutFile_h,seqType):  # seqType is 'gene' or 'protein'
-        headerCount    = 0
-        header   = ""
-        sequence = ""
-        FIRST    = True
-        p_header = re.compile('^>')
-        iLines = vogInFile_h.read().splitlines()
-        for iLine in iLines:
-            match_header   = re.search(p_header,iLine)
-            if match_header:
-                (junk,matchHeader) = iLine.split('>')
-                if not FIRST: # Process previous fasta sequence
-                    for fasta in self.fastaSet.fastaList:
-                        if fasta.header == matchHeader:
-                            newHeader = '>' + fasta.customHeader + fasta.header
-                            headerCount += 1
-                            if VERBOSE:
-                                if headerCount >= 1000:
-                                    print ("working...")
-                                    headerCount = 0
-                            vogOutFile_h.write("%s\n%s\n" % (newHeader,sequence))
-                # Reset
-                header = ""
-                sequence = ""
-                FIRST = False
-            else:
-                sequence += iLine
+        headerCount   = 0
+        taggedCount   = 0
+        untaggedCount = 0
+        newHeader     = ""   # tagged header of the current sequence; empty if not mapped to a VOG
+        sequence      = []   # sequence lines of the current sequence
+        for iLine in vogInFile_h:
+            if iLine.startswith('>'):
+                if newHeader != "": # Write previous fasta sequence
+                    vogOutFile_h.write("%s\n%s\n" % (newHeader,''.join(sequence)))
+                header = iLine[1:].rstrip('\r\n')
+                if header in self.accnVogMap:
+                    newHeader = '>' + self.accnVogMap[header] + header
+                    taggedCount += 1
+                else:
+                    newHeader = ""
+                    untaggedCount += 1
+                headerCount += 1
+                if VERBOSE:
+                    if headerCount >= 1000:
+                        print ("working...")
+                        headerCount = 0
+                sequence = []
+            elif newHeader != "":
+                sequence.append(iLine.rstrip('\r\n'))
 
-        # Process last sequence
-        for fasta in self.fastaSet.fastaList:
-            if fasta.header == header:
-                newHeader = fasta.customHeader + fasta.header
-                vogOutFile_h.write("%s\n%s\n" % (newHeader,sequence))
+        # Write last sequence
+        if newHeader != "":
+            vogOutFile_h.write("%s\n%s\n" % (newHeader,''.join(sequence)))
+        print("dbPrep_vog says, Wrote",taggedCount,seqType,"sequences tagged with VOG identifiers;",untaggedCount,"not mapped to a VOG were omitted")
         return
 
     def getSequence(self,accn,seqFile_h):
@@ -301,7 +274,7 @@ class VOGs(object):
             print("dbPrep_vog says, Counting accessions")
         accessionCount = 0
         for VOG in self.VOGlist:
-            accessionCount += len(VOG.accessionList)
+            accessionCount += len(VOG.accnList)
         return accessionCount
 
     def printAll(self):
@@ -314,5 +287,4 @@ class VOGs(object):
         print("VOGproteinFastaFile:",self.VOGproteinFastaFile)
         for vogObj in self.VOGlist:
             vogObj.printAll()
-        for fasta in self.fastaSet:
-            fasta.printAll()
+        print("accessions mapped to VOGs:",len(self.accnVogMap))
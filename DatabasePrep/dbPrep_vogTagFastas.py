@@ -6,12 +6,12 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Most recent update: 23 July 2020 
+# Most recent update: 18 October 2026
 #
 # Description: Processes VOG data files. Inserts VOG identifiers in header
 #    string of each fasta file.  
 #
-# Instructions: Run this code within the /DatabasePrep/ folder
+# Instructions: Run this code within the /DatabasePrep/ folder; VOGsDir is, e.g., ../Databases/VOGs/
 #
 ###########################################################################
 
@@ -34,7 +34,6 @@ if len(sys.argv) != 2:
 VOG_DIR = sys.argv[1]
 
 # FILES
-VOG_DIR = "../Databases/VOGs/"  # Run this code within the /DatabasePrep/ folder
 #VOG_BLASTDB_DIR            = os.path.join(VOG_DIR,"BlastDBs/")
 VOG_MAP_FILE               = os.path.join(VOG_DIR,"vog.members.tsv")
 VOG_ANNOTATION_FILE        = os.path.join(VOG_DIR,"vog.annotations.tsv")
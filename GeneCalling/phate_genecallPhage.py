@@ -4,16 +4,21 @@
 #
 # Programmers: Jeff Kimbrel, Carol Zhou
 #
-# Last update: 19 October 2020
+# Last update: 18 October 2026
 #
 # Description: Script phate_genecallPhage.py runs up to four gene callers: PHANOTATE, Prodigal, 
 #    Glimmer and GeneMarkS, on a genome fasta file. Outputs from these gene callers are converted to
 #    GFF format, and also to a multiPhATE2-specfic CGC format, which facilitates downstream 
 #    processing in the SequenceAnnotation module of multiPhATE2.
+#    The gene callers are run concurrently, each under a time limit, and each caller's output is
+#    parsed to CGC format (in-process, by CGC_parser) as soon as that caller finishes.
 #
 # Classes and Methods:
 #    class geneCall
-#       systemCall()
+#    class callerJob
+#       run()
+#    systemCall()
+#    writeLog()
 #       getProdigalID()
 #       getGeneMarkSID()
 #       processProdigal()
@@ -22,6 +27,7 @@
 #       processPhanotate()
 #       Convert_gff2cgc()
 #       Convert_cgc2gff()
+#       Convert_prodigalGff2sco()
 #
 ################################################################
 
@@ -33,6 +39,10 @@ import sys
 import re
 import subprocess
 #from subprocess import PIPE, run
+import signal
+import time
+import threading
+import concurrent.futures
 
 DEBUG = False 
 #DEBUG = True
@@ -45,6 +55,11 @@ PHANOTATE_CALLS = False
 # booleans to control whether custom calls are processed
 CUSTOM_CALLS    = False
 
+# time limit (seconds) for each gene caller's run; a caller exceeding its limit is stopped, and its calls omitted
+CALLER_TIMEOUTS = {'prodigal' : 3600, 'glimmer' : 3600, 'genemarks' : 3600, 'phanotate' : 14400}
+# a caller that fails or times out is disabled, so that its (missing or partial) output is not processed
+CALLER_ENABLED  = {'prodigal' : True, 'glimmer' : True, 'genemarks' : True, 'phanotate' : True}
+
 # patterns
 p_genemarks = re.compile('[gG][eE][nN][eE][mM][aA][rR][kK]')
 p_glimmer   = re.compile('[gG][lL][iI][mM][mM][eE][rR]')
@@ -63,6 +78,9 @@ geneMarkSPath = os.environ["PHATE_GENEMARKS_PATH"]
 phanotatePath = os.environ["PHATE_PHANOTATE_PATH"]
 cgcPath       = os.environ["PHATE_CGC_PATH"]
 
+sys.path.append(cgcPath)
+import CGC_parser
+
 # Verbosity
 PHATE_MESSAGES = False
 PHATE_WARNINGS = False
@@ -180,13 +198,58 @@ class geneCall:
         for gene in geneCallList:
             print(gene)
 
+# A gene caller's command chain, run in a worker thread under the caller's time limit
+class callerJob:
+
+    def __init__(self, caller, cgcCaller, commandList, rawOutput, cgcFile):
+        self.caller      = caller       # key into CALLER_TIMEOUTS, CALLER_ENABLED
+        self.cgcCaller   = cgcCaller    # gene caller name, as recognized by CGC_parser
+        self.commandList = commandList  # commands, run in order
+        self.rawOutput   = rawOutput    # caller output to be parsed to cgc format
+        self.cgcFile     = cgcFile
+        self.timeout     = CALLER_TIMEOUTS[caller]
+        self.status      = "not run"
+
+    # Returns True if every command completed, with exit code 0, within the time limit
+    def run(self):
+        deadline = time.time() + self.timeout
+        for command in self.commandList:
+            remaining = deadline - time.time()
+            try:
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(command, self.timeout)
+                result = systemCall(command, remaining)
+            except subprocess.TimeoutExpired:
+                self.status = "timed out after " + str(self.timeout) + " seconds"
+                return False
+            if result != 0:
+                self.status = "failed with exit code " + str(result) + " from command: " + command
+                return False
+        self.status = "complete"
+        return True
+
 ########## FUNCTIONS ##########
 
-def systemCall(command):
+# Callers run concurrently, so writes to the log are serialized
+LOG_LOCK = threading.Lock()
+
+def writeLog(text):
+    with LOG_LOCK:
+        logfile.write("%s\n" % (text))
+
+# Runs command in a shell, and returns its exit code. On timeout, the command's whole process group
+# (the shell plus any pipeline or child processes) is killed, and subprocess.TimeoutExpired is raised.
+def systemCall(command,timeout=None):
     if PHATE_MESSAGES:
         print("\nSYSTEM CALL: ", command)
-    logfile.write("%s%s\n" % ("command is ",command))
-    os.system(command)
+    writeLog("command is " + command)
+    process = subprocess.Popen(command, shell=True, start_new_session=True)
+    try:
+        return process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        raise
 
 def getProdigalId(x):
     colonSplit = x.split(";")
@@ -371,130 +434,161 @@ def Convert_cgc2gff(cgcFile,gffFile):
     CGC_H.close()
     GFF_H.close()
 
-########## PRODIGAL ##########
+# Derive Prodigal's sco-format output (as written with -f sco) from its gff output, so Prodigal need run only once
+def Convert_prodigalGff2sco(gffFile,scoFile):
+    GFF_H = open(gffFile,"r")
+    SCO_H = open(scoFile,"w")
+    for gLine in GFF_H:
+        gLine = gLine.rstrip('\n')
+        if gLine.startswith("# Sequence Data:") or gLine.startswith("# Model Data:"):
+            SCO_H.write("%s\n" % (gLine))
+        elif gLine and not gLine.startswith("#"):
+            fields = gLine.split("\t")
+            if len(fields) < 9:
+                continue
+            geneNo = getProdigalId(fields[8]).split("_")[-1]  # ID=<sequence number>_<gene number>
+            SCO_H.write("%s%s_%s_%s_%s\n" % (">",geneNo,fields[3],fields[4],fields[6]))
+    GFF_H.close()
+    SCO_H.close()
 
-# system call to prodigal
-## the '-p' option will currently give an error that there is not enough sequence info to train.
-## This will be addressed in version 3 (https://github.com/hyattpd/Prodigal/issues/11)
+########## GENE CALLERS ##########
 
-if PRODIGAL_CALLS:
-    if PHATE_PROGRESS:
-        print("phate_genecallPhage says, running Prodigal.")
-    if PHATE_MESSAGES:
-        print("\n########## Prodigal ##########")
-    logfile.write("%s\n" % ("Processing Prodigal"))
+# The enabled gene callers are independent of one another, so they are run concurrently, each in its own
+# worker thread, and each under its own time limit (CALLER_TIMEOUTS). As each caller finishes, its exit
+# codes are checked, and its output is parsed (into geneCall objects, and into cgc format) in-process.
+# A caller that fails or times out is reported, and omitted from the results and the CGC comparison.
 
-    dumpFile = "./dump.out"
-    command = prodigalPath + 'prodigal -q -i ' + fastaFileName + ' -o ' + outputFolder + 'prodigal.gff -f gff -p meta'
-    systemCall(command)
+callerJobs = []
 
+## Prodigal: run once, writing gff, proteins, and potential genes; the sco file (for CGC) is derived from the gff
+## the '-p' option will currently give an error that there is not enough sequence info to train.
+## This will be addressed in version 3 (https://github.com/hyattpd/Prodigal/issues/11)
+if PRODIGAL_CALLS:
+    logfile.write("%s\n" % ("Preparing Prodigal"))
     prodigalPeptideFile   = outputFolder + "prodigal.proteins.faa"
     prodigalPotentialFile = outputFolder + "prodigal.genes.potential"
-
-    command = prodigalPath + 'prodigal -i ' + fastaFileName + ' -o ' + outputFolder + 'prodigal.genes.sco -f sco -p meta -d ' + prodigalPeptideFile + ' -s ' + prodigalPotentialFile
-    systemCall(command)
-
     files['Raw Prodigal GFF'] = outputFolder + 'prodigal.gff'
-
-    prodigalFile = open(files['Raw Prodigal GFF'], 'r')
-    lines = prodigalFile.read().splitlines()
-    for line in lines:
-        processProdigal(line)
-    logfile.write("%s\n" % ("Prodigal processing complete."))
-
+    commandList = [
+        prodigalPath + 'prodigal -q -i ' + fastaFileName + ' -o ' + outputFolder + 'prodigal.gff -f gff -p meta -d ' + prodigalPeptideFile + ' -s ' + prodigalPotentialFile,
+        ]
+    callerJobs.append(callerJob('prodigal', "Prodigal", commandList, outputFolder + 'prodigal.genes.sco', outputFolder + 'prodigal.cgc'))
 else:
     logfile.write("%s\n" % ("Not running Prodigal gene calling"))
 
-########## GLIMMER ##########
-
-## This runs the standard version of glimmer3.02b ("from scratch")
-
-logfile.write("%s\n" % ("Preparing to process Glimmer calls"))
+## Glimmer: this runs the standard version of glimmer3.02b ("from scratch")
 logfile.write("%s%s\n" % ("GLIMMER_CALLS is ",GLIMMER_CALLS))
 if GLIMMER_CALLS:
-    if PHATE_PROGRESS:
-        print("phate_genecallPhage says, running Glimmer.")
-    if PHATE_MESSAGES:
-        print("\n########## Glimmer ##########")
-    logfile.write("%s\n" % ("Processing Glimmer"))
+    logfile.write("%s\n" % ("Preparing Glimmer"))
     logfile.write("%s%s\n" % ("glimmerPath is ",glimmerPath))
     logfile.write("%s%s\n" % ("fastaFileName is ",fastaFileName))
     logfile.write("%s%s\n" % ("outputFolder is ",outputFolder))
-
-    systemCall(glimmerPath + 'long-orfs -n -t 1.15 ' + fastaFileName + ' ' + outputFolder + 'glimmer.longorfs')
-    systemCall(glimmerPath + 'extract -t '           + fastaFileName + ' ' + outputFolder + 'glimmer.longorfs > ' + outputFolder + 'glimmer.train')
-    systemCall(glimmerPath + 'build-icm -r ' + outputFolder + 'glimmer.icm < ' + outputFolder + 'glimmer.train')
-    systemCall(glimmerPath + 'glimmer3 -o50 -g110 -t30 ' + fastaFileName + ' ' + outputFolder + 'glimmer.icm ' + outputFolder + 'glimmer')
-    systemCall('tail -n +2 ' + outputFolder + 'glimmer.predict > ' + outputFolder + 'glimmer.coords') 
-
     glimmerOutputHandle = "glimmer"
-    
+    commandList = [
+        glimmerPath + 'long-orfs -n -t 1.15 ' + fastaFileName + ' ' + outputFolder + 'glimmer.longorfs',
+        glimmerPath + 'extract -t '           + fastaFileName + ' ' + outputFolder + 'glimmer.longorfs > ' + outputFolder + 'glimmer.train',
+        glimmerPath + 'build-icm -r ' + outputFolder + 'glimmer.icm < ' + outputFolder + 'glimmer.train',
+        glimmerPath + 'glimmer3 -o50 -g110 -t30 ' + fastaFileName + ' ' + outputFolder + 'glimmer.icm ' + outputFolder + 'glimmer',
+        'tail -n +2 ' + outputFolder + 'glimmer.predict > ' + outputFolder + 'glimmer.coords',
+        ]
     if iterateGlimmer == True:
-        systemCall('tail -n +2 ' + outputFolder + 'glimmer.predict > ' + outputFolder + 'long-orfs.coords')    
-        systemCall(glimmerPath + '/scripts/upstream-coords.awk 25 0 ' + outputFolder + 'long-orfs.coords | ' + glimmerPath + '/bin/extract ' + fastaFileName + ' - > ' + outputFolder + 'glimmer.upstream')
-        systemCall('/data/data1/softwares/ELPH/bin/Linux-i386/elph ' + outputFolder + 'glimmer.upstream LEN=6 | ' + glimmerPath + '/scripts/get-motif-counts.awk > ' + outputFolder + 'glimmer.motif')
-        systemCall('set startuse = \'' + glimmerPath + '/bin/start-codon-distrib -3 ' + fastaFileName + ' ' + outputFolder + '/long-orfs.coords\'')
-        systemCall(glimmerPath + '/bin/glimmer3 -o50 -g110 -t30 -b ' + outputFolder + 'glimmer.motif -P $startuse ' + fastaFileName + ' ' + outputFolder + 'glimmer.icm ' + outputFolder + 'glimmerIterative')
+        commandList.extend([
+            'tail -n +2 ' + outputFolder + 'glimmer.predict > ' + outputFolder + 'long-orfs.coords',
+            glimmerPath + '/scripts/upstream-coords.awk 25 0 ' + outputFolder + 'long-orfs.coords | ' + glimmerPath + '/bin/extract ' + fastaFileName + ' - > ' + outputFolder + 'glimmer.upstream',
+            '/data/data1/softwares/ELPH/bin/Linux-i386/elph ' + outputFolder + 'glimmer.upstream LEN=6 | ' + glimmerPath + '/scripts/get-motif-counts.awk > ' + outputFolder + 'glimmer.motif',
+            'set startuse = \'' + glimmerPath + '/bin/start-codon-distrib -3 ' + fastaFileName + ' ' + outputFolder + '/long-orfs.coords\'',
+            glimmerPath + '/bin/glimmer3 -o50 -g110 -t30 -b ' + outputFolder + 'glimmer.motif -P $startuse ' + fastaFileName + ' ' + outputFolder + 'glimmer.icm ' + outputFolder + 'glimmerIterative',
+            ])
         glimmerOutputHandle = "glimmerIterative"
-
-
     files['Raw Glimmer Output'] = outputFolder + '' + glimmerOutputHandle + '.predict'
     logfile.write("%s%s\n" % ("Raw Glimmer Output is ", files['Raw Glimmer Output']))
+    callerJobs.append(callerJob('glimmer', "Glimmer", commandList, outputFolder + 'glimmer.predict', outputFolder + 'glimmer.cgc'))
+else:
+    logfile.write("%s\n" % ("Not running Glimmer gene calling"))
+
+## GeneMarkS
+logfile.write("%s%s\n" % ("GENEMARKS_CALLS is ",GENEMARKS_CALLS))
+if GENEMARKS_CALLS:
+    logfile.write("%s\n" % ("Preparing GeneMarkS"))
+    files['Raw GeneMarkS GFF'] = outputFolder + 'geneMarkS.gff'
+    commandList = [
+        geneMarkSPath + 'gmhmmp -m ' + geneMarkSPath + '/heu_11.mod ' + fastaFileName + ' -o ' + outputFolder + 'geneMarkS.lst -r',
+        geneMarkSPath + 'gmhmmp -m ' + geneMarkSPath + '/heu_11.mod ' + fastaFileName + ' -o ' + outputFolder + 'geneMarkS.gff -r -f G',
+        ]
+    callerJobs.append(callerJob('genemarks', "Genemarks", commandList, outputFolder + 'geneMarkS.gff', outputFolder + 'genemark.cgc'))
+else:
+    logfile.write("%s\n" % ("Not running GeneMarkS gene calling"))
 
+## PHANOTATE
+logfile.write("%s%s\n" % ("PHANOTATE_CALLS is ",PHANOTATE_CALLS))
+if PHANOTATE_CALLS:
+    logfile.write("%s\n" % ("Preparing PHANOTATE"))
+    commandList = [
+        'phanotate.py ' + fastaFileName + ' > ' + outputFolder + 'phanotateOutput.txt',
+        ]
+    callerJobs.append(callerJob('phanotate', "PHANOTATE", commandList, outputFolder + 'phanotateOutput.txt', outputFolder + 'phanotate.cgc'))
+else:
+    logfile.write("%s\n" % ("Not running PHANOTATE gene calling"))
+
+## Run the callers
+if callerJobs:
+    if PHATE_PROGRESS:
+        print("phate_genecallPhage says, running gene callers:", ', '.join([job.cgcCaller for job in callerJobs]))
+    callerPool = concurrent.futures.ThreadPoolExecutor(max_workers=len(callerJobs))
+    future2job = {}
+    for job in callerJobs:
+        future2job[callerPool.submit(job.run)] = job
+    for future in concurrent.futures.as_completed(future2job):
+        job = future2job[future]
+        if future.result() and job.caller == 'prodigal':
+            Convert_prodigalGff2sco(files['Raw Prodigal GFF'], job.rawOutput)
+        if future.result() and os.path.exists(job.rawOutput):
+            CGC_parser.ParseGeneCallFile(job.cgcCaller, job.rawOutput, job.cgcFile)
+            writeLog(job.cgcCaller + " gene calling complete; calls parsed to " + job.cgcFile)
+            if PHATE_PROGRESS:
+                print("phate_genecallPhage says,", job.cgcCaller, "complete.")
+        else:
+            CALLER_ENABLED[job.caller] = False
+            writeLog("ERROR: " + job.cgcCaller + " gene calling " + job.status + "; its calls are omitted")
+            if PHATE_WARNINGS:
+                print("phate_genecallPhage says, WARNING:", job.cgcCaller, "gene calling", job.status + "; its calls are omitted.")
+    callerPool.shutdown()
+    os.chdir(workingFolder)
+
+PRODIGAL_CALLS  = PRODIGAL_CALLS  and CALLER_ENABLED['prodigal']
+GLIMMER_CALLS   = GLIMMER_CALLS   and CALLER_ENABLED['glimmer']
+GENEMARKS_CALLS = GENEMARKS_CALLS and CALLER_ENABLED['genemarks']
+PHANOTATE_CALLS = PHANOTATE_CALLS and CALLER_ENABLED['phanotate']
+
+# Record each successful caller's calls, in a fixed order (regardless of which caller finished first)
+if PRODIGAL_CALLS:
+    prodigalFile = open(files['Raw Prodigal GFF'], 'r')
+    lines = prodigalFile.read().splitlines()
+    prodigalFile.close()
+    for line in lines:
+        processProdigal(line)
+    logfile.write("%s\n" % ("Prodigal processing complete."))
+
+if GLIMMER_CALLS:
     currentGlimmerContig = ""
-    for line in open(outputFolder + '' + glimmerOutputHandle + '.predict', 'rt'):
+    for line in open(files['Raw Glimmer Output'], 'rt'):
         line = line.rstrip()
         if line.startswith(">"):
             currentGlimmerContig = line[1:]
         else:
             processGlimmer(line,currentGlimmerContig)
     logfile.write("%s\n" % ("Processing Glimmer complete."))
-else:
-    logfile.write("%s\n" % ("Not running Glimmer gene calling"))
 
-########## GENEMARKS ##########
-
-logfile.write("%s\n" % ("Preparing to process Genemarks calls"))
-logfile.write("%s%s\n" % ("GENEMARKS_CALLS is ",GENEMARKS_CALLS))
 if GENEMARKS_CALLS:
-    if PHATE_PROGRESS:
-        print("phate_genecallPhage says, running GeneMarkS.")
-    if PHATE_MESSAGES:
-        print("\n########## GeneMarkS ##########")
-    logfile.write("%s\n" % ("Processing GeneMarkS"))
-
-    systemCall(geneMarkSPath + 'gmhmmp -m ' + geneMarkSPath + '/heu_11.mod ' + fastaFileName + ' -o ' + outputFolder + 'geneMarkS.lst -r')
-    systemCall(geneMarkSPath + 'gmhmmp -m ' + geneMarkSPath + '/heu_11.mod ' + fastaFileName + ' -o ' + outputFolder + 'geneMarkS.gff -r -f G')
-    files['Raw GeneMarkS GFF'] = outputFolder + 'geneMarkS.gff'
-
-    for line in open(outputFolder + 'geneMarkS.gff', 'rt'):
+    for line in open(files['Raw GeneMarkS GFF'], 'rt'):
         line = line.rstrip()
         processGeneMarkS(line)
     logfile.write("%s\n" % ("Processing Genemarks complete."))
-else:
-    logfile.write("%s\n" % ("Not running GeneMarkS gene calling"))
-
-########## PHANOTATE ##########
-
-logfile.write("%s\n" % ("Preparing to process PHANOTATE calls"))
-logfile.write("%s%s\n" % ("PHANOTATE_CALLS is ",PHANOTATE_CALLS))
 
 if PHANOTATE_CALLS:
-    if PHATE_PROGRESS:
-        print("phate_genecallPhage says, running Phanotate.")
-    if PHATE_MESSAGES:
-        print("########## PHANOTATE ##########")
-    logfile.write("%s\n" % ("Processing PHANOTATE"))
-
-    systemCall('phanotate.py ' + fastaFileName + ' > ' + outputFolder + 'phanotateOutput.txt' )
-    os.chdir(workingFolder)
-
     for line in open(outputFolder + 'phanotateOutput.txt', 'rt'):
         line = line.rstrip()
         processPhanotate(line)
     logfile.write("%s\n" % ("Processing PHANOTATE complete."))
-else:
-    logfile.write("%s\n" % ("Not running PHANOTATE gene calling"))
 
 ########## CUSTOM ###########
 
@@ -544,23 +638,18 @@ print()
 
 logfile.write("%s\n" % ("Parsing genecall files into CGC format..."))
 callerCount = 0
-if GENEMARKS_CALLS:
+if GENEMARKS_CALLS:   # parsed to genemark.cgc as the caller finished
     callerCount += 1
-    systemCall('python ' + cgcPath + '/CGC_parser.py Genemarks ' + outputFolder + 'geneMarkS.gff ' + outputFolder + 'genemark.cgc')
-if PRODIGAL_CALLS:
+if PRODIGAL_CALLS:    # parsed to prodigal.cgc as the caller finished
     callerCount += 1
-    systemCall('python ' + cgcPath + '/CGC_parser.py Prodigal ' + outputFolder + 'prodigal.genes.sco ' + outputFolder + 'prodigal.cgc')
-if GLIMMER_CALLS:
+if GLIMMER_CALLS:     # parsed to glimmer.cgc as the caller finished
     callerCount += 1
-    #systemCall('python ' + cgcPath + '/CGC_parser.py Glimmer ' + outputFolder + 'glimmer.coords ' + outputFolder + 'glimmer.cgc')
-    systemCall('python ' + cgcPath + '/CGC_parser.py Glimmer ' + outputFolder + 'glimmer.predict ' + outputFolder + 'glimmer.cgc')
-if PHANOTATE_CALLS:
+if PHANOTATE_CALLS:   # parsed to phanotate.cgc as the caller finished
     callerCount += 1
-    systemCall('python ' + cgcPath + '/CGC_parser.py PHANOTATE ' + outputFolder + 'phanotateOutput.txt ' + outputFolder + 'phanotate.cgc')
 if CUSTOM_CALLS:
     callerCount += 1
-    logfile.write("%s\n" % ("Calling CGC_parser.py with custom calls"))
-    systemCall('python ' + cgcPath + '/CGC_parser.py Custom ' + customCallsGff + ' ' + outputFolder + 'custom.cgc')
+    logfile.write("%s\n" % ("Parsing custom calls to cgc format"))
+    CGC_parser.ParseGeneCallFile("Custom", customCallsGff, outputFolder + 'custom.cgc')
 
 logfile.write("%s%s\n" % ("callerCount is ",callerCount))
 if callerCount >= 2:
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+#############################################
+# Name: genomics_benchmarkCompare.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Scaling benchmark for genomics_compareGenomes.comparison: synthetic CGP Results_ directories (log,
+#    report, and paralog files, in the formats written by compareGeneProfiles_main.py) are written
+#    for every pair of <count> genomes of <genes> genes each, then loading of the best hits and
+#    paralogs (loadData) and computation of homology groups (computeHomologyGroups) are timed.
+#    Genes of genome 1 (the reference) hit a permutation of each other genome's genes: most are
+#    mutual best hits, some singular; the rest are loners. Each genome has a few paralog pairs.
+#    With -reference, the data are also loaded with the former list-scan lookups (of genomes by name,
+#    of genes and proteins by contig and name, of paralogs by identifier, and of annotations), timed,
+#    and the genome dumps, homology lists, and homology group annotations are checked to be identical.
+#
+# Usage:  python genomics_benchmarkCompare.py [genes] [count ...] [-reference]   (genes defaults to 50; counts to 10 50 100)
+#
+# Methods:
+#    GeneHeader
+#    WriteLogFile
+#    WriteReportFile
+#    WriteParalogFile
+#    WriteResults
+#    class referenceGenome
+#    class referenceComparison
+#    RunComparison
+#    DumpComparison
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os
+import io
+import random
+import shutil
+import tempfile
+import time
+
+# This benchmark may be run outside of multiPhATE; output locations are set to a temporary directory
+tempDir = tempfile.mkdtemp()
+os.environ.setdefault("PHATE_CGP_RESULTS_DIR",tempDir + "/")
+os.environ.setdefault("PHATE_GENOMICS_RESULTS_DIR",tempDir + "/")
+os.environ.setdefault("PHATE_PIPELINE_OUTPUT_DIR",tempDir + "/")
+for variable in ["PHATE_PHATE_PROGRESS","PHATE_PHATE_MESSAGES","PHATE_PHATE_WARNINGS"]:
+    os.environ.setdefault(variable,"False")
+
+import genomics_compareGenomes
+
+# The module overrides the verbosity settings; quiet it for timing
+genomics_compareGenomes.PHATE_PROGRESS = False
+genomics_compareGenomes.PHATE_MESSAGES = False
+genomics_compareGenomes.PHATE_WARNINGS = False
+
+DEFAULT_GENES    = 50
+DEFAULT_COUNTS   = [10,50,100]
+MUTUAL_FRACTION  = 0.7   # fraction of genes having a mutual best hit in the other genome
+HIT_FRACTION     = 0.9   # fraction of genes having any best hit in the other genome
+PARALOG_PAIRS    = 3     # paralog pairs per genome
+CONTIG           = "contig_1"
+
+def GeneHeader(number):
+    return "cds" + str(number) + "/+/" + str(number * 1000 + 1) + "/" + str(number * 1000 + 900) + "/"
+
+def WriteLogFile(directory,genome1,genome2):
+    LOG_H = open(os.path.join(directory,genomics_compareGenomes.CGP_LOG_FILE),"w")
+    LOG_H.write("%s%s\n" % ("genome file #1: /genomes/",genome1 + ".fasta"))
+    LOG_H.write("%s%s\n" % ("genome file #2: /genomes/",genome2 + ".fasta"))
+    LOG_H.close()
+
+# Writes gene hits, then protein hits; each data line has the 30 fields of a CGP report line
+def WriteReportFile(directory,genes,hitTable):
+    REPORT_H = open(os.path.join(directory,genomics_compareGenomes.CGP_REPORT_FILE),"w")
+    for section in ["#GENE HITS","#PROTEIN HITS"]:
+        REPORT_H.write("%s\n" % (section))
+        lineNumber = 0
+        for (genomeType,number1,number2) in hitTable:
+            lineNumber += 1
+            fields = [""] * 30
+            fields[genomics_compareGenomes.SORT_POSITION] = str(lineNumber)
+            fields[genomics_compareGenomes.GENOME_TYPE]   = genomeType
+            if number1:
+                fields[genomics_compareGenomes.G1_HEADER]      = GeneHeader(number1)
+                fields[genomics_compareGenomes.G1_CONTIG]      = CONTIG
+                fields[genomics_compareGenomes.G1_ANNOTATIONS] = str([["cds" + str(number1) + "_phanotate","hypothetical protein"]])
+            if number2:
+                fields[genomics_compareGenomes.G2_HEADER]      = GeneHeader(number2)
+                fields[genomics_compareGenomes.G2_CONTIG]      = CONTIG
+                fields[genomics_compareGenomes.G2_ANNOTATIONS] = str([["cds" + str(number2) + "_phanotate","hypothetical protein"]])
+            REPORT_H.write("%s\n" % ('\t'.join(fields)))
+    REPORT_H.close()
+
+def WriteParalogFile(directory,genome1,genome2,paralogs):
+    PARALOG_H = open(os.path.join(directory,genomics_compareGenomes.CGP_PARALOG_FILE),"w")
+    for genome in [genome1,genome2]:
+        PARALOG_H.write("%s%s\n" % ("# PARALOGS for genome /genomes/",genome + ".fasta"))
+        for section in ["# Gene Paralogs","# Protein Paralogs"]:
+            PARALOG_H.write("%s\n" % (section))
+            for (number1,number2) in paralogs[genome]:
+                PARALOG_H.write("%s%s%s%s\n" % ("header:",GeneHeader(number1)," contig:",CONTIG))
+                PARALOG_H.write("%s\n" % ("# blast hit:"))
+                PARALOG_H.write("%s%s\t%s%s\t%s\n" % ("query:",GeneHeader(number1),"subject:",GeneHeader(number2),
+                    "hit type:paralog\tidentity:80.0\talignment length:850\tmismatches:10\tgapopens:0\tquery start/end:1/850\tsubject start/end:1/850\tevalue:1e-100\tbitscore:1500\tquery/subject coverage:0.9/0.9"))
+                PARALOG_H.write("%s\n" % ("coverage:0.9"))
+    PARALOG_H.close()
+
+# Writes a Results_ directory for each pair of genomes; returns the number of directories
+def WriteResults(resultsDir,genomes,genes):
+    paralogs = {}
+    for genome in genomes:
+        paralogs[genome] = [(random.randrange(1,genes + 1),random.randrange(1,genes + 1)) for i in range(0,PARALOG_PAIRS)]
+    pairCount = 0
+    for i in range(0,len(genomes)):
+        for j in range(i + 1,len(genomes)):
+            directory = os.path.join(resultsDir,"Results_" + genomes[i] + "_" + genomes[j])
+            os.makedirs(directory)
+            permutation = list(range(1,genes + 1)); random.shuffle(permutation)
+            hitTable = []
+            for number in range(1,genes + 1):
+                roll = random.random()
+                if roll < MUTUAL_FRACTION:
+                    hitTable.append(("genome1_mutual",number,permutation[number - 1]))
+                elif roll < HIT_FRACTION:
+                    hitTable.append(("genome1_singular",number,permutation[number - 1]))
+                    hitTable.append(("genome2_singular",random.randrange(1,genes + 1),number))
+                else:
+                    hitTable.append(("genome1_loner",number,0))
+                    hitTable.append(("genome2_loner",0,permutation[number - 1]))
+            WriteLogFile(directory,genomes[i],genomes[j])
+            WriteReportFile(directory,genes,hitTable)
+            WriteParalogFile(directory,genomes[i],genomes[j],paralogs)
+            pairCount += 1
+    return pairCount
+
+# The former model: genes and proteins are found by scanning the genome's lists
+class referenceGenome(genomics_compareGenomes.genome):
+
+    def findGene(self,contigName,name):
+        for gene_obj in self.geneList:
+            if gene_obj.contigName == contigName and gene_obj.name == name:
+                return gene_obj
+        return None
+
+    def findProtein(self,contigName,name):
+        for protein_obj in self.proteinList:
+            if protein_obj.contigName == contigName and protein_obj.name == name:
+                return protein_obj
+        return None
+
+# The former model: genomes, paralogs, and annotations are found by scanning the genome list
+class referenceComparison(genomics_compareGenomes.comparison):
+
+    def __init__(self):
+        genomics_compareGenomes.comparison.__init__(self)
+        self.genomeTemplate = referenceGenome()
+
+    def findGenomeObject(self,genomeName):
+        for genome_object in self.genomeList:
+            if genome_object.name == genomeName:
+                return genome_object
+        return
+
+    def findGeneParalog(self,genomeName,geneIdentifier):
+        gene_obj = self.geneTemplate
+        for genome in self.genomeList:
+            if genome.name == genomeName:
+                for gene_obj in genome.geneList:
+                    if gene_obj.identifier == geneIdentifier:
+                        return gene_obj
+        return gene_obj
+
+    def findProteinParalog(self,genomeName,proteinIdentifier):
+        protein_obj = self.proteinTemplate
+        for genome in self.genomeList:
+            if genome.name == genomeName:
+                for protein_obj in genome.proteinList:
+                    if protein_obj.identifier == proteinIdentifier:
+                        return protein_obj
+        return protein_obj
+
+    def getAnnotation(self,identifier,seqType):
+        annot = ""
+        (genomeName,contigName,cgpHeader) = identifier.split(':')
+        for genome in self.genomeList:
+            if genome.name == genomeName:
+                if seqType.lower() == "gene":
+                    for gene in genome.geneList:
+                        if gene.cgpHeader == cgpHeader:
+                            annot = gene.annotation
+                elif seqType.lower() == "protein":
+                    for protein in genome.proteinList:
+                        if protein.cgpHeader == cgpHeader:
+                            annot = protein.annotation
+        return annot
+
+# Loads the comparison data and computes homology groups; returns (loadData seconds, computeHomologyGroups seconds)
+def RunComparison(comparison,reference):
+    comparison.setParameters({"referenceGenome" : reference})
+    startTime = time.time()
+    comparison.loadData()
+    loadTime = time.time() - startTime
+    startTime = time.time()
+    comparison.computeHomologyGroups()
+    return (loadTime,time.time() - startTime)
+
+# Returns the genome dump, plus each reference gene's and protein's homology list with the annotations of its members
+def DumpComparison(comparison,reference):
+    DUMP_H = io.StringIO()
+    comparison.printAll2file(DUMP_H)
+    reference_obj = comparison.findGenomeObject(reference)
+    for (seqType,itemList) in [("gene",reference_obj.geneList),("protein",reference_obj.proteinList)]:
+        for item in itemList:
+            DUMP_H.write("%s\t%s\t%s\n" % (seqType,item.identifier,item.homologyList))
+            for homolog in item.homologyList:
+                DUMP_H.write("%s\t%s\n" % (homolog,comparison.getAnnotation(homolog,seqType)))
+    return DUMP_H.getvalue()
+
+##### Main
+
+genes  = DEFAULT_GENES
+counts = []
+REFERENCE = False
+arguments = sys.argv[1:]
+if "-reference" in arguments:
+    REFERENCE = True
+    arguments.remove("-reference")
+if len(arguments) > 0:
+    genes = int(arguments[0])
+for argument in arguments[1:]:
+    counts.append(int(argument))
+if not counts:
+    counts = DEFAULT_COUNTS
+
+random.seed(1)
+print("genomics_benchmarkCompare says, Genes per genome:", genes)
+for count in counts:
+    resultsDir = os.path.join(tempDir,"CGP_" + str(count))
+    os.makedirs(resultsDir)
+    genomes = ["genome" + str(i + 1) for i in range(0,count)]
+    pairCount = WriteResults(resultsDir,genomes,genes)
+    genomics_compareGenomes.CGP_RESULTS_DIR = resultsDir
+
+    comparison = genomics_compareGenomes.comparison()
+    (loadTime,groupTime) = RunComparison(comparison,genomes[0])
+    geneCount = sum([len(genome.geneList) for genome in comparison.genomeList])
+    groupCount = len([gene for gene in comparison.genomeIndex[genomes[0]].geneList if gene.homologyList])
+    print("   genomes: %4d  pair reports: %5d  genes loaded: %7d  homology groups: %4d  loadData: %7.2f s  computeHomologyGroups: %6.3f s" % \
+        (count,pairCount,geneCount,groupCount,loadTime,groupTime))
+    if REFERENCE:
+        former = referenceComparison()
+        (formerLoadTime,formerGroupTime) = RunComparison(former,genomes[0])
+        print("      former lookups:  loadData: %7.2f s  computeHomologyGroups: %6.3f s  identical: %s" % \
+            (formerLoadTime,formerGroupTime,DumpComparison(comparison,genomes[0]) == DumpComparison(former,genomes[0])))
+    shutil.rmtree(resultsDir)
+
+shutil.rmtree(tempDir)
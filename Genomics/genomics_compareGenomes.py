@@ -3,7 +3,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Most recent update: 08 December 2020
+# Most recent update: 18 October 2026
 #
 # Module comprising classes and data structures for comparing genomes
 #
@@ -61,7 +61,14 @@
 #       printReport
 #       printAll2file
 #       printAll
+#    class sequenceStore
+#       loadFile
+#       getSequence
 #    class genome
+#       addGene
+#       addProtein
+#       findGene
+#       findProtein
 #       addParalog
 #     - genome data check methods
 #       checkMutualBestHitList
@@ -163,6 +170,11 @@ PHATE_PIPELINE_OUTPUT_DIR       = os.environ["PHATE_PIPELINE_OUTPUT_DIR"]
 CGP_GENES_FILENAME              = "cgp_gene.fnt"
 CGP_PROTEINS_FILENAME           = "cgp_protein.faa"  
 
+# Patterns for report file lines
+p_comment  = re.compile('^#')
+p_protein  = re.compile('^#PROTEIN\sHITS')
+p_dataLine = re.compile('^\d+')
+
 # Report file fields
 SORT_POSITION        = 0
 GENOME_TYPE          = 1
@@ -206,10 +218,14 @@ class comparison(object):
         self.referenceGenome       = "unknown"      # name of genome assigned as the reference
         self.genomeCount           = 0              # number of genomes in set
         self.genomeList            = []             # set of genome class objects
+        self.genomeIndex           = {}             # genome name => genome object (first listed, if repeated)
+        self.geneCallStrings       = {}             # annotation string => genecall string; see getGeneCallString
         self.commonCore_gene       = []             # list of genes that are common among all genomes: all around mutual best hits
         self.commonCore_protein    = []             # list of protein that are common among all genomes: all around mutual best hits
         self.geneHomologyGroups    = []             # closely related genes for hmmbuild (list of lists) #*** CHECK THIS - is this used at comparison level?
         self.proteinHomologyGroups = []             # closely related proteins for hmmbuild (list of lists) #*** CHECK THIS
+        self.sequenceStore         = sequenceStore() # sequences of the genomes' CGP gene and protein files, loaded once per run
+        self.annotationIndex       = None           # (seqType,genomeName,cgpHeader) => annotation; see getAnnotation
         # Templates
         self.genomeTemplate        = genome()
         self.geneTemplate          = gene_protein()
@@ -322,6 +338,8 @@ class comparison(object):
                 nextGenome.isReference = True
             nextGenome.file = genomeFastaList[i]
             self.genomeList.append(nextGenome)
+            if nextGenome.name not in self.genomeIndex:
+                self.genomeIndex[nextGenome.name] = nextGenome
 
         # Walk through .report files, add mutual & singular best hits, loners
         if PHATE_PROGRESS:
@@ -380,9 +398,9 @@ class comparison(object):
         for rLine in rLines:
             fields = []; genomeNum = ""; hitType = ""
             # Skip lines not to be processed in this method
-            match_comment  = re.search('^#',rLine)
-            match_protein  = re.search('^#PROTEIN\sHITS',rLine)
-            match_dataLine = re.search('^\d+',rLine)
+            match_comment  = p_comment.search(rLine)
+            match_protein  = p_protein.search(rLine)
+            match_dataLine = p_dataLine.search(rLine)
             if match_protein: 
                 PROTEIN = True  # Prepare for loading protein hits next
                 continue
@@ -566,16 +584,19 @@ class comparison(object):
             if PHATE_WARNINGS:
                 print("genomics_compareGenomes says, WARNING: Expected genome1 name in addParalog2genome")
                 return
-        for genome_obj in self.genomeList:
-            if genome_obj.name == genome:
-                genome_obj.addParalog(dataArgs)
-                break
+        genome_obj = self.findGenomeObject(genome)
+        if genome_obj:
+            genome_obj.addParalog(dataArgs)
         return
 
     # Method getGeneCallString extracts the genecall name from the annotation string
+    # A gene's annotation string recurs in each pair's report, so each is parsed once
     def getGeneCallString(self,inString):  
+        if inString in self.geneCallStrings:
+            return self.geneCallStrings[inString]
         inList = ast.literal_eval(inString) # Convert string representation of a list to an actual list
         geneCallString = inList[0][0]          # First element of the list is the genecall string
+        self.geneCallStrings[inString] = geneCallString
         return geneCallString
 
     # Method addHit2genome inserts a new gene hit into a genome's geneList or proteinList, or records a gene as a
@@ -646,15 +667,12 @@ class comparison(object):
         if MUTUAL or SINGULAR_ONE or LONER_ONE:
             # Search for query gene in genome1 (if exists)
             if GENE:
-                GENE_FOUND = False; NEW = False
-                for gene_obj in genome1_obj.geneList:
-                    if gene_obj.contigName == dataArgs["contig1"] and gene_obj.name == dataArgs["gene1"]:
-                        GENE_FOUND = True
-                        break
-                if not GENE_FOUND: 
+                NEW = False
+                gene_obj = genome1_obj.findGene(dataArgs["contig1"],dataArgs["gene1"])
+                if gene_obj is None: 
                     # Create and populate a new gene object
                     NEW = True
-                    gene_obj = copy.deepcopy(self.geneTemplate)
+                    gene_obj = gene_protein()
                     gene_obj.name         = dataArgs["gene1"]
                     gene_obj.type         = "gene"
                     gene_obj.identifier   = gene1id 
@@ -678,18 +696,15 @@ class comparison(object):
 
                 # If this gene object needed to be newly created, then add to geneList; else it's already there!
                 if NEW:
-                    genome1_obj.geneList.append(gene_obj)
+                    genome1_obj.addGene(gene_obj)
 
             elif PROTEIN:
-                PROTEIN_FOUND = False; NEW = False
-                for protein_obj in genome1_obj.proteinList:
-                    if protein_obj.contigName == dataArgs["contig1"] and protein_obj.name == dataArgs["protein1"]:
-                        PROTEIN_FOUND = True
-                        break
-                if not PROTEIN_FOUND: 
+                NEW = False
+                protein_obj = genome1_obj.findProtein(dataArgs["contig1"],dataArgs["protein1"])
+                if protein_obj is None: 
                     # Create and populate a new gene object
                     NEW = True
-                    protein_obj = copy.deepcopy(self.proteinTemplate)
+                    protein_obj = gene_protein()
                     protein_obj.name         = dataArgs["protein1"]
                     protein_obj.type         = "protein"
                     protein_obj.identifier   = protein1id 
@@ -713,20 +728,17 @@ class comparison(object):
 
                 # If this protein object needed to be newly created, then add to proteinList; else it's already there!
                 if NEW:
-                    genome1_obj.proteinList.append(protein_obj)
+                    genome1_obj.addProtein(protein_obj)
 
         if MUTUAL or SINGULAR_TWO or LONER_TWO:
             # Search for query gene in genome2 (if exists)
             if GENE:
-                GENE_FOUND = False; NEW = False
-                for gene_obj in genome2_obj.geneList:
-                    if gene_obj.contigName == dataArgs["contig2"] and gene_obj.name == dataArgs["gene2"]:
-                        GENE_FOUND = True
-                        break
-                if not GENE_FOUND: 
+                NEW = False
+                gene_obj = genome2_obj.findGene(dataArgs["contig2"],dataArgs["gene2"])
+                if gene_obj is None: 
                     # Create and populate a new gene object
                     NEW = True
-                    gene_obj = copy.deepcopy(self.geneTemplate)
+                    gene_obj = gene_protein()
                     gene_obj.name         = dataArgs["gene2"]
                     gene_obj.type         = "gene"
                     gene_obj.identifier   = gene2id 
@@ -748,18 +760,15 @@ class comparison(object):
                 if LONER_TWO:
                     gene_obj.lonerList.append(dataArgs["genome1"])
                 if NEW:
-                    genome2_obj.geneList.append(gene_obj)
+                    genome2_obj.addGene(gene_obj)
 
             elif PROTEIN:
-                PROTEIN_FOUND = False; NEW = False
-                for protein_obj in genome2_obj.proteinList:
-                    if protein_obj.contigName == dataArgs["contig2"] and protein_obj.name == dataArgs["protein2"]:
-                        PROTEIN_FOUND = True
-                        break
-                if not PROTEIN_FOUND: 
+                NEW = False
+                protein_obj = genome2_obj.findProtein(dataArgs["contig2"],dataArgs["protein2"])
+                if protein_obj is None: 
                     # Create and populate a new gene object
                     NEW = True
-                    protein_obj = copy.deepcopy(self.proteinTemplate)
+                    protein_obj = gene_protein()
                     protein_obj.name         = dataArgs["protein2"]
                     protein_obj.type         = "protein"
                     protein_obj.identifier   = protein2id 
@@ -781,14 +790,11 @@ class comparison(object):
                 if LONER_TWO:
                     protein_obj.lonerList.append(dataArgs["genome1"])
                 if NEW:
-                    genome2_obj.proteinList.append(protein_obj)
+                    genome2_obj.addProtein(protein_obj)
         return
 
     def findGenomeObject(self,genomeName):
-        for genome_object in self.genomeList:
-            if genome_object.name == genomeName:
-                return genome_object
-        return
+        return self.genomeIndex.get(genomeName)
 
     def addMutualBestHit(self,hitList,hit,item1,item2,item3,item4,item5):
         print("genomics_comparGenomes says, Adding hit ",hit," to mutualBestHitList:")
@@ -825,8 +831,8 @@ class comparison(object):
     def computeHomologyGroups(self):
         # Compute homology groups  for each reference gene/protein by combining homologous genes 
         # laterally (across genomes) and vertically (paralogs); save to reference genome object.
-        refGeneList    = []  # Names of reference genes that have been combined into a group 
-        refProteinList = []  # Names of reference proteins that have been combined into a group 
+        refGeneList    = set()  # Names of reference genes that have been combined into a group 
+        refProteinList = set()  # Names of reference proteins that have been combined into a group 
         for genome in self.genomeList:
             if genome.isReference:
 
@@ -836,7 +842,7 @@ class comparison(object):
                         continue 
                     else:
                         # Account for the gene itself
-                        refGeneList.append(gene.identifier)
+                        refGeneList.add(gene.identifier)
                         # Account for each mutual best hit
                         for homolog in gene.mutualBestHitList:
                             gene.homologyList.append(homolog)
@@ -846,7 +852,7 @@ class comparison(object):
                         # Account for each paralog of the gene itself
                         for homolog in gene.paralogList:
                             gene.homologyList.append(homolog)
-                            refGeneList.append(homolog) # record here so doesn't provoke another homology group 
+                            refGeneList.add(homolog) # record here so doesn't provoke another homology group 
                             # Account for each mutual and singular best hit of each paralog
                             paralog_obj = self.findGeneParalog(genome.name,homolog)
                             for gHomolog in paralog_obj.mutualBestHitList:
@@ -860,7 +866,7 @@ class comparison(object):
                         continue 
                     else:
                         # Account for the protein itself
-                        refProteinList.append(protein.identifier)
+                        refProteinList.add(protein.identifier)
                         # Account for each mutual best hit
                         for homolog in protein.mutualBestHitList:
                             protein.homologyList.append(homolog)
@@ -870,7 +876,7 @@ class comparison(object):
                         # Account for each paralog of the protein itself
                         for homolog in protein.paralogList:
                             protein.homologyList.append(homolog)
-                            refProteinList.append(homolog) # record here so doesn't provoke another homology group
+                            refProteinList.add(homolog) # record here so doesn't provoke another homology group
                             # Account for each mutual and singular best hit of each paralog
                             paralog_obj = self.findProteinParalog(genome.name,homolog)
                             for pHomolog in paralog_obj.mutualBestHitList:
@@ -881,25 +887,20 @@ class comparison(object):
             print("genomics_compareGenomes says, Homology group computation complete.")
         return
 
-    def findGeneParalog(self,genomeName,geneIdentifier):
-        gene_obj = self.geneTemplate
-        for genome in self.genomeList:
-            if genome.name == genomeName:
-                for gene_obj in genome.geneList:
-                    if gene_obj.identifier == geneIdentifier:
-                        return gene_obj
-        return gene_obj
-
-    def findProteinParalog(self,genomeName,proteinIdentifier):
-        protein_obj = self.proteinTemplate
-        for genome in self.genomeList:
-            if genome.name == genomeName:
-                for protein_obj in genome.proteinList:
-                    if protein_obj.identifier == proteinIdentifier:
-                        return protein_obj 
-        return protein_obj 
+    def findGeneParalog(self,genomeName,geneIdentifier):  # Returns the gene template (no hits) if not found
+        genome = self.findGenomeObject(genomeName)
+        if genome and geneIdentifier in genome.geneIdentifierIndex:
+            return genome.geneIdentifierIndex[geneIdentifier]
+        return self.geneTemplate
+
+    def findProteinParalog(self,genomeName,proteinIdentifier):  # Returns the protein template (no hits) if not found
+        genome = self.findGenomeObject(genomeName)
+        if genome and proteinIdentifier in genome.proteinIdentifierIndex:
+            return genome.proteinIdentifierIndex[proteinIdentifier]
+        return self.proteinTemplate 
 
     # Method createGeneHomologyFastaFiles creates homoloyg fasta files (for the reference genome)
+    # Sequences are served by self.sequenceStore, which reads each genome's CGP gene file once
     def createGeneHomologyFastaFiles(self,directory='./'):
         geneFasta   = ""
         groupNumber = 0
@@ -915,17 +916,18 @@ class comparison(object):
                         # Get fasta sequence for this reference protein
                         filePathName = self.getGeneFile(genome.name) 
                         geneSeq = self.getSequence(gene.name,filePathName)
-                        FILE_H = open(nextHomologyFastaFile,'w')
-                        fastaString = '>' + gene.identifier + '\n' + geneSeq + '\n'
-                        FILE_H.write("%s" % (fastaString))
+                        fastaStrings = ['>' + gene.identifier + '\n' + geneSeq + '\n']
 
                         # Get fasta sequence for each member of this reference genes homology group 
                         for seqID in gene.homologyList:
                             (genomeName,contigName,cgpHeader) = seqID.split(':')
                             filePathName = self.getGeneFile(genomeName)
                             geneFasta = self.getSequence(cgpHeader,filePathName)
-                            fastaString = '>' + seqID + '\n' + geneSeq + '\n'
-                            FILE_H.write("%s" % (fastaString))
+                            fastaStrings.append('>' + seqID + '\n' + geneFasta + '\n')
+
+                        # Write the group's fasta file
+                        FILE_H = open(nextHomologyFastaFile,'w')
+                        FILE_H.write("%s" % (''.join(fastaStrings)))
                         FILE_H.close()
         return geneFasta
 
@@ -948,23 +950,22 @@ class comparison(object):
                         annotFileName = HOMOLOGY_ANNOT_PREFIX + str(groupNumber) + '.annot'
                         nextHomologyAnnotFile = os.path.join(directory,annotFileName)
 
-                        # Open fasta and annotation files
-                        FASTA_FILE_H = open(nextHomologyFastaFile,'w')
-                        ANNOT_FILE_H = open(nextHomologyAnnotFile,'w')
-
-                        # Get fasta sequence for this reference protein and write to file
+                        # Get fasta sequence for this reference protein
                         filePathName = self.getProteinFile(genome.name) 
                         proteinSeq = self.getSequence(protein.name,filePathName)
-                        fastaString = '>' + protein.identifier + '\n' + proteinSeq + '\n'
-                        FASTA_FILE_H.write("%s" % (fastaString))
+                        fastaStrings = ['>' + protein.identifier + '\n' + proteinSeq + '\n']
 
-                        # Get fasta sequence for each member of this reference protein's homology group and write to file
+                        # Get fasta sequence for each member of this reference protein's homology group
                         for seqID in protein.homologyList:
                             (genomeName,contigName,cgpHeader) = seqID.split(':')
                             filePathName = self.getProteinFile(genomeName)
                             proteinSeq = self.getSequence(cgpHeader,filePathName)
-                            fastaString = '>' + seqID + '\n' + proteinSeq + '\n'
-                            FASTA_FILE_H.write("%s" % (fastaString))
+                            fastaStrings.append('>' + seqID + '\n' + proteinSeq + '\n')
+
+                        # Write the group's fasta file; open annotation file
+                        FASTA_FILE_H = open(nextHomologyFastaFile,'w')
+                        FASTA_FILE_H.write("%s" % (''.join(fastaStrings)))
+                        ANNOT_FILE_H = open(nextHomologyAnnotFile,'w')
 
                         # Get annotation for this reference protein and write to file
                         fullAnnotation = ast.literal_eval(protein.annotation)
@@ -1000,44 +1001,27 @@ class comparison(object):
         return filePathName 
 
     def getSequence(self,cgpHeader,filePathName):
-        seq = ""
-        try:
-            file_h = open(filePathName,'r')
-        except:
-            print("genomics_compareGenomes says, ERROR: Cannot open file ",filePathName)
-            return seq 
-        fLines = file_h.read().splitlines()
-        for i in range(0,len(fLines)):
-            fLine = fLines[i]
-            # Note: using the cgpHeader as a search string fails if it has '+' (for strand)
-            # Thus, need to substitute the '+' in order to find the original string in file
-            new_cgpHeader = re.sub('\+','\\+',cgpHeader)
-            match_header = re.search(new_cgpHeader,fLine)
-            if match_header:
-                seq = fLines[i+1]
-                break
+        seq = self.sequenceStore.getSequence(cgpHeader,filePathName)
         if seq == "":
             if PHATE_WARNINGS:
                 print("genomics_compareGenomes says, WARNING: Failed to find sequence for cgpHeader ",cgpHeader)
-        file_h.close()
         return seq 
 
     def getAnnotation(self,identifier,seqType):
-        annot = ""
         (genomeName,contigName,cgpHeader) = identifier.split(':')
-        for genome in self.genomeList:
-            # Identify the genome in question
-            if genome.name == genomeName:
-                # Identify the gene or protein, and capture it's annotation
-                if seqType.lower() == "gene" or seqType.lower() == "nucleotide" or seqType.lower() == "nt":
-                    for gene in genome.geneList:
-                        if gene.cgpHeader == cgpHeader:
-                            annot = gene.annotation 
-                elif seqType.lower() == "protein" or seqType.lower() == "peptide" or seqType.lower() == "aa" or seqType.lower() == "prot":
-                    for protein in genome.proteinList:
-                        if protein.cgpHeader == cgpHeader:
-                            annot = protein.annotation
-        return annot
+        if self.annotationIndex is None:  # Index the genes' and proteins' annotations on first use
+            self.annotationIndex = {}
+            for genome in self.genomeList:
+                for gene in genome.geneList:
+                    self.annotationIndex[("gene",genome.name,gene.cgpHeader)] = gene.annotation
+                for protein in genome.proteinList:
+                    self.annotationIndex[("protein",genome.name,protein.cgpHeader)] = protein.annotation
+        # Identify the gene or protein, and capture it's annotation
+        if seqType.lower() == "gene" or seqType.lower() == "nucleotide" or seqType.lower() == "nt":
+            return self.annotationIndex.get(("gene",genomeName,cgpHeader),"")
+        elif seqType.lower() == "protein" or seqType.lower() == "peptide" or seqType.lower() == "aa" or seqType.lower() == "prot":
+            return self.annotationIndex.get(("protein",genomeName,cgpHeader),"")
+        return ""
 
     #===== COMPARISON DATA CHECK METHODS
 
@@ -1493,6 +1477,56 @@ class comparison(object):
         print("=========End Genome Set=========")
         return
 
+#############################################################################################################
+# Class sequenceStore reads each CGP gene or protein fasta file once, and serves its sequences by cgpHeader,
+#   so that writing the homology group fasta files does not re-read a genome's file for each group member.
+class sequenceStore(object):
+
+    def __init__(self):
+        self.fileSequences = {}  # file path/name => {header => sequence}
+        self.fileHeaders   = {}  # file path/name => list of headers, in file order
+
+    def loadFile(self,filePathName):
+        sequences = {}
+        headers   = []
+        try:
+            file_h = open(filePathName,'r')
+        except:
+            print("genomics_compareGenomes says, ERROR: Cannot open file ",filePathName)
+            self.fileSequences[filePathName] = sequences  # report a missing file once
+            self.fileHeaders[filePathName]   = headers
+            return False
+        header = ""
+        for fLine in file_h:
+            fLine = fLine.rstrip('\r\n')
+            if fLine.startswith('>'):
+                header = fLine[1:]
+                if header not in sequences:  # as before, the first occurrence of a header is taken
+                    sequences[header] = []
+                    headers.append(header)
+                else:
+                    header = ""
+            elif header:
+                sequences[header].append(fLine)
+        file_h.close()
+        for header in headers:
+            sequences[header] = ''.join(sequences[header])
+        self.fileSequences[filePathName] = sequences
+        self.fileHeaders[filePathName]   = headers
+        return True
+
+    def getSequence(self,cgpHeader,filePathName):
+        if filePathName not in self.fileSequences:
+            self.loadFile(filePathName)
+        sequences = self.fileSequences[filePathName]
+        if cgpHeader in sequences:
+            return sequences[cgpHeader]
+        # The cgpHeader may be part of the fasta header; take the first header that contains it
+        for header in self.fileHeaders[filePathName]:
+            if cgpHeader in header:
+                return sequences[header]
+        return ""
+
 #############################################################################################################
 # Class genome stores metadata 
 #############################################################################################################
@@ -1506,6 +1540,31 @@ class genome(object):
         self.geneList             = []     # List of gene_protein objects 
         self.proteinList          = []     # List of gene_protein objects 
         self.paralogList          = []     # List of paralogSet objects
+        # Indexes of geneList and proteinList; genes and proteins are added via addGene and addProtein
+        self.geneIndex              = {}   # (contigName, name) => gene_protein object
+        self.proteinIndex           = {}   # (contigName, name) => gene_protein object
+        self.geneIdentifierIndex    = {}   # identifier => gene_protein object (first added, if repeated)
+        self.proteinIdentifierIndex = {}   # identifier => gene_protein object (first added, if repeated)
+        self.geneHeaderIndex        = {}   # cgpHeader => list of gene_protein objects, in geneList order
+        self.proteinHeaderIndex     = {}   # cgpHeader => list of gene_protein objects, in proteinList order
+
+    def addGene(self,gene_obj):
+        self.geneList.append(gene_obj)
+        self.geneIndex.setdefault((gene_obj.contigName,gene_obj.name),gene_obj)
+        self.geneIdentifierIndex.setdefault(gene_obj.identifier,gene_obj)
+        self.geneHeaderIndex.setdefault(gene_obj.cgpHeader,[]).append(gene_obj)
+
+    def addProtein(self,protein_obj):
+        self.proteinList.append(protein_obj)
+        self.proteinIndex.setdefault((protein_obj.contigName,protein_obj.name),protein_obj)
+        self.proteinIdentifierIndex.setdefault(protein_obj.identifier,protein_obj)
+        self.proteinHeaderIndex.setdefault(protein_obj.cgpHeader,[]).append(protein_obj)
+
+    def findGene(self,contigName,name):  # Returns the gene_protein object, or None
+        return self.geneIndex.get((contigName,name))
+
+    def findProtein(self,contigName,name):  # Returns the gene_protein object, or None
+        return self.proteinIndex.get((contigName,name))
 
     def addParalog(self,dataArgs):
         hitType = ""; gene1 = ""; gene2 = ""; protein1 = ""; protein2 = ""
@@ -1545,23 +1604,19 @@ class genome(object):
 
         # Find gene1 and gene2 in genome; get gene identifiers
         if hitType == "gene_paralog":
-            for gene_obj1 in self.geneList:
-                if gene_obj1.cgpHeader == gene1:
-                    for gene_obj2 in self.geneList:
-                        if gene_obj2.cgpHeader == gene2:
-                            paralogID = gene_obj2.identifier
-                            if paralogID not in gene_obj1.paralogList:
-                                gene_obj1.paralogList.append(paralogID)
+            for gene_obj1 in self.geneHeaderIndex.get(gene1,[]):
+                for gene_obj2 in self.geneHeaderIndex.get(gene2,[]):
+                    paralogID = gene_obj2.identifier
+                    if paralogID not in gene_obj1.paralogList:
+                        gene_obj1.paralogList.append(paralogID)
 
         # Find protein1 and protein2 in genome; get protein identifiers
         elif hitType == "protein_paralog":
-            for protein_obj1 in self.proteinList:
-                if protein_obj1.cgpHeader == protein1:
-                    for protein_obj2 in self.proteinList:
-                        if protein_obj2.cgpHeader == protein2:
-                            paralogID = protein_obj2.identifier
-                            if paralogID not in protein_obj1.paralogList:
-                                protein_obj1.paralogList.append(paralogID)
+            for protein_obj1 in self.proteinHeaderIndex.get(protein1,[]):
+                for protein_obj2 in self.proteinHeaderIndex.get(protein2,[]):
+                    paralogID = protein_obj2.identifier
+                    if paralogID not in protein_obj1.paralogList:
+                        protein_obj1.paralogList.append(paralogID)
         return
 
     #===== GENOME DATA CHECK METHODS
@@ -1600,37 +1655,37 @@ class genome(object):
         return
 
     def checkUnique(self):
-        tempList = []
+        tempList = set()
         for gene in self.geneList:
             if gene.identifier in tempList:
                 if PHATE_WARNINGS:
                     print("genomics_compareGenomes genome obj says, WARNING: ",gene.identifier," is not unique")
             else:
-                tempList.append(gene.identifier)
+                tempList.add(gene.identifier)
             
-        tempList = []
+        tempList = set()
         for gene in self.geneList:
             if gene.cgpHeader in tempList:
                 if PHATE_WARNINGS:
                     print("genomics_compareGenomes genome obj says, WARNING: ",gene.cgpHeader," is not unique")
             else:
-                tempList.append(gene.cgpHeader)
+                tempList.add(gene.cgpHeader)
             
-        tempList = []
+        tempList = set()
         for protein in self.proteinList:
             if protein.identifier in tempList:
                 if PHATE_WARNINGS:
                     print("genomics_compareGenomes genome obj says, WARNING: ",protein.identifier," is not unique")
             else:
-                tempList.append(protein.identifier)
+                tempList.add(protein.identifier)
 
-        tempList = []
+        tempList = set()
         for protein in self.proteinList:
             if protein.cgpHeader in tempList:
                 if PHATE_WARNINGS:
                     print("genomics_compareGenomes genome obj says, WARNING: ",protein.cgpHeader," is not unique")
             else:
-                tempList.append(protein.cgpHeader)
+                tempList.add(protein.cgpHeader)
         return
 
     #===== GENOME PRINT METHODS
@@ -6,7 +6,7 @@
 #
 # Programmer:  C. E. Zhou
 #
-# Latest update:  07 December 2020
+# Latest update:  18 October 2026
 #
 # Description: This driver code runs the Genomics module, which identifies gene correspondences
 #    among genomes that have been compared using CompareGeneProfiles (CGP), creates fasta
@@ -57,10 +57,13 @@ GENOMICS_RESULTS_DIR = os.environ["PHATE_GENOMICS_RESULTS_DIR"]
 # BEGIN MAIN
 #
 
-# Collect input parameter
+# Collect input parameters: reference genome, and (optionally) number of cpus for building hmms
 referenceGenome = "" 
-if len(sys.argv) == 2:
+genomicsThreads = 0
+if len(sys.argv) >= 2:
     referenceGenome = sys.argv[1]
+if len(sys.argv) >= 3:
+    genomicsThreads = int(sys.argv[2])
 if referenceGenome == "":
     print("genomics_driver says, ERROR: reference genome not set.")
 
@@ -94,6 +97,7 @@ buildParameters = {
         "codeVersion"       : '2',
         "alignmentCodeName" : "clustalo",
         "buildDirectory"    : GENOMICS_RESULTS_DIR,
+        "threads"           : genomicsThreads,
         }
 hmmBuild.setParameters(buildParameters)
 if PHATE_MESSAGES:
@@ -3,7 +3,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Most recent update: 19 November 2020
+# Most recent update: 18 October 2026
 #
 # Module comprising classes and data structures for building HMM profiles 
 #
@@ -17,7 +17,10 @@
 #       printAll
 #       printAll2file
 #    class build 
+#       getParameterSets
 #       performBuild
+#       combineHmms
+#    buildGroupHmm
 #
 #################################################################################
 
@@ -26,6 +29,7 @@
 
 import re, os, copy
 import subprocess
+from multiprocessing import Pool
 
 CODE_BASE_DIR    = ""
 OUTPUT_DIR       = ""
@@ -72,6 +76,16 @@ CLUSTALO_FORMAT = "vienna"     # This one doesn't work on server, fnt input; com
 
 # Locations and files
 PHATE_PIPELINE_OUTPUT_DIR = os.environ["PHATE_PIPELINE_OUTPUT_DIR"] 
+GENE_HMM_LIBRARY          = "homologyGroups_gene.hmm"     # all gene group HMMs, pressed for hmmscan; in the build directory
+PROTEIN_HMM_LIBRARY       = "homologyGroups_protein.hmm"  # all protein group HMMs, pressed for hmmscan; in the build directory
+
+# Build one homology group's HMM (alignment, then hmmbuild); run in a worker process by build.performBuild
+def buildGroupHmm(parameterSet):
+    myHmm = build1hmm()
+    myHmm.setParameters(parameterSet)
+    if PHATE_MESSAGES:
+        print("hmm_build says, creating HMM for group ",os.path.basename(myHmm.groupFile))
+    return myHmm.runHmmAnalysis()
 
 # templates 
 
@@ -92,6 +106,7 @@ class build1hmm(object):
         self.outFile                     = ""         # captures screen output from hmmbuild
         self.sequenceType                = ""         # "nucleotide" or "protein"
         self.alignmentFormat             = ""         # set by build object
+        self.threads                     = 0          # cpus for clustalo (--threads) and hmmbuild (--cpu); 0 = codes' defaults
 
     def setParameters(self,kvargs):
         if isinstance(kvargs,dict):
@@ -115,11 +130,16 @@ class build1hmm(object):
                 self.sequenceType = kvargs["sequenceType"]
             if "alignmentFormat" in list(kvargs.keys()):
                 self.alignmentFormat = kvargs["alignmentFormat"]
+            if "threads" in list(kvargs.keys()):
+                self.threads = int(kvargs["threads"])
         return
 
     def runHmmAnalysis(self):
-        self.runAlignment()
-        self.runHmmbuild()
+        alignmentResult = self.runAlignment()
+        hmmbuildResult  = self.runHmmbuild()
+        if alignmentResult != SUCCESS:
+            return alignmentResult
+        return hmmbuildResult
 
     def runAlignment(self):  # Currently coded for running clustal omega
         # Construct command
@@ -128,6 +148,8 @@ class build1hmm(object):
         # If parameters have been set, construct alignment command
         if self.groupFile != '' and self.alignmentFile != '' and self.alignmentFormat != '':
             command = self.alignmentCodeName + ' -i ' + self.groupFile + ' -o ' + self.alignmentFile + ' --outfmt=' + self.alignmentFormat
+            if self.threads > 0:
+                command += ' --threads=' + str(self.threads)
         else:
             return ERROR_CODE_1
 
@@ -136,8 +158,7 @@ class build1hmm(object):
             if os.path.exists(self.alignmentFile):
                 if PHATE_MESSAGES:
                     print ("hmm_build says, Clearing previous results...removing ",self.alignmentFile)
-                rm_command = 'rm ' + self.alignmentFile
-                os.system(rm_command)
+                os.remove(self.alignmentFile)
             if PHATE_MESSAGES:
                 print ("hmm_build says, Running clustal omega; command is ",command)
             os.system(command)
@@ -160,7 +181,10 @@ class build1hmm(object):
         # Construct command
         command = ''
         if self.hmmFile != '' and self.alignmentFile != '' and self.outFile != '' and self.groupFile != '':
-            command = self.codeName + ' ' + seqType + ' -o ' + self.outFile + ' ' + self.hmmFile + ' ' + self.alignmentFile
+            command = self.codeName + ' ' + seqType + ' -o ' + self.outFile
+            if self.threads > 0:
+                command += ' --cpu ' + str(self.threads)
+            command += ' ' + self.hmmFile + ' ' + self.alignmentFile
         else:
             return ERROR_CODE_1
 
@@ -169,8 +193,7 @@ class build1hmm(object):
             if os.path.exists(self.hmmFile):
                 if PHATE_MESSAGES:
                     print ("multiPhATE_build says, Clearing out previous results...")
-                rm_command = 'rm ' + self.hmmFile
-                os.system(rm_command)
+                os.remove(self.hmmFile)
             if PHATE_MESSAGES:
                 print ("hmm_build says, Running hmmbuild; command is ",command)
             os.system(command)     
@@ -189,6 +212,7 @@ class build1hmm(object):
         print("hmmFile:",self.hmmFile)
         print("outFile:",self.outFile)
         print("alignmentFormat:",self.alignmentFormat)
+        print("threads:",self.threads)
         return
 
     def printParameters2file(self,FILE_H):
@@ -200,6 +224,7 @@ class build1hmm(object):
         FILE_H.write("%s%s\n" % ("hmmFile:",self.hmmFile))
         FILE_H.write("%s%s\n" % ("outFile:",self.outFile))
         FILE_H.write("%s%s\n" % ("alignmentFormat:",self.alignmentFormat))
+        FILE_H.write("%s%s\n" % ("threads:",self.threads))
         return
 
     def printResults(self):
@@ -234,6 +259,7 @@ class build(object):
         self.fileList_fnt                = []         # list of nucleotide fasta group files for hmm build
         self.fileList_faa                = []         # list of peptide fasta group files for hmm build
         self.alignmentFormat             = CLUSTALO_FORMAT  # Default is defined at top of this file
+        self.threads                     = 0          # cpus for building; groups are built in parallel if > 1
 
     def setParameters(self,kvargs):
         if isinstance(kvargs,dict):
@@ -250,6 +276,8 @@ class build(object):
                 self.buildSubDirectory = os.path.join(self.buildDirectory,"HOMOLOGY_GROUPS")
             if "alignmentFormat" in list(kvargs.keys()):
                 self.alignmentFormat = kvargs["alignmentFormat"]
+            if "threads" in list(kvargs.keys()):
+                self.threads = int(kvargs["threads"])
         return
 
     def getListsOfGroups(self):
@@ -273,17 +301,35 @@ class build(object):
             return
         return
 
+    # Returns the build1hmm parameter set for each group file in fileList
+    def getParameterSets(self,fileList,sequenceType,alignmentExtension):
+        parameterSets = []
+        for group in fileList:
+            # load parameters into standard build1hmm object
+            groupFile = os.path.join(self.buildSubDirectory,group)
+            alignmentFile = groupFile + alignmentExtension  
+            hmmFile       = groupFile + '.hmm'
+            outFile       = groupFile + '.out'
+            parameterSets.append({
+                    "codeName"          : self.codeName,
+                    "codeVersion"       : self.codeVersion,
+                    "alignmentCodeName" : self.alignmentCodeName,
+                    "groupFile"         : groupFile,
+                    "alignmentFile"     : alignmentFile,
+                    "hmmFile"           : hmmFile,
+                    "outFile"           : outFile,
+                    "sequenceType"      : sequenceType,
+                    "alignmentFormat"   : self.alignmentFormat,
+                    })
+        return parameterSets
+
+    # Groups are aligned and built on a pool of up to self.threads processes, each given an equal share of
+    # the cpus for clustalo and hmmbuild; with one process, groups are built one after another, as before
     def performBuild(self):
 
         # Query directory for list of group filenames
         self.getListsOfGroups()
 
-        # Create HMM build object
-        myHmm = build1hmm()
-
-        if PHATE_PROGRESS:
-            print("hmm_build says, Building HMMs for nucleotide files")
-
         # Determine file extension appropriate for alignmentFormat
         alignmentExtension = ''
         if self.alignmentFormat.lower() == 'fasta':
@@ -301,56 +347,60 @@ class build(object):
         else:
             alignmentExtension = '.aln'
 
-        # Create HMMs for nucleotide groups
-        for group in self.fileList_fnt:
-            # load parameters into standard build1hmm object
-            groupFile = os.path.join(self.buildSubDirectory,group)
-            alignmentFile = groupFile + alignmentExtension  
-            hmmFile       = groupFile + '.hmm'
-            outFile       = groupFile + '.out'
-            parameterSet = {
-                    "codeName"          : self.codeName,
-                    "codeVersion"       : self.codeVersion,
-                    "alignmentCodeName" : self.alignmentCodeName,
-                    "groupFile"         : groupFile,
-                    "alignmentFile"     : alignmentFile,
-                    "hmmFile"           : hmmFile,
-                    "outFile"           : outFile,
-                    "sequenceType"      : "nucleotide",
-                    "alignmentFormat"   : self.alignmentFormat,
-                    }
-            myHmm.setParameters(parameterSet)
-            if PHATE_MESSAGES:
-                print("hmm_build says, creating HMM for group ",group)
-            myHmm.runHmmAnalysis()
+        # Parameters for HMMs of nucleotide groups, then of peptide groups
+        geneParameterSets    = self.getParameterSets(self.fileList_fnt,"nucleotide",alignmentExtension)
+        proteinParameterSets = self.getParameterSets(self.fileList_faa,"protein",alignmentExtension)
+        parameterSets        = geneParameterSets + proteinParameterSets
 
-        # Create HMMs for peptide groups
+        # Divide the cpus among the groups being built at once
+        processCount = min(self.threads,len(parameterSets))
+        groupThreads = self.threads
+        if processCount > 1:
+            groupThreads = max(1,self.threads // processCount)
+        for parameterSet in parameterSets:
+            parameterSet["threads"] = groupThreads
 
         if PHATE_PROGRESS:
-            print("hmm_build says, Building HMMs for protein files")
-
-        for group in self.fileList_faa:
-            # Load parameters into standard build1hmm object
-            groupFile = os.path.join(self.buildSubDirectory,group)
-            alignmentFile = groupFile + alignmentExtension
-            hmmFile       = groupFile + '.hmm'
-            outFile       = groupFile + '.out'
-            parameterSet = {
-                    "codeName"          : self.codeName,
-                    "codeVersion"       : self.codeVersion,
-                    "alignmentCodeName" : self.alignmentCodeName,
-                    "groupFile"         : groupFile,
-                    "alignmentFile"     : alignmentFile,
-                    "hmmFile"           : hmmFile,
-                    "outFile"           : outFile,
-                    "sequenceType"      : "protein",
-                    "alignmentFormat"   : self.alignmentFormat,
-                    }
-            myHmm.setParameters(parameterSet)
-            if PHATE_MESSAGES:
-                print("hmm_build says, creating HMM for group ",group)
-            myHmm.runHmmAnalysis()
+            print("hmm_build says, Building HMMs for",len(geneParameterSets),"nucleotide and",len(proteinParameterSets),"protein groups")
+        if processCount > 1:
+            if PHATE_PROGRESS:
+                print("hmm_build says, Using",processCount,"processes of",groupThreads,"cpus each")
+            buildPool = Pool(processCount)
+            results = buildPool.map(buildGroupHmm,parameterSets)
+            buildPool.close()
+            buildPool.join()
+        else:
+            results = [buildGroupHmm(parameterSet) for parameterSet in parameterSets]
+        for i in range(0,len(results)):
+            if results[i] != SUCCESS and PHATE_WARNINGS:
+                print("hmm_build says, WARNING: HMM build did not complete for group",parameterSets[i]["groupFile"])
+
+        # Combine the groups' HMMs into libraries for hmmscan
+        self.combineHmms(geneParameterSets,os.path.join(self.buildDirectory,GENE_HMM_LIBRARY))
+        self.combineHmms(proteinParameterSets,os.path.join(self.buildDirectory,PROTEIN_HMM_LIBRARY))
+        return
 
+    # Concatenate the groups' HMM files into one library, and press it (hmmpress) for hmmscan
+    def combineHmms(self,parameterSets,libraryFile):
+        hmmCount = 0
+        LIBRARY_H = open(libraryFile,'w')
+        for parameterSet in parameterSets:
+            if os.path.exists(parameterSet["hmmFile"]):
+                HMM_H = open(parameterSet["hmmFile"],'r')
+                for hLine in HMM_H:
+                    LIBRARY_H.write("%s" % (hLine))
+                HMM_H.close()
+                hmmCount += 1
+        LIBRARY_H.close()
+        if hmmCount == 0:
+            os.remove(libraryFile)
+            return
+        pressCommand = os.path.join(os.path.dirname(self.codeName),'hmmpress') + ' -f ' + libraryFile + ' > /dev/null'
+        if PHATE_MESSAGES:
+            print("hmm_build says, Pressing",hmmCount,"HMMs into library; command is ",pressCommand)
+        result = os.system(pressCommand)
+        if result != 0 and PHATE_WARNINGS:
+            print("hmm_build says, WARNING: hmmpress did not complete for library",libraryFile)
         return
 
     def printParameters(self):
@@ -358,6 +408,7 @@ class build(object):
         print("codeName: ",self.codeName," codeVersion: ",self.codeVersion)
         print("alginmentCodeName: ",self.alignmentCodeName," alignmentCodeVersion: ",self.alignmentCodeVersion)
         print("buildDirectory: ",self.buildDirectory)
+        print("threads: ",self.threads)
         return
 
     def printParameters2file(self,FILE_H):
@@ -365,6 +416,7 @@ class build(object):
         FILE_H.write("%s%s%s%s\n" % ("codeName: ",self.codeName," codeVersion: ",self.codeVersion))
         FILE_H.write("%s%s%s%s\n" % ("alginmentCodeName: ",self.alignmentCodeName," alignmentCodeVersion: ",self.alignmentCodeVersion))
         FILE_H.write("%s%s\n" % ("buildDirectory: ",self.buildDirectory))
+        FILE_H.write("%s%s\n" % ("threads: ",self.threads))
         return
 
     def printAll(self):
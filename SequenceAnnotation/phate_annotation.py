@@ -4,11 +4,13 @@
 #
 # Programmer: Carol L. Ecale Zhou
 #
-# Latest update: 20 October 2020
+# Latest update: 18 October 2026
 #
 # Description: Module containing classes and methods for representing annotation results from various sources 
 #
 # Classes and methods: 
+#     ncbiHeader2accession(name)
+#     prefetchNCBItaxonomyIDs(nameList,database)
 #     annotationRecord
 #         addPVOBid2list
 #         getPVOGassociationList
@@ -20,7 +22,8 @@
 #         getPvogMembers
 #         findPVOGannotation
 #         findVOGannotation
-#         getNCBItaxonomy
+#         getNCBItaxonomyID
+#         grepNCBItaxonomyID
 #         link2databaseIdentifiers
 #         getECdescription4cazy
 #         printAnnotationRecord_tabHeader
@@ -40,7 +43,8 @@
 # THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
 
 import re, os, subprocess
-import platform
+import phate_taxonomy
+import phate_annotationCatalog
 
 DEBUG = False
 DEBUG = True
@@ -97,8 +101,41 @@ pVOGheaderFile       = PVOGS_BASE_DIR      + "pVOGs.headers.lst"
 VOGheaderFile        = VOGS_BASE_DIR       + "VOGs.headers.lst"     #*** ???
 VOGannotationFile    = VOGS_BASE_DIR       + "vog.annotations.tsv"  #*** ???
 
+# Extract the accession from an NCBI hit header (sans '>')
+# Current formatting is as follows:
+# >accn.version<\s>Text description of genome
+# Ex: >NC_001798.2 Human herpesvirus 2 strain HG52, complete genome 
+# WAIT:  Now (8/8/2020) the name field looks like this:
+# gi|33438897|ref|NC_005056.1| Bacteriophage WPhi, complete genome
+# Databases keep changing !!!
+def ncbiHeader2accession(name):
+    IDENTIFIERS_INDEX = 0
+    ACCESSION_INDEX   = 3
+    words   = name.split(' ')             # There is a space separating the identifiers string from the description, which may contain spaces
+    fullId  = words[IDENTIFIERS_INDEX]    # The identifiers string is several items separated by pipe
+    idWords = fullId.split('|')           # Separate the identifiers and labels
+    if len(idWords) > ACCESSION_INDEX:
+        return idWords[ACCESSION_INDEX]   # The accession is the 4th item: gi|giNumber|ref|accession.version|
+    return fullId                         # Older format: accession.version only
+
+# Look up the taxonomy ids for a set of NCBI hit headers (e.g., all hits for a genome) in one pass,
+# so that subsequent getNCBItaxonomyID calls are answered from the taxonomy index's cache
+def prefetchNCBItaxonomyIDs(nameList,database=''):
+    if database == '':
+        database = ncbi_taxon_lookup
+    taxonomyIndex = phate_taxonomy.getTaxonomyIndex(database)
+    accessionList = []
+    for name in nameList:
+        if name != '' and name.lower() != 'none' and name.lower() != 'unknown':
+            accessionList.append(ncbiHeader2accession(name))
+    return taxonomyIndex.lookupList(accessionList)
+
 class annotationRecord(object):
 
+    # An annotationRecord is created for every hit to every protein, so its attributes are held in slots
+    __slots__ = ["source","method","annotationType","VOGlist","contig","start","end","strand","readingFrame",
+        "identifier","locusTag","name","description","annotationList","category","wraparound","annotationString"]
+
     def __init__(self):
         self.source            = "unknown" # Typically RAST, LLNL, PhAnToMe, GeneMark, Glimmer, Prodigal, PHANOTATE, KEGG, NCBI, pVOGs 
         self.method            = "unknown" # Typcially RAST, PFP, PhiRAST, JGI, SDSU, BLAST, blastp, blastn, HMM, jackhmmer 
@@ -106,6 +143,7 @@ class annotationRecord(object):
         self.VOGlist           = []        # list of pVOG or VOG identifiers (identified via blast hit)
         self.contig            = "unknown"
         self.start             = 0
+        self.end               = 0
         self.strand            = 'x' 
         self.readingFrame      = 'x'
         self.identifier        = "none"
@@ -257,88 +295,47 @@ class annotationRecord(object):
     def findPVOGannotation(self,vogID,database):   # database is the pVOGs.headers.lst file
         # database lines look like this, and are tab delimited:
         # VOG00012        118     96      Xu      sp|P03795|Y28_BPT7 Protein 2.8 
+        # The file is held in memory by the annotation catalog (see phate_annotationCatalog.py)
         vogAnnotation = ' '
-        database_h = open(database,'r')
-        dLines = database_h.read().splitlines()
-        database_h.close()
-        for dLine in dLines:
-            match_vog = re.search(vogID,dLine)
-            if match_vog:
-                fields = dLine.split(' ')
-                words  = fields[1:]
-                vogAnnotation = vogAnnotation.join(words) 
-                break
+        dLine = phate_annotationCatalog.getAnnotationCatalog().getPVOGheaderLine(vogID,database)
+        if dLine != '':
+            fields = dLine.split(' ')
+            words  = fields[1:]
+            vogAnnotation = vogAnnotation.join(words) 
         return vogAnnotation
 
     #*** IMPROVE CODE HERE: calling method is passing database; doesn't need to, since annotation DB is environ var now
     # This method finds the summary annotation for a given VOG.
     def findVOGannotation(self,vogID,database):   # database is the vog.annotations.tsv file
-        #database_h = open(database,'r')
-        database_h = open(VOG_ANNOTATION_FILE,'r')
-        dLines = database_h.read().splitlines()
-        database_h.close()
-        for dLine in dLines:
-            match_vog = re.search(vogID, dLine)
-            if match_vog:
-                (vogID,proteinCount,speciesCount,functionalCategory,vogAnnotation) = dLine.split('\t')
-                break
+        # The file is held in memory by the annotation catalog (see phate_annotationCatalog.py)
+        vogAnnotation = ''
+        dLine = phate_annotationCatalog.getAnnotationCatalog().getVOGannotationLine(vogID)
+        if dLine != '':
+            (vogID,proteinCount,speciesCount,functionalCategory,vogAnnotation) = dLine.split('\t')
         return vogAnnotation
 
     # Query a taxonomy lookup table to get taxonomy information
     def getNCBItaxonomyID(self,database):   # Database maps ncbi header to taxonomy 
-        # First, determine what operating system this code is running on.
-        command = "platform.system()"  #*** THIS DOES NOT WORK IN CODE, BUT DOES ON COMMAND LINE; WHY???
-        proc = subprocess.Popen([command], stdout=subprocess.PIPE, shell=True)
-        result, err = proc.communicate()
-        #result = os.system(command)
-        resultStr = str(result,'utf-8')
-
         # The database is the nucl_gb.accession2taxid, and the format of each line is as follows:
         # accn<\t>accn.version<\t>taxid<\t>gi
-        # taxID is in the 3rd column of the accession2taxID file, and is one or more digits
-        accession = ''; accessionVersion = ''; taxID = ''; giNumber = ''
+        # Lookups go to the index of this file built by DatabasePrep/dbPrep_taxonIndex.py (see phate_taxonomy.py);
+        # if there is no index, fall back to searching the file itself. 
+        taxID = ''
         ncbiTaxonList = []
 
-        # The name field of the current object (self) contains the fasta header of a hit sequence
-        # Current formatting is as follows:
-        # >accn.version<\s>Text description of genome
-        # Ex: >NC_001798.2 Human herpesvirus 2 strain HG52, complete genome 
-        # self.name is the fasta header sans '>'
-        # WAIT:  Now (8/8/2020) the name field looks like this:
-        # gi|33438897|ref|NC_005056.1| Bacteriophage WPhi, complete genome
-        # Databases keep changing !!!
-        IDENTIFIERS_INDEX = 0
-        ACCESSION_INDEX   = 3
-
-        words = []; accession = ""; description = ""
-        p_taxID = re.compile('^[\d\w_]+\t[\d\w_]+\t([\d]+)\t[\d]+')  # 3rd column contains taxID (see above)
-
         # Split self.name field to extract accn, then search accession2tax file for the taxonomy id
         if self.name != '' and self.name.lower() != 'none' and self.name.lower() != 'unknown':
 
-            # Extract accession and sequence description from header string
-            words       = self.name.split(' ')     # There is a space separating the identifiers string from the description, which may contain spaces
-            description = ' '.join(words[1:])      # Join all but the first item to construct the full description string
-            fullId      = words[IDENTIFIERS_INDEX] # The identifiers string is several items separated by pipe
-            idWords     = fullId.split('|')        # Separate the identifiers and labels
-            accession   = idWords[ACCESSION_INDEX] # The accession is the 4th item: gi|giNumber|ref|accession.version|
-
-            # Find line in database corresponding to this accession
-            try:
-                #*** THIS COMMAND WORKS ON MAC OSX; I DON'T KNOW IF IT WILL WORK ON UNIX
-                #*** LC_ALL=C might crash on non-OSX systems.
-                command = 'LC_ALL="C" grep -a \"' + accession + '\" ' + database
-                proc = subprocess.Popen([command], stdout=subprocess.PIPE, shell=True)
-                out, err = proc.communicate()
-            except:  # Other operating systems might fail the try, drop to this block
-                command = 'grep -a \"' + accession + '\" ' + database
-                proc = subprocess.Popen([command], stdout=subprocess.PIPE, shell=True)
-                out, err = proc.communicate()
-
-            # Apparently, grep reads as binary... so need to convert result
-            newOut = out.decode('utf8')
-            if newOut != '':
-                (accn,accn_v,taxID,gi) = newOut.split('\t')
+            accession = ncbiHeader2accession(self.name)
+
+            # Find taxonomy id corresponding to this accession
+            taxonomyIndex = phate_taxonomy.getTaxonomyIndex(database)
+            if taxonomyIndex.isAvailable():
+                taxID = taxonomyIndex.lookup(accession)
+            else:
+                taxID = self.grepNCBItaxonomyID(accession,database)
+
+            if taxID != '':
                 taxonomyString = 'NCBItaxID=' + taxID
                 ncbiTaxonList.append(taxonomyString)
                 ncbiTaxonLink = NCBI_TAXON_LINK + taxID
@@ -351,6 +348,18 @@ class annotationRecord(object):
                 print("phate_annotation says, WARNING: NCBI hit header has improper format or is missing:", self.name)
         return ncbiTaxonList
 
+    # Search the accession2taxid file directly; slow, as it scans the whole file (used only if there is no index)
+    def grepNCBItaxonomyID(self,accession,database):
+        taxID = ''
+        command = 'LC_ALL="C" grep -a -m 1 \"' + accession + '\" ' + database
+        proc = subprocess.Popen([command], stdout=subprocess.PIPE, shell=True)
+        out, err = proc.communicate()
+        # Apparently, grep reads as binary... so need to convert result
+        newOut = out.decode('utf8')
+        if newOut != '':
+            (accn,accn_v,taxID,gi) = newOut.rstrip('\n').split('\t')
+        return taxID
+
     def link2databaseIdentifiers(self,database,dbName): 
         cazyAnnotationFile = CAZY_ANNOTATION_PATH 
         vogAnnotationFile  = VOG_ANNOTATION_FILE  # for VOG hits
@@ -394,14 +403,11 @@ class annotationRecord(object):
                 for fig in figList:
                     dbxrefList.append(fig)
 
-            elif dbName.lower() == 'ncbi':
+            elif dbName.lower() == 'ncbivirusgenome':
                 taxonList = self.getNCBItaxonomyID(ncbi_taxon_lookup)
                 for taxon in taxonList:
                     dbxrefList.append(taxon)
 
-            elif dbName.lower() == 'ncbivirusgenome':
-                pass
-
             elif dbName.lower() == 'ncbivirusprotein':
                 pass
 
@@ -462,46 +468,32 @@ class annotationRecord(object):
         return 
 
     # Parses the CAZy annotation file to capture enzyme description(s) for blast hits.
+    # The file (lines: code<\t>description) is held in memory by the annotation catalog (see phate_annotationCatalog.py)
     def getECdescription4cazy(self,cazyAnnotationFile):
         # self.name is the subject hit header
         dbxrefList = []; dbxrefCode = ""  # captures codes and annotations for CAZy hits
         code = ""; codeList = []  # captures codes that are listed in the headers of CAZy hits 
-        annotationCode = ""; annotationDescription = ""  # from cazy annotation file; these are captured for reporting
+        annotationDescription = ""  # from cazy annotation file; captured for reporting
         # Headers look like this: ">AWI06117.1|GT2|AT46|" (with one or more codes, pipe-separated)
         # Headers can also look like this: ">AAD03276.1|GH104|4.2.2.n1|" (with an EC number following, with or w/o terminal '|') 
         # ...or even like this: ">AUH33181.1|CE14"  (without terminal pipe)
         p_header = re.compile('\|([\w\d_^\.]+)\|') # Some headers have EC numbers following CAZy code   
-        CAZY_ANNOT_H = open(cazyAnnotationFile,'r')
         try:
-            # Pull dbxref from header; find data line in cazyAnnotationFile; add to dbxrefList
+            # Pull dbxref from header; look up each code in the CAZy annotations; add to dbxrefList
             match_header = re.search(p_header,self.name)
             if match_header:
                 dbxrefCode = match_header.group(1)
                 codeList = dbxrefCode.split('|')
-                ANNOT_H = open(cazyAnnotationFile,'r')
-                aLines = ANNOT_H.read().splitlines()
+                catalog = phate_annotationCatalog.getAnnotationCatalog()
                 for code in codeList:
                     if code != "": 
-                        matchCode = code + '\t'
-                        for aLine in aLines:
-                            match_dbxref = re.search(matchCode,aLine)
-                            if match_dbxref:
-                                try:
-                                    (annotationCode,annotationDescription) = aLine.split('\t')
-                                    if code == annotationCode:  # Need to identify the identical one (else keep looking)
-                                        dbxrefList.append(annotationDescription)
-                                        break 
-                                    else:
-                                        continue
-                                except:
-                                    if PHATE_WARNINGS:
-                                        print("phate_annotation says, WARNING: No annotation found for dbxrefCode",dbxrefCode)
-                ANNOT_H.close()
+                        annotationDescription = catalog.getCAZyDescription(code)
+                        if annotationDescription != "":
+                            dbxrefList.append(annotationDescription)
             else:
                 print("phate_annotation says, WARNING: getECdescription4cazy saw an unexpected subject hit header:",self.name)
         except:
             print("phate_annotation says, WARNING: Cannot identify dbxref for subject header",self.name)
-        CAZY_ANNOT_H.close()
         return dbxrefList
 
     # PRINT METHODS
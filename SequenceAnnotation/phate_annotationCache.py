@@ -0,0 +1,327 @@
+############################################################################
+#
+# Name:  phate_annotationCache.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# Persistent, content-addressed cache of per-gene search results (blast, jackhmmer/phmmer, hmmscan).
+# Phage proteomes share many identical proteins, and a re-run after adding genomes or changing one
+# database would otherwise repeat every search for every protein. Each cache entry holds the parsed
+# annotation records of one search of one sequence, keyed by:
+#    sequence key:  sha256 of the (upper-case) sequence
+#    search key:    sha256 of tool, database path, database name, database fingerprint (size and
+#                   modification time of the database's files), and the search parameters
+# so an entry is reused only if the same sequence was searched the same way against the same version
+# of the database. Identical sequences within a run are also searched only once.
+# A database built by DatabasePrep/dbPrep_getDBs.py is instead fingerprinted by the cache key that the
+# build recorded in Databases/dbPrep_manifest.json (a checksum of its sources and build), as long as
+# its files are as the build left them. Results are then reused after an unchanged database is
+# re-fetched or copied, but not after the database is changed.
+# Entries are kept in an sqlite file under the pipeline output directory, shared by all genomes and
+# runs; when the cache holds more than maxEntries entries, the least recently used are removed.
+# Hit and miss counts are recorded for the run log (see printStatistics2file).
+#
+# A search module uses the cache in its ...FastaSet method:
+#    plan = cache.planSearch(fastaSet,searchKey,tool)  # looks up each sequence; plan.querySet holds the
+#                                                       # sequences still to be searched (shadow copies)
+#    ... queue searches of plan.querySet on the scheduler, adding each task to plan.taskList ...
+#    completionList.append((cache.completeSearch,(plan,)))  # annotates fastaSet; stores new results
+#
+# Classes and Methods:
+#    searchPlan
+#    annotationCache
+#       setMaxEntries(maxEntries)
+#       isEnabled
+#       open
+#       getManifestFingerprint(database)
+#       getDatabaseFingerprint(database)
+#       getSearchKey(tool,database,dbName,parameterString)
+#       getSequenceKey(fasta)
+#       lookupList(sequenceKeyList,searchKey)
+#       storeList(entryList,searchKey)
+#       planSearch(fastaSet,searchKey,tool)
+#       completeSearch(plan)
+#       evict
+#       close
+#       printStatistics2file(fileH)
+#    getAnnotationCache
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os, re
+import copy
+import json
+import time
+import pickle
+import hashlib
+import threading
+import sqlite3
+
+PIPELINE_OUTPUT_DIR  = os.environ["PHATE_PIPELINE_OUTPUT_DIR"]
+ANNOTATION_CACHE_DIR = os.path.join(PIPELINE_OUTPUT_DIR, "ANNOTATION_CACHE")
+ANNOTATION_CACHE_DB  = "annotationCache.sqlite"
+DB_MANIFEST_FILE     = "dbPrep_manifest.json"   # written by DatabasePrep/dbPrep_getDBs.py
+QUERY_CHUNK          = 500   # number of sequence keys per query in lookupList (sqlite's variable limit is 999)
+LOCK_TIMEOUT         = 300   # seconds to wait for another process (genome) that is writing to the cache
+
+# Database files that make up a searchable database, beside the database path itself:
+# blast+ (e.g., nr.pin, nr.00.psq, VOGs.faa.nal) and hmmpress (e.g., Pfam-A.hmm.h3m)
+p_databaseFile = re.compile('^(\.\d+)?\.([pn][a-z]{2}|h3[mifp])$')
+
+# Verbosity
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_MESSAGES_STRING = os.environ["PHATE_PHATE_MESSAGES"]
+PHATE_WARNINGS = False
+PHATE_MESSAGES = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+if PHATE_MESSAGES_STRING.lower() == 'true':
+    PHATE_MESSAGES = True
+
+class searchPlan(object):
+
+    def __init__(self,fastaSet,searchKey,tool):
+        self.fastaSet  = fastaSet  # fastas to be annotated
+        self.searchKey = searchKey
+        self.tool      = tool
+        self.querySet  = None      # copy of fastaSet listing only the (shadow) fastas to be searched
+        self.entryList = []        # per fasta in fastaSet: (sequence key, cached annotation list or None)
+        self.shadows   = {}        # sequence key => shadow fasta searched for that sequence
+        self.taskList  = []        # scheduler tasks searching querySet; results of failed tasks are not cached
+
+class annotationCache(object):
+
+    def __init__(self,cacheDir=ANNOTATION_CACHE_DIR):
+        self.cacheFile    = os.path.join(cacheDir, ANNOTATION_CACHE_DB)
+        self.maxEntries   = 0                 # 0 => cache is off; -1 => no limit
+        self.connection   = None
+        self.fingerprints = {}                # database => fingerprint string
+        self.hitCount     = {}                # tool => number of sequences found in the cache
+        self.missCount    = {}                # tool => number of sequences searched
+        self.reuseCount   = {}                # tool => number of sequences that repeat a sequence searched in this run
+        self.storeCount   = 0                 # entries written
+        self.evictCount   = 0                 # entries removed to keep within maxEntries
+        self.lock         = threading.Lock()  # connection is shared by threads
+
+    def setMaxEntries(self,maxEntries):
+        if int(maxEntries) >= -1:
+            self.maxEntries = int(maxEntries)
+
+    def isEnabled(self):
+        if self.maxEntries != 0:
+            return True
+        return False
+
+    # Open (creating if need be) the cache file; returns True if the cache can be used
+    def open(self):
+        if self.connection:
+            return True
+        try:
+            os.makedirs(os.path.dirname(self.cacheFile), exist_ok=True)
+            self.connection = sqlite3.connect(self.cacheFile,timeout=LOCK_TIMEOUT,check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS annotation (sequence_key TEXT, search_key TEXT, annotations BLOB, last_used REAL, PRIMARY KEY (sequence_key, search_key))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS annotation_last_used ON annotation (last_used)")
+            self.connection.commit()
+        except (OSError, sqlite3.Error) as e:
+            if PHATE_WARNINGS:
+                print("phate_annotationCache says, WARNING: Could not open annotation cache", self.cacheFile, "; searching without it:", e)
+            self.connection = None
+            self.maxEntries = 0
+            return False
+        return True
+
+    # Cache key of the database build recorded in the database manifest (in the database's directory or
+    # a directory above it), if the manifest lists the database's files and they are unchanged since
+    # the build; otherwise returns ""
+    def getManifestFingerprint(self,database):
+        databasePath = os.path.abspath(database)
+        directory = os.path.dirname(databasePath)
+        manifestFile = ""
+        while True:
+            if os.path.isfile(os.path.join(directory,DB_MANIFEST_FILE)):
+                manifestFile = os.path.join(directory,DB_MANIFEST_FILE)
+                break
+            if os.path.dirname(directory) == directory:
+                return ""
+            directory = os.path.dirname(directory)
+        try:
+            MANIFEST_H = open(manifestFile,'r')
+            entries = json.load(MANIFEST_H)["databases"]
+            MANIFEST_H.close()
+        except (ValueError,KeyError,OSError) as e:
+            if PHATE_WARNINGS:
+                print("phate_annotationCache says, WARNING: Could not read database manifest", manifestFile, ":", e)
+            return ""
+        for name in sorted(entries.keys()):
+            entry = entries[name]
+            outputList = [output for output in entry["outputs"].values() if output["path"] == databasePath or \
+                (output["path"].startswith(databasePath) and re.search(p_databaseFile,output["path"][len(databasePath):]))]
+            if not outputList:
+                continue
+            for output in outputList:
+                try:
+                    fileStat = os.stat(output["path"])
+                except OSError:
+                    return ""
+                if fileStat.st_size != output["size"] or fileStat.st_mtime_ns != output["mtime_ns"]:
+                    return ""   # changed since the build
+            return "manifest:" + entry["cacheKey"]
+        return ""
+
+    # Size and modification time of each of the database's files; a database that is rebuilt or
+    # updated gets a new fingerprint, so results from its previous version are not reused
+    def getDatabaseFingerprint(self,database):
+        if database in self.fingerprints:
+            return self.fingerprints[database]
+        fingerprint = self.getManifestFingerprint(database)
+        if fingerprint != "":
+            self.fingerprints[database] = fingerprint
+            return fingerprint
+        fileList = []
+        (databaseDir,databaseName) = os.path.split(database)
+        if databaseDir == "":
+            databaseDir = "."
+        if os.path.isdir(databaseDir):
+            for filename in os.listdir(databaseDir):
+                if filename == databaseName or (filename.startswith(databaseName) and re.search(p_databaseFile,filename[len(databaseName):])):
+                    fileStat = os.stat(os.path.join(databaseDir,filename))
+                    fileList.append(filename + ':' + str(fileStat.st_size) + ':' + str(int(fileStat.st_mtime)))
+        fingerprint = ','.join(sorted(fileList))
+        self.fingerprints[database] = fingerprint
+        return fingerprint
+
+    def getSearchKey(self,tool,database,dbName,parameterString):
+        keyString = '\t'.join([tool,database,dbName,self.getDatabaseFingerprint(database),parameterString])
+        return hashlib.sha256(keyString.encode('utf-8')).hexdigest()
+
+    def getSequenceKey(self,fasta):
+        sequence = ''.join(fasta.sequence.split()).upper()
+        return hashlib.sha256(sequence.encode('utf-8')).hexdigest()
+
+    # Returns a dict of sequence key => cached annotation list, for the keys found; marks them as used
+    def lookupList(self,sequenceKeyList,searchKey):
+        found = {}
+        if not self.open():
+            return found
+        now = time.time()
+        with self.lock:
+            for i in range(0,len(sequenceKeyList),QUERY_CHUNK):
+                chunk = sequenceKeyList[i:i+QUERY_CHUNK]
+                query = "SELECT sequence_key, annotations FROM annotation WHERE search_key = ? AND sequence_key IN (" + ','.join(['?'] * len(chunk)) + ")"
+                for (sequenceKey,annotations) in self.connection.execute(query,[searchKey] + chunk):
+                    try:
+                        found[sequenceKey] = pickle.loads(annotations)
+                    except Exception:  # e.g., written by an incompatible version of phate_annotation; search again
+                        pass
+            if found:
+                self.connection.executemany("UPDATE annotation SET last_used = ? WHERE sequence_key = ? AND search_key = ?",
+                    [(now,sequenceKey,searchKey) for sequenceKey in found])
+                self.connection.commit()
+        return found
+
+    # Store each (sequence key, annotation list) in entryList under searchKey
+    def storeList(self,entryList,searchKey):
+        if not entryList or not self.open():
+            return
+        now = time.time()
+        rowList = []
+        for (sequenceKey,annotationList) in entryList:
+            rowList.append((sequenceKey,searchKey,pickle.dumps(annotationList),now))
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO annotation (sequence_key, search_key, annotations, last_used) VALUES (?,?,?,?)",rowList)
+            self.connection.commit()
+            self.storeCount += len(rowList)
+
+    # Look up each fasta in fastaSet; returns a searchPlan whose querySet lists one shadow copy
+    # (see phate_scheduler.createShadowFastas) of each distinct sequence that is not in the cache
+    def planSearch(self,fastaSet,searchKey,tool):
+        plan = searchPlan(fastaSet,searchKey,tool)
+        sequenceKeyList = [self.getSequenceKey(fasta) for fasta in fastaSet.fastaList]
+        found = self.lookupList(list(set(sequenceKeyList)),searchKey)
+        queryList = []
+        for i in range(0,len(fastaSet.fastaList)):
+            sequenceKey = sequenceKeyList[i]
+            if sequenceKey in found:
+                plan.entryList.append((sequenceKey,found[sequenceKey]))
+                self.hitCount[tool] = self.hitCount.get(tool,0) + 1
+            elif sequenceKey in plan.shadows:
+                plan.entryList.append((sequenceKey,None))
+                self.reuseCount[tool] = self.reuseCount.get(tool,0) + 1
+            else:
+                shadow = copy.copy(fastaSet.fastaList[i])
+                shadow.annotationList = []
+                plan.shadows[sequenceKey] = shadow
+                queryList.append(shadow)
+                plan.entryList.append((sequenceKey,None))
+                self.missCount[tool] = self.missCount.get(tool,0) + 1
+        plan.querySet = copy.copy(fastaSet)
+        plan.querySet.fastaList = queryList
+        if PHATE_MESSAGES:
+            print("phate_annotationCache says,", tool, "sequences:", len(fastaSet.fastaList), "; found in cache:", len(found), "; to search:", len(queryList))
+        return plan
+
+    # Once plan.querySet has been searched: annotate each fasta of plan.fastaSet, from the cache or
+    # from its sequence's search, in fastaSet order, and store the new results
+    def completeSearch(self,plan):
+        failedKeys = set()
+        for task in plan.taskList:
+            if task.error:
+                queries = task.args[0]
+                if not isinstance(queries,list):
+                    queries = [queries]
+                for shadow in queries:
+                    failedKeys.add(self.getSequenceKey(shadow))
+        newEntries = []; stored = set()
+        for i in range(0,len(plan.fastaSet.fastaList)):
+            (sequenceKey,annotationList) = plan.entryList[i]
+            if annotationList is None:
+                annotationList = plan.shadows[sequenceKey].annotationList
+                if sequenceKey not in failedKeys and sequenceKey not in stored:
+                    newEntries.append((sequenceKey,annotationList))
+                    stored.add(sequenceKey)
+            plan.fastaSet.fastaList[i].annotationList.extend(copy.deepcopy(annotationList))
+        self.storeList(newEntries,plan.searchKey)
+
+    # Remove least recently used entries, so that the cache holds at most maxEntries
+    def evict(self):
+        if self.maxEntries <= 0 or not self.connection:
+            return
+        with self.lock:
+            entryCount = self.connection.execute("SELECT COUNT(*) FROM annotation").fetchone()[0]
+            if entryCount > self.maxEntries:
+                excess = entryCount - self.maxEntries
+                self.connection.execute("DELETE FROM annotation WHERE rowid IN (SELECT rowid FROM annotation ORDER BY last_used ASC LIMIT ?)",(excess,))
+                self.connection.commit()
+                self.evictCount += excess
+
+    def close(self):
+        if self.connection:
+            self.evict()
+            self.connection.close()
+            self.connection = None
+
+    def printStatistics2file(self,fileH):
+        if not self.isEnabled() and not self.hitCount and not self.missCount:
+            return
+        fileH.write("%s%s\n" % ("Annotation cache: ",self.cacheFile))
+        for tool in sorted(set(list(self.hitCount) + list(self.missCount) + list(self.reuseCount))):
+            fileH.write("%s%s%s%s%s%s%s%s\n" % ("   ",tool,": cache hits ",self.hitCount.get(tool,0),", misses (searched) ",self.missCount.get(tool,0),
+                ", repeats of a sequence searched in this run ",self.reuseCount.get(tool,0)))
+        fileH.write("%s%s%s%s\n" % ("   entries stored ",self.storeCount,", entries evicted ",self.evictCount))
+
+# The one cache for this run, created on first use
+ANNOTATION_CACHE = None
+ANNOTATION_CACHE_LOCK = threading.Lock()
+
+def getAnnotationCache():
+    global ANNOTATION_CACHE
+    with ANNOTATION_CACHE_LOCK:
+        if ANNOTATION_CACHE is None:
+            ANNOTATION_CACHE = annotationCache()
+    return ANNOTATION_CACHE
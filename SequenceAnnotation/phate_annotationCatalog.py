@@ -0,0 +1,132 @@
+############################################################################
+#
+# Name:  phate_annotationCatalog.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# Holds the VOG, pVOG, and CAZy annotation look-up tables in memory, so that annotating a hit
+# is a dictionary lookup, rather than a re-read and scan of the whole file per hit.
+# There is one catalog per run (see getAnnotationCatalog). Each file is loaded the first time
+# it is needed, and is keyed by identifier:
+#    vog.annotations.tsv   VOGid  => line: VOGid<\t>proteinCount<\t>speciesCount<\t>functionalCategory<\t>description
+#    pVOGs.headers.lst     VOGid  => first header line listing the VOGid
+#    CAZy annotation file  code   => description (from line: code<\t>description)
+# Hit and miss counts and load times are recorded for profiling (see printStatistics2file).
+#
+# Classes and Methods:
+#    annotationCatalog
+#       getVOGannotationLine(vogID)
+#       getPVOGheaderLine(vogID,pVOGheaderFile)
+#       getCAZyDescription(code)
+#       printStatistics2file(fileH)
+#    getAnnotationCatalog
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os, re
+import time
+import threading
+
+VOG_ANNOTATION_FILE  = os.environ["PHATE_VOG_ANNOTATION_FILE"]
+CAZY_ANNOTATION_PATH = os.environ["PHATE_CAZY_ANNOTATION_PATH"]
+
+# Verbosity
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_WARNINGS = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+
+p_vogID = re.compile('VOG\d+')
+
+class annotationCatalog(object):
+
+    def __init__(self):
+        self.tables    = {}                # file => dict of identifier => annotation
+        self.loadTime  = {}                # file => seconds taken to load it
+        self.hitCount  = {}                # file => number of lookups that found an entry
+        self.missCount = {}                # file => number of lookups that did not
+        self.lock      = threading.Lock()  # hits may be annotated from concurrent threads (see phate_scheduler)
+
+    # Load file into a dict, once, using loader to parse its lines; returns the dict
+    def getTable(self,filename,loader):
+        if filename not in self.tables:
+            with self.lock:
+                if filename not in self.tables:
+                    startTime = time.time()
+                    table = {}
+                    try:
+                        file_h = open(filename,'r')
+                        loader(file_h.read().splitlines(),table)
+                        file_h.close()
+                    except IOError:
+                        if PHATE_WARNINGS:
+                            print("phate_annotationCatalog says, WARNING: Cannot open annotation file", filename)
+                    self.loadTime[filename]  = time.time() - startTime
+                    self.hitCount[filename]  = 0
+                    self.missCount[filename] = 0
+                    self.tables[filename]    = table
+        return self.tables[filename]
+
+    def lookup(self,filename,loader,key):
+        table = self.getTable(filename,loader)
+        if key in table:
+            self.hitCount[filename] += 1
+            return table[key]
+        self.missCount[filename] += 1
+        return ''
+
+    ##### LOADERS
+
+    def loadVOGannotations(self,lines,table):
+        for line in lines:
+            fields = line.split('\t')
+            if len(fields) == 5 and fields[0] not in table:
+                table[fields[0]] = line
+
+    def loadPVOGheaders(self,lines,table):
+        for line in lines:
+            for vogID in re.findall(p_vogID,line):
+                if vogID not in table:
+                    table[vogID] = line
+
+    def loadCAZyAnnotations(self,lines,table):
+        for line in lines:
+            fields = line.split('\t')
+            if len(fields) == 2 and fields[0] not in table:
+                table[fields[0]] = fields[1]
+
+    ##### LOOKUPS
+
+    # Returns the vog.annotations.tsv line for vogID, or '' if there is none
+    def getVOGannotationLine(self,vogID):
+        return self.lookup(VOG_ANNOTATION_FILE,self.loadVOGannotations,vogID)
+
+    # Returns the first pVOGs.headers.lst line that lists vogID, or '' if there is none
+    def getPVOGheaderLine(self,vogID,pVOGheaderFile):
+        return self.lookup(pVOGheaderFile,self.loadPVOGheaders,vogID)
+
+    # Returns the description of a CAZy code, or '' if there is none
+    def getCAZyDescription(self,code):
+        return self.lookup(CAZY_ANNOTATION_PATH,self.loadCAZyAnnotations,code)
+
+    def printStatistics2file(self,fileH):
+        fileH.write("%s\n" % ("Annotation catalog statistics:"))
+        for filename in self.tables:
+            fileH.write("%s%s%s%s%s%s%s%s%s%s%s\n" % ("   ",filename,": ",len(self.tables[filename])," entries loaded in ",round(self.loadTime[filename],3)," seconds; ",self.hitCount[filename]," hits, ",self.missCount[filename]," misses"))
+
+# The one catalog for this run, created on first use
+ANNOTATION_CATALOG = None
+ANNOTATION_CATALOG_LOCK = threading.Lock()
+
+def getAnnotationCatalog():
+    global ANNOTATION_CATALOG
+    with ANNOTATION_CATALOG_LOCK:
+        if ANNOTATION_CATALOG is None:
+            ANNOTATION_CATALOG = annotationCatalog()
+    return ANNOTATION_CATALOG
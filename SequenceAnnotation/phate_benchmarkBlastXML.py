@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+#############################################
+# Name: phate_benchmarkBlastXML.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Benchmark for the blast XML parsing of phate_blast.multiBlast: parseBlastXML (incremental, one
+#    blastHit record per <Hit>) and hit2annotation. A synthetic multi-query blast XML file of
+#    <queries> queries, each with <hits> hits of 2 HSPs, is written and annotated, as in blastBatch.
+#    With -reference, the file is also annotated with the former parser (whole-tree ElementTree parse,
+#    with a deepcopy of the hit, HSP, and annotation templates per hit), timed, and the annotations
+#    are checked to be identical.
+#
+# Usage:  python phate_benchmarkBlastXML.py [queries] [hits] [-reference]   (defaults: 100 queries, 500 hits)
+#
+# Methods:
+#    WriteBlastXML
+#    AnnotationFields
+#    ReferenceHit2annotation
+#    ReferenceParse
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os, re
+import copy
+import random
+import tempfile
+import time
+from xml.etree.ElementTree import ElementTree as ET
+
+# This benchmark may be run outside of multiPhATE; parsing does not use these settings
+for variable in ["PHATE_BLAST_HOME","PHATE_NCBI_VIRUS_GENOME_BLAST_HOME","PHATE_NCBI_VIRUS_PROTEIN_BLAST_HOME","PHATE_REFSEQ_PROTEIN_BLAST_HOME",
+        "PHATE_REFSEQ_GENE_BLAST_HOME","PHATE_PVOGS_BLAST_HOME","PHATE_VOG_GENE_BLAST_HOME","PHATE_VOG_PROTEIN_BLAST_HOME","PHATE_VOG_ANNOTATION_FILE",
+        "PHATE_PHANTOME_BLAST_HOME","PHATE_KEGG_VIRUS_BLAST_HOME","PHATE_SWISSPROT_BLAST_HOME","PHATE_PHAGE_ENZYME_BLAST_HOME","PHATE_PFAM_BLAST_HOME",
+        "PHATE_UNIPROT_BLAST_HOME","PHATE_NR_BLAST_HOME","PHATE_CAZY_BASE_DIR","PHATE_CAZY_BLAST_HOME","PHATE_NCBI_TAXON_DIR","PHATE_CUSTOM_GENOME_BLAST_HOME",
+        "PHATE_CUSTOM_GENE_BLAST_HOME","PHATE_CUSTOM_PROTEIN_BLAST_HOME","PHATE_KEGG_VIRUS_BASE_DIR","PHATE_NCBI_VIRUS_BASE_DIR","PHATE_PHANTOME_BASE_DIR",
+        "PHATE_PVOGS_BASE_DIR","PHATE_VOGS_BASE_DIR","PHATE_CAZY_ANNOTATION_PATH","PHATE_VOG_PROTEIN_HEADER_FILE","PHATE_EMBOSS_PHATE_HOME"]:
+    os.environ.setdefault(variable,"")
+for variable in ["PHATE_MIN_BLASTP_IDENTITY","PHATE_MIN_BLASTN_IDENTITY","PHATE_BLASTP_IDENTITY_DEFAULT","PHATE_BLASTN_IDENTITY_DEFAULT"]:
+    os.environ.setdefault(variable,"60")
+for variable in ["PHATE_MAX_BLASTP_HIT_COUNT","PHATE_MAX_BLASTN_HIT_COUNT","PHATE_BLASTP_HIT_COUNT_DEFAULT","PHATE_BLASTN_HIT_COUNT_DEFAULT","PHATE_HIT_COUNT_MAX"]:
+    os.environ.setdefault(variable,"100")
+for variable in ["PHATE_CLEAN_RAW_DATA","PHATE_PHATE_PROGRESS","PHATE_PHATE_MESSAGES","PHATE_PHATE_WARNINGS","PHATE_MAC_OSX"]:
+    os.environ.setdefault(variable,"False")
+os.environ.setdefault("PHATE_SCORE_EDGE_MAX","0.1")
+os.environ.setdefault("PHATE_OVERHANG_MAX","1")
+os.environ.setdefault("PHATE_PIPELINE_OUTPUT_DIR",tempfile.gettempdir())
+
+import phate_blast
+
+DEFAULT_QUERIES = 100
+DEFAULT_HITS    = 500
+DATABASE        = "/databases/VOGs/VOGs.faa"
+DB_NAME         = "custom"
+
+HIT_XML = """        <Hit>
+          <Hit_num>%d</Hit_num>
+          <Hit_id>gnl|BL_ORD_ID|%d</Hit_id>
+          <Hit_def>VOG%05d|NP_%06d.1 hypothetical protein [Phage %d]</Hit_def>
+          <Hit_accession>%d</Hit_accession>
+          <Hit_len>%d</Hit_len>
+          <Hit_hsps>
+%s          </Hit_hsps>
+        </Hit>
+"""
+HSP_XML = """            <Hsp>
+              <Hsp_num>%d</Hsp_num>
+              <Hsp_bit-score>%.2f</Hsp_bit-score>
+              <Hsp_score>%d</Hsp_score>
+              <Hsp_evalue>%s</Hsp_evalue>
+              <Hsp_query-from>%d</Hsp_query-from>
+              <Hsp_query-to>%d</Hsp_query-to>
+              <Hsp_hit-from>%d</Hsp_hit-from>
+              <Hsp_hit-to>%d</Hsp_hit-to>
+              <Hsp_query-frame>0</Hsp_query-frame>
+              <Hsp_hit-frame>0</Hsp_hit-frame>
+              <Hsp_identity>%d</Hsp_identity>
+              <Hsp_positive>%d</Hsp_positive>
+              <Hsp_gaps>%d</Hsp_gaps>
+              <Hsp_align-len>%d</Hsp_align-len>
+              <Hsp_qseq>%s</Hsp_qseq>
+              <Hsp_hseq>%s</Hsp_hseq>
+              <Hsp_midline>%s</Hsp_midline>
+            </Hsp>
+"""
+
+# Write a blastp XML (-outfmt 5) file of queryCount queries, each with hitCount hits
+def WriteBlastXML(filename,queryCount,hitCount):
+    XML_H = open(filename,"w")
+    XML_H.write("%s\n" % ('<?xml version="1.0"?>'))
+    XML_H.write("%s\n" % ('<BlastOutput>'))
+    XML_H.write("%s\n" % ('  <BlastOutput_program>blastp</BlastOutput_program>'))
+    XML_H.write("%s%s%s\n" % ('  <BlastOutput_db>',DATABASE,'</BlastOutput_db>'))
+    XML_H.write("%s\n" % ('  <BlastOutput_query-def>query_1</BlastOutput_query-def>'))
+    XML_H.write("%s\n" % ('  <BlastOutput_iterations>'))
+    for query in range(1,queryCount + 1):
+        XML_H.write("%s\n" % ('    <Iteration>'))
+        XML_H.write("%s%d%s\n" % ('      <Iteration_iter-num>',query,'</Iteration_iter-num>'))
+        XML_H.write("%s%d%s\n" % ('      <Iteration_query-def>query_',query,'</Iteration_query-def>'))
+        XML_H.write("%s\n" % ('      <Iteration_hits>'))
+        for hit in range(1,hitCount + 1):
+            hspString = ""
+            for hsp in range(1,3):
+                alignLen = random.randint(50,300)
+                identity = random.randint(alignLen // 3,alignLen)
+                sequence = ''.join(random.choice("ACDEFGHIKLMNPQRSTVWY") for i in range(0,40))
+                hspString += HSP_XML % (hsp,random.uniform(30,500),random.randint(50,1000),"%.1e" % random.uniform(1e-80,1e-3),
+                    random.randint(1,50),random.randint(100,400),random.randint(1,50),random.randint(100,400),
+                    identity,identity,random.randint(0,5),alignLen,sequence,sequence,sequence)
+            accession = random.randint(1,999999)
+            XML_H.write(HIT_XML % (hit,accession,random.randint(1,99999),accession,random.randint(1,9999),accession,random.randint(100,900),hspString))
+        XML_H.write("%s\n" % ('      </Iteration_hits>'))
+        XML_H.write("%s\n" % ('    </Iteration>'))
+    XML_H.write("%s\n" % ('  </BlastOutput_iterations>'))
+    XML_H.write("%s\n" % ('</BlastOutput>'))
+    XML_H.close()
+
+def AnnotationFields(annotationLists):
+    return [[(a.source,a.method,a.annotationType,a.category,a.name,a.start,a.end,a.annotationList,a.VOGlist,a.description) for a in annotationList] for annotationList in annotationLists]
+
+##### Former (whole-tree, template-copying) parser, for timing and checking results
+
+def ReferenceHit2annotation(myBlast,hit,blastDatabase,database,dbName):
+    hitDataSet = {"hitNumber" : 0, "hitID" : "", "hitDefline" : "", "hitAccession" : "", "gi" : "", "hitLength" : 0, "hitHSPs" : []}
+    hspDataSet = {"hspSequence" : "", "hspNumber" : 0, "hspScore" : 0, "hspEvalue" : 0, "queryStart" : 0, "queryEnd" : 0, "hitStart" : 0, "hitEnd" : 0,
+        "hspAlignLen" : 0, "hspBitScore" : 0.0, "hspIdentity" : 0, "hspPositives" : 0, "hspGaps" : 0, "hspPercentIdentity" : 0.0}
+    nextHitDataSet = copy.deepcopy(hitDataSet)
+    for hitData in hit:
+        if hitData.tag == "Hit_num":
+            nextHitDataSet["hitNumber"] = hitData.text
+        if hitData.tag == "Hit_id":
+            nextHitDataSet["hitID"] = hitData.text
+        if hitData.tag == "Hit_def":
+            defline = hitData.text
+            nextHitDataSet["gi"] = re.findall(phate_blast.p_gi,defline)[0]
+            nextHitDataSet["hitDefline"] = defline
+        if hitData.tag == "Hit_accession":
+            nextHitDataSet["hitAccession"] = hitData.text
+        if hitData.tag == "Hit_len":
+            nextHitDataSet["hitLength"] = hitData.text
+        if hitData.tag == "Hit_hsps":
+            for hsps in hitData:
+                nextHspDataSet = copy.deepcopy(hspDataSet)
+                for hsp in hsps:
+                    if hsp.tag == "Hsp_hseq":
+                         nextHspDataSet["hspSequence"]= hsp.text
+                    if hsp.tag == "Hsp_num":
+                         nextHspDataSet["hspNumber"] = hsp.text
+                    if hsp.tag == "Hsp_bit_score":
+                         nextHspDataSet["hspBitScore"]= hsp.text
+                    if hsp.tag == "Hsp_evalue":
+                         nextHspDataSet["hspEvalue"]= hsp.text
+                    if hsp.tag == "Hsp_query-from":
+                         nextHspDataSet["queryStart"]= hsp.text
+                    if hsp.tag == "Hsp_query-to":
+                         nextHspDataSet["queryEnd"]= hsp.text
+                    if hsp.tag == "Hsp_hit-from":
+                         nextHspDataSet["hitStart"]= hsp.text
+                    if hsp.tag == "Hsp_hit-to":
+                         nextHspDataSet["hitEnd"]= hsp.text
+                    if hsp.tag == "Hsp_identity":
+                         nextHspDataSet["hspIdentity"]= hsp.text
+                    if hsp.tag == "Hsp_positive":
+                         nextHspDataSet["hspPositives"]= hsp.text
+                    if hsp.tag == "Hsp_gaps":
+                         nextHspDataSet["hspGaps"]= hsp.text
+                    if hsp.tag == "Hsp_align-len":
+                         nextHspDataSet["hspAlignLen"] = hsp.text
+                         if int(nextHspDataSet["hspAlignLen"]) > 0:
+                             nextHspDataSet["hspPercentIdentity"] = int(nextHspDataSet["hspIdentity"])*100/int(nextHspDataSet["hspAlignLen"])
+                nextHitDataSet["hitHSPs"].append(nextHspDataSet)
+    newAnnotation = copy.deepcopy(phate_blast.annotation)
+    newAnnotation.source         = blastDatabase
+    newAnnotation.method         = myBlast.blastFlavor
+    newAnnotation.annotationType = "homology"
+    newAnnotation.category       = "sequence"
+    newAnnotation.name           = nextHitDataSet["hitDefline"]
+    newAnnotation.start          = nextHitDataSet["hitHSPs"][0]["queryStart"]
+    newAnnotation.end            = nextHitDataSet["hitHSPs"][0]["queryEnd"]
+    newAnnotation.annotationList.append('identity=' + str(round(nextHitDataSet["hitHSPs"][0]["hspPercentIdentity"],2)))
+    newAnnotation.annotationList.append('alignlen=' + str(nextHitDataSet["hitHSPs"][0]["hspAlignLen"]))
+    resultString = 'evalue=' + str(nextHitDataSet["hitHSPs"][0]["hspEvalue"])
+    if 'vog' in newAnnotation.source.lower():
+        for VOGid in re.findall('VOG\d+',newAnnotation.name):
+            if VOGid not in newAnnotation.VOGlist:
+                newAnnotation.VOGlist.append(VOGid)
+    newAnnotation.annotationList.append(resultString)
+    if float(nextHitDataSet["hitHSPs"][0]["hspPercentIdentity"]) < float(myBlast.identityMin):
+        return None
+    newAnnotation.link2databaseIdentifiers(database,dbName)
+    return newAnnotation
+
+def ReferenceParse(myBlast,filename,queryCount):
+    annotationLists = [[] for i in range(0,queryCount)]
+    blastDatabase = ""
+    tree = ET()
+    tree.parse(filename)
+    root = tree.getroot()
+    for child in root:
+        if child.tag == 'BlastOutput_db':
+            blastDatabase = child.text
+    for iteration in root.iter('Iteration'):
+        iterNum = 0
+        for iterData in iteration:
+            if iterData.tag == 'Iteration_iter-num':
+                iterNum = int(iterData.text)
+        for hit in iteration.iter('Hit'):
+            newAnnotation = ReferenceHit2annotation(myBlast,hit,blastDatabase,DATABASE,DB_NAME)
+            if newAnnotation:
+                annotationLists[iterNum-1].append(newAnnotation)
+    return annotationLists
+
+##### Main
+
+queryCount = DEFAULT_QUERIES
+hitCount   = DEFAULT_HITS
+REFERENCE  = False
+counts     = []
+for argument in sys.argv[1:]:
+    if argument == "-reference":
+        REFERENCE = True
+    else:
+        counts.append(int(argument))
+if len(counts) >= 1:
+    queryCount = counts[0]
+if len(counts) >= 2:
+    hitCount = counts[1]
+
+random.seed(1)
+tempDir = tempfile.mkdtemp()
+xmlFile = os.path.join(tempDir,"benchmark.blastp.xml")
+WriteBlastXML(xmlFile,queryCount,hitCount)
+print("phate_benchmarkBlastXML says, Queries:", queryCount, "; hits per query:", hitCount, "; XML file size:", os.path.getsize(xmlFile), "bytes")
+
+myBlast = phate_blast.multiBlast()
+myBlast.setIdentityMin(60)
+
+startTime = time.time()
+hitTotal = 0
+for hit in phate_blast.parseBlastXML(xmlFile):
+    hitTotal += 1
+print("   parseBlastXML (hit records only):   %.3f seconds for %d hits" % (time.time() - startTime, hitTotal))
+
+startTime = time.time()
+annotationLists = [[] for i in range(0,queryCount)]
+for hit in phate_blast.parseBlastXML(xmlFile):
+    newAnnotation = myBlast.hit2annotation(hit,DATABASE,DB_NAME)
+    if newAnnotation:
+        annotationLists[hit.queryNumber-1].append(newAnnotation)
+print("   parseBlastXML + hit2annotation:     %.3f seconds; %d annotations" % (time.time() - startTime, sum([len(annotationList) for annotationList in annotationLists])))
+
+if REFERENCE:
+    startTime = time.time()
+    referenceLists = ReferenceParse(myBlast,xmlFile,queryCount)
+    print("   reference (tree parse + deepcopy):  %.3f seconds" % (time.time() - startTime))
+    print("   results identical to reference:", AnnotationFields(annotationLists) == AnnotationFields(referenceLists))
+
+os.remove(xmlFile)
+os.rmdir(tempDir)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+#############################################
+# Name: phate_benchmarkTaxonomy.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Date of last update:  18 October 2026
+#
+# Description:
+# Benchmark for the taxonomy lookup of NCBI virus genome hits (see phate_taxonomy.py). A synthetic
+#    nucl_gb.accession2taxid file of <accessions> accessions is written and indexed with
+#    DatabasePrep/dbPrep_taxonIndex.py. A recorded blastn XML output of one genome with <hits> hits
+#    to ncbiVirusGenome is then annotated by phate_blast.multiBlast.blastBatch, which looks up the
+#    taxonomy ids of the whole batch at once (phate_annotation.prefetchNCBItaxonomyIDs). The calls
+#    made to the taxonomy index are counted. With -reference, the hits are also annotated with a
+#    lookup per hit, as without the batched lookup, timed, and the annotations are checked to be
+#    identical.
+#
+# Usage:  python phate_benchmarkTaxonomy.py [hits] [accessions] [-reference]   (defaults: 500 hits, 1000000 accessions)
+#
+# Methods:
+#    WriteAccession2taxid
+#    WriteBlastXML
+#    CountCalls
+#    AnnotationFields
+#    ReferenceAnnotate
+#
+#####################################################################################################
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import sys, os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+# This benchmark may be run outside of multiPhATE; the taxonomy file is the synthetic one written below
+tempDir = tempfile.mkdtemp()
+os.environ["PHATE_NCBI_TAXON_DIR"] = tempDir + os.sep
+for variable in ["PHATE_BLAST_HOME","PHATE_NCBI_VIRUS_GENOME_BLAST_HOME","PHATE_NCBI_VIRUS_PROTEIN_BLAST_HOME","PHATE_REFSEQ_PROTEIN_BLAST_HOME",
+        "PHATE_REFSEQ_GENE_BLAST_HOME","PHATE_PVOGS_BLAST_HOME","PHATE_VOG_GENE_BLAST_HOME","PHATE_VOG_PROTEIN_BLAST_HOME","PHATE_VOG_ANNOTATION_FILE",
+        "PHATE_PHANTOME_BLAST_HOME","PHATE_KEGG_VIRUS_BLAST_HOME","PHATE_SWISSPROT_BLAST_HOME","PHATE_PHAGE_ENZYME_BLAST_HOME","PHATE_PFAM_BLAST_HOME",
+        "PHATE_UNIPROT_BLAST_HOME","PHATE_NR_BLAST_HOME","PHATE_CAZY_BASE_DIR","PHATE_CAZY_BLAST_HOME","PHATE_CUSTOM_GENOME_BLAST_HOME",
+        "PHATE_CUSTOM_GENE_BLAST_HOME","PHATE_CUSTOM_PROTEIN_BLAST_HOME","PHATE_KEGG_VIRUS_BASE_DIR","PHATE_NCBI_VIRUS_BASE_DIR","PHATE_PHANTOME_BASE_DIR",
+        "PHATE_PVOGS_BASE_DIR","PHATE_VOGS_BASE_DIR","PHATE_CAZY_ANNOTATION_PATH","PHATE_VOG_PROTEIN_HEADER_FILE","PHATE_EMBOSS_PHATE_HOME"]:
+    os.environ.setdefault(variable,"")
+for variable in ["PHATE_MIN_BLASTP_IDENTITY","PHATE_MIN_BLASTN_IDENTITY","PHATE_BLASTP_IDENTITY_DEFAULT","PHATE_BLASTN_IDENTITY_DEFAULT"]:
+    os.environ.setdefault(variable,"60")
+for variable in ["PHATE_MAX_BLASTP_HIT_COUNT","PHATE_MAX_BLASTN_HIT_COUNT","PHATE_BLASTP_HIT_COUNT_DEFAULT","PHATE_BLASTN_HIT_COUNT_DEFAULT","PHATE_HIT_COUNT_MAX"]:
+    os.environ.setdefault(variable,"100")
+for variable in ["PHATE_CLEAN_RAW_DATA","PHATE_PHATE_PROGRESS","PHATE_PHATE_MESSAGES","PHATE_PHATE_WARNINGS","PHATE_MAC_OSX"]:
+    os.environ.setdefault(variable,"False")
+os.environ.setdefault("PHATE_SCORE_EDGE_MAX","0.1")
+os.environ.setdefault("PHATE_OVERHANG_MAX","1")
+os.environ.setdefault("PHATE_PIPELINE_OUTPUT_DIR",tempfile.gettempdir())
+
+import phate_blast
+import phate_annotation
+import phate_fastaSequence
+import phate_taxonomy
+
+DEFAULT_HITS       = 500
+DEFAULT_ACCESSIONS = 1000000
+DATABASE           = "/databases/NCBI/Virus_Genome/ncbiVirusGenome.fasta"
+DB_NAME            = "ncbiVirusGenome"
+TAXON_INDEX_CODE   = os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","DatabasePrep","dbPrep_taxonIndex.py")
+CALL_COUNTS        = {"lookup" : 0, "lookupList" : 0, "_query" : 0}
+
+HIT_XML = """        <Hit>
+          <Hit_num>%d</Hit_num>
+          <Hit_id>gi|%d|ref|NC_%06d.1|</Hit_id>
+          <Hit_def>gi|%d|ref|NC_%06d.1| Phage %d, complete genome</Hit_def>
+          <Hit_accession>NC_%06d</Hit_accession>
+          <Hit_len>%d</Hit_len>
+          <Hit_hsps>
+            <Hsp>
+              <Hsp_num>1</Hsp_num>
+              <Hsp_bit-score>%.2f</Hsp_bit-score>
+              <Hsp_score>%d</Hsp_score>
+              <Hsp_evalue>%s</Hsp_evalue>
+              <Hsp_query-from>%d</Hsp_query-from>
+              <Hsp_query-to>%d</Hsp_query-to>
+              <Hsp_hit-from>%d</Hsp_hit-from>
+              <Hsp_hit-to>%d</Hsp_hit-to>
+              <Hsp_query-frame>1</Hsp_query-frame>
+              <Hsp_hit-frame>1</Hsp_hit-frame>
+              <Hsp_identity>%d</Hsp_identity>
+              <Hsp_positive>%d</Hsp_positive>
+              <Hsp_gaps>0</Hsp_gaps>
+              <Hsp_align-len>%d</Hsp_align-len>
+              <Hsp_qseq>ACGT</Hsp_qseq>
+              <Hsp_hseq>ACGT</Hsp_hseq>
+              <Hsp_midline>||||</Hsp_midline>
+            </Hsp>
+          </Hit_hsps>
+        </Hit>
+"""
+
+# Write an accession2taxid file of accessionCount accessions: NC_000001.1 ... (header line first)
+def WriteAccession2taxid(filename,accessionCount):
+    ACCN_H = open(filename,"w")
+    ACCN_H.write("%s\n" % ("accession\taccession.version\ttaxid\tgi"))
+    for number in range(1,accessionCount + 1):
+        ACCN_H.write("%s\t%s\t%d\t%d\n" % ("NC_" + str(number).zfill(6),"NC_" + str(number).zfill(6) + ".1",10000 + number % 5000,number))
+    ACCN_H.close()
+
+# Write a blastn XML (-outfmt 5) file of one query with hitCount hits to NCBI virus genomes; about 1 in 20
+# hit accessions is not in the accession2taxid file
+def WriteBlastXML(filename,queryDef,hitCount,accessionCount):
+    XML_H = open(filename,"w")
+    XML_H.write("%s\n" % ('<?xml version="1.0"?>'))
+    XML_H.write("%s\n" % ('<BlastOutput>'))
+    XML_H.write("%s\n" % ('  <BlastOutput_program>blastn</BlastOutput_program>'))
+    XML_H.write("%s%s%s\n" % ('  <BlastOutput_db>',DATABASE,'</BlastOutput_db>'))
+    XML_H.write("%s%s%s\n" % ('  <BlastOutput_query-def>',queryDef,'</BlastOutput_query-def>'))
+    XML_H.write("%s\n" % ('  <BlastOutput_iterations>'))
+    XML_H.write("%s\n" % ('    <Iteration>'))
+    XML_H.write("%s\n" % ('      <Iteration_iter-num>1</Iteration_iter-num>'))
+    XML_H.write("%s%s%s\n" % ('      <Iteration_query-def>',queryDef,'</Iteration_query-def>'))
+    XML_H.write("%s\n" % ('      <Iteration_hits>'))
+    for (hit,number) in enumerate(random.sample(range(1,accessionCount * 21 // 20 + 1),hitCount)):
+        alignLen = random.randint(500,5000)
+        identity = random.randint(alignLen * 7 // 10,alignLen)
+        queryStart = random.randint(1,40000)
+        XML_H.write(HIT_XML % (hit + 1,number,number,number,number,number,number,random.randint(20000,90000),
+            random.uniform(100,9000),random.randint(500,9000),"%.1e" % random.uniform(1e-180,1e-10),queryStart,queryStart + alignLen - 1,
+            queryStart,queryStart + alignLen - 1,identity,identity,alignLen))
+    XML_H.write("%s\n" % ('      </Iteration_hits>'))
+    XML_H.write("%s\n" % ('    </Iteration>'))
+    XML_H.write("%s\n" % ('  </BlastOutput_iterations>'))
+    XML_H.write("%s\n" % ('</BlastOutput>'))
+    XML_H.close()
+
+# Count the calls made to a method of phate_taxonomy.taxonomyIndex, in CALL_COUNTS
+def CountCalls(methodName):
+    method = getattr(phate_taxonomy.taxonomyIndex,methodName)
+    def countedMethod(*arguments):
+        CALL_COUNTS[methodName] += 1
+        return method(*arguments)
+    setattr(phate_taxonomy.taxonomyIndex,methodName,countedMethod)
+
+def AnnotationFields(annotationList):
+    return [(a.source,a.method,a.name,a.start,a.end,a.annotationList,a.description) for a in annotationList]
+
+# Annotate the hits with a taxonomy lookup per hit, as without prefetchNCBItaxonomyIDs
+def ReferenceAnnotate(myBlast,xmlFile):
+    annotationList = []
+    for hit in phate_blast.parseBlastXML(xmlFile):
+        newAnnotation = myBlast.hit2annotation(hit,DATABASE,DB_NAME)
+        if newAnnotation:
+            annotationList.append(newAnnotation)
+    return annotationList
+
+##### Main
+
+hitCount       = DEFAULT_HITS
+accessionCount = DEFAULT_ACCESSIONS
+REFERENCE      = False
+counts         = []
+for argument in sys.argv[1:]:
+    if argument == "-reference":
+        REFERENCE = True
+    else:
+        counts.append(int(argument))
+if len(counts) >= 1:
+    hitCount = counts[0]
+if len(counts) >= 2:
+    accessionCount = counts[1]
+
+random.seed(1)
+accn2taxidFile = phate_annotation.ncbi_taxon_lookup
+WriteAccession2taxid(accn2taxidFile,accessionCount)
+startTime = time.time()
+subprocess.check_call([sys.executable,TAXON_INDEX_CODE,accn2taxidFile],stdout=subprocess.DEVNULL)
+print("phate_benchmarkTaxonomy says, Indexed", accessionCount, "accessions in %.2f seconds; hits: %d" % (time.time() - startTime,hitCount))
+for methodName in CALL_COUNTS:
+    CountCalls(methodName)
+taxonomyIndex = phate_taxonomy.getTaxonomyIndex(accn2taxidFile)
+
+# The genome blasted against ncbiVirusGenome; blast is replaced by a copy of the recorded output
+genome = phate_fastaSequence.fasta()
+genome.assignHeader("genome_1")
+genome.assignSequence("ACGT" * 100)
+xmlFile = os.path.join(tempDir,"recorded.blastn.xml")
+WriteBlastXML(xmlFile,genome.sequentialHeader,hitCount,accessionCount)  # blastBatch writes the sequential header
+
+myBlast = phate_blast.multiBlast()
+myBlast.setBlastFlavor('blastn')
+myBlast.setIdentityMin(60)
+myBlast.getBlastCommand = lambda fastaFile,outfile,database: "cp " + xmlFile + " " + outfile
+
+startTime = time.time()
+myBlast.blastBatch([genome],os.path.join(tempDir,"genome_ncbiVirGenome_blastn.out"),DATABASE,DB_NAME)
+print("   blastBatch: %.3f seconds; %d annotations, %d with a taxonomy id" % (time.time() - startTime,len(genome.annotationList),
+    len([annotation for annotation in genome.annotationList if 'NCBItaxID=' in annotation.description])))
+print("   taxonomy index calls: lookupList %d, lookup %d, single-accession queries %d" % (CALL_COUNTS["lookupList"],CALL_COUNTS["lookup"],CALL_COUNTS["_query"]))
+
+if REFERENCE:
+    taxonomyIndex.cache.clear()
+    for methodName in CALL_COUNTS:
+        CALL_COUNTS[methodName] = 0
+    startTime = time.time()
+    referenceList = ReferenceAnnotate(myBlast,xmlFile)
+    print("   reference (lookup per hit): %.3f seconds" % (time.time() - startTime))
+    print("   taxonomy index calls: lookupList %d, lookup %d, single-accession queries %d" % (CALL_COUNTS["lookupList"],CALL_COUNTS["lookup"],CALL_COUNTS["_query"]))
+    print("   results identical to reference:", AnnotationFields(genome.annotationList) == AnnotationFields(referenceList))
+
+taxonomyIndex.close()
+shutil.rmtree(tempDir)
@@ -6,9 +6,11 @@
 #
 # Programmer:  Carol Zhou
 #
-# Last Update:  08 December 2020
+# Last Update:  18 October 2026
 # 
 # Classes and Methods:
+#    blastHit
+#    parseBlastXML(outfile)
 #    multiBlast
 #       setBlastParameters(dict)
 #       setBlastFlavor(flavor)
@@ -17,10 +19,20 @@
 #       setEvalueMin(evalue)
 #       setEvalueSelect(evalue)
 #       setTopHitCount(number)
+#       setBlastBatchSize(number)
 #       setTopHits
 #       getTopHits
+#       getCacheParameterString
+#       getBlastCommand(fastaFile,outfile,database)
+#       executeBlast(command,outfile)
 #       blast1fasta(fasta,outfile,database)
+#       blastBatch(fastaList,outfile,database,dbName)
+#       blastFastaSet(fastaSet,outfileTag,database,dbName)
+#       hit2annotation(hit,database,dbName)
 #       runBlast(fastaSet,database)
+#       completeBlast
+#       setScheduler(scheduler)
+#       writeVOGgroupFiles(fastaSet,database,outfileRoot,extension)
 #       cleanBlastOutDir
 #       printParameters
 #       printParameters2file(file_h)
@@ -38,10 +50,13 @@ import re
 import copy
 import os
 import subprocess
-from xml.etree.ElementTree import ElementTree as ET
+from xml.etree.ElementTree import iterparse
 import phate_fastaSequence
 import phate_genomeSequence
 import phate_annotation
+import phate_scheduler
+import phate_vogIndex
+import phate_annotationCache
 
 # Constants
 # Note: sometimes blast+ ignores sort based on selected output format selected
@@ -142,6 +157,65 @@ LIST = 7
 # templates 
 annotation = phate_annotation.annotationRecord()
 
+# patterns
+p_organism = re.compile('\[[\w\d\s]+\]') # organism names are enclosed in brackets in defline
+p_gi       = re.compile('^gi\|(\d*)|')   # gi number occurs at front of hit defline; capture number only via group(0)
+p_VOGid    = re.compile('VOG\d+')
+
+# The fields of one XML <Hit> that are used to annotate a query; HSP data are those of the hit's first (best) HSP
+class blastHit(object):
+    __slots__ = ["queryNumber","queryDef","database","defline","queryStart","queryEnd","identity","alignLen","evalue"]
+
+    def __init__(self,queryNumber,queryDef,database):
+        self.queryNumber = queryNumber  # <Iteration_iter-num>: position of the query in the blast input, counting from 1
+        self.queryDef    = queryDef     # <Iteration_query-def> (or <BlastOutput_query-def>)
+        self.database    = database     # <BlastOutput_db>
+        self.defline     = ""           # <Hit_def>
+        self.queryStart  = 0
+        self.queryEnd    = 0
+        self.identity    = 0
+        self.alignLen    = 0
+        self.evalue      = 0
+
+# Read an XML-formatted (-outfmt 5) blast output file, one or many queries, and yield a blastHit for each <Hit>,
+# in file order. The file is parsed incrementally, and each <Hit> is discarded once read.
+def parseBlastXML(outfile):
+    database = ""; queryDef = ""; queryNumber = 1
+    hit = None; hspCount = 0
+    for (event,element) in iterparse(outfile):  # "end" events: an element's text and children are complete
+        tag = element.tag
+        if hit is not None:
+            if tag == "Hsp":
+                hspCount += 1
+            elif hspCount == 0 and tag.startswith("Hsp_"):
+                if tag == "Hsp_query-from":
+                    hit.queryStart = element.text
+                elif tag == "Hsp_query-to":
+                    hit.queryEnd = element.text
+                elif tag == "Hsp_identity":
+                    hit.identity = element.text
+                elif tag == "Hsp_align-len":
+                    hit.alignLen = element.text
+                elif tag == "Hsp_evalue":
+                    hit.evalue = element.text
+            elif tag == "Hit_def":
+                hit.defline = element.text
+            elif tag == "Hit":
+                yield hit
+                hit = None
+                element.clear()
+        elif tag == "Hit_num":  # first element of a <Hit>
+            hit = blastHit(queryNumber,queryDef,database)
+            hspCount = 0
+        elif tag == "Iteration_iter-num":
+            queryNumber = int(element.text)
+        elif tag == "Iteration_query-def" or tag == "BlastOutput_query-def":
+            queryDef = element.text
+        elif tag == "BlastOutput_db":
+            database = element.text
+        elif tag == "Iteration":
+            element.clear()
+
 class multiBlast(object):
 
     def __init__(self):
@@ -154,6 +228,9 @@ class multiBlast(object):
         self.scoreEdge                = SCORE_EDGE_MAX # default: BLAST recommended default
         self.overhang                 = OVERHANG_MAX   # default: BLAST recommended default
         self.blastThreads             = 1         # default: run in serial
+        self.blastBatchSize           = 0         # default: blast one query at a time; N>0 blasts N queries per blast run; -1 blasts all at once
+        self.scheduler                = None      # shared phate_scheduler.searchScheduler; if None, runBlast runs its own searches
+        self.completionList           = []        # (function,args) steps to run, in order, after queued blast runs complete
         self.outputFormat             = 5         # default: XML output
         self.blastAnnotations         = []        # List of phate_annotation objects; blast output get temporarily stored here
         # move to hit class:  self.topHitList     = []        # 
@@ -203,6 +280,8 @@ class multiBlast(object):
                 self.setOverhang(paramset['overhang'])
             if 'blastThreads' in list(paramset.keys()):
                 self.setBlastThreads(paramset['blastThreads'])
+            if 'blastBatchSize' in list(paramset.keys()):
+                self.setBlastBatchSize(paramset['blastBatchSize'])
             if 'geneCallDir' in list(paramset.keys()):
                 self.setGeneCallDir(paramset['geneCallDir'])
             if 'blastOutDir' in list(paramset.keys()):
@@ -328,6 +407,13 @@ class multiBlast(object):
             print("phate_blast says, Turning blastThreads off.")
             self.blastThreads = 0 
 
+    def setBlastBatchSize(self,batchSize):
+        if int(batchSize) >= -1:
+            self.blastBatchSize = int(batchSize)
+        else:
+            if PHATE_WARNINGS:
+                print("phate_blast says, WARNING: Blast batch size should be 0 (one query per blast), -1 (all queries in one blast), or a positive integer.")
+
     def setGeneCallDir(self,geneCallDir):
         self.geneCallDir = geneCallDir
         GENE_CALL_DIR = geneCallDir
@@ -347,22 +433,16 @@ class multiBlast(object):
     def getTopHits(self):
         return self.topHitList 
 
+    # Parameters that determine a search's annotations, for keying the annotation cache (see phate_annotationCache.py)
+    def getCacheParameterString(self):
+        return ':'.join([str(parameter) for parameter in [self.blastFlavor,self.identityMin,self.evalueMin,self.identitySelect,self.evalueSelect,self.topHitCount,self.scoreEdge,self.overhang,self.outputFormat]])
+
     ##### PERFORM BLAST
 
-    # Blast one fasta sequence. This method is called by runBlast 
-    def blast1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
+    # Construct the blast+ command line for the current blast flavor and parameters
+    def getBlastCommand(self,fastaFile,outfile,database):
         command = ""
 
-        # Write fasta sequence to temporary file
-        fastaFile = self.blastOutDir + "temp.fasta"
-        fastaFileH = open(fastaFile,"w")
-        if fasta.sequentialHeader == "unknown":  # unchanged from default
-            fasta.printFasta2file(fastaFileH,"blastHeader")
-        else:
-            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
-        fastaFileH.close()
-
-        # Run blast
         if self.blastFlavor == 'blastn':
             command = BLAST_HOME + "blastn -query " + fastaFile + " -out " + outfile + \
                 " -task blastn -db " + database + " -evalue " + str(self.evalueMin) + \
@@ -404,8 +484,11 @@ class multiBlast(object):
         else:
             if PHATE_WARNINGS:
                 print("phate_blast says, ERROR: blast flavor not currently supported: ", self.blastFlavor)
-            return
 
+        return command
+
+    # Run a blast command; returns False if the blast process could not be run
+    def executeBlast(self,command,outfile):
         BLAST_SUCCEEDED = True
         try:
             if PHATE_MESSAGES:
@@ -419,168 +502,77 @@ class multiBlast(object):
             BLAST_SUCCEEDED = False
             if DEBUG:
                 BLAST_ERROR_LOG.write("%s%s\n" % ("WARNING: Blast failed for the following sequence:",outfile))
+        return BLAST_SUCCEEDED
+
+    # Convert one blastHit (see parseBlastXML) into an annotation object. Returns the annotation, or None if the
+    # hit does not meet the identity cutoff. Called by blast1fasta and blastBatch, so both paths annotate identically.
+    def hit2annotation(self,hit,database,dbName):
+        percentIdentity = 0.0
+        if int(hit.alignLen) > 0:
+            percentIdentity = int(hit.identity)*100/int(hit.alignLen)
+        if float(percentIdentity) < float(self.identityMin):  # Hits that fail the cutoff are discarded
+            return None
+
+        # Store new blast annotation
+        newAnnotation = phate_annotation.annotationRecord()
+        newAnnotation.source         = hit.database
+        newAnnotation.method         = self.blastFlavor
+        newAnnotation.annotationType = "homology"
+        newAnnotation.category       = "sequence"
+        newAnnotation.name           = hit.defline     # subject header (possibly truncated by blast)
+        newAnnotation.start          = hit.queryStart  # query start
+        newAnnotation.end            = hit.queryEnd    # query end
+        newAnnotation.annotationList.append('identity=' + str(round(percentIdentity,2)))
+        newAnnotation.annotationList.append('alignlen=' + str(hit.alignLen))
+
+        # CHECK THIS: code adapted assuming same structure of pVOGs vs. VOGs
+        # If this is a pVOG/VOG blast result, capture the VOG identifiers in the annotation object
+        if 'vog' in newAnnotation.source.lower():  # pVOG or VOG
+            # Note that structure of pVOG annotation information differs from that of VOG.
+            # VOG hit header has VOGid(s) + proteinID; pVOG hit header has VOGid(s) + proteinID + description
+            VOGidList = re.findall(p_VOGid,newAnnotation.name)  # name holds to hit's header, which has func dscr for pVOG
+            for VOGid in VOGidList:
+                if VOGid not in newAnnotation.VOGlist:  # ensure list is non-redundant
+                    newAnnotation.VOGlist.append(VOGid)
+        newAnnotation.annotationList.append('evalue=' + str(hit.evalue))
+
+        # Get DBXREFs, packed into annotation object's self.description field
+        newAnnotation.link2databaseIdentifiers(database,dbName) # Get DBXREFs, packed into self.description
+        return newAnnotation
 
-        # Capture result(s) and store as an annotation object for this fasta; Coded for -outfmt 7
+    # Blast one fasta sequence. This method is called by runBlast 
+    def blast1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
 
-        # For XML parsing
-        MIN_LENGTH = 100 # shortest hit length that is of sufficient coverage
-        doPrint = False
-        count = 0
-        countGood = 0
-        nrList = {}
-        organismList = [] # holds the organisms identified in the deflines
-        hitList = [] # contains a list of hitDataSet objects
-        hitDataSet = {
-            "hitNumber"    : 0,
-            "hitID"        : "",
-            "hitDefline"   : "",
-            "hitAccession" : "",
-            "gi"           : "",  # gi identifier
-            "hitLength"    : 0,
-            "hitHSPs"      : [], # list of hspDataSet objects
-            }
-        hspDataSet = {
-            "hspSequence"        : "",
-            "hspNumber"          : 0,
-            "hspScore"           : 0,
-            "hspEvalue"          : 0,
-            "queryStart"         : 0,
-            "queryEnd"           : 0,
-            "hitStart"           : 0,
-            "hitEnd"             : 0,
-            "hspAlignLen"        : 0,
-            "hspBitScore"        : 0.0,
-            "hspIdentity"        : 0,
-            "hspPositives"       : 0,
-            "hspGaps"            : 0,
-            "hspPercentIdentity" : 0.0,
-            }
-        
-        p_organism = re.compile('\[[\w\d\s]+\]') # organism names are enclosed in brackets in defline
-        p_gi       = re.compile('^gi\|(\d*)|')   # gi number occurs at front of hit defline; capture number only via group(0)
+        # Write fasta sequence to temporary file; named for the outfile, so concurrent blast runs don't collide
+        fastaFile = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        if fasta.sequentialHeader == "unknown":  # unchanged from default
+            fasta.printFasta2file(fastaFileH,"blastHeader")
+        else:
+            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
+        fastaFileH.close()
+
+        # Run blast
+        command = self.getBlastCommand(fastaFile,outfile,database)
+        if command == "":
+            return
+        BLAST_SUCCEEDED = self.executeBlast(command,outfile)
+
+        # Capture result(s) and store as an annotation object for this fasta; Coded for -outfmt 7
 
         # Parse from XML-formatted blast output
         if self.outputFormat == XML and BLAST_SUCCEEDED:
 
-            blastDatabase = ""
-            blastProgram  = ""
-            blastQuery    = ""
-
-            # Load XML tree
-            tree = ET()
-            tree.parse(outfile)
-            root = tree.getroot()
-            for child in root:
-                if child.tag == 'BlastOutput_program':
-                    blastProgram = child.text
-                if child.tag == 'BlastOutput_db':
-                    blastDatabase = child.text
-                if child.tag == 'BlastOutput_query-def':  # CHECK: was this not "Blast_query-def" in other blastp outputs?
-                    blastQuery = child.text
-
-            # Find hits and extract hit data
-            for hit in root.iter('Hit'):  
-                # reset
-                speciesList = []; doPrint = False
-                querySeq = ""; subjectSeq = ""; hitDefline = ""
-                # increment
-                count += 1
-                # capture salient data
-                nextHitDataSet = copy.deepcopy(hitDataSet)
-
-                # Identify hit
-                for hitData in hit:
-                    if hitData.tag == "Hit_num":
-                        nextHitDataSet["hitNumber"] = hitData.text
-                    if hitData.tag == "Hit_id":
-                        nextHitDataSet["hitID"] = hitData.text
-                    if hitData.tag == "Hit_def":
-                        defline = hitData.text
-                        match = re.findall(p_gi,defline)
-                        gi = match[0]
-                        nextHitDataSet["gi"] = gi
-                        nextHitDataSet["hitDefline"] = defline
-                        match = re.findall(p_organism,defline)
-                        if match:
-                            for m in match:
-                                organismList.append(m)
-                    if hitData.tag == "Hit_accession":
-                        nextHitDataSet["hitAccession"] = hitData.text
-                    if hitData.tag == "Hit_len":
-                        nextHitDataSet["hitLength"] = hitData.text
-                    if hitData.tag == "Hit_hsps":
-  
-                        # Capture one or more hsps
-                        for hsps in hitData:
-                            nextHspDataSet = copy.deepcopy(hspDataSet)
-                            for hsp in hsps:
-                                if hsp.tag == "Hsp_hseq":
-                                     nextHspDataSet["hspSequence"]= hsp.text
-                                if hsp.tag == "Hsp_num":
-                                     nextHspDataSet["hspNumber"] = hsp.text
-                                if hsp.tag == "Hsp_bit_score":
-                                     nextHspDataSet["hspBitScore"]= hsp.text
-                                if hsp.tag == "Hsp_evalue":
-                                     nextHspDataSet["hspEvalue"]= hsp.text
-                                if hsp.tag == "Hsp_query-from":
-                                     nextHspDataSet["queryStart"]= hsp.text
-                                if hsp.tag == "Hsp_query-to":
-                                     nextHspDataSet["queryEnd"]= hsp.text
-                                if hsp.tag == "Hsp_hit-from":
-                                     nextHspDataSet["hitStart"]= hsp.text
-                                if hsp.tag == "Hsp_hit-to":
-                                     nextHspDataSet["hitEnd"]= hsp.text
-                                if hsp.tag == "Hsp_identity":
-                                     nextHspDataSet["hspIdentity"]= hsp.text
-                                if hsp.tag == "Hsp_positive":
-                                     nextHspDataSet["hspPositives"]= hsp.text
-                                if hsp.tag == "Hsp_gaps":
-                                     nextHspDataSet["hspGaps"]= hsp.text
-                                if hsp.tag == "Hsp_align-len":
-                                     nextHspDataSet["hspAlignLen"] = hsp.text
-                                     if int(nextHspDataSet["hspAlignLen"]) > 0:
-                                         nextHspDataSet["hspPercentIdentity"] = int(nextHspDataSet["hspIdentity"])*100/int(nextHspDataSet["hspAlignLen"])
-                                          
-                            nextHitDataSet["hitHSPs"].append(nextHspDataSet)
-                hitList.append(nextHitDataSet)
-
-                # Store new blast annotation
-                newAnnotation = copy.deepcopy(annotation)
-                newAnnotation.source         = blastDatabase
-                newAnnotation.method         = self.blastFlavor
-                newAnnotation.annotationType = "homology"
-                newAnnotation.category       = "sequence"
-                newAnnotation.name           = nextHitDataSet["hitDefline"]               # subject header (possibly truncated by blast)
-                newAnnotation.start          = nextHitDataSet["hitHSPs"][0]["queryStart"] # query start
-                newAnnotation.end            = nextHitDataSet["hitHSPs"][0]["queryEnd"]   # query end
-                resultString                 = 'identity=' + str(round(nextHitDataSet["hitHSPs"][0]["hspPercentIdentity"],2)) 
-                newAnnotation.annotationList.append(resultString)
-                resultString                 = 'alignlen=' + str(nextHitDataSet["hitHSPs"][0]["hspAlignLen"]) 
-                newAnnotation.annotationList.append(resultString)
-                resultString = 'evalue='   + str(nextHitDataSet["hitHSPs"][0]["hspEvalue"]) 
-                MEETS_IDENTITY_CUTOFF = False
-                if float(nextHitDataSet["hitHSPs"][0]["hspPercentIdentity"]) >= float(self.identityMin):
-                    MEETS_IDENTITY_CUTOFF = True
-
-                # CHECK THIS: code adapted assuming same structure of pVOGs vs. VOGs
-                # If this is a pVOG/VOG blast result, capture the VOG identifiers in the annotation object
-                match_pVOG = re.search('pvog',newAnnotation.source.lower())  # First check if it's a pVOG
-                if not match_pVOG:                                           # If it's not a pVOG, then it might be a VOG
-                    match_VOG  = re.search('vog', newAnnotation.source.lower())
-                if match_pVOG or match_VOG: 
-                    # Note that structure of pVOG annotation information differs from that of VOG.
-                    # VOG hit header has VOGid(s) + proteinID; pVOG hit header has VOGid(s) + proteinID + description
-                    VOGidList = re.findall('VOG\d+',newAnnotation.name)  # name holds to hit's header, which has func dscr for pVOG
-                    for VOGid in VOGidList:
-                        if VOGid not in newAnnotation.VOGlist:  # ensure list is non-redundant
-                            newAnnotation.VOGlist.append(VOGid)
-                newAnnotation.annotationList.append(resultString)
- 
-                # Get DBXREFs, packed into annotation object's self.description field
-                newAnnotation.link2databaseIdentifiers(database,dbName) # Get DBXREFs, packed into self.description
+            # Find hits and extract hit data; taxonomy ids of NCBI virus genome hits are looked up all at once
+            hitList = parseBlastXML(outfile)
+            if dbName.lower() == 'ncbivirusgenome':
+                hitList = list(hitList)
+                phate_annotation.prefetchNCBItaxonomyIDs([hit.defline for hit in hitList])
+            for hit in hitList:
+                newAnnotation = self.hit2annotation(hit,database,dbName)
  
                 # Add this completed annotation to growing list for this fasta
-                if MEETS_IDENTITY_CUTOFF:
+                if newAnnotation:
                     fasta.annotationList.append(newAnnotation)
 
         # Parse from LIST-formatted blast output
@@ -604,7 +596,7 @@ class multiBlast(object):
                 for hitLine in hitList:
 
                     # Extract blast info from hitLine and stash into new annotation object
-                    newAnnotation = copy.deepcopy(annotation) 
+                    newAnnotation = phate_annotation.annotationRecord()
                     newAnnotation.source = database 
                     newAnnotation.method = self.blastFlavor 
                     newAnnotation.annotationType = "homology"
@@ -634,7 +626,112 @@ class multiBlast(object):
             if PHATE_WARNINGS:
                 print("phate_blast says, WARNING: Output format", self.outputFormat, "not yet supported in phate_blast.py/blast1fasta(). Use blast out xml or list format for now.")
 
-    # Run BLAST over a set of fasta sequences. This method calls blast1fasta for each sequence.
+    # Blast a list of fasta sequences in a single blast run (multi-query). Hits are distributed back onto
+    # each fasta's annotationList according to the query each <Iteration> reports, so the resulting
+    # annotations are the same as those produced by calling blast1fasta on each sequence in turn.
+    def blastBatch(self,fastaList,outfile,database,dbName): # fastaList is a list of phate_fastaSequence.fasta objects
+
+        # Write all query sequences to one temporary file; record which header was written for each fasta
+        queryHeaders = []  # query headers, in query order
+        queryDict = {}     # query header => fasta object (only for headers that are unique within this batch)
+        fastaFile = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        for fasta in fastaList:
+            if fasta.sequentialHeader == "unknown":  # unchanged from default
+                fasta.printFasta2file(fastaFileH,"blastHeader")
+                queryHeaders.append(fasta.blastHeader)
+            else:
+                fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
+                queryHeaders.append(fasta.sequentialHeader)
+        fastaFileH.close()
+        for i in range(0,len(fastaList)):
+            if queryHeaders.count(queryHeaders[i]) == 1:
+                queryDict[queryHeaders[i]] = fastaList[i]
+
+        # Run blast
+        command = self.getBlastCommand(fastaFile,outfile,database)
+        if command == "":
+            return
+        BLAST_SUCCEEDED = self.executeBlast(command,outfile)
+        if not BLAST_SUCCEEDED:
+            return
+
+        # Parse from XML-formatted blast output; one <Iteration> per query, in query order
+        hitList = parseBlastXML(outfile)
+
+        # Hits to NCBI virus genomes are annotated with taxonomy ids; look these up for the whole batch at once
+        if dbName.lower() == 'ncbivirusgenome':
+            hitList = list(hitList)
+            phate_annotation.prefetchNCBItaxonomyIDs([hit.defline for hit in hitList])
+
+        queryNumber = 0; fasta = None
+        for hit in hitList:
+
+            # Identify the query: blast reports queries in input order; confirm by header where possible
+            if hit.queryNumber != queryNumber:
+                queryNumber = hit.queryNumber
+                fasta = None
+                queryID = ""
+                if hit.queryDef:
+                    queryID = hit.queryDef.split(' ')[0]  # blast truncates the defline at the first space
+                if queryNumber >= 1 and queryNumber <= len(fastaList):
+                    if queryID == "" or queryID == queryHeaders[queryNumber-1]:
+                        fasta = fastaList[queryNumber-1]
+                if fasta is None and queryID in queryDict:
+                    fasta = queryDict[queryID]
+                if fasta is None and PHATE_WARNINGS:
+                    print("phate_blast says, WARNING: Could not match blast query", hit.queryDef, "to an input sequence in", outfile)
+            if fasta is None:
+                continue
+
+            newAnnotation = self.hit2annotation(hit,database,dbName)
+
+            # Add this completed annotation to growing list for this fasta
+            if newAnnotation:
+                fasta.annotationList.append(newAnnotation)
+
+    # Blast each fasta in fastaSet against database, either one query per blast run (blastBatchSize = 0),
+    # or in batches of blastBatchSize queries (-1 = all queries in one run). Batching requires XML output.
+    # Each blast run is added to the scheduler as a task that annotates shadow copies of its fastas; 
+    # merging the shadow annotations back onto fastaSet is queued on completionList (see completeBlast).
+    def blastFastaSet(self,fastaSet,outfileTag,database,dbName,scheduler): # fastaSet is a phate_fastaSequence.multiFasta object
+        # With the annotation cache on, only sequences not already searched are queued (see phate_annotationCache.py)
+        annotationCache = phate_annotationCache.getAnnotationCache()
+        plan = None
+        if annotationCache.isEnabled():
+            searchKey = annotationCache.getSearchKey(self.blastFlavor,database,dbName,self.getCacheParameterString())
+            plan = annotationCache.planSearch(fastaSet,searchKey,self.blastFlavor)
+            fastaSet = plan.querySet
+        if self.blastBatchSize == 0 or self.outputFormat != XML:
+            count = 0
+            for fasta in fastaSet.fastaList:
+                count += 1
+                outfile = self.blastOutDir + self.blastFlavor + outfileTag + str(count)
+                shadowList = scheduler.createShadowFastas([fasta])
+                task = scheduler.addTask(outfile,self.blast1fasta,(shadowList[0],outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,([fasta],shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        else:
+            batchSize = self.blastBatchSize
+            if batchSize == -1:
+                batchSize = len(fastaSet.fastaList)
+            batchCount = 0
+            for i in range(0,len(fastaSet.fastaList),batchSize):
+                batchCount += 1
+                outfile = self.blastOutDir + self.blastFlavor + outfileTag + "batch_" + str(batchCount)
+                fastaList  = fastaSet.fastaList[i:i+batchSize]
+                shadowList = scheduler.createShadowFastas(fastaList)
+                task = scheduler.addTask(outfile,self.blastBatch,(shadowList,outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,(fastaList,shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        if plan:
+            self.completionList.append((annotationCache.completeSearch,(plan,)))
+
+    # Run BLAST over a set of fasta sequences. This method calls blastFastaSet for each selected database.
+    # If a shared scheduler has been set (setScheduler), the blast runs are only queued here; the caller
+    # runs the scheduler, then calls completeBlast(). Otherwise, the blast runs are done before returning.
     def runBlast(self,fastaSet,dbType="protein"): # fastaSet is a phate_fastaSequence.multiFasta object
 
         # Set sequence type 
@@ -650,6 +747,15 @@ class multiBlast(object):
                 print("phate_blast says, WARNING: unrecognized database type in runBlast:", dbType)
             return
                
+        if self.scheduler:
+            scheduler = self.scheduler
+        else:
+            scheduler = phate_scheduler.searchScheduler()
+
+        # Queued blast runs may execute after this object's parameters have been reset (e.g., for the
+        # next sequence type), so queue them on a copy. The copy shares completionList with this object.
+        searcher = copy.copy(self)
+
         # Set database variable, invoke blast for each fasta 
         database = ''
 
@@ -657,305 +763,161 @@ class multiBlast(object):
             if self.NCBI_VIRUS_GENOME_BLAST:
                 database = NCBI_VIRUS_GENOME_BLAST_HOME
                 dbName = 'ncbiVirusGenome'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running NCBI blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_ncbiVirGenome_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_ncbiVirGenome_",database,dbName,scheduler)
 
             elif self.CUSTOM_GENOME_BLAST:
                 database = CUSTOM_GENOME_BLAST_HOME
                 dbName = 'customGenome'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Custom Genome blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_customGenome_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_customGenome_",database,dbName,scheduler)
 
         if GENE:
             if self.REFSEQ_GENE_BLAST:  #*** To be deprecated
                 database = REFSEQ_GENE_BLAST_HOME
                 dbName   = 'refseqGene'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Refseq gene blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_refseqGene_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)  
+                searcher.blastFastaSet(fastaSet,"_refseqGene_",database,dbName,scheduler)
 
             elif self.VOG_GENE_BLAST:
                 database = VOG_GENE_BLAST_HOME
                 dbName   = 'vogGene'
-                count    = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running VOG Gene blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_vogGene_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_vogGene_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_blast says, Blasting completed.")
                     print("phate_blast says, Collecting and saving VOG Gene sequences corresponding to blast hit(s)")
 
                 # Next you want to create VOG fasta group files so user can do alignments
-                # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
-                # Capture VOG.faa lines
-                VOGs_h = open(database,"r")
-                VOGlines = VOGs_h.read().splitlines()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    vogPrintedList = []  # keeps track of VOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was a blast hit
-                            if VOG not in vogPrintedList:
-                                vogPrintedList.append(VOG)  # Record this pVOG identifier as "done"
-                                # create dynamic file name
-                                countA += 1 
-                                outfileVOG = self.VOGsOutDir + "vogGeneGroup_" + str(count) + '_' + str(countA) + '.fnt' 
-                                # open file and write current fasta plus each corresponding VOG fasta
-                                outfileVOG_h = open(outfileVOG,'w')
-                                outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                self.writeVOGsequences2file(outfileVOG_h,VOGlines,VOG)               # followed by the VOG group
-                                outfileVOG_h.close()
+                # These are written once the blast results have been merged onto the fastas (see completeBlast)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,searcher.VOGsOutDir + "vogGeneGroup_",".fnt")))
 
             elif self.CUSTOM_GENE_BLAST:
                 database = CUSTOM_GENE_BLAST_HOME
                 dbName   = 'customGene'
-                count    = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Custom Gene blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_customGene_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_customGene_",database,dbName,scheduler)
 
         if PROTEIN:
             if self.NR_BLAST:  
                 database = NR_BLAST_HOME
                 dbName   = 'nr'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running NR blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_nr_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)  
+                searcher.blastFastaSet(fastaSet,"_nr_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, NR blasting completed.")
 
             if self.NCBI_VIRUS_PROTEIN_BLAST:  
                 database = NCBI_VIRUS_PROTEIN_BLAST_HOME
                 dbName   = 'ncbiVirusProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running NCBI_VIRUS_PROTEIN blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_ncbiVirProt_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_ncbiVirProt_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, NCBI Virus Protein blasting completed.")
 
             if self.REFSEQ_PROTEIN_BLAST:
                 database = REFSEQ_PROTEIN_BLAST_HOME
                 dbName   = 'refseqProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Refseq protein blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_refseqProtein_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_refseqProtein_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Refseq Protein blasting completed.")
 
             if self.PHANTOME_BLAST:
                 database = PHANTOME_BLAST_HOME
                 dbName   = 'phantome'
-                count = 0 
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running PHANTOME blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_phantome_" +str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_phantome_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Phantome blasting completed.")
 
             if self.KEGG_VIRUS_BLAST: 
                 database = KEGG_VIRUS_BLAST_HOME
                 dbName   = 'kegg'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running KEGG blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_kegg_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_kegg_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Kegg blasting completed.")
 
             if self.SWISSPROT_BLAST: 
                 database = SWISSPROT_BLAST_HOME
                 dbName   = 'swissprot'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Swissprot blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_swissprot_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)  
+                searcher.blastFastaSet(fastaSet,"_swissprot_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Swissprot blasting completed.")
 
             if self.PHAGE_ENZYME_BLAST: 
                 database = PHAGE_ENZYME_BLAST_HOME
                 dbName   = 'phageEnzyme'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running phageEnzyme blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_phageEnz_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_phageEnz_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Phage Enzyme blasting completed.")
 
             if self.PVOGS_BLAST:  
                 database = PVOGS_BLAST_HOME
                 dbName   = 'pVOGs'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running pVOGs blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_pvog_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_pvog_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Blasting completed.")
                     print("phate_blast says, Collecting and saving pVOG sequences corresponding to blast hit(s)")
 
-                # Next you want to create pVOG fasta group files so user can do alignments
-                # You need only one "alignment" file per pVOG group that the fasta hit (under blast cutoffs)
-                # Capture pVOG.faa lines
-                pVOGs_h = open(database,"r")
-                pVOGlines = pVOGs_h.read().splitlines()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    pvogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for pVOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            # Avoid redundancy in printing pVOG groups for this fasta; only once per pVOG ID that was a blast hit
-                            if pVOG not in pvogPrintedList:
-                                pvogPrintedList.append(pVOG)  # Record this pVOG identifier as "done"
-                                # create dynamic file name
-                                countA += 1 
-                                outfilePVOG = self.pVOGsOutDir + "pvogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                # open file and write current fasta pluse each corresponding pVOG fasta
-                                outfilePVOG_h = open(outfilePVOG,'w')
-                                outfilePVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                self.writePVOGsequences2file(outfilePVOG_h,pVOGlines,pVOG)                  # followed by the pVOG group
-                                outfilePVOG_h.close()
+                # Next you want to create VOG fasta group files so user can do alignments
+                # These are written once the blast results have been merged onto the fastas (see completeBlast)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,searcher.pVOGsOutDir + "pvogGroup_",".faa")))
 
             if self.VOGS_BLAST:  #*** To be deprecated
                 database = VOGS_BLAST_HOME
                 dbName   = 'VOGs'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running VOGs blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_vog_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_vog_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_blast says, Blasting completed.")
                     print("phate_blast says, Collecting and saving VOG sequences corresponding to blast hit(s)")
 
                 # Next you want to create VOG fasta group files so user can do alignments
-                # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
-                # Capture VOG.faa lines
-                VOGs_h = open(database,"r")
-                VOGlines = VOGs_h.read().splitlines()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    vogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was a blast hit
-                            if VOG not in vogPrintedList:
-                                vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
-                                # create dynamic file name
-                                countA += 1 
-                                outfileVOG = self.VOGsOutDir + "vogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                # open file and write current fasta pluse each corresponding VOG fasta
-                                outfileVOG_h = open(outfileVOG,'w')
-                                outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                self.writeVOGsequences2file(outfileVOG_h,VOGlines,VOG)               # followed by the VOG group
-                                outfileVOG_h.close()
+                # These are written once the blast results have been merged onto the fastas (see completeBlast)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,searcher.VOGsOutDir + "vogGroup_",".faa")))
 
             if self.VOG_PROTEIN_BLAST:  
                 database = VOG_PROTEIN_BLAST_HOME
                 dbName   = 'vogProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running VOG Protein blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_vogProtein_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName)
+                searcher.blastFastaSet(fastaSet,"_vogProtein_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_blast says, Blasting completed.")
                     print("phate_blast says, Collecting and saving VOG Protein sequences corresponding to blast hit(s)")
 
                 # Next you want to create VOG fasta group files so user can do alignments
-                # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
-                # Capture VOG.faa lines
-                VOGs_h = open(database,"r")
-                VOGlines = VOGs_h.read().splitlines()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    vogPrintedList = []  # keeps track of VOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was a blast hit
-                            if VOG not in vogPrintedList:
-                                vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
-                                # create dynamic file name
-                                countA += 1 
-                                outfileVOG = self.VOGsOutDir + "vogProtGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                # open file and write current fasta pluse each corresponding VOG fasta
-                                outfileVOG_h = open(outfileVOG,'w')
-                                outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                self.writeVOGsequences2file(outfileVOG_h,VOGlines,VOG)               # followed by the VOG group
-                                outfileVOG_h.close()
+                # These are written once the blast results have been merged onto the fastas (see completeBlast)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,searcher.VOGsOutDir + "vogProtGroup_",".faa")))
 
             if self.CAZY_BLAST: 
                 database = CAZY_BLAST_HOME
                 dbName   = 'cazy'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running CAZy blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_cazy_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_cazy_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Blasting completed.")
                     print("phate_blast says, Collecting and saving CAZy EC numbers and descriptions corresponding to blast hit(s)")
@@ -963,60 +925,52 @@ class multiBlast(object):
             if self.CUSTOM_PROTEIN_BLAST: 
                 database = CUSTOM_PROTEIN_BLAST_HOME
                 dbName   = 'customProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_blast says, Running Custom Protein blast:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.blastOutDir + self.blastFlavor + "_customProtein_" + str(count)
-                    self.blast1fasta(fasta,outfile,database,dbName) 
+                searcher.blastFastaSet(fastaSet,"_customProtein_",database,dbName,scheduler)
                 if PHATE_PROGRESS:
                     print("phate_blast says, Custom Protein blasting completed.")
 
         if CLEAN_RAW_DATA == 'True':
-            self.cleanBlastOutDir()
-
-    def writePVOGsequences2file(self,FILE_H,lines,pVOG):
-        pVOGheader = ""; pVOGsequence = ""; GET_SEQ = False
-        for i in range(0,len(lines)-1):
-            nextLine = lines[i]
-            match_header = re.search('>',nextLine)
-            match_pVOG = re.search(pVOG,nextLine)
-
-            if match_header:   
-                if GET_SEQ:
-                    FILE_H.write("%s\n%s\n" % (pVOGheader,pVOGsequence))
-                    pVOGheader = ""; pVOGsequence = ""
-                    GET_SEQ = False
-
-                if match_pVOG:
-                    pVOGheader = nextLine
-                    GET_SEQ = True
-
-            elif GET_SEQ:
-                pVOGsequence = pVOGsequence + nextLine
-
-    #*** CHECK THIS
-    #*** This method is modeled after writePVOGsequences2file, pending data is structured same as pVOGs
-    def writeVOGsequences2file(self,FILE_H,lines,VOG):
-        VOGheader = ""; VOGsequence = ""; GET_SEQ = False
-        for i in range(0,len(lines)-1):
-            nextLine = lines[i]
-            match_header = re.search('>',nextLine)
-            match_VOG    = re.search(VOG,nextLine)
-
-            if match_header:   
-                if GET_SEQ:
-                    FILE_H.write("%s\n%s\n" % (VOGheader,VOGsequence))
-                    VOGheader = ""; VOGsequence = ""
-                    GET_SEQ = False
-
-                if match_VOG:
-                    VOGheader = nextLine
-                    GET_SEQ = True
-
-            elif GET_SEQ:
-                VOGsequence = VOGsequence + nextLine
+            self.completionList.append((searcher.cleanBlastOutDir,()))
+
+        if not self.scheduler:
+            scheduler.runTasks()
+            self.completeBlast()
+
+    # Merge queued blast results onto the fastas, and do any post-processing, in the order a serial run would 
+    def completeBlast(self):
+        completionList = self.completionList
+        self.completionList = []
+        for (function,args) in completionList:
+            function(*args)
+
+    def setScheduler(self,scheduler):
+        self.scheduler = scheduler
+
+    # Write one fasta group file for each VOG that a fasta hit: the fasta, followed by the VOG group's sequences
+    def writeVOGgroupFiles(self,fastaSet,database,outfileRoot,extension):
+        # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
+        # Index of VOG group members in the VOG database (see phate_vogIndex.py)
+        vogIndex = phate_vogIndex.getVOGgroupIndex(database)
+        count = 0; countA = 0
+        for fasta in fastaSet.fastaList:
+            vogPrintedList = []  # keeps track of VOGs that have already been printed for current fasta
+            count += 1 
+            countA = 0
+            for annot in fasta.annotationList:
+                for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
+                    # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was a blast hit
+                    if VOG not in vogPrintedList:
+                        vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
+                        # create dynamic file name
+                        countA += 1 
+                        outfileVOG = outfileRoot + str(count) + '_' + str(countA) + extension
+                        # open file and write current fasta plus each corresponding VOG fasta
+                        outfileVOG_h = open(outfileVOG,'w')
+                        outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
+                        vogIndex.writeGroup(outfileVOG_h,VOG)                                # followed by the VOG group
+                        outfileVOG_h.close()
 
     def cleanBlastOutDir(self):  # Remove temporary files from BLAST_OUT_DIR
         if PHATE_PROGRESS:
@@ -1046,6 +1000,7 @@ class multiBlast(object):
         print("   scoreEdge:      ", self.scoreEdge)
         print("   overhang:       ", self.overhang)
         print("   outputFormat:   ", self.outputFormat)
+        print("   blastBatchSize: ", self.blastBatchSize)
 
     def printParameters2file(self,fileHandle):
         fileHandle.write("%s\n" % ("Parameters:"))
@@ -1058,6 +1013,7 @@ class multiBlast(object):
         fileHandle.write("%s%s\n" % ("   scoreEdge: ",self.scoreEdge))
         fileHandle.write("%s%s\n" % ("   overhang ",self.overhang))
         fileHandle.write("%s%s\n" % ("   outputFormat: ",self.outputFormat))
+        fileHandle.write("%s%s\n" % ("   blastBatchSize: ",self.blastBatchSize))
 
     def printAnnotations(self):  #*** Don't need this; don't use, because code writes directoy to fasta's annotation object
         print("Annotations:")
@@ -3,10 +3,11 @@
 #
 # Programmer: Carol L. Ecale Zhou
 #
-# Most recent update: 19 October 2020
+# Most recent update: 18 October 2026
 # 
 # Module containing classes and methods for representing a multi-fasta sequence and associated methods
 # Classes and methods: 
+#     readFastaRecords(lines)
 #     fasta
 #         queryNRsequence
 #         enterGeneData
@@ -60,7 +61,10 @@
 #         assignMoleculeType
 #         addFasta
 #         addFastas
+#         addFastaRecords
 #         addFastasFromFile
+#         indexFastaFile
+#         getIndexedFasta
 #         addAnnotation
 #         deleteFasta
 #         printMultiFasta
@@ -110,6 +114,10 @@ p_comment    = re.compile('^#')
 p_up2space   = re.compile('^\S*')   # find 1st instance of everything that's not white space (check this)
 p_startCodon = re.compile('atg')  # standard start codon sequence (recall: storing sequence as lower case)
 
+# Offset index of a fasta file (see multiFasta.indexFastaFile): written beside the fasta file; first line records
+# the size and modification time of the fasta file, then one line per sequence: header, offset, length (bytes)
+FASTA_INDEX_SUFFIX = ".phate.fai"
+
 # Verbosity
 
 CLEAN_RAW_DATA  = os.environ["PHATE_CLEAN_RAW_DATA"]
@@ -139,14 +147,25 @@ class fasta(object):
     # the entire header string provided by the user. (Note: RAST truncates header after space)
     # Sequence can be entered as a list of lines or as continuous sequence in a single string.
     # Sequence can be converted back & forth between lines vs. single string.
+    # A genome yields a fasta object per gene and per protein, so attributes are held in slots, and the
+    # header variants that derive from the header alone (clean, trunc, short, blast) are computed when
+    # first used, from the header given to assignHeader, rather than for every object.
+
+    __slots__ = ["header","_assignedHeader","_cleanHeader","_truncHeader","_shortHeader","_blastHeader",
+        "compoundHeader","sequentialHeader","customHeader","name","sequence","sequenceLength","sequenceType",
+        "moleculeType","parentSequence","parentSequenceLength","truncation","annotationList","paralogList",
+        "startCodonCount","codonStartLocs","start","end","parentName","parentStart","parentEnd","parentStrand",
+        "strand","nrHeader","nrGInumber","geneCallFile","geneCaller","geneCallRank","nextFastaNumber","order",
+        "number","pVOGassociationList","pVOGcount","contig"]
 
     def __init__(self):
         self.header = "unknown"           # full, original header
-        self.cleanHeader = ""             # remove all special chars from original header
-        self.truncHeader = ""             # truncated after N (self.truncation) characters
-        self.shortHeader = ""             # truncated after 1st space (consistent w/RAST) 
+        self._assignedHeader = None       # header as given to assignHeader, from which the variants below derive
+        self._cleanHeader = ""            # remove all special chars from original header (see cleanHeader)
+        self._truncHeader = ""            # truncated after N (self.truncation) characters (see truncHeader)
+        self._shortHeader = ""            # truncated after 1st space (consistent w/RAST) (see shortHeader)
         self.compoundHeader = ""          # header with parentSequence (eg, contig name) appended
-        self.blastHeader = ""             # header that results from blast, which truncates after 1st space
+        self._blastHeader = ""            # header that results from blast, which truncates after 1st space (see blastHeader)
         self.sequentialHeader = "hdr"     # an assigned, benign header that will not break 3rd party codes
         self.customHeader = ""            # a customized header; could be anything, but written for pVOGs
         self.name = "none"                # name will be geneCaller + number, if gene|protein from gene call
@@ -233,22 +252,63 @@ class fasta(object):
         else:
             self.sequenceType = "unknown"
 
+    # Header variants derived from the assigned header; each is computed on first use, or may be set directly
+    @property
+    def cleanHeader(self):
+        if self._cleanHeader is None:
+            cleanHeader = re.sub(' ', '_', self._assignedHeader)
+            self._cleanHeader = re.sub('[();:?\.]','',cleanHeader)
+        return self._cleanHeader
+
+    @cleanHeader.setter
+    def cleanHeader(self,value):
+        self._cleanHeader = value
+
+    @property
+    def truncHeader(self):
+        if self._truncHeader is None:
+            self._truncHeader = self._assignedHeader[0:self.truncation]
+        return self._truncHeader
+
+    @truncHeader.setter
+    def truncHeader(self,value):
+        self._truncHeader = value
+
+    @property
+    def shortHeader(self):
+        if self._shortHeader is None:
+            match = p_up2space.match(self._assignedHeader)
+            if match:
+                self._shortHeader = match.group()
+            else:
+                self._shortHeader = self.truncHeader
+        return self._shortHeader
+
+    @shortHeader.setter
+    def shortHeader(self,value):
+        self._shortHeader = value
+
+    @property
+    def blastHeader(self):
+        if self._blastHeader is None:
+            self._blastHeader = self._assignedHeader.split(' ')[0]  # Note: Blast truncates after the 1st space
+        return self._blastHeader
+
+    @blastHeader.setter
+    def blastHeader(self,value):
+        self._blastHeader = value
+
     def assignHeader(self,hdr):   # Remove symbols and spaces, which may cause problems for open-source codes
         cleanHeader = hdr.lstrip('>') # Remove '>' symbol if present; store header text only
         self.header = cleanHeader  # Store full, original header, but without the '>'
-        splitSpace = cleanHeader.split(' ') # Note: Blast truncates after the 1st space
-        self.blastHeader = splitSpace[0] 
-        cleanHeader = re.sub(' ', '_', cleanHeader)
-        cleanHeader = re.sub('[();:?\.]','',cleanHeader)
-        self.cleanHeader = cleanHeader
-        self.truncHeader = self.header[0:self.truncation]
+        # Clean, truncated, short, and blast headers are derived from this header when first used
+        self._assignedHeader = cleanHeader
+        self._cleanHeader = None
+        self._truncHeader = None
+        self._shortHeader = None
+        self._blastHeader = None
         # Assign a benign, sequential header 
         self.sequentialHeader = self.moleculeType + '-' + str(self.order)
-        match = p_up2space.match(self.header)
-        if match:
-            self.shortHeader = match.group()
-        else:
-            self.shortHeader = self.truncHeader
         self.compoundHeader = self.header
         if self.parentSequence:
             self.compoundHeader = self.compoundHeader + '_' + self.parentSequence
@@ -611,6 +671,26 @@ class fasta(object):
             annot.printAnnotationRecord2file(FILE_HANDLE)
 
 #####################################################################################
+
+# Yields (header, sequence) for each fasta in lines, which may be a list of lines or an open file, so that a file
+# need not be read into memory. As in multiFasta.addFastas, the first line is taken to be the first header.
+def readFastaRecords(lines):
+    header = None
+    sequenceLines = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if header is None:
+            header = line
+        elif line.startswith('>'):  # start of a new fasta
+            yield (header, ''.join(sequenceLines))
+            header = line
+            sequenceLines = []
+        else:
+            sequenceLines.append(line)
+    if header is not None:
+        yield (header, ''.join(sequenceLines))
+
+#####################################################################################
  
 class multiFasta(object): 
  
@@ -627,11 +707,26 @@ class multiFasta(object):
         self.moleculeType   = 'unknown'
         self.contig         = 'unknown'  # redundant (use parentName)
         self.parentName     = ''         # contig name for gene or protein set; genome name for contig set
+        self.fastaIndex     = None       # header => (offset, length) of sequence in self.filename; see indexFastaFile
 
+    # Returns the fasta whose header is searchString, else the first whose header matches searchString as a regular
+    # expression, else 0. If the fastas have not been loaded but self.filename is set, the file's offset index is
+    # searched instead (see indexFastaFile), and only the matching sequence is loaded from the file.
     def findStringInHeader(self,searchString):
-        found = False
+        p_searchString = re.compile(searchString)
+        if not self.fastaList and self.filename != "unknown" and self.filename != '':
+            if self.fastaIndex is None:
+                self.indexFastaFile()
+            if searchString.lstrip('>') in self.fastaIndex:
+                return(self.getIndexedFasta(searchString))
+            for header in self.fastaIndex:  # headers in file order
+                if p_searchString.search(header):
+                    return(self.getIndexedFasta(header))
+        for fasta in self.fastaList:
+            if fasta.header == searchString.lstrip('>'):
+                return(fasta)
         for fasta in self.fastaList:
-            match_string2header = re.search(searchString,fasta.header)
+            match_string2header = p_searchString.search(fasta.header)
             if match_string2header:
                 return(fasta)
         if PHATE_WARNINGS:
@@ -681,36 +776,22 @@ class multiFasta(object):
         newFa.moleculeType = self.moleculeType
         self.fastaList.append(newFa)
 
-    def addFastas(self,lines,mtype): # Given multi-fasta file read into line set, create multi-fasta object
-        sequence = ""
-        numberAdded = 0
+    def addFastas(self,lines,mtype): # Given multi-fasta file as line set or open file, create multi-fasta object
         if lines:
-            header = lines[0] # capture 1st header (should be first line in lineSet!)
-            lines.pop(0)
-            for line in lines:
-                match = re.search(p_header, line) # detect start of a new fasta
-                if match:
-                    newFasta = fasta()            # create new object
-                    newFasta.moleculeType = self.moleculeType
-                    numberAdded += 1              # no. of fasta objects added so far from lines
-                    newFasta.order = numberAdded
-                    newFasta.assignHeader(header) # 
-                    newFasta.assignSequence(sequence)
-                    newFasta.assignType(mtype)
-                    self.addFasta(newFasta)
-                    sequence = ""                 # reset
-                    header = line                 # capture next header
-                    continue
-                sequence += line
-            newFasta = fasta()
+            return self.addFastaRecords(readFastaRecords(lines),mtype)
+        return 0
+
+    def addFastaRecords(self,records,mtype): # Given (header, sequence) records (see readFastaRecords), add fasta objects
+        numberAdded = 0
+        for (header,sequence) in records:
+            newFasta = fasta()            # create new object
             newFasta.moleculeType = self.moleculeType
-            numberAdded += 1              # no. of fasta objects added so far from lines
+            numberAdded += 1              # no. of fasta objects added so far from records
             newFasta.order = numberAdded
             newFasta.assignHeader(header)
             newFasta.assignSequence(sequence)
             newFasta.assignType(mtype)
             self.addFasta(newFasta)
-            numberAdded += 1
         return numberAdded
 
     def addFastasFromFile(self,mtype):
@@ -719,8 +800,76 @@ class multiFasta(object):
                 print("phate_fastaSequence says, WARNING: First you must set the filename in addFastasFromFile()")
         else:
             fastaFile = open(self.filename,"r")
-            fLines = fastaFile.read().splitlines()
-            self.addFastas(fLines,mtype)
+            self.addFastas(fastaFile,mtype)  # read line by line
+            fastaFile.close()
+
+    # Index the sequences of self.filename by header, so that a sequence can be loaded on demand (getIndexedFasta)
+    # without reading the file into fasta objects. The index is saved beside the fasta file, and is rebuilt if the
+    # fasta file has changed since. Returns the number of sequences indexed.
+    def indexFastaFile(self):
+        self.fastaIndex = {}
+        if self.filename == "unknown" or self.filename == '':
+            if PHATE_WARNINGS:
+                print("phate_fastaSequence says, WARNING: First you must set the filename in indexFastaFile()")
+            return 0
+        fileStat = os.stat(self.filename)
+        signature = "# " + str(fileStat.st_size) + " " + str(fileStat.st_mtime_ns)
+        indexFile = self.filename + FASTA_INDEX_SUFFIX
+
+        # Load the saved index, if it is current
+        if os.path.exists(indexFile):
+            INDEX_H = open(indexFile,"r")
+            if INDEX_H.readline().rstrip('\n') == signature:
+                for iLine in INDEX_H:
+                    (header,offset,length) = iLine.rstrip('\n').rsplit('\t',2)
+                    self.fastaIndex[header] = (int(offset),int(length))
+                INDEX_H.close()
+                return len(self.fastaIndex)
+            INDEX_H.close()
+
+        # Scan the fasta file for header lines, recording where each sequence starts and how many bytes it spans
+        FASTA_H = open(self.filename,"rb")
+        header = None; offset = 0; position = 0
+        for fLine in FASTA_H:
+            if fLine.startswith(b'>'):
+                if header is not None:
+                    self.fastaIndex[header] = (offset,position - offset)
+                header = fLine.decode('utf-8').rstrip('\r\n').lstrip('>')  # as stored by fasta.assignHeader
+                offset = position + len(fLine)
+            position += len(fLine)
+        if header is not None:
+            self.fastaIndex[header] = (offset,position - offset)
+        FASTA_H.close()
+
+        try:
+            INDEX_H = open(indexFile + ".tmp","w")
+            INDEX_H.write("%s\n" % (signature))
+            for header in self.fastaIndex:
+                INDEX_H.write("%s\t%s\t%s\n" % (header,self.fastaIndex[header][0],self.fastaIndex[header][1]))
+            INDEX_H.close()
+            os.replace(indexFile + ".tmp",indexFile)
+        except OSError as e:  # e.g., database directory is read-only; the index is kept in memory only
+            if PHATE_WARNINGS:
+                print("phate_fastaSequence says, WARNING: Could not save fasta index", indexFile, ":", e)
+        return len(self.fastaIndex)
+
+    def getIndexedFasta(self,hdr,mtype="unknown"): # Returns a new fasta object, loaded from self.filename, or False
+        if self.fastaIndex is None:
+            self.indexFastaFile()
+        hdr = hdr.lstrip('>')
+        if hdr not in self.fastaIndex:
+            return False
+        (offset,length) = self.fastaIndex[hdr]
+        FASTA_H = open(self.filename,"rb")
+        FASTA_H.seek(offset)
+        sequence = FASTA_H.read(length).decode('utf-8')
+        FASTA_H.close()
+        newFasta = fasta()
+        newFasta.moleculeType = self.moleculeType
+        newFasta.assignHeader(hdr)
+        newFasta.assignSequence(sequence)  # line breaks are removed with other white space
+        newFasta.assignType(mtype)
+        return newFasta
 
     def addAnnotation(self,newAnnot):
         self.annotationList.append(newAnnot)
@@ -4,7 +4,7 @@
 #
 # Programmer: Carol L. Ecale Zhou
 #
-# Most recent update: 20 October 2020
+# Most recent update: 18 October 2026
 #
 # Description:
 # Module comprising data structures for organizing genome information
@@ -23,6 +23,10 @@
 #        setGenomeType
 #        setFilename
 #        setSpecies
+#        setGeneticCode
+#        indexContigs
+#        getContig
+#        getContigSubsequence
 #        getCGCsubsequence
 #        getSubsequence
 #        getSubsequenceWithFlank
@@ -56,6 +60,7 @@
 import string
 import phate_fastaSequence
 import phate_annotation
+import phate_translation
 import re, os, copy
 import subprocess
  
@@ -122,6 +127,10 @@ class genome(object):
         self.proteinSet.sequenceType = 'aa'
         self.codeBaseDir             = ""       # needs to be set
         self.outputDir               = ""       # needs to be set
+        self.geneticCode             = phate_translation.DEFAULT_GENETIC_CODE  # NCBI genetic code for translating genes
+        self.contigIndex             = {}       # contig header => contig fasta object
+        self.contigShortIndex        = {}       # contig short header (RAST truncates after 1st space) => contig fasta object
+        self.contigIndexCount        = -1       # number of contigs when the index was built
 
     # GET and SET
  
@@ -133,6 +142,9 @@ class genome(object):
         self.outputDir = outputDir
         OUTPUT_DIR = outputDir
 
+    def setGeneticCode(self,geneticCode):
+        self.geneticCode = int(geneticCode)
+
     def setName(self,name):
         self.name = name
 
@@ -145,22 +157,45 @@ class genome(object):
     def setSpecies(self,species):
         self.species = species
 
-    def getCGCsubsequence(self,start,end,strand,contig):  # Tailored for output from CGCparser.py
-        subSeq = ""
-        for fa in self.contigSet.fastaList:
-            if fa.header == contig:
-                subSeq = fa.getSubsequence(int(start)-1,int(end)) #*** ???
-            else:
-                if PHATE_WARNINGS:
-                    print("phate_genomeSequence says, WARNING: fa.header", fa.header, "did not match contig", contig)
-        return subSeq           
+    # CONTIGS
+    # Gene calls are located on their contigs via an index by header, rather than by scanning the contig set for each
+    # gene, and subsequences are sliced from the contig sequence directly. Contigs may be added directly to contigSet
+    # (e.g., contigSet.addFastas), so the index is rebuilt whenever the number of contigs has changed.
+
+    def indexContigs(self):
+        self.contigIndex = {}
+        self.contigShortIndex = {}
+        for fa in self.contigSet.fastaList:  # if headers repeat, the last contig wins, as in a scan of the contig set
+            self.contigIndex[fa.header] = fa
+            self.contigShortIndex[fa.shortHeader] = fa
+        self.contigIndexCount = len(self.contigSet.fastaList)
+
+    def getContig(self,contig,headerType="full"):  # Returns the contig fasta object, or None
+        if self.contigIndexCount != len(self.contigSet.fastaList):
+            self.indexContigs()
+        if headerType.lower() == "short":
+            return self.contigShortIndex.get(contig)
+        return self.contigIndex.get(contig)
+
+    def getContigSubsequence(self,fa,start,end,strand='+'):  # Recall: string position numbering starts with 0!
+        subSeq = fa.sequence[int(start):int(end)]
+        if strand == '-':
+            subSeq = subSeq.translate(complements)[::-1]
+        return subSeq
+
+    def getCGCsubsequence(self,start,end,strand,contig):  # Tailored for output from CGCparser.py; reverse complements if strand is '-'
+        fa = self.getContig(contig)
+        if fa is None:
+            if PHATE_WARNINGS:
+                print("phate_genomeSequence says, WARNING: No contig with header", contig, "was found for gene call", start, end, strand)
+            return ""
+        return self.getContigSubsequence(fa,int(start)-1,int(end),strand)
 
     def getSubsequence(self,start,end,contig):  # Note: tailored to RAST
-        subSeq = ""
-        for fa in self.contigSet.fastaList:
-            if contig == fa.shortHeader: # RAST truncates after 1st space
-                subSeq = fa.getSubsequence(int(start)-1,int(end)) # recall: numerbing starts w/zero
-        return subSeq
+        fa = self.getContig(contig,"short")  # RAST truncates after 1st space
+        if fa is None:
+            return ""
+        return self.getContigSubsequence(fa,int(start)-1,int(end)) # recall: numerbing starts w/zero
 
     def getSubsequenceWithFlank(self,start,end,contig,flank):
         subSeq = ""
@@ -170,9 +205,9 @@ class genome(object):
             fa = self.contigSet.fastaList[0]
             subSeq = fa.getSubsequence(int(flankedStart)-1,int(flankedEnd)) # recall: numerbing starts w/zero
         else:
-            for fa in self.contigSet.fastaList:
-                if contig == fa.shortHeader: # RAST truncates after 1st space
-                    subSeq = fa.getSubsequence(int(flankedStart)-1,int(flankedEnd)) # recall: numerbing starts w/zero
+            fa = self.getContig(contig,"short")  # RAST truncates after 1st space
+            if fa is not None:
+                subSeq = self.getContigSubsequence(fa,int(flankedStart)-1,int(flankedEnd)) # recall: numerbing starts w/zero
         return subSeq
 
     # INPUT/PROCESS SEQUENCES 
@@ -237,6 +272,7 @@ class genome(object):
                 return (0)
 
         # Read gene-call lines from gene caller output file and create a new gene object
+        newGeneList = []; newProteinList = []  # genes and their proteins, in order, for translation
         fLines = GENE_CALL_H.read().splitlines()
         for fLine in fLines:
             match_geneCall = re.search('^\d+',fLine)
@@ -258,7 +294,7 @@ class genome(object):
                     rightEnd = matchDigits.group(0)
 
                 # Create new gene object and fill data
-                newGene = copy.deepcopy(fastaObj)
+                newGene = phate_fastaSequence.fasta()
                 newGene.moleculeType = self.geneSet.moleculeType # Gene inherits from multi-fasta "parent"
                 newGene.assignHeader(geneName)  # Note:  using method assignHeader establishes all header variants
                 newGene.parentSequence = contig
@@ -287,17 +323,12 @@ class genome(object):
                 if newGene.start == 0:
                     newGene.start = 1
 
-                # Extract gene from genome sequence
+                # Extract gene from genome sequence (reverse complemented if on reverse strand)
                 sequence = self.getCGCsubsequence(newGene.start,newGene.end,newGene.strand,contig)
                 newGene.sequence = sequence
 
-                # Reverse complement the string if on reverse strand
-                if newGene.strand == '-':
-                    reverseComplement = newGene.sequence.translate(complements)[::-1] 
-                    newGene.sequence = reverseComplement 
-
                 # Create new protein object and fill data
-                newProtein = copy.deepcopy(fastaObj)
+                newProtein = phate_fastaSequence.fasta()
                 newProtein.moleculeType = self.proteinSet.moleculeType   # "Inherits" moleculeType from its "parent"
                 newProtein.assignHeader(geneName)   # Note: using method assignHeader establishes all header variants
                 newProtein.parentSequence = newGene.sequence
@@ -312,11 +343,18 @@ class genome(object):
                 newProtein.parentStart = newGene.start
                 newProtein.parentEnd   = newGene.end
                 newProtein.strand      = newGene.strand
-                newProtein.sequence = self.translateGene(newGene)
 
                 # Record new gene, protein
                 self.addGene(newGene)     # Add this new gene to the gene list
                 self.addProtein(newProtein)
+                newGeneList.append(newGene)
+                newProteinList.append(newProtein)
+
+        # Translate all of the new genes in one pass
+        codonTable = phate_translation.getCodonTable(self.geneticCode)
+        proteinSequences = codonTable.translateSequences([gene.sequence for gene in newGeneList])
+        for i in range(0,len(newProteinList)):
+            newProteinList[i].sequence = proteinSequences[i]
 
     def addContig(self,newContig):  # Adding a fasta object
         newContig.order = len(self.contigSet) 
@@ -582,29 +620,11 @@ class genome(object):
 
     # OTHER METHODS
 
-    def translateGene(self,geneObject):  #*** This is ugly, but transeq works on files, not strings
-        proteinString = ""
-        geneticCode = 11
-        tempGeneFile = self.outputDir + "tempGeneFile"
-        tempProtFile = self.outputDir + "tempProtFile"
-        GENE_H = open(tempGeneFile,"w")
-        outHeader = '>' + geneObject.header
-        outSequence = geneObject.sequence
-        GENE_H.write("%s\n" % (outHeader)) 
-        GENE_H.write("%s\n" % (outSequence)) 
-        GENE_H.close()
-        command = "transeq" + " -sequence " + tempGeneFile + " -outseq " + tempProtFile + " -table " + str(geneticCode) + " -frame=1"
-        # OS matters; change to other system call if you get an error message on this line
-        result = os.system(command)
-        #result = subprocess.check_output(command,shell=True)
-        PROT_H = open(tempProtFile,"r")
-        fLines = PROT_H.read().splitlines()
-        for i in range(1,(len(fLines))):
-            proteinString += fLines[i] 
-        PROT_H.close()
-        return proteinString
+    def translateGene(self,geneObject):  # Translation is in-process (see phate_translation), formerly by EMBOSS transeq
+        codonTable = phate_translation.getCodonTable(self.geneticCode)
+        return codonTable.translate(geneObject.sequence)
 
-    def translateGenes(self,kvargs):  # Clear proteinSet; translate geneSet fastas and load to proteinSet
+    def translateGenes(self,kvargs):  # Translate geneFile fastas and write to proteinFile, in transeq's output format
         if "geneticCode" in list(kvargs.keys()):
             geneticCode = kvargs["geneticCode"]
         else:
@@ -613,9 +633,21 @@ class genome(object):
             geneFile = kvargs["geneFile"]
         if "proteinFile" in list(kvargs.keys()):
             protFile = kvargs["proteinFile"]
-        command = EMBOSS_PHATE_HOME + "transeq" + " -sequence " + geneFile + " -outseq " + protFile + " -table " + str(geneticCode)
-        result = os.system(command)
-        return result 
+        geneSet = phate_fastaSequence.multiFasta()
+        GENE_H = open(geneFile,"r")
+        geneSet.addFastas(GENE_H,"nt")
+        GENE_H.close()
+        codonTable = phate_translation.getCodonTable(geneticCode)
+        proteinSequences = codonTable.translateSequences([gene.sequence for gene in geneSet.fastaList])
+        PROT_H = open(protFile,"w")
+        for i in range(0,len(geneSet.fastaList)):
+            words = geneSet.fastaList[i].header.split(' ')  # transeq appends "_1" (the frame) to the identifier
+            words[0] = words[0] + "_1"
+            PROT_H.write("%c%s\n" % ('>',' '.join(words)))
+            for j in range(0,len(proteinSequences[i]),60):
+                PROT_H.write("%s\n" % (proteinSequences[i][j:j+60]))
+        PROT_H.close()
+        return 0
     
     # MOVING THIS METHOD TO CLASS BLAST    
     def makeBlastDB(self,kvargs): # Create blast DBs for contigs, genes, proteins
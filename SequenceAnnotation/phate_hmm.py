@@ -4,7 +4,7 @@
 #
 # Programmer:  Carol Zhou
 #
-# Most recent update:  19 October 2020
+# Most recent update:  18 October 2026
 # 
 # Description:
 # This class performs hmm searches against various protein- or phage-related fasta databases. 
@@ -21,8 +21,18 @@
 #       setPVOGsOutDir
 #       setVOGsOutDir
 #       getTopHits
+#       getCacheParameterString
+#       hmmHits2annotations
+#       getHmmCommand
+#       executeHmm
 #       hmm1fasta
+#       demultiplexHits
+#       hmmBatch
 #       runHmm
+#       hmmFastaSet
+#       completeHmm
+#       setScheduler
+#       writeVOGgroupFiles
 #       writeVOGsequence2file
 #       cleanHmmOutDir
 #       printParameters
@@ -46,6 +56,9 @@ from xml.etree.ElementTree import ElementTree as ET
 import phate_fastaSequence
 import phate_genomeSequence
 import phate_annotation
+import phate_scheduler
+import phate_vogIndex
+import phate_annotationCache
 from subprocess import Popen, PIPE, STDOUT
 import string
 
@@ -115,6 +128,7 @@ MAX_SEQ_HITS   = 5   # HMM search can return many hits; report only top number d
 TBL  = 1
 XML  = 2 
 LIST = 3 
+BATCH_QUERY_PREFIX = "query_"  # batched queries are named by position, e.g. query_12
 
 # templates 
 annotation = phate_annotation.annotationRecord()
@@ -155,6 +169,10 @@ class multiHMM(object):
         self.CAZY_HMM                 = False     #  
         self.CUSTOM_GENE_HMM          = False     #  
         self.CUSTOM_PROTEIN_HMM       = False     #  
+        self.hmmBatchSize             = 0         # number of queries per jackhmmer/phmmer run; 0 => one at a time, -1 => all at once
+        self.hmmThreads               = 0         # cpus per jackhmmer/phmmer run (--cpu); 0 => hmmer's default
+        self.scheduler                = None      # shared phate_scheduler.searchScheduler; if None, runHmm runs its own searches
+        self.completionList           = []        # (function,args) steps to run, in order, after queued searches complete
 
     ##### SET AND GET PARAMETERS
 
@@ -177,6 +195,10 @@ class multiHMM(object):
                 self.pVOGsOutDir = paramset['pVOGsOutDir']
             if 'VOGsOutDir' in list(paramset.keys()):
                 self.VOGsOutDir = paramset['VOGsOutDir']
+            if 'hmmBatchSize' in list(paramset.keys()):
+                self.hmmBatchSize = int(paramset['hmmBatchSize'])
+            if 'hmmThreads' in list(paramset.keys()):
+                self.hmmThreads = int(paramset['hmmThreads'])
             # Booleans to control execution  
             # This module performs hmm search against sequence databases--hence the blast/sequence databases are referenced
             # Values are True or False, and True indicates that the database shall be used.
@@ -266,50 +288,13 @@ class multiHMM(object):
     def getTopHits(self):
         return self.topHitList 
 
-    ##### PERFORM HMM on a single sequence
-
-    def hmm1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
-        command = ''
-
-        # Write fasta sequence to temporary file
-        fastaFile = self.proteinHmmOutDir + "temp.fasta"
-        fastaFileH = open(fastaFile,"w")
-        if fasta.sequentialHeader == "unknown":  # unchanged from default
-            fasta.printFasta2file(fastaFileH,"blastHeader")
-        else:
-            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
-        fastaFileH.close()
-
-        # Run hmm program; write output to specified file  #*** Note: only jackhmmer is currently in service
-        if self.jackhmmerSearch:
-            # Construct out file names
-            seqOutfile = outfile + '.jackhmmer.seqout' # captures tabbed data for the sequence-level analysis
-            domOutfile = outfile + '.jackhmmer.domout' # captures tabbed data for the domain-level analysis
-            stdOutfile = outfile + '.jackhmmer.stdout' # captures data written to standard out, other than seq or dom output
- 
-            command = HMMER_HOME + "jackhmmer --tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
-
-        elif self.phmmerSearch: 
-            # Construct out file names
-            seqOutfile = outfile + '.phmmer.seqout' # captures tabbed data for the sequence-level analysis
-            domOutfile = outfile + '.phmmer.domout' # captures tabbed data for the domain-level analysis
-            stdOutfile = outfile + '.phmmer.stdout' # captures data written to standard out, other than seq or dom output
- 
-            command = HMMER_HOME + "phmmer --tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
+    # Parameters that determine a search's annotations, for keying the annotation cache (see phate_annotationCache.py)
+    def getCacheParameterString(self):
+        return ':'.join([str(parameter) for parameter in [self.hmmProgram,self.jackhmmerSearch,self.phmmerSearch,self.topHitCount,self.outputFormat]])
 
-        if command == '':  # set to 'jackhmmer' as default 
-            command = HMMER_HOME + "jackhmmer --tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
-            if PHATE_WARNINGS:
-                print("phate_hmm says, WARNING: HMM program not currently supported: ", self.hmmProgram, "Program was set to jackhmmer.")
-
-        if PHATE_OUT == 'True':
-            p = Popen(command, shell=True, stdin=PIPE, stdout=PIPE, stderr=STDOUT, close_fds=True)
-            output = p.stdout.read() 
-            OUT_H = open(stdOutfile, "w")
-            OUT_H.write("%s\n" % (output)) 
-            OUT_H.close()
-        else:
-            result = os.system(command)
+    # Parse jackhmmer/phmmer TBL-formatted sequence-level (sLines) and domain-level (dLines) hit lines for one query,
+    # and add an annotation for each hit to fasta.annotationList
+    def hmmHits2annotations(self,fasta,sLines,dLines,database,dbName):
 
         # For jackhmmer/phmmer TBL parsing
         hitList = [] # contains a list of hitDataSet objects
@@ -344,6 +329,251 @@ class multiHMM(object):
             "acc"               : 0.0, 
             }
 
+
+        # Parse the sequence-level hmm data (global hit)
+        #***
+        # Note:  Although data appear to be in explicitly defined fields (columns), they are not!
+        #        Column locations for data values change in each file. Therefore, you cannot parse
+        #        the jackhmmer output using fixed columns. Nor are the columns tab-delimited. The
+        #        following parser separates data fields by splitting on >= 1 white space. However,
+        #        this will fail if the subject (target) fasta header contains white space!!! It will
+        #        work for the pVOGs fasta file that is prepared for use with PhATE, but will not work
+        #        for most fasta input data sets. I need to explore other possible jackhmmer output
+        #        formats, if there are others. XML would be great.... 
+        hitCount = 0
+
+        # Process the sequence hit lines; note: domain hits are in a separate file
+        for sLine in sLines:
+            match_comment = re.search('^#',sLine)
+            if match_comment:
+                continue
+            
+            else: # extract data fields and remove preceding or trailing whitespace
+                hitCount += 1
+                fields = sLine.split()  # split line on white space
+                targetName        = fields[0];   targetName      = targetName.rstrip() 
+                targetAccession   = fields[1];   targetAccession = targetAccession.rstrip()
+                queryName         = fields[2];   queryName       = queryName.rstrip()
+                queryAccession    = fields[3];   queryAccession  = queryAccession.rstrip()
+                seqEvalue         = fields[4];   seqEvalue       = seqEvalue.lstrip()
+                seqScore          = fields[5];   seqScore        = seqScore.lstrip()
+                seqBias           = fields[6];   seqBias         = seqBias.lstrip()
+                dom1evalue        = fields[7];   dom1evalue      = dom1evalue.lstrip()
+                dom1score         = fields[8];   dom1score       = dom1score.lstrip()
+                dom1bias          = fields[9];   dom1bias        = dom1bias.lstrip()
+                dom1exp           = fields[10];  dom1exp         = dom1exp.lstrip()
+                dom1reg           = fields[11];  dom1reg         = dom1reg.lstrip()
+                dom1clu           = fields[12];  dom1clu         = dom1clu.lstrip()
+                dom1ov            = fields[13];  dom1ov          = dom1ov.lstrip()
+                dom1env           = fields[14];  dom1env         = dom1env.lstrip()
+                dom1dom           = fields[15];  dom1dom         = dom1dom.lstrip()
+                dom1rep           = fields[16];  dom1rep         = dom1rep.lstrip()
+                dom1inc           = fields[17];  dom1inc         = dom1inc.lstrip()
+                #targetDescription = fields[18];  targetDescription = targetDescription.rstrip()
+                targetDescription = ' '.join(fields[18:]);  targetDescription = targetDescription.rstrip()
+                    
+                # Collect pVOG identifiers for this hmm search hit; fasta header of target may have >= 1 pVOG identifier
+                vogIDs = ''; VOGlist = []
+                VOGlist = re.findall('VOG\d+', targetName)
+                if VOGlist:
+                    for pVOG in VOGlist:
+                        vogIDs += pVOG + ' '
+                    vogIDs.rstrip()
+                 
+                # Create new hitDataSet object and store data (note: some data may not be stored)
+                newSequenceDataSet = copy.deepcopy(sequenceDataSet)
+                newSequenceDataSet["hitNumber"]       = hitCount
+                newSequenceDataSet["hitSequenceName"] = targetName
+                newSequenceDataSet["hitDescription"]  = targetDescription
+                newSequenceDataSet["hitVOG"]          = vogIDs
+                newSequenceDataSet["hitEvalue"]       = seqEvalue
+                newSequenceDataSet["hitScore"]        = seqScore
+                newSequenceDataSet["hitBias"]         = seqBias
+                newSequenceDataSet["domEvalue"]       = dom1evalue
+                newSequenceDataSet["domScore"]        = dom1score
+                newSequenceDataSet["domBias"]         = dom1bias
+                newSequenceDataSet["domExp"]          = dom1exp
+                hitList.append(newSequenceDataSet)
+                if hitCount >= MAX_SEQ_HITS:
+                    break # enough hits; we are done!
+
+        # Collect all pVOG identifiers for this hmm search, then remove redundancy from list
+        vogs = []; tempVOGlist = []; nrVOGlist = []
+        for hit in hitList:
+            if hit["hitVOG"]:
+                vogs = hit["hitVOG"].split(' ')
+                for vog in vogs:
+                    if vog != '':
+                        tempVOGlist.append(vog)  # Now we have a complete (super)set of all pVOG identifiers found in hmm search 
+        nrVOGlist = list(set(tempVOGlist)) # create a set, then convert back to list: presto! non-redundant list
+
+        # Parse the domain-level hmm data
+        # There can be multiple domain-level hits for a given sequence (global) hit (above)
+        # Process each domain hit, then identify its corresponding sequence-level hit, and add to that object
+        # Data are in explicitly defined fields (columns)
+        for dLine in dLines:
+            match_comment = re.search('^#',dLine)
+            if match_comment:
+                continue
+            else:  # extract data fields and remove preceding or trailing whitespace
+                fields = dLine.split()
+                targetName        = fields[0];  targetName        = targetName.rstrip()
+                targetAccession   = fields[1];  targetAccession   = targetAccession.rstrip()
+                targetLength      = fields[2];  targetLength      = targetLength.lstrip()
+                queryName         = fields[3];  queryName         = queryName.rstrip()
+                queryAccession    = fields[4];  queryAccession    = queryAccession.rstrip()
+                queryLength       = fields[5];  queryLength       = queryLength.lstrip()
+                fullSeqEvalue     = fields[6];  fullSeqEvalue     = fullSeqEvalue.lstrip()
+                fullSeqScore      = fields[7];  fullSeqScore      = fullSeqScore.lstrip()
+                fullSeqBias       = fields[8];  fullSeqBias       = fullSeqBias.lstrip()
+                domainNumber      = fields[9];  domainNumber      = domainNumber.lstrip()
+                domOf             = fields[10]; domOf             = domOf.lstrip()
+                cEvalue           = fields[11]; cEvalue           = cEvalue.lstrip()
+                iEvalue           = fields[12]; iEvalue           = iEvalue.lstrip()
+                score             = fields[13]; score             = score.lstrip()
+                bias              = fields[14]; bias              = bias.lstrip()
+                hmmFrom           = fields[15]; hmmFrom           = hmmFrom.lstrip()
+                hmmTo             = fields[16]; hmmTo             = hmmTo.lstrip()
+                alignFrom         = fields[17]; alignFrom         = alignFrom.lstrip()
+                alignTo           = fields[18]; alignTo           = alignTo.lstrip()
+                envFrom           = fields[19]; envFrom           = envFrom.lstrip()
+                envTo             = fields[20]; envTo             = envTo.lstrip()
+                acc               = fields[21]; acc               = acc.lstrip()
+                targetDescription = fields[22]; targetDescription = targetDescription.rstrip()
+                
+                # Create new domDataSet object and store data 
+                newDomainDataSet = copy.deepcopy(domainDataSet)
+                newDomainDataSet["number"]    = domainNumber
+                newDomainDataSet["score"]     = score 
+                newDomainDataSet["c-Evalue"]  = cEvalue
+                newDomainDataSet["i-Evalue"]  = iEvalue
+                newDomainDataSet["hmmFrom"]   = hmmFrom
+                newDomainDataSet["hmmTo"]     = hmmTo
+                newDomainDataSet["alignFrom"] = alignFrom
+                newDomainDataSet["alignTo"]   = alignTo
+                newDomainDataSet["envFrom"]   = envFrom
+                newDomainDataSet["envTo"]     = envTo
+                newDomainDataSet["acc"]       = acc  
+
+                # Figure out which seqDataSet to add this domDataSet to
+                FOUND = False
+                for hit in hitList:
+                    if hit["hitSequenceName"] == targetName:
+                        hit["hitDomainList"].append(newDomainDataSet)
+                        if PHATE_MESSAGES:
+                            print("phate_hmm says: Match found between domain and sequence. targetName:",targetName,"\nfasta:",fasta.header)
+
+
+        # Assuming there were hits...create an annotation object, and fill with sequence- and domain- hit data 
+        if hitList:
+            for hit in hitList:
+                # Extract hmm info from hitLine and stash into new annotation object
+                newAnnotation = phate_annotation.annotationRecord() 
+                newAnnotation.source         = database 
+                newAnnotation.method         = self.hmmProgram
+                newAnnotation.annotationType = "hmm search"
+                newAnnotation.name           = hit["hitSequenceName"] # subject
+                newAnnotation.description    = hit["hitDescription"]
+                newAnnotation.start          = '1' # query start
+                newAnnotation.end            = 'N' # query end
+                newAnnotation.category       = "sequence"
+
+                # Extract VOG identifier(s) from hit's header (if pVOG or VOG database)
+                VOGlist = [] 
+                VOGlist = hit["hitVOG"].split(' ')
+                for VOG in VOGlist: 
+                    if VOG != '':
+                        newAnnotation.VOGlist.append(VOG)
+                
+                # Fill in description, if it's empty (ie, VOG hits have empty description)
+                if VOGlist:
+                    if dbName.lower() == 'vogs' or dbName.lower() == 'vog' or dbName.lower() == 'voggene' or dbName.lower() == 'vogprotein' or dbName.lower() == 'vogs_hmm' or dbName.lower() == 'cazy':
+                        newAnnotation.link2databaseIdentifiers(database,dbName)
+                # Link to description for CAZy hit
+
+                # Collapse all domain hits into an annotation list for this sequence/global hit
+                for domain in hit["hitDomainList"]:
+                    resultString  = "domainNo:"    + domain["number"]    + '|'
+                    resultString += "score:"       + domain["score"]     + '|'
+                    resultString += "c-E:"         + domain["c-Evalue"]  + '|'
+                    resultString += "i-E:"         + domain["i-Evalue"]  + '|'
+                    resultString += "hmmFrom:"     + domain["hmmFrom"]   + '|'
+                    resultString += "hmmTo:"       + domain["hmmTo"]     + '|'
+                    resultString += "alignFrom:"   + domain["alignFrom"] + '|'
+                    resultString += "alignTo:"     + domain["alignTo"]   + '|'
+                    resultString += "envFrom:"     + domain["envFrom"]   + '|'
+                    resultString += "envTo:"       + domain["envTo"]     + '|'
+                    resultString += "acc:"         + domain["acc"]       + '|'
+                    newAnnotation.annotationList.append(resultString)
+
+                # Add this completed annotation to growing list for this fasta
+                fasta.annotationList.append(newAnnotation)
+        else:
+            if PHATE_MESSAGES:
+                print("phate_hmm says, No HMM hit found for query", fasta.blastHeader, "against", database)    
+
+    ##### PERFORM HMM on a single sequence
+
+    # Construct the hmm program command for searching fastaFile (one or more queries) against database;
+    # returns the command, plus the names of the sequence-level, domain-level, and standard out files
+    def getHmmCommand(self,fastaFile,outfile,database):
+        command = ''
+        cpuString = ''
+        if self.hmmThreads > 0:
+            cpuString = '--cpu ' + str(self.hmmThreads) + ' '
+
+        #*** Note: only jackhmmer is currently in service
+        if self.jackhmmerSearch:
+            # Construct out file names
+            seqOutfile = outfile + '.jackhmmer.seqout' # captures tabbed data for the sequence-level analysis
+            domOutfile = outfile + '.jackhmmer.domout' # captures tabbed data for the domain-level analysis
+            stdOutfile = outfile + '.jackhmmer.stdout' # captures data written to standard out, other than seq or dom output
+ 
+            command = HMMER_HOME + "jackhmmer " + cpuString + "--tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
+
+        elif self.phmmerSearch: 
+            # Construct out file names
+            seqOutfile = outfile + '.phmmer.seqout' # captures tabbed data for the sequence-level analysis
+            domOutfile = outfile + '.phmmer.domout' # captures tabbed data for the domain-level analysis
+            stdOutfile = outfile + '.phmmer.stdout' # captures data written to standard out, other than seq or dom output
+ 
+            command = HMMER_HOME + "phmmer " + cpuString + "--tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
+
+        if command == '':  # set to 'jackhmmer' as default 
+            seqOutfile = outfile + '.jackhmmer.seqout'
+            domOutfile = outfile + '.jackhmmer.domout'
+            stdOutfile = outfile + '.jackhmmer.stdout'
+            command = HMMER_HOME + "jackhmmer " + cpuString + "--tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + fastaFile + ' ' + database + ' > ' + stdOutfile
+            if PHATE_WARNINGS:
+                print("phate_hmm says, WARNING: HMM program not currently supported: ", self.hmmProgram, "Program was set to jackhmmer.")
+
+        return (command,seqOutfile,domOutfile,stdOutfile)
+
+    def executeHmm(self,command,stdOutfile):
+        if PHATE_OUT == 'True':
+            p = Popen(command, shell=True, stdin=PIPE, stdout=PIPE, stderr=STDOUT, close_fds=True)
+            output = p.stdout.read() 
+            OUT_H = open(stdOutfile, "w")
+            OUT_H.write("%s\n" % (output)) 
+            OUT_H.close()
+        else:
+            result = os.system(command)
+
+    def hmm1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
+
+        # Write fasta sequence to temporary file; named for the outfile, so concurrent searches don't collide
+        fastaFile = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        if fasta.sequentialHeader == "unknown":  # unchanged from default
+            fasta.printFasta2file(fastaFileH,"blastHeader")
+        else:
+            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
+        fastaFileH.close()
+
+        # Run hmm program; write output to specified file
+        (command,seqOutfile,domOutfile,stdOutfile) = self.getHmmCommand(fastaFile,outfile,database)
+        self.executeHmm(command,stdOutfile)
+
         # Capture result(s) and store as an annotation object for this fasta; Coded for output format TBL (5) 
 
         # Parse XML-, LIST-, or TBL-formatted hmm output #*** Is XML format available?  
@@ -354,201 +584,62 @@ class multiHMM(object):
             self.outputFormat = TBL
 
         if self.outputFormat == TBL:
-
-            # Parse the sequence-level hmm data (global hit)
-            #***
-            # Note:  Although data appear to be in explicitly defined fields (columns), they are not!
-            #        Column locations for data values change in each file. Therefore, you cannot parse
-            #        the jackhmmer output using fixed columns. Nor are the columns tab-delimited. The
-            #        following parser separates data fields by splitting on >= 1 white space. However,
-            #        this will fail if the subject (target) fasta header contains white space!!! It will
-            #        work for the pVOGs fasta file that is prepared for use with PhATE, but will not work
-            #        for most fasta input data sets. I need to explore other possible jackhmmer output
-            #        formats, if there are others. XML would be great.... 
-            hitCount = 0
-
-            # Open and process the sequence hit file; note: domain hits are in a separate file
             seqOutfileH = open(seqOutfile,"r")  # Open the sequence hit file
             sLines = seqOutfileH.read().splitlines()
-            for sLine in sLines:
-                match_comment = re.search('^#',sLine)
-                if match_comment:
-                    continue
-                
-                else: # extract data fields and remove preceding or trailing whitespace
-                    hitCount += 1
-                    fields = sLine.split()  # split line on white space
-                    targetName        = fields[0];   targetName      = targetName.rstrip() 
-                    targetAccession   = fields[1];   targetAccession = targetAccession.rstrip()
-                    queryName         = fields[2];   queryName       = queryName.rstrip()
-                    queryAccession    = fields[3];   queryAccession  = queryAccession.rstrip()
-                    seqEvalue         = fields[4];   seqEvalue       = seqEvalue.lstrip()
-                    seqScore          = fields[5];   seqScore        = seqScore.lstrip()
-                    seqBias           = fields[6];   seqBias         = seqBias.lstrip()
-                    dom1evalue        = fields[7];   dom1evalue      = dom1evalue.lstrip()
-                    dom1score         = fields[8];   dom1score       = dom1score.lstrip()
-                    dom1bias          = fields[9];   dom1bias        = dom1bias.lstrip()
-                    dom1exp           = fields[10];  dom1exp         = dom1exp.lstrip()
-                    dom1reg           = fields[11];  dom1reg         = dom1reg.lstrip()
-                    dom1clu           = fields[12];  dom1clu         = dom1clu.lstrip()
-                    dom1ov            = fields[13];  dom1ov          = dom1ov.lstrip()
-                    dom1env           = fields[14];  dom1env         = dom1env.lstrip()
-                    dom1dom           = fields[15];  dom1dom         = dom1dom.lstrip()
-                    dom1rep           = fields[16];  dom1rep         = dom1rep.lstrip()
-                    dom1inc           = fields[17];  dom1inc         = dom1inc.lstrip()
-                    #targetDescription = fields[18];  targetDescription = targetDescription.rstrip()
-                    targetDescription = ' '.join(fields[18:]);  targetDescription = targetDescription.rstrip()
-                        
-                    # Collect pVOG identifiers for this hmm search hit; fasta header of target may have >= 1 pVOG identifier
-                    vogIDs = ''; VOGlist = []
-                    VOGlist = re.findall('VOG\d+', targetName)
-                    if VOGlist:
-                        for pVOG in VOGlist:
-                            vogIDs += pVOG + ' '
-                        vogIDs.rstrip()
-                     
-                    # Create new hitDataSet object and store data (note: some data may not be stored)
-                    newSequenceDataSet = copy.deepcopy(sequenceDataSet)
-                    newSequenceDataSet["hitNumber"]       = hitCount
-                    newSequenceDataSet["hitSequenceName"] = targetName
-                    newSequenceDataSet["hitDescription"]  = targetDescription
-                    newSequenceDataSet["hitVOG"]          = vogIDs
-                    newSequenceDataSet["hitEvalue"]       = seqEvalue
-                    newSequenceDataSet["hitScore"]        = seqScore
-                    newSequenceDataSet["hitBias"]         = seqBias
-                    newSequenceDataSet["domEvalue"]       = dom1evalue
-                    newSequenceDataSet["domScore"]        = dom1score
-                    newSequenceDataSet["domBias"]         = dom1bias
-                    newSequenceDataSet["domExp"]          = dom1exp
-                    hitList.append(newSequenceDataSet)
-                    if hitCount >= MAX_SEQ_HITS:
-                        break # enough hits; we are done!
-
-            # Collect all pVOG identifiers for this hmm search, then remove redundancy from list
-            vogs = []; tempVOGlist = []; nrVOGlist = []
-            for hit in hitList:
-                if hit["hitVOG"]:
-                    vogs = hit["hitVOG"].split(' ')
-                    for vog in vogs:
-                        if vog != '':
-                            tempVOGlist.append(vog)  # Now we have a complete (super)set of all pVOG identifiers found in hmm search 
-            nrVOGlist = list(set(tempVOGlist)) # create a set, then convert back to list: presto! non-redundant list
-
-            # Parse the domain-level hmm data
-            # There can be multiple domain-level hits for a given sequence (global) hit (above)
-            # Process each domain hit, then identify its corresponding sequence-level hit, and add to that object
-            # Data are in explicitly defined fields (columns)
+            seqOutfileH.close()
             domOutfileH = open(domOutfile,"r")
             dLines = domOutfileH.read().splitlines()
-            for dLine in dLines:
-                match_comment = re.search('^#',dLine)
-                if match_comment:
-                    continue
-                else:  # extract data fields and remove preceding or trailing whitespace
-                    fields = dLine.split()
-                    targetName        = fields[0];  targetName        = targetName.rstrip()
-                    targetAccession   = fields[1];  targetAccession   = targetAccession.rstrip()
-                    targetLength      = fields[2];  targetLength      = targetLength.lstrip()
-                    queryName         = fields[3];  queryName         = queryName.rstrip()
-                    queryAccession    = fields[4];  queryAccession    = queryAccession.rstrip()
-                    queryLength       = fields[5];  queryLength       = queryLength.lstrip()
-                    fullSeqEvalue     = fields[6];  fullSeqEvalue     = fullSeqEvalue.lstrip()
-                    fullSeqScore      = fields[7];  fullSeqScore      = fullSeqScore.lstrip()
-                    fullSeqBias       = fields[8];  fullSeqBias       = fullSeqBias.lstrip()
-                    domainNumber      = fields[9];  domainNumber      = domainNumber.lstrip()
-                    domOf             = fields[10]; domOf             = domOf.lstrip()
-                    cEvalue           = fields[11]; cEvalue           = cEvalue.lstrip()
-                    iEvalue           = fields[12]; iEvalue           = iEvalue.lstrip()
-                    score             = fields[13]; score             = score.lstrip()
-                    bias              = fields[14]; bias              = bias.lstrip()
-                    hmmFrom           = fields[15]; hmmFrom           = hmmFrom.lstrip()
-                    hmmTo             = fields[16]; hmmTo             = hmmTo.lstrip()
-                    alignFrom         = fields[17]; alignFrom         = alignFrom.lstrip()
-                    alignTo           = fields[18]; alignTo           = alignTo.lstrip()
-                    envFrom           = fields[19]; envFrom           = envFrom.lstrip()
-                    envTo             = fields[20]; envTo             = envTo.lstrip()
-                    acc               = fields[21]; acc               = acc.lstrip()
-                    targetDescription = fields[22]; targetDescription = targetDescription.rstrip()
-                    
-                    # Create new domDataSet object and store data 
-                    newDomainDataSet = copy.deepcopy(domainDataSet)
-                    newDomainDataSet["number"]    = domainNumber
-                    newDomainDataSet["score"]     = score 
-                    newDomainDataSet["c-Evalue"]  = cEvalue
-                    newDomainDataSet["i-Evalue"]  = iEvalue
-                    newDomainDataSet["hmmFrom"]   = hmmFrom
-                    newDomainDataSet["hmmTo"]     = hmmTo
-                    newDomainDataSet["alignFrom"] = alignFrom
-                    newDomainDataSet["alignTo"]   = alignTo
-                    newDomainDataSet["envFrom"]   = envFrom
-                    newDomainDataSet["envTo"]     = envTo
-                    newDomainDataSet["acc"]       = acc  
-
-                    # Figure out which seqDataSet to add this domDataSet to
-                    FOUND = False
-                    for hit in hitList:
-                        if hit["hitSequenceName"] == targetName:
-                            hit["hitDomainList"].append(newDomainDataSet)
-                            if PHATE_MESSAGES:
-                                print("phate_hmm says: Match found between domain and sequence. targetName:",targetName,"\nfasta:",fasta.header)
-
-            # Close HMM output files
-            seqOutfileH.close()
             domOutfileH.close()
-
-            # Assuming there were hits...create an annotation object, and fill with sequence- and domain- hit data 
-            if hitList:
-                for hit in hitList:
-                    # Extract hmm info from hitLine and stash into new annotation object
-                    newAnnotation = copy.deepcopy(annotation) 
-                    newAnnotation.source         = database 
-                    newAnnotation.method         = self.hmmProgram
-                    newAnnotation.annotationType = "hmm search"
-                    newAnnotation.name           = hit["hitSequenceName"] # subject
-                    newAnnotation.description    = hit["hitDescription"]
-                    newAnnotation.start          = '1' # query start
-                    newAnnotation.end            = 'N' # query end
-                    newAnnotation.category       = "sequence"
-
-                    # Extract VOG identifier(s) from hit's header (if pVOG or VOG database)
-                    VOGlist = [] 
-                    VOGlist = hit["hitVOG"].split(' ')
-                    for VOG in VOGlist: 
-                        if VOG != '':
-                            newAnnotation.VOGlist.append(VOG)
-                    
-                    # Fill in description, if it's empty (ie, VOG hits have empty description)
-                    if VOGlist:
-                        if dbName.lower() == 'vogs' or dbName.lower() == 'vog' or dbName.lower() == 'voggene' or dbName.lower() == 'vogprotein' or dbName.lower() == 'vogs_hmm' or dbName.lower() == 'cazy':
-                            newAnnotation.link2databaseIdentifiers(database,dbName)
-                    # Link to description for CAZy hit
-
-                    # Collapse all domain hits into an annotation list for this sequence/global hit
-                    for domain in hit["hitDomainList"]:
-                        resultString  = "domainNo:"    + domain["number"]    + '|'
-                        resultString += "score:"       + domain["score"]     + '|'
-                        resultString += "c-E:"         + domain["c-Evalue"]  + '|'
-                        resultString += "i-E:"         + domain["i-Evalue"]  + '|'
-                        resultString += "hmmFrom:"     + domain["hmmFrom"]   + '|'
-                        resultString += "hmmTo:"       + domain["hmmTo"]     + '|'
-                        resultString += "alignFrom:"   + domain["alignFrom"] + '|'
-                        resultString += "alignTo:"     + domain["alignTo"]   + '|'
-                        resultString += "envFrom:"     + domain["envFrom"]   + '|'
-                        resultString += "envTo:"       + domain["envTo"]     + '|'
-                        resultString += "acc:"         + domain["acc"]       + '|'
-                        newAnnotation.annotationList.append(resultString)
-
-                    # Add this completed annotation to growing list for this fasta
-                    fasta.annotationList.append(newAnnotation)
-            else:
-                if PHATE_MESSAGES:
-                    print("phate_hmm says, No HMM hit found for query", fasta.blastHeader, "against", database)    
+            self.hmmHits2annotations(fasta,sLines,dLines,database,dbName)
 
         # Requested HMM output format not supported
         else:
             if PHATE_WARNINGS:
                 print("phate_hmm says, WARNING: Output format", self.outputFormat, "not yet supported in phate_hmm.py/hmm1fasta(). Use hmm out TBL format for now.")
 
+    ##### PERFORM HMM on a batch of sequences
+
+    # Read a jackhmmer/phmmer TBL-formatted output file holding the hits of many queries, and return a
+    # dictionary of query name => that query's hit lines, in file order. The query name is found in
+    # column queryColumn (3 for --tblout, 4 for --domtblout, counting from 1).
+    def demultiplexHits(self,hitFile,queryColumn):
+        query2lines = {}
+        HIT_H = open(hitFile,"r")
+        for hLine in HIT_H.read().splitlines():
+            if hLine.startswith('#') or hLine.strip() == '':
+                continue
+            fields = hLine.split()
+            if len(fields) >= queryColumn:
+                query2lines.setdefault(fields[queryColumn - 1],[]).append(hLine)
+        HIT_H.close()
+        return query2lines
+
+    # Search a batch of fasta sequences with a single jackhmmer/phmmer run; each query's hits are then
+    # parsed exactly as for a single-sequence search (see hmm1fasta)
+    def hmmBatch(self,fastaList,outfile,database,dbName): # fastaList is a list of phate_fastaSequence.fasta objects
+
+        # Write all query sequences to one temporary file, each named by its position in the batch,
+        # so that hit lines can be assigned to their queries regardless of the sequences' headers
+        fastaFile = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        for i in range(0,len(fastaList)):
+            fastaFileH.write("%c%s%s\n%s\n" % ('>',BATCH_QUERY_PREFIX,str(i + 1),fastaList[i].sequence))
+        fastaFileH.close()
+
+        (command,seqOutfile,domOutfile,stdOutfile) = self.getHmmCommand(fastaFile,outfile,database)
+        self.executeHmm(command,stdOutfile)
+
+        if self.outputFormat == XML or self.outputFormat == LIST:
+            if PHATE_WARNINGS:
+                print("phate_hmm says, WARNING: only TBL format is currently being used for jackhmmer output parsing; setting to TBL.")
+            self.outputFormat = TBL
+
+        seqLines = self.demultiplexHits(seqOutfile,3)
+        domLines = self.demultiplexHits(domOutfile,4)
+        for i in range(0,len(fastaList)):
+            queryName = BATCH_QUERY_PREFIX + str(i + 1)
+            self.hmmHits2annotations(fastaList[i],seqLines.get(queryName,[]),domLines.get(queryName,[]),database,dbName)
+
     def runHmm(self,fastaSet,dbType="protein"): # fastaSet is a phate_fastaSequence.multiFasta object
         # Set sequence type 
         GENOME = False; GENE = False; PROTEIN = False
@@ -563,6 +654,15 @@ class multiHMM(object):
                 print("phate_hmm says, WARNING: Unrecognized database type in runHmm:", dbType)
             return
                
+        if self.scheduler:
+            scheduler = self.scheduler
+        else:
+            scheduler = phate_scheduler.searchScheduler()
+
+        # Queued searches may execute after this object's parameters have been reset (e.g., the hmm
+        # program), so queue them on a copy. The copy shares completionList with this object.
+        searcher = copy.copy(self)
+
         # Set database variable, invoke HMM program for each fasta 
         database = ''
 
@@ -576,115 +676,73 @@ class multiHMM(object):
             if self.REFSEQ_GENE_HMM:   # Not in service
                 database = REFSEQ_GENE_HMM_HOME # same database as blast uses
                 dbName   = 'refseqGene'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says: Running Refseq gene hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.hmmOutDir + self.hmmProgram + "_refseqGene_" + str(count)
-                    if PHATE_PROGRESS:
-                        print("phate_hmm says, Searching fasta number",count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.hmmFastaSet(fastaSet,searcher.hmmOutDir,"_refseqGene_",database,dbName,scheduler)
 
             if self.CUSTOM_GENE_HMM:
                 database = CUSTOM_GENE_HMM_HOME
                 dbName   = 'customGeneHmm'
-                count    = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running Custom Gene hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.geneHmmOutDir + self.hmmProgram + "_customGeneHmm_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)
+                searcher.hmmFastaSet(fastaSet,searcher.geneHmmOutDir,"_customGeneHmm_",database,dbName,scheduler)
 
         if PROTEIN:
             if self.NR_HMM:  
                 database = NR_HMM_HOME # same database as blast uses
                 dbName   = 'nr'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running NR hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_nr_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_nr_",database,dbName,scheduler)
 
             if self.NCBI_VIRUS_PROTEIN_HMM:  
                 database = NCBI_VIRUS_PROTEIN_HMM_HOME 
                 dbName   = 'ncbiVirusProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running NCBI_VIRUS_PROTEIN hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_ncbiVirProt_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_ncbiVirProt_",database,dbName,scheduler)
 
             if self.REFSEQ_PROTEIN_HMM:
                 database = REFSEQ_PROTEIN_HMM_HOME # same database as blast uses
                 dbName   = 'refseqProtein'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running Refseq protein hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_refseqProtein_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_refseqProtein_",database,dbName,scheduler)
 
             if self.PHANTOME_HMM:
                 database = PHANTOME_HMM_HOME # same database as blast uses
                 dbName   = 'phantome'
-                count = 0 
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running PHANTOME hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_phantome_" +str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_phantome_",database,dbName,scheduler)
 
             if self.KEGG_VIRUS_HMM: 
                 database = KEGG_VIRUS_HMM_HOME # same database as blast uses
                 dbName   = 'kegg'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running KEGG hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_kegg_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_kegg_",database,dbName,scheduler)
 
             if self.SWISSPROT_HMM: 
                 database = SWISSPROT_HMM_HOME # same database as blast uses
                 dbName   = 'swissprot'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running Swissprot hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_swissprot_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)   
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_swissprot_",database,dbName,scheduler)
 
             if self.PHAGE_ENZYME_HMM: 
                 database = PHAGE_ENZYME_HMM_HOME # same database as blast uses
                 dbName   = 'swissprot'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running phage enzyme hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_phageEnz_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)   
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_phageEnz_",database,dbName,scheduler)
 
             if self.CAZY_HMM: 
                 database = CAZY_HMM_HOME # same database as blast uses
                 dbName   = 'cazy'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running CAZy hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_cazy_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)   
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_cazy_",database,dbName,scheduler)
 
             if self.PVOGS_HMM:  
                 database = PVOGS_HMM_HOME # same database as blast uses
@@ -701,117 +759,123 @@ class multiHMM(object):
                     print("phate_hmm says, Collecting and saving pVOG sequences corresponding to hmm hit(s)")
 
                 if self.jackhmmerSearch or self.phmmerSearch: # Create pVOG fasta group files so user can do alignments
-                    # You need only one "alignment" file per pVOG group that the fasta hit (under blast cutoffs)
-                    # Capture pVOG.faa lines
-                    pVOGs_h = open(database,"r")
-                    pVOGlines = pVOGs_h.read().splitlines()
-                    count = 0; countA = 0
-                    for fasta in fastaSet.fastaList:
-                        pvogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                        count += 1 
-                        countA = 0
-                        for annot in fasta.annotationList:
-                            for pVOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                                match_good = re.search('VOG',pVOG)
-                                if match_good:
-                                    # Avoid redundancy in printing pVOG groups for this fasta; only once per pVOG ID that was an hmm hit
-                                    if pVOG not in pvogPrintedList:
-                                        pvogPrintedList.append(pVOG)  # Record this pVOG identifier as "done"
-                                        # create dynamic file name
-                                        countA += 1 
-                                        if self.jackhmmerSearch:
-                                            outfilePVOG = self.pVOGsOutDir + "hmm_jackhmmer_pvogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        elif self.phmmerSearch:
-                                            outfilePVOG = self.pVOGsOutDir + "hmm_phmmer_pvogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        # open file and write current fasta pluse each corresponding pVOG fasta
-                                        outfilePVOG_h = open(outfilePVOG,'w')
-                                        outfilePVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                        self.writeVOGsequences2file(outfilePVOG_h,pVOGlines,pVOG)            # ...followed by the pVOG group
-                                        outfilePVOG_h.close()
-                                else:
-                                    if PHATE_WARNINGS:
-                                        print("phate_hmm says, WARNING: unexpected pVOG identifier:", pVOG, "for fasta", fasta.header)        
+                    # These are written once the hmm results have been merged onto the fastas (see completeHmm)
+                    if self.jackhmmerSearch:
+                        outfileRoot = searcher.pVOGsOutDir + "hmm_jackhmmer_pvogGroup_"
+                    else:
+                        outfileRoot = searcher.pVOGsOutDir + "hmm_phmmer_pvogGroup_"
+                    self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,outfileRoot)))
 
             if self.VOG_PROTEIN_HMM:   
                 database = VOG_PROTEIN_HMM_HOME # same database as blast uses
                 dbName   = 'vogs_hmm'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running VOGs hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_vog_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_vog_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_hmm says, VOGs hmm search complete.")
                     print("phate_hmm says, Collecting and saving VOG sequences corresponding to hmm hit(s)")
 
                 if self.jackhmmerSearch or self.phmmerSearch: # Create VOG fasta group files so user can do alignments
-                    # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
-                    # Capture VOG.faa lines
-                    VOGs_h = open(database,"r")
-                    VOGlines = VOGs_h.read().splitlines()
-                    count = 0; countA = 0
-                    for fasta in fastaSet.fastaList:
-                        vogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                        count += 1 
-                        countA = 0
-                        for annot in fasta.annotationList:
-                            for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                                match_good = re.search('VOG',VOG)
-                                if match_good:
-                                    # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was an hmm hit
-                                    if VOG not in vogPrintedList:
-                                        vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
-                                        # create dynamic file name
-                                        countA += 1 
-                                        if self.jackhmmerSearch:
-                                            outfileVOG = self.VOGsOutDir + "hmm_jackhmmer_vogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        elif self.phmmerSearch:
-                                            outfileVOG = self.VOGsOutDir + "hmm_phmmer_vogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        # open file and write current fasta pluse each corresponding VOG fasta
-                                        outfileVOG_h = open(outfileVOG,'w')
-                                        outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                        self.writeVOGsequences2file(outfileVOG_h,VOGlines,VOG)               # ...followed by the VOG group
-                                        outfileVOG_h.close()
-                                else:
-                                    if PHATE_WARNINGS:
-                                        print("phate_hmm says, WARNING: unexpected VOG identifier:", VOG, "for fasta",fasta.header)        
+                    # These are written once the hmm results have been merged onto the fastas (see completeHmm)
+                    if self.jackhmmerSearch:
+                        outfileRoot = searcher.VOGsOutDir + "hmm_jackhmmer_vogGroup_"
+                    else:
+                        outfileRoot = searcher.VOGsOutDir + "hmm_phmmer_vogGroup_"
+                    self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,database,outfileRoot)))
 
             if self.CUSTOM_PROTEIN_HMM:
                 database = CUSTOM_PROTEIN_HMM_HOME
                 dbName   = 'customProteinHmm'
-                count    = 0
                 if PHATE_PROGRESS:
                     print("phate_hmm says, Running Custom Protein hmm search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinHmmOutDir + self.hmmProgram + "_customProteinHmm_" + str(count)
-                    self.hmm1fasta(fasta,outfile,database,dbName)
+                searcher.hmmFastaSet(fastaSet,searcher.proteinHmmOutDir,"_customProteinHmm_",database,dbName,scheduler)
 
         if CLEAN_RAW_DATA == 'True':
-            self.cleanHmmOutDir('protein')
-
-    def writeVOGsequences2file(self,FILE_H,lines,VOG):
-        VOGheader = ""; VOGsequence = ""; GET_SEQ = False
-        for i in range(0,len(lines)-1):
-            nextLine = lines[i]
-            match_header = re.search('>',nextLine)
-            match_VOG    = re.search(VOG,nextLine)
-
-            if match_header:   
-                if GET_SEQ:
-                    FILE_H.write("%s\n%s\n" % (VOGheader,VOGsequence))
-                    VOGheader = ""; VOGsequence = ""
-                    GET_SEQ = False
-
-                if match_VOG:
-                    VOGheader = nextLine
-                    GET_SEQ = True
-
-            elif GET_SEQ:
-                VOGsequence = VOGsequence + nextLine
+            self.completionList.append((searcher.cleanHmmOutDir,('protein',)))
+
+        if not self.scheduler:
+            scheduler.runTasks()
+            self.completeHmm()
+
+    # Search each fasta in fastaSet against database. Each search is added to the scheduler as a task that
+    # annotates a shadow copy of the fasta; merging onto fastaSet is queued on completionList (see completeHmm).
+    # If hmmBatchSize is set, the query set is split into shards of that many fastas, each searched by one
+    # jackhmmer/phmmer run (see hmmBatch); the scheduler runs the shards concurrently, within its cpu budget.
+    def hmmFastaSet(self,fastaSet,outDir,outfileTag,database,dbName,scheduler): # fastaSet is a phate_fastaSequence.multiFasta object
+        # With the annotation cache on, only sequences not already searched are queued (see phate_annotationCache.py)
+        annotationCache = phate_annotationCache.getAnnotationCache()
+        plan = None
+        if annotationCache.isEnabled():
+            searchKey = annotationCache.getSearchKey(self.hmmProgram,database,dbName,self.getCacheParameterString())
+            plan = annotationCache.planSearch(fastaSet,searchKey,self.hmmProgram)
+            fastaSet = plan.querySet
+        if self.hmmBatchSize == 0:
+            count = 0
+            for fasta in fastaSet.fastaList:
+                count += 1
+                outfile = outDir + self.hmmProgram + outfileTag + str(count)
+                shadowList = scheduler.createShadowFastas([fasta])
+                task = scheduler.addTask(outfile,self.hmm1fasta,(shadowList[0],outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,([fasta],shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        else:
+            batchSize = self.hmmBatchSize
+            if batchSize == -1:
+                batchSize = len(fastaSet.fastaList)
+            batchCount = 0
+            for i in range(0,len(fastaSet.fastaList),batchSize):
+                batchCount += 1
+                outfile = outDir + self.hmmProgram + outfileTag + "batch_" + str(batchCount)
+                fastaList  = fastaSet.fastaList[i:i+batchSize]
+                shadowList = scheduler.createShadowFastas(fastaList)
+                task = scheduler.addTask(outfile,self.hmmBatch,(shadowList,outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,(fastaList,shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        if plan:
+            self.completionList.append((annotationCache.completeSearch,(plan,)))
+
+    # Merge queued hmm results onto the fastas, and do any post-processing, in the order a serial run would 
+    def completeHmm(self):
+        completionList = self.completionList
+        self.completionList = []
+        for (function,args) in completionList:
+            function(*args)
+
+    def setScheduler(self,scheduler):
+        self.scheduler = scheduler
+
+    # Write one fasta group file for each (p)VOG that a fasta hit: the fasta, followed by the group's sequences
+    def writeVOGgroupFiles(self,fastaSet,database,outfileRoot):
+        # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
+        # Index of VOG group members in the VOG database (see phate_vogIndex.py)
+        vogIndex = phate_vogIndex.getVOGgroupIndex(database)
+        count = 0; countA = 0
+        for fasta in fastaSet.fastaList:
+            vogPrintedList = []  # keeps track of VOGs that have already been printed for current fasta
+            count += 1 
+            countA = 0
+            for annot in fasta.annotationList:
+                for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
+                    match_good = re.search('VOG',VOG)
+                    if match_good:
+                        # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was an hmm hit
+                        if VOG not in vogPrintedList:
+                            vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
+                            # create dynamic file name
+                            countA += 1 
+                            outfileVOG = outfileRoot + str(count) + '_' + str(countA) + '.faa' 
+                            # open file and write current fasta plus each corresponding VOG fasta
+                            outfileVOG_h = open(outfileVOG,'w')
+                            outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
+                            vogIndex.writeGroup(outfileVOG_h,VOG)                                # ...followed by the VOG group
+                            outfileVOG_h.close()
+                    else:
+                        if PHATE_WARNINGS:
+                            print("phate_hmm says, WARNING: unexpected VOG identifier:", VOG, "for fasta",fasta.header)        
 
     def cleanHmmOutDir(self,seqType):  # Remove temporary files from HMM_OUT_DIR
         if PHATE_PROGRESS:
@@ -847,6 +911,8 @@ class multiHMM(object):
         print("   hmmOutDir:             ", self.hmmOutDir)
         print("   pVOGsOutDir:           ", self.pVOGsOutDir)
         print("   VOGsOutDir:            ", self.VOGsOutDir)
+        print("   hmmBatchSize:          ", self.hmmBatchSize)
+        print("   hmmThreads:            ", self.hmmThreads)
         print("   NCBI_VIRUS_PROTEIN_HMM:", self.NCBI_VIRUS_PROTEIN_HMM)
         print("   NR_HMM:                ", self.NR_HMM)
         print("   KEGG_VIRUS_HMM:        ", self.KEGG_VIRUS_HMM)
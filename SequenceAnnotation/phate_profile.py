@@ -4,7 +4,7 @@
 #
 # Programmer:  Carol Zhou
 #
-# Most Recent Update: 19 October 2020
+# Most Recent Update: 18 October 2026
 #
 # Description:
 # This class performs hmm searches of hmm profiles or alignments against 
@@ -19,11 +19,19 @@
 #       setGeneCallDir
 #       setProfileOutDir
 #       getTopHits
+#       getCacheParameterString
 #       getDescription4pvog
 #       getDescription4vog
+#       profileHits2annotations
+#       getProfileCommand
+#       executeProfile
 #       prifile1fasta
+#       profileBatch
 #       runProfile
-#       writeVOGsequences2file
+#       profileFastaSet
+#       completeProfile
+#       setScheduler
+#       writeVOGgroupFiles
 #       cleanProfileOutDir
 #       printParameters
 #       printParameters2file
@@ -45,6 +53,10 @@ from xml.etree.ElementTree import ElementTree as ET
 import phate_fastaSequence
 import phate_genomeSequence
 import phate_annotation
+import phate_scheduler
+import phate_vogIndex
+import phate_annotationCache
+import phate_annotationCatalog
 from subprocess import Popen, PIPE, STDOUT
 import string
 
@@ -96,6 +108,15 @@ if PHATE_PROGRESS_STRING.lower() == 'true':
     PHATE_PROGRESS = True
 
 
+# VOG functional category codes, as found in vog.annotations.tsv
+VOG_FUNCTIONAL_CATEGORIES = [
+    ('Xr', 'Virus replication'),
+    ('Xs', 'Virus structure'),
+    ('Xh', 'Virus protein w/benefit for host'),
+    ('Xp', 'Virus protein w/benefit for virus'),
+    ('Xu', 'Function unknown'),
+    ]
+
 # Other configurables 
 
 GENE_CALL_DIR            = ""  # set by set method, via parameter list
@@ -103,6 +124,7 @@ PROFILE_OUT_DIR          = ""  # set by set method, via parameter list
 TBL  = 1
 XML  = 2
 LIST = 3
+BATCH_QUERY_PREFIX       = "query_"  # batched queries are named by position, e.g. query_12
 
 # templates 
 annotation = phate_annotation.annotationRecord()
@@ -122,6 +144,8 @@ class multiProfile(object):
         self.topHitCount                = MAX_SEQ_HITS 
         self.hmmscan                    = False     # If True, run hmmscan
         self.outputFormat               = TBL
+        self.profileBatchSize           = 0         # number of queries per hmmscan run; 0 => one at a time, -1 => all at once
+        self.hmmThreads                 = 0         # cpus per hmmscan run (--cpu); 0 => hmmscan's default
         self.NCBI_VIRUS_PROTEIN_PROFILE = False     # Booleans control whether hmm search will be done against a given fasta blast database 
         self.REFSEQ_PROTEIN_PROFILE     = False     #
         self.REFSEQ_GENE_PROFILE        = False     #  
@@ -135,6 +159,8 @@ class multiProfile(object):
         self.SWISSPROT_PROFILE          = False     #  
         self.UNIPROT_PROFILE            = False     # 
         self.NR_PROFILE                 = False     #  
+        self.scheduler                  = None      # shared phate_scheduler.searchScheduler; if None, runProfile runs its own searches
+        self.completionList             = []        # (function,args) steps to run, in order, after queued searches complete
 
     ##### SET AND GET PARAMETERS
 
@@ -161,6 +187,10 @@ class multiProfile(object):
                 self.hmmscan = paramset['hmmscan'] 
                 if self.hmmscan == True:
                     self.profileProgram = 'hmmscan'
+            if 'profileBatchSize' in list(paramset.keys()):
+                self.profileBatchSize = int(paramset['profileBatchSize'])
+            if 'hmmThreads' in list(paramset.keys()):
+                self.hmmThreads = int(paramset['hmmThreads'])
             # Booleans to control execution  #*** Only pvogsHmm is currently in service
             if 'ncbiVirusGenomeHmm' in list(paramset.keys()):
                 self.NCBI_VIRUS_GENOME_PROFILE = paramset["ncbiVirusGenomeHmm"]
@@ -220,90 +250,42 @@ class multiProfile(object):
     def getTopHits(self):
         return self.topHitList 
 
+    # Parameters that determine a search's annotations, for keying the annotation cache (see phate_annotationCache.py)
+    def getCacheParameterString(self):
+        return ':'.join([str(parameter) for parameter in [self.profileProgram,self.hmmscan,self.topHitCount,self.outputFormat]])
+
     ##### PERFORM HMM SEARCH ON PROFILE DATABASE - SINGLE SEQUENCE
 
+    # pVOG headers and VOG annotations are held in memory by the annotation catalog (see phate_annotationCatalog.py)
     def getDescription4pvog(self,pvogID):
         description = ""; words = []
-        headers_h = open(PVOG_HEADERS,'r')
-        hLines = headers_h.read().splitlines()
-        for hLine in hLines:
-            match_pvog = re.search(pvogID,hLine)
-            if match_pvog:
-                words = hLine.split(' ')
-                description = ' '.join(words[1:])
-                break
-        headers_h.close()
+        hLine = phate_annotationCatalog.getAnnotationCatalog().getPVOGheaderLine(pvogID,PVOG_HEADERS)
+        if hLine != '':
+            words = hLine.split(' ')
+            description = ' '.join(words[1:])
         return description
 
     def getDescription4vog(self,vogID):
-        functionalDescription = "unknown"; functionalCategory = ""
+        functionalDescription = "unknown"
         functionalCategories  = []; categoryString = "" 
-        # patterns for identifying function categories
-        p_Xr = re.compile('Xr')
-        p_Xs = re.compile('Xs')
-        p_Xh = re.compile('Xh')
-        p_Xp = re.compile('Xp')  
-        p_Xu = re.compile('Xu')
-        # Search annotations file for VOG description
-        vogAnnotations_h = open(VOG_ANNOTATIONS,'r')
-        vLines = vogAnnotations_h.read().splitlines()
-        for vLine in vLines:
+        # Look up annotation line for VOG description
+        vLine = phate_annotationCatalog.getAnnotationCatalog().getVOGannotationLine(vogID)
+        if vLine != '':
             (VOGid,protCount,sppCount,funcCat,funcDescr) = vLine.split('\t')
-            match_Xr = re.search(p_Xr,vLine)
-            match_Xs = re.search(p_Xs,vLine)
-            match_Xh = re.search(p_Xh,vLine)
-            match_Xp = re.search(p_Xp,vLine)
-            match_Xu = re.search(p_Xu,vLine)
-            if vogID == VOGid:
-                if match_Xr:
-                    functionalCategories.append('Virus replication')
-                if match_Xs:
-                    functionalCategories.append('Virus structure')
-                if match_Xh:
-                    functionalCategories.append('Virus protein w/benefit for host')
-                if match_Xp:
-                    functionalCategories.append('Virus protein w/benefit for virus')
-                if match_Xu:
-                    functionalCategories.append('Function unknown')
-                for f in functionalCategories:
-                    categoryString += f + ':'
-                functionalDescription = categoryString + funcDescr
-                break
-        vogAnnotations_h.close()
+            for (categoryCode,category) in VOG_FUNCTIONAL_CATEGORIES:
+                if categoryCode in vLine:
+                    functionalCategories.append(category)
+            for f in functionalCategories:
+                categoryString += f + ':'
+            functionalDescription = categoryString + funcDescr
         return functionalDescription
 
-    def profile1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
-        command = ''
+    # Parse hmmscan TBL-formatted sequence-level (sLines) and domain-level (dLines) hit lines for one query,
+    # and add an annotation for each hit to fasta.annotationList
+    def profileHits2annotations(self,fasta,sLines,dLines,database,dbName):
         match_pvog = re.search('pvog',dbName.lower())
         match_vog  = re.search('vog', dbName.lower())
 
-        # Write fasta sequence to temporary file
-        fastaFile  = self.proteinProfileOutDir + "temp.fasta"
-        fastaFileH = open(fastaFile,"w")
-        if fasta.sequentialHeader == "unknown":  # unchanged from default
-            fasta.printFasta2file(fastaFileH,"blastHeader")
-        else:
-            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
-        fastaFileH.close()
-
-        # Construct out file names
-        seqOutfile = outfile + '.hmmscan.seqout' # captures tabbed data for the sequence-level analysis
-        domOutfile = outfile + '.hmmscan.domout' # captures tabbed data for the domain-level analysis
-        stdOutfile = outfile + '.hmmscan.stdout' # captures data written to standard out, other than seq or dom output
- 
-        # Run hmm program; write output to specified file  # Note: only hmmscan is currently in service
-        if self.hmmscan == True:
-            command = HMMER_HOME + "hmmscan --tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + database + ' ' + fastaFile + ' > ' + stdOutfile 
-
-        if PHATE_OUT == 'True':
-            p = Popen(command, shell=True, stdin=PIPE, stdout=PIPE, stderr=STDOUT, close_fds=True)
-            output = p.stdout.read() 
-            OUT_H = open(stdOutfile, "w")
-            OUT_H.write("%s\n" % (output)) 
-            OUT_H.close()
-        else:
-            result = os.system(command)
-
         # For TBL parsing
         hitList = [] # contains a list of hitDataSet objects
         sequenceDataSet = {
@@ -337,6 +319,240 @@ class multiProfile(object):
             "acc"               : 0.0, 
             }
 
+        # Parse the sequence-level profile search output data (global hit)
+        #***
+        # Note:  Although data appear to be in explicitly defined fields (columns), they are not!
+        #        Column locations for data values change in each file. Therefore, you cannot parse
+        #        the hmmscan output using fixed columns. Nor are the columns tab-delimited. The
+        #        following parser separates data fields by splitting on >= 1 white space. However,
+        #        this will fail if the subject (target) fasta header contains white space!!! It will
+        #        work for the pVOGs fasta file that is prepared for use with PhATE, but will not work
+        #        for most fasta input data sets. I need to explore other possible jackhmmer output
+        #        formats, if there are others. XML would be great.... 
+        hitCount = 0
+
+        # Process the sequence hit lines; note: domain hits are in a separate file
+        for sLine in sLines:
+            match_comment = re.search('^#',sLine)
+            if match_comment:
+                continue
+            
+            else: # extract data fields and remove preceding or trailing whitespace
+                hitCount += 1
+                fields = sLine.split()  # split line on white space
+                targetName        = fields[0];   targetName      = targetName.rstrip() 
+                targetAccession   = fields[1];   targetAccession = targetAccession.rstrip()
+                queryName         = fields[2];   queryName       = queryName.rstrip()
+                queryAccession    = fields[3];   queryAccession  = queryAccession.rstrip()
+                seqEvalue         = fields[4];   seqEvalue       = seqEvalue.lstrip()
+                seqScore          = fields[5];   seqScore        = seqScore.lstrip()
+                seqBias           = fields[6];   seqBias         = seqBias.lstrip()
+                dom1evalue        = fields[7];   dom1evalue      = dom1evalue.lstrip()
+                dom1score         = fields[8];   dom1score       = dom1score.lstrip()
+                dom1bias          = fields[9];   dom1bias        = dom1bias.lstrip()
+                dom1exp           = fields[10];  dom1exp         = dom1exp.lstrip()
+                dom1reg           = fields[11];  dom1reg         = dom1reg.lstrip()
+                dom1clu           = fields[12];  dom1clu         = dom1clu.lstrip()
+                dom1ov            = fields[13];  dom1ov          = dom1ov.lstrip()
+                dom1env           = fields[14];  dom1env         = dom1env.lstrip()
+                dom1dom           = fields[15];  dom1dom         = dom1dom.lstrip()
+                dom1rep           = fields[16];  dom1rep         = dom1rep.lstrip()
+                dom1inc           = fields[17];  dom1inc         = dom1inc.lstrip()
+                # Target description is not found in the profile search output.
+                # Needs to be queried from the annotation file, for VOGs, and
+                # from the headers file, for pVOGs.
+                targetDescription = '' 
+                if match_pvog:
+                    targetDescription = self.getDescription4pvog(targetName)
+                elif match_vog:
+                    targetDescription = self.getDescription4vog(targetName)
+                else:
+                    print("phate_profiles says, ERROR: database not recognized: ",dbName)
+                vogIDs = ''; VOGlist = []
+                if re.search("vog",database.lower()):
+                    # Collect VOG identifiers for this hmm/profile search hit; fasta header of target may have >= 1 VOG identifier
+                    VOGlist = re.findall('VOG\d+', targetName)
+                    if VOGlist:
+                        for VOG in VOGlist:
+                            vogIDs += VOG + ' '
+                        vogIDs.rstrip()
+                 
+                # Create new hitDataSet object and store data (note: some data may not be stored)
+                newSequenceDataSet = copy.deepcopy(sequenceDataSet)
+                newSequenceDataSet["hitNumber"]       = hitCount
+                newSequenceDataSet["hitSequenceName"] = targetName
+                newSequenceDataSet["hitDescription"]  = targetDescription
+                newSequenceDataSet["hitVOG"]          = vogIDs
+                newSequenceDataSet["hitEvalue"]       = seqEvalue
+                newSequenceDataSet["hitScore"]        = seqScore
+                newSequenceDataSet["hitBias"]         = seqBias
+                newSequenceDataSet["domEvalue"]       = dom1evalue
+                newSequenceDataSet["domScore"]        = dom1score
+                newSequenceDataSet["domBias"]         = dom1bias
+                newSequenceDataSet["domExp"]          = dom1exp
+                hitList.append(newSequenceDataSet)
+                if hitCount >= MAX_SEQ_HITS:
+                    break # enough hits; we are done!
+
+        # Collect all pVOG identifiers for this hmm search, then remove redundancy from list
+        vogs = []; tempVOGlist = []; nrVOGlist = []
+        for hit in hitList:
+            if hit["hitVOG"]:
+                vogs = hit["hitVOG"].split(' ')
+                for vog in vogs:
+                    tempVOGlist.append(vog)  # Now we have a complete (super)set of all pVOG identifiers found in hmm search 
+        nrVOGlist = list(set(tempVOGlist)) # create a set, then convert back to list: presto! non-redundant list
+
+        # Parse the domain-level hmm data
+        # There can be multiple domain-level hits for a given sequence (global) hit (above)
+        # Process each domain hit, then identify its corresponding sequence-level hit, and add to that object
+        # Data are in explicitly defined fields (columns)
+        for dLine in dLines:
+            match_comment = re.search('^#',dLine)
+            if match_comment:
+                continue
+            else:  # extract data fields and remove preceding or trailing whitespace
+                fields = dLine.split()
+                targetName        = fields[0];  targetName = targetName.rstrip()
+                targetAccession   = fields[1];  targetAccession = targetAccession.rstrip()
+                targetLength      = fields[2];  targetLength = targetLength.lstrip()
+                queryName         = fields[3];  queryName = queryName.rstrip()
+                queryAccession    = fields[4];  queryAccession = queryAccession.rstrip()
+                queryLength       = fields[5];  queryLength = queryLength.lstrip()
+                fullSeqEvalue     = fields[6];  fullSeqEvalue = fullSeqEvalue.lstrip()
+                fullSeqScore      = fields[7];  fullSeqScore = fullSeqScore.lstrip()
+                fullSeqBias       = fields[8];  fullSeqBias = fullSeqBias.lstrip()
+                domainNumber      = fields[9];  domainNumber = domainNumber.lstrip()
+                domOf             = fields[10]; domOf = domOf.lstrip()
+                cEvalue           = fields[11]; cEvalue = cEvalue.lstrip()
+                iEvalue           = fields[12]; iEvalue = iEvalue.lstrip()
+                score             = fields[13]; score = score.lstrip()
+                bias              = fields[14]; bias = bias.lstrip()
+                hmmFrom           = fields[15]; hmmFrom = hmmFrom.lstrip()
+                hmmTo             = fields[16]; hmmTo = hmmTo.lstrip()
+                alignFrom         = fields[17]; alignFrom = alignFrom.lstrip()
+                alignTo           = fields[18]; alignTo = alignTo.lstrip()
+                envFrom           = fields[19]; envFrom = envFrom.lstrip()
+                envTo             = fields[20]; envTo = envTo.lstrip()
+                acc               = fields[21]; acc = acc.lstrip()
+                targetDescription = fields[22]; targetDescription = targetDescription.rstrip()
+                
+                # Create new domDataSet object and store data 
+                newDomainDataSet = copy.deepcopy(domainDataSet)
+                newDomainDataSet["number"]    = domainNumber
+                newDomainDataSet["score"]     = score 
+                newDomainDataSet["c-Evalue"]  = cEvalue
+                newDomainDataSet["i-Evalue"]  = iEvalue
+                newDomainDataSet["hmmFrom"]   = hmmFrom
+                newDomainDataSet["hmmTo"]     = hmmTo
+                newDomainDataSet["alignFrom"] = alignFrom
+                newDomainDataSet["alignTo"]   = alignTo
+                newDomainDataSet["envFrom"]   = envFrom
+                newDomainDataSet["envTo"]     = envTo
+                newDomainDataSet["acc"]       = acc  
+
+                # Figure out which seqDataSet to add this domDataSet to
+                FOUND = False
+                for hit in hitList:
+                    if hit["hitSequenceName"] == targetName:
+                        hit["hitDomainList"].append(newDomainDataSet)
+                        FOUND = True
+                if not FOUND:
+                    if PHATE_WARNINGS:
+                        print("phate_profile says, WARNING: sequence data object not found for domain object", targetName)
+
+
+        # Assuming there were hits...create an annotation object, and fill with sequence- and domain- hit data 
+        if hitList:
+            for hit in hitList:
+                # Extract hmm info from hitLine and stash into new annotation object
+                newAnnotation = phate_annotation.annotationRecord() 
+                newAnnotation.source         = database 
+                newAnnotation.method         = self.profileProgram
+                newAnnotation.annotationType = "profile search"
+                newAnnotation.name           = hit["hitSequenceName"] # subject
+                newAnnotation.start          = '1' # query start
+                newAnnotation.end            = 'N' # query end
+                newAnnotation.category       = "hmm"
+                newAnnotation.description    = hit["hitDescription"]  # Note: this field appears to be blank for hmmscan
+
+                # Extract VOG identifier(s) from hit's header (if VOG or VOG database)
+                VOGlist = []
+                VOGlist = hit["hitVOG"].split(' ')
+                for VOG in VOGlist: 
+                    newAnnotation.VOGlist.append(VOG)
+
+                # Collapse all domain hits as into an annotation list for this sequence/global hit
+                for domain in hit["hitDomainList"]:
+                    #resultString  = VOGstring                           + '|'
+                    resultString  = "domainNo:"    + domain["number"]    + '|'
+                    resultString += "score:"       + domain["score"]     + '|'
+                    resultString += "c-E:"         + domain["c-Evalue"]  + '|'
+                    resultString += "i-E:"         + domain["i-Evalue"]  + '|'
+                    resultString += "hmmFrom:"     + domain["hmmFrom"]   + '|'
+                    resultString += "hmmTo:"       + domain["hmmTo"]     + '|'
+                    resultString += "alignFrom:"   + domain["alignFrom"] + '|'
+                    resultString += "alignTo:"     + domain["alignTo"]   + '|'
+                    resultString += "envFrom:"     + domain["envFrom"]   + '|'
+                    resultString += "envTo:"       + domain["envTo"]     + '|'
+                    resultString += "acc:"         + domain["acc"]       + '|'
+                    newAnnotation.annotationList.append(resultString)
+
+                # For VOG description, get annotation from file
+                if newAnnotation.VOGlist:
+                    if dbName.lower() == 'vogs' or dbName.lower() == 'vog':
+                       newAnnotation.link2databaseIdentifiers(database,dbName)
+
+                # Add this completed annotation to growing list for this fasta
+                fasta.annotationList.append(newAnnotation)
+        else:
+            if PHATE_MESSAGES:
+                print("phate_profiles says, No Profile hit found for query", fasta.blastHeader, "against", database)    
+
+    # Construct the hmm program command for searching fastaFile (one or more queries) against database
+    def getProfileCommand(self,fastaFile,outfile,database):
+        command = ''
+        seqOutfile = outfile + '.hmmscan.seqout' # captures tabbed data for the sequence-level analysis
+        domOutfile = outfile + '.hmmscan.domout' # captures tabbed data for the domain-level analysis
+        stdOutfile = outfile + '.hmmscan.stdout' # captures data written to standard out, other than seq or dom output
+        cpuString  = ''
+        if self.hmmThreads > 0:
+            cpuString = '--cpu ' + str(self.hmmThreads) + ' '
+        # Note: only hmmscan is currently in service
+        if self.hmmscan == True:
+            command = HMMER_HOME + "hmmscan " + cpuString + "--tblout " + seqOutfile + ' --domtblout ' + domOutfile + ' ' + database + ' ' + fastaFile + ' > ' + stdOutfile 
+        return command
+
+    def executeProfile(self,command,stdOutfile):
+        if PHATE_OUT == 'True':
+            p = Popen(command, shell=True, stdin=PIPE, stdout=PIPE, stderr=STDOUT, close_fds=True)
+            output = p.stdout.read() 
+            OUT_H = open(stdOutfile, "w")
+            OUT_H.write("%s\n" % (output)) 
+            OUT_H.close()
+        else:
+            result = os.system(command)
+
+    def profile1fasta(self,fasta,outfile,database,dbName): # fasta is a phate_fastaSequence.fasta object
+
+        # Write fasta sequence to temporary file; named for the outfile, so concurrent searches don't collide
+        fastaFile  = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        if fasta.sequentialHeader == "unknown":  # unchanged from default
+            fasta.printFasta2file(fastaFileH,"blastHeader")
+        else:
+            fasta.printFasta2file(fastaFileH,"sequential")  # use sequential header format to avoid special chars issue
+        fastaFileH.close()
+
+        # Construct out file names
+        seqOutfile = outfile + '.hmmscan.seqout' # captures tabbed data for the sequence-level analysis
+        domOutfile = outfile + '.hmmscan.domout' # captures tabbed data for the domain-level analysis
+        stdOutfile = outfile + '.hmmscan.stdout' # captures data written to standard out, other than seq or dom output
+ 
+        # Run hmm program; write output to specified file
+        command = self.getProfileCommand(fastaFile,outfile,database)
+        self.executeProfile(command,stdOutfile)
+
         # Capture result(s) and store as an annotation object for this fasta; Coded for output format TBL (5) 
 
         # Parse XML-, LIST-, or TBL-formatted hmm output #*** Is XML format available?  
@@ -347,209 +563,60 @@ class multiProfile(object):
             self.outputFormat = TBL
 
         if self.outputFormat == TBL:
-
-            # Parse the sequence-level profile search output data (global hit)
-            #***
-            # Note:  Although data appear to be in explicitly defined fields (columns), they are not!
-            #        Column locations for data values change in each file. Therefore, you cannot parse
-            #        the hmmscan output using fixed columns. Nor are the columns tab-delimited. The
-            #        following parser separates data fields by splitting on >= 1 white space. However,
-            #        this will fail if the subject (target) fasta header contains white space!!! It will
-            #        work for the pVOGs fasta file that is prepared for use with PhATE, but will not work
-            #        for most fasta input data sets. I need to explore other possible jackhmmer output
-            #        formats, if there are others. XML would be great.... 
-            hitCount = 0
-
-            # Open and process the sequence hit file; note: domain hits are in a separate file
             seqOutfileH = open(seqOutfile,"r")  # Open the sequence hit file
             sLines = seqOutfileH.read().splitlines()
-            for sLine in sLines:
-                match_comment = re.search('^#',sLine)
-                if match_comment:
-                    continue
-                
-                else: # extract data fields and remove preceding or trailing whitespace
-                    hitCount += 1
-                    fields = sLine.split()  # split line on white space
-                    targetName        = fields[0];   targetName      = targetName.rstrip() 
-                    targetAccession   = fields[1];   targetAccession = targetAccession.rstrip()
-                    queryName         = fields[2];   queryName       = queryName.rstrip()
-                    queryAccession    = fields[3];   queryAccession  = queryAccession.rstrip()
-                    seqEvalue         = fields[4];   seqEvalue       = seqEvalue.lstrip()
-                    seqScore          = fields[5];   seqScore        = seqScore.lstrip()
-                    seqBias           = fields[6];   seqBias         = seqBias.lstrip()
-                    dom1evalue        = fields[7];   dom1evalue      = dom1evalue.lstrip()
-                    dom1score         = fields[8];   dom1score       = dom1score.lstrip()
-                    dom1bias          = fields[9];   dom1bias        = dom1bias.lstrip()
-                    dom1exp           = fields[10];  dom1exp         = dom1exp.lstrip()
-                    dom1reg           = fields[11];  dom1reg         = dom1reg.lstrip()
-                    dom1clu           = fields[12];  dom1clu         = dom1clu.lstrip()
-                    dom1ov            = fields[13];  dom1ov          = dom1ov.lstrip()
-                    dom1env           = fields[14];  dom1env         = dom1env.lstrip()
-                    dom1dom           = fields[15];  dom1dom         = dom1dom.lstrip()
-                    dom1rep           = fields[16];  dom1rep         = dom1rep.lstrip()
-                    dom1inc           = fields[17];  dom1inc         = dom1inc.lstrip()
-                    # Target description is not found in the profile search output.
-                    # Needs to be queried from the annotation file, for VOGs, and
-                    # from the headers file, for pVOGs.
-                    targetDescription = '' 
-                    if match_pvog:
-                        targetDescription = self.getDescription4pvog(targetName)
-                    elif match_vog:
-                        targetDescription = self.getDescription4vog(targetName)
-                    else:
-                        print("phate_profiles says, ERROR: database not recognized: ",dbName)
-                    vogIDs = ''; VOGlist = []
-                    if re.search("vog",database.lower()):
-                        # Collect VOG identifiers for this hmm/profile search hit; fasta header of target may have >= 1 VOG identifier
-                        VOGlist = re.findall('VOG\d+', targetName)
-                        if VOGlist:
-                            for VOG in VOGlist:
-                                vogIDs += VOG + ' '
-                            vogIDs.rstrip()
-                     
-                    # Create new hitDataSet object and store data (note: some data may not be stored)
-                    newSequenceDataSet = copy.deepcopy(sequenceDataSet)
-                    newSequenceDataSet["hitNumber"]       = hitCount
-                    newSequenceDataSet["hitSequenceName"] = targetName
-                    newSequenceDataSet["hitDescription"]  = targetDescription
-                    newSequenceDataSet["hitVOG"]          = vogIDs
-                    newSequenceDataSet["hitEvalue"]       = seqEvalue
-                    newSequenceDataSet["hitScore"]        = seqScore
-                    newSequenceDataSet["hitBias"]         = seqBias
-                    newSequenceDataSet["domEvalue"]       = dom1evalue
-                    newSequenceDataSet["domScore"]        = dom1score
-                    newSequenceDataSet["domBias"]         = dom1bias
-                    newSequenceDataSet["domExp"]          = dom1exp
-                    hitList.append(newSequenceDataSet)
-                    if hitCount >= MAX_SEQ_HITS:
-                        break # enough hits; we are done!
-
-            # Collect all pVOG identifiers for this hmm search, then remove redundancy from list
-            vogs = []; tempVOGlist = []; nrVOGlist = []
-            for hit in hitList:
-                if hit["hitVOG"]:
-                    vogs = hit["hitVOG"].split(' ')
-                    for vog in vogs:
-                        tempVOGlist.append(vog)  # Now we have a complete (super)set of all pVOG identifiers found in hmm search 
-            nrVOGlist = list(set(tempVOGlist)) # create a set, then convert back to list: presto! non-redundant list
-
-            # Parse the domain-level hmm data
-            # There can be multiple domain-level hits for a given sequence (global) hit (above)
-            # Process each domain hit, then identify its corresponding sequence-level hit, and add to that object
-            # Data are in explicitly defined fields (columns)
+            seqOutfileH.close()
             domOutfileH = open(domOutfile,"r")
             dLines = domOutfileH.read().splitlines()
-            for dLine in dLines:
-                match_comment = re.search('^#',dLine)
-                if match_comment:
-                    continue
-                else:  # extract data fields and remove preceding or trailing whitespace
-                    fields = dLine.split()
-                    targetName        = fields[0];  targetName = targetName.rstrip()
-                    targetAccession   = fields[1];  targetAccession = targetAccession.rstrip()
-                    targetLength      = fields[2];  targetLength = targetLength.lstrip()
-                    queryName         = fields[3];  queryName = queryName.rstrip()
-                    queryAccession    = fields[4];  queryAccession = queryAccession.rstrip()
-                    queryLength       = fields[5];  queryLength = queryLength.lstrip()
-                    fullSeqEvalue     = fields[6];  fullSeqEvalue = fullSeqEvalue.lstrip()
-                    fullSeqScore      = fields[7];  fullSeqScore = fullSeqScore.lstrip()
-                    fullSeqBias       = fields[8];  fullSeqBias = fullSeqBias.lstrip()
-                    domainNumber      = fields[9];  domainNumber = domainNumber.lstrip()
-                    domOf             = fields[10]; domOf = domOf.lstrip()
-                    cEvalue           = fields[11]; cEvalue = cEvalue.lstrip()
-                    iEvalue           = fields[12]; iEvalue = iEvalue.lstrip()
-                    score             = fields[13]; score = score.lstrip()
-                    bias              = fields[14]; bias = bias.lstrip()
-                    hmmFrom           = fields[15]; hmmFrom = hmmFrom.lstrip()
-                    hmmTo             = fields[16]; hmmTo = hmmTo.lstrip()
-                    alignFrom         = fields[17]; alignFrom = alignFrom.lstrip()
-                    alignTo           = fields[18]; alignTo = alignTo.lstrip()
-                    envFrom           = fields[19]; envFrom = envFrom.lstrip()
-                    envTo             = fields[20]; envTo = envTo.lstrip()
-                    acc               = fields[21]; acc = acc.lstrip()
-                    targetDescription = fields[22]; targetDescription = targetDescription.rstrip()
-                    
-                    # Create new domDataSet object and store data 
-                    newDomainDataSet = copy.deepcopy(domainDataSet)
-                    newDomainDataSet["number"]    = domainNumber
-                    newDomainDataSet["score"]     = score 
-                    newDomainDataSet["c-Evalue"]  = cEvalue
-                    newDomainDataSet["i-Evalue"]  = iEvalue
-                    newDomainDataSet["hmmFrom"]   = hmmFrom
-                    newDomainDataSet["hmmTo"]     = hmmTo
-                    newDomainDataSet["alignFrom"] = alignFrom
-                    newDomainDataSet["alignTo"]   = alignTo
-                    newDomainDataSet["envFrom"]   = envFrom
-                    newDomainDataSet["envTo"]     = envTo
-                    newDomainDataSet["acc"]       = acc  
-
-                    # Figure out which seqDataSet to add this domDataSet to
-                    FOUND = False
-                    for hit in hitList:
-                        if hit["hitSequenceName"] == targetName:
-                            hit["hitDomainList"].append(newDomainDataSet)
-                            FOUND = True
-                    if not FOUND:
-                        if PHATE_WARNINGS:
-                            print("phate_profile says, WARNING: sequence data object not found for domain object", targetName)
-
-            # Close HMM output files
-            seqOutfileH.close()
             domOutfileH.close()
-
-            # Assuming there were hits...create an annotation object, and fill with sequence- and domain- hit data 
-            if hitList:
-                for hit in hitList:
-                    # Extract hmm info from hitLine and stash into new annotation object
-                    newAnnotation = copy.deepcopy(annotation) 
-                    newAnnotation.source         = database 
-                    newAnnotation.method         = self.profileProgram
-                    newAnnotation.annotationType = "profile search"
-                    newAnnotation.name           = hit["hitSequenceName"] # subject
-                    newAnnotation.start          = '1' # query start
-                    newAnnotation.end            = 'N' # query end
-                    newAnnotation.category       = "hmm"
-                    newAnnotation.description    = hit["hitDescription"]  # Note: this field appears to be blank for hmmscan
-
-                    # Extract VOG identifier(s) from hit's header (if VOG or VOG database)
-                    VOGlist = []
-                    VOGlist = hit["hitVOG"].split(' ')
-                    for VOG in VOGlist: 
-                        newAnnotation.VOGlist.append(VOG)
-
-                    # Collapse all domain hits as into an annotation list for this sequence/global hit
-                    for domain in hit["hitDomainList"]:
-                        #resultString  = VOGstring                           + '|'
-                        resultString  = "domainNo:"    + domain["number"]    + '|'
-                        resultString += "score:"       + domain["score"]     + '|'
-                        resultString += "c-E:"         + domain["c-Evalue"]  + '|'
-                        resultString += "i-E:"         + domain["i-Evalue"]  + '|'
-                        resultString += "hmmFrom:"     + domain["hmmFrom"]   + '|'
-                        resultString += "hmmTo:"       + domain["hmmTo"]     + '|'
-                        resultString += "alignFrom:"   + domain["alignFrom"] + '|'
-                        resultString += "alignTo:"     + domain["alignTo"]   + '|'
-                        resultString += "envFrom:"     + domain["envFrom"]   + '|'
-                        resultString += "envTo:"       + domain["envTo"]     + '|'
-                        resultString += "acc:"         + domain["acc"]       + '|'
-                        newAnnotation.annotationList.append(resultString)
-
-                    # For VOG description, get annotation from file
-                    if newAnnotation.VOGlist:
-                        if dbName.lower() == 'vogs' or dbName.lower() == 'vog':
-                           newAnnotation.link2databaseIdentifiers(database,dbName)
-
-                    # Add this completed annotation to growing list for this fasta
-                    fasta.annotationList.append(newAnnotation)
-            else:
-                if PHATE_MESSAGES:
-                    print("phate_profiles says, No Profile hit found for query", fasta.blastHeader, "against", database)    
+            self.profileHits2annotations(fasta,sLines,dLines,database,dbName)
 
         # Requested Hmm/Profile output format not supported
         else:
             if PHATE_WARNINGS:
                 print("phate_profile says, WARNING: Output format", self.outputFormat, "not yet supported in phate_profile.py/profile1fasta(). Use TBL format for now.")
 
+    # Search a batch of fasta sequences with a single hmmscan run. The combined TBL outputs are split by query,
+    # and each query's hit lines are parsed exactly as for a single-sequence search (see profile1fasta).
+    def profileBatch(self,fastaList,outfile,database,dbName): # fastaList is a list of phate_fastaSequence.fasta objects
+
+        # Write all query sequences to one temporary file, each named by its position in the batch,
+        # so that hit lines can be assigned to their queries regardless of the sequences' headers
+        fastaFile  = outfile + ".query.fasta"
+        fastaFileH = open(fastaFile,"w")
+        for i in range(0,len(fastaList)):
+            fastaFileH.write("%c%s%s\n%s\n" % ('>',BATCH_QUERY_PREFIX,str(i + 1),fastaList[i].sequence))
+        fastaFileH.close()
+
+        seqOutfile = outfile + '.hmmscan.seqout'
+        domOutfile = outfile + '.hmmscan.domout'
+        stdOutfile = outfile + '.hmmscan.stdout'
+
+        command = self.getProfileCommand(fastaFile,outfile,database)
+        self.executeProfile(command,stdOutfile)
+
+        if self.outputFormat == XML or self.outputFormat == LIST:
+            if PHATE_WARNINGS:
+                print("phate_profile says, WARNING: Only TBL format is currently being used for hmmscan output parsing; setting as TBL.")
+            self.outputFormat = TBL
+
+        # Split the sequence-level (query name in column 3) and domain-level (column 4) hit lines by query
+        seqLines = {}; domLines = {}
+        seqOutfileH = open(seqOutfile,"r")
+        for sLine in seqOutfileH.read().splitlines():
+            if not sLine.startswith('#'):
+                seqLines.setdefault(sLine.split()[2],[]).append(sLine)
+        seqOutfileH.close()
+        domOutfileH = open(domOutfile,"r")
+        for dLine in domOutfileH.read().splitlines():
+            if not dLine.startswith('#'):
+                domLines.setdefault(dLine.split()[3],[]).append(dLine)
+        domOutfileH.close()
+
+        for i in range(0,len(fastaList)):
+            queryName = BATCH_QUERY_PREFIX + str(i + 1)
+            self.profileHits2annotations(fastaList[i],seqLines.get(queryName,[]),domLines.get(queryName,[]),database,dbName)
+
     def runProfile(self,fastaSet,dbType="protein"): # fastaSet is a phate_fastaSequence.multiFasta object
 
         # Set sequence type 
@@ -565,6 +632,15 @@ class multiProfile(object):
                 print("phate_profile says, WARNING: unrecognized database type in runProfile:", dbType)
             return
                
+        if self.scheduler:
+            scheduler = self.scheduler
+        else:
+            scheduler = phate_scheduler.searchScheduler()
+
+        # Queued searches may execute after this object's parameters have been reset, so queue them
+        # on a copy. The copy shares completionList with this object.
+        searcher = copy.copy(self)
+
         # Set database variable, invoke HMM program for each fasta 
         database = ''
 
@@ -576,69 +652,45 @@ class multiProfile(object):
             if self.REFSEQ_GENE_PROFILE:
                 database = REFSEQ_GENE_PROFILE_DB_HOME # same database as blast uses
                 dbName   = 'refseqGene'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running Refseq gene hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.geneProfileOutDir + self.profileProgram + "_refseqGene_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.profileFastaSet(fastaSet,searcher.geneProfileOutDir,"_refseqGene_",database,dbName,scheduler)
 
         if PROTEIN:
             if self.NR_PROFILE:  
                 database = NR_PROFILE_DB_HOME 
                 dbName   = 'nr'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running NR hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_nrProfile_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_nrProfile_",database,dbName,scheduler)
 
             if self.NCBI_VIRUS_PROTEIN_PROFILE:  
                 database = NCBI_VIRUS_PROTEIN_PROFILE_DB_HOME 
                 dbName   = 'ncbiVirusProteinHmm'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running NCBI_VIRUS_PROTEIN hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_ncbiVirProtProfile_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_ncbiVirProtProfile_",database,dbName,scheduler)
 
             if self.REFSEQ_PROTEIN_PROFILE:
                 database = REFSEQ_PROTEIN_PROFILE_DB_HOME 
                 dbName   = 'refseqProteinHmm'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running Refseq protein hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_refseqProteinProfile_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)  #*** CONTROL
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_refseqProteinProfile_",database,dbName,scheduler)
 
             if self.PHANTOME_PROFILE:
                 database = PHANTOME_PROFILE_DB_HOME # same database as blast uses
                 dbName   = 'phantomeProfile'
-                count = 0 
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running PHANTOME hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_phantomeProfile_" +str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_phantomeProfile_",database,dbName,scheduler)
 
             if self.KEGG_VIRUS_PROFILE: 
                 database = KEGG_VIRUS_PROFILE_DB_HOME # same database as blast uses
                 dbName   = 'keggProfile'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running KEGG hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_keggProfile_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_keggProfile_",database,dbName,scheduler)
 
             if self.SWISSPROT_PROFILE: 
                 database = SWISSPROT_PROFILE_DB_HOME # same database as blast uses
@@ -654,134 +706,128 @@ class multiProfile(object):
             if self.PHAGE_ENZYME_PROFILE: 
                 database = PHAGE_ENZYME_PROFILE_DB_HOME 
                 dbName   = 'phageEnzProfile'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running phage enzyme hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_phageEnzProfile_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)   #*** CONTROL
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_phageEnzProfile_",database,dbName,scheduler)
 
             if self.PVOGS_PROFILE:  
                 database = PVOGS_PROFILE_DB_HOME 
                 pVOGseqDB = PVOG_SEQUENCES
                 dbName   = 'pVOGsHmm'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running pVOGs hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_pvogHmm_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_pvogHmm_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_profile says: pVOGs hmm/profile search complete.")
                     print("phate_profile says: Collecting and saving pVOG sequences corresponding to hmm/profile hit(s)")
 
                 # Next you want to create pVOG fasta group files so user can do alignments
-                # You need only one "alignment" file per pVOG group that the fasta hit (under blast cutoffs)
-                # Capture pVOG.faa lines
-                #pVOGs_h = open(database,"r")
-                pVOGs_h = open(pVOGseqDB,"r")
-                pVOGlines = pVOGs_h.read().splitlines()
-                pVOGs_h.close()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    pvogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for pVOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            if pVOG != '':
-                                match_good = re.search('VOG',pVOG)
-                                if match_good:
-                                    # Avoid redundancy in printing pVOG groups for this fasta; only once per pVOG ID that was an hmm hit
-                                    if pVOG not in pvogPrintedList:
-                                        pvogPrintedList.append(pVOG)  # Record this pVOG identifier as "done"
-                                        # create dynamic file name
-                                        countA += 1 
-                                        outfilePVOG = self.pVOGsOutDir + "profile_pvogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        # open file and write current fasta pluse each corresponding pVOG fasta
-                                        outfilePVOG_h = open(outfilePVOG,'w')
-                                        outfilePVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                        self.writeVOGsequences2file(outfilePVOG_h,pVOGlines,pVOG)                  # followed by the pVOG group
-                                        outfilePVOG_h.close()
-                                else:
-                                    if PHATE_WARNINGS:
-                                        print("phate_profiles says, WARNING: unexpected pVOG identifier:", pVOG)        
+                # These are written once the profile results have been merged onto the fastas (see completeProfile)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,pVOGseqDB,searcher.pVOGsOutDir + "profile_pvogGroup_")))
 
             if self.VOGS_PROFILE:  
                 database = VOGS_PROFILE_DB_HOME 
                 VOGseqDB = VOG_SEQUENCES
                 dbName   = 'VOGsHmm'
-                count = 0
                 if PHATE_PROGRESS:
                     print("phate_profile says: Running VOGs hmm/profile search:", database, dbName)
-                for fasta in fastaSet.fastaList:
-                    count += 1
-                    outfile = self.proteinProfileOutDir + self.profileProgram + "_vogHmm_" + str(count)
-                    self.profile1fasta(fasta,outfile,database,dbName)
+                searcher.profileFastaSet(fastaSet,searcher.proteinProfileOutDir,"_vogHmm_",database,dbName,scheduler)
 
                 if PHATE_PROGRESS:
                     print("phate_profile says: VOGs hmm/profile search complete.")
                     print("phate_profile says: Collecting and saving VOG sequences corresponding to hmm/profile hit(s)")
 
                 # Next you want to create VOG fasta group files so user can do alignments
-                # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
-                # Capture VOG.faa lines
-                #VOGs_h = open(database,"r")
-                VOGs_h = open(VOGseqDB,"r")
-                VOGlines = VOGs_h.read().splitlines()
-                VOGs_h.close()
-                count = 0; countA = 0
-                for fasta in fastaSet.fastaList:
-                    vogPrintedList = []  # keeps track of pVOGs that have already been printed for current fasta
-                    count += 1 
-                    countA = 0
-                    for annot in fasta.annotationList:
-                        for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
-                            if VOG != '':
-                                match_good = re.search('VOG',VOG)
-                                if match_good:
-                                    # Avoid redundancy in printing VOG groups for this fasta; only once per pVOG ID that was an hmm hit
-                                    if VOG not in vogPrintedList:
-                                        vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
-                                        # create dynamic file name
-                                        countA += 1 
-                                        outfileVOG = self.VOGsOutDir + "profile_vogGroup_" + str(count) + '_' + str(countA) + '.faa' 
-                                        # open file and write current fasta plus each corresponding VOG fasta
-                                        outfileVOG_h = open(outfileVOG,'w')
-                                        outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
-                                        self.writeVOGsequences2file(outfileVOG_h,VOGlines,VOG)                  # followed by the VOG group
-                                        outfileVOG_h.close()
-                                else:
-                                    if PHATE_WARNINGS:
-                                        print("phate_profiles says, WARNING: unexpected VOG identifier:", VOG)        
+                # These are written once the profile results have been merged onto the fastas (see completeProfile)
+                self.completionList.append((searcher.writeVOGgroupFiles,(fastaSet,VOGseqDB,searcher.VOGsOutDir + "profile_vogGroup_")))
 
         if CLEAN_RAW_DATA == 'True':
             if PHATE_PROGRESS:
                 print("phate_profile says: Removing raw data files.")
-            self.cleanProfileOutDir()
-
-    def writeVOGsequences2file(self,FILE_H,lines,VOG):
-        VOGheader = ""; VOGsequence = ""; GET_SEQ = False
-        for i in range(0,len(lines)-1):
-            nextLine = lines[i]
-            match_header = re.search('>',nextLine)
-            match_VOG = re.search(VOG,nextLine)
-
-            if match_header:   
-                if GET_SEQ:
-                    FILE_H.write("%s\n%s\n" % (VOGheader,VOGsequence))
-                    VOGheader = ""; VOGsequence = ""
-                    GET_SEQ = False
-
-                if match_VOG:
-                    VOGheader = nextLine
-                    GET_SEQ = True
-
-            elif GET_SEQ:
-                VOGsequence = VOGsequence + nextLine
+            self.completionList.append((searcher.cleanProfileOutDir,()))
+
+        if not self.scheduler:
+            scheduler.runTasks()
+            self.completeProfile()
+
+    # Search each fasta in fastaSet against database. Each search is added to the scheduler as a task that
+    # annotates a shadow copy of the fasta; merging onto fastaSet is queued on completionList (see completeProfile).
+    # If profileBatchSize is set, each task searches a batch of fastas with one hmmscan run (see profileBatch).
+    def profileFastaSet(self,fastaSet,outDir,outfileTag,database,dbName,scheduler): # fastaSet is a phate_fastaSequence.multiFasta object
+        # With the annotation cache on, only sequences not already searched are queued (see phate_annotationCache.py)
+        annotationCache = phate_annotationCache.getAnnotationCache()
+        plan = None
+        if annotationCache.isEnabled():
+            searchKey = annotationCache.getSearchKey(self.profileProgram,database,dbName,self.getCacheParameterString())
+            plan = annotationCache.planSearch(fastaSet,searchKey,self.profileProgram)
+            fastaSet = plan.querySet
+        if self.profileBatchSize == 0:
+            count = 0
+            for fasta in fastaSet.fastaList:
+                count += 1
+                outfile = outDir + self.profileProgram + outfileTag + str(count)
+                shadowList = scheduler.createShadowFastas([fasta])
+                task = scheduler.addTask(outfile,self.profile1fasta,(shadowList[0],outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,([fasta],shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        else:
+            batchSize = self.profileBatchSize
+            if batchSize == -1:
+                batchSize = len(fastaSet.fastaList)
+            batchCount = 0
+            for i in range(0,len(fastaSet.fastaList),batchSize):
+                batchCount += 1
+                outfile = outDir + self.profileProgram + outfileTag + "batch_" + str(batchCount)
+                fastaList  = fastaSet.fastaList[i:i+batchSize]
+                shadowList = scheduler.createShadowFastas(fastaList)
+                task = scheduler.addTask(outfile,self.profileBatch,(shadowList,outfile,database,dbName))
+                self.completionList.append((scheduler.mergeShadowFastas,(fastaList,shadowList)))
+                if plan:
+                    plan.taskList.append(task)
+        if plan:
+            self.completionList.append((annotationCache.completeSearch,(plan,)))
+
+    # Merge queued profile results onto the fastas, and do any post-processing, in the order a serial run would 
+    def completeProfile(self):
+        completionList = self.completionList
+        self.completionList = []
+        for (function,args) in completionList:
+            function(*args)
+
+    def setScheduler(self,scheduler):
+        self.scheduler = scheduler
+
+    # Write one fasta group file for each (p)VOG that a fasta hit: the fasta, followed by the group's sequences
+    def writeVOGgroupFiles(self,fastaSet,VOGseqDB,outfileRoot):
+        # You need only one "alignment" file per VOG group that the fasta hit (under blast cutoffs)
+        # Index of VOG group members in the VOG database (see phate_vogIndex.py)
+        vogIndex = phate_vogIndex.getVOGgroupIndex(VOGseqDB)
+        count = 0; countA = 0
+        for fasta in fastaSet.fastaList:
+            vogPrintedList = []  # keeps track of VOGs that have already been printed for current fasta
+            count += 1 
+            countA = 0
+            for annot in fasta.annotationList:
+                for VOG in annot.VOGlist:  # There may be multiple annotations to inspect
+                    if VOG != '':
+                        match_good = re.search('VOG',VOG)
+                        if match_good:
+                            # Avoid redundancy in printing VOG groups for this fasta; only once per VOG ID that was an hmm hit
+                            if VOG not in vogPrintedList:
+                                vogPrintedList.append(VOG)  # Record this VOG identifier as "done"
+                                # create dynamic file name
+                                countA += 1 
+                                outfileVOG = outfileRoot + str(count) + '_' + str(countA) + '.faa' 
+                                # open file and write current fasta plus each corresponding VOG fasta
+                                outfileVOG_h = open(outfileVOG,'w')
+                                outfileVOG_h.write("%c%s\n%s\n" % ('>',fasta.header,fasta.sequence)) # write the current peptide fasta,
+                                vogIndex.writeGroup(outfileVOG_h,VOG)                                # followed by the VOG group
+                                outfileVOG_h.close()
+                        else:
+                            if PHATE_WARNINGS:
+                                print("phate_profiles says, WARNING: unexpected VOG identifier:", VOG)        
 
     def cleanProfileOutDir(self):  # Remove temporary files from HMM_OUT_DIR
         #command = "ls " + HMM_OUT_DIR  #*** FIX: list only files, not directories too
@@ -813,6 +859,8 @@ class multiProfile(object):
         print("   geneProfileOutDir:          ", self.geneProfileOutDir)
         print("   proteinProfileOutDir:       ", self.proteinProfileOutDir)
         print("   hmmscan:                    ", self.hmmscan)
+        print("   profileBatchSize:           ", self.profileBatchSize)
+        print("   hmmThreads:                 ", self.hmmThreads)
         print("   pVOGsOutDir:                ", self.pVOGsOutDir)
         print("   NCBI_VIRUS_GENOME_PROFILE:  ", self.NCBI_VIRUS_GENOME_PROFILE)
         print("   NCBI_VIRUS_PROTEIN_PROFILE: ", self.NCBI_VIRUS_PROTEIN_PROFILE)
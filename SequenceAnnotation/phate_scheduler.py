@@ -0,0 +1,150 @@
+############################################################################
+#
+# Name:  phate_scheduler.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# This class runs sequence annotation searches (blast, jackhmmer/phmmer, hmmscan) as a set of
+# independent tasks, one task per (database, tool, query chunk), on a bounded pool of workers.
+# Each task searches a "shadow" copy of its query fastas, so that tasks never write to the same
+# annotation list. Once all tasks are done, the calling module merges the shadow annotations back
+# onto the real fastas in the same order a serial run would have produced them, so annotation
+# output (tab and gff) is unchanged by concurrency.
+#
+# The search codes are external programs (blast+, hmmer); workers are therefore threads, which
+# spend their time waiting on the external processes. The number of workers is the cpu budget
+# divided by the number of threads each search itself uses (e.g., blast_threads).
+#
+# Classes and Methods:
+#    searchTask
+#    searchScheduler
+#       setCpuBudget(cpuBudget,threadsPerTask)
+#       getWorkerCount
+#       addTask(label,function,args)
+#       runTasks
+#       createShadowFastas(fastaList)
+#       mergeShadowFastas(fastaList,shadowList)
+#       printParameters2file(fileH)
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import copy
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Verbosity
+PHATE_WARNINGS_STRING         = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_MESSAGES_STRING         = os.environ["PHATE_PHATE_MESSAGES"]
+PHATE_PROGRESS_STRING         = os.environ["PHATE_PHATE_PROGRESS"]
+PHATE_WARNINGS = False
+PHATE_MESSAGES = False
+PHATE_PROGRESS = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+if PHATE_MESSAGES_STRING.lower() == 'true':
+    PHATE_MESSAGES = True
+if PHATE_PROGRESS_STRING.lower() == 'true':
+    PHATE_PROGRESS = True
+
+class searchTask(object):
+
+    def __init__(self,label,function,args):
+        self.label    = label     # for messages, e.g., "blastp_nr_batch_1"
+        self.function = function  # method to call, e.g., a multiBlast object's blast1fasta
+        self.args     = args      # tuple of arguments to pass to function
+        self.result   = None      # value returned by function
+        self.error    = ""        # set if function raised an exception
+        self.done     = False
+
+    def run(self):
+        try:
+            self.result = self.function(*self.args)
+        except Exception as e:
+            self.error = str(e)
+            if PHATE_WARNINGS:
+                print("phate_scheduler says, WARNING: Search task", self.label, "failed:", self.error)
+        self.done = True
+        return self
+
+class searchScheduler(object):
+
+    def __init__(self):
+        self.cpuBudget      = 1   # total number of cpus the searches may use; 1 => run tasks serially
+        self.threadsPerTask = 1   # cpus used by each search (e.g., blast -num_threads)
+        self.taskList       = []  # tasks not yet run, in the order they were added
+        self.taskCount      = 0   # total tasks run
+        self.failCount      = 0   # total tasks that raised an exception
+
+    def setCpuBudget(self,cpuBudget,threadsPerTask=1):
+        if str(cpuBudget).lower() == 'all' or str(cpuBudget).lower() == 'max':
+            cpuBudget = os.cpu_count()
+        if int(cpuBudget) >= 1:
+            self.cpuBudget = int(cpuBudget)
+        else:
+            self.cpuBudget = 1
+        if int(threadsPerTask) >= 1:
+            self.threadsPerTask = int(threadsPerTask)
+        else:
+            self.threadsPerTask = 1
+
+    def getWorkerCount(self):
+        workers = self.cpuBudget // self.threadsPerTask
+        if workers < 1:
+            workers = 1
+        if len(self.taskList) > 0 and workers > len(self.taskList):
+            workers = len(self.taskList)
+        return workers
+
+    def addTask(self,label,function,args):
+        newTask = searchTask(label,function,args)
+        self.taskList.append(newTask)
+        return newTask
+
+    # Run all pending tasks; returns the tasks in the order they were added
+    def runTasks(self):
+        taskList = self.taskList
+        self.taskList = []
+        if not taskList:
+            return taskList
+        workers = self.getWorkerCount()
+        if PHATE_PROGRESS:
+            print("phate_scheduler says, Running", len(taskList), "search tasks on", workers, "worker(s) at", datetime.datetime.now())
+        if workers == 1:
+            for task in taskList:
+                task.run()
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(searchTask.run,taskList))
+        self.taskCount += len(taskList)
+        for task in taskList:
+            if task.error:
+                self.failCount += 1
+        if PHATE_PROGRESS:
+            print("phate_scheduler says, Search tasks complete at", datetime.datetime.now())
+        return taskList
+
+    # Shallow copies of the fastas, each with its own (empty) annotation list
+    def createShadowFastas(self,fastaList):
+        shadowList = []
+        for fasta in fastaList:
+            shadow = copy.copy(fasta)
+            shadow.annotationList = []
+            shadowList.append(shadow)
+        return shadowList
+
+    # Append each shadow fasta's annotations to its real fasta, preserving annotation order
+    def mergeShadowFastas(self,fastaList,shadowList):
+        for i in range(0,len(fastaList)):
+            fastaList[i].annotationList.extend(shadowList[i].annotationList)
+
+    def printParameters2file(self,fileH):
+        fileH.write("%s%s\n" % ("   search cpu budget: ",self.cpuBudget))
+        fileH.write("%s%s\n" % ("   threads per search: ",self.threadsPerTask))
+        fileH.write("%s%s\n" % ("   search workers: ",self.cpuBudget // self.threadsPerTask))
@@ -149,6 +149,9 @@ import phate_annotation     # records annotations, including gene-call info and
 import phate_blast          # runs blast search against blast database(s) 
 import phate_hmm            # runs hmm search against specified sequence database(s) 
 import phate_profile        # runs hmm search against specified hmm profile database(s)
+import phate_scheduler      # runs blast, hmm, and profile database searches concurrently
+import phate_annotationCatalog # VOG, pVOG, and CAZy annotation look-up tables, loaded once per run
+import phate_annotationCache   # per-gene search results, reused for identical sequences within and across runs
 
 ##### FILES
 
@@ -173,6 +176,12 @@ blastpIdentity  = BLASTP_IDENTITY_DEFAULT  # integer percent identity cutoff
 blastnIdentity  = BLASTN_IDENTITY_DEFAULT  # integer percent identity cutoff
 blastpHitCount  = BLASTP_HIT_COUNT_DEFAULT # number of top hits to capture
 blastnHitCount  = BLASTN_HIT_COUNT_DEFAULT # number of top blastn hits to capture 
+blastBatchSize  = 0                        # number of queries per blast run; 0 => one at a time, -1 => all at once
+searchThreads   = 0                        # cpus for concurrent database searches; 0 or 1 => one search at a time
+profileBatchSize = 0                       # number of queries per hmmscan run; 0 => one at a time, -1 => all at once
+hmmThreads      = 0                        # cpus per hmmer run; 0 => hmmer's default
+hmmBatchSize    = 0                        # number of queries per jackhmmer/phmmer run; 0 => one at a time, -1 => all at once
+annotationCacheSize = 0                    # maximum entries in the per-gene annotation cache; 0 => no cache, -1 => no limit
 geneticCode     = GENETIC_CODE             # default, unless changed
 
 ##### BOOLEANS:  These may be changed by input parameters
@@ -253,6 +262,12 @@ p_blastnIdentityParam        = re.compile('^-j')   # blastn identity cutoff
 p_blastpHitCountParam        = re.compile('^-h')   # blastp top hit count
 p_blastnHitCountParam        = re.compile('^-H')   # blastn top hit count
 p_blastThreadsParam          = re.compile('^-z')   # number of blast threads to execute
+p_blastBatchSizeParam        = re.compile('^-y')   # number of query sequences per blast run
+p_searchThreadsParam         = re.compile('^-T')   # number of cpus for concurrent database searches
+p_profileBatchSizeParam      = re.compile('^-P')   # number of query sequences per hmmscan run
+p_hmmThreadsParam            = re.compile('^-u')   # number of cpus per hmmer run
+p_hmmBatchSizeParam          = re.compile('^-Y')   # number of query sequences per jackhmmer/phmmer run
+p_annotationCacheSizeParam   = re.compile('^-A')   # maximum number of entries in the per-gene annotation cache
 p_translateOnlyParam         = re.compile('^-x')   # if user passes 'true' => get genes, translate, compare, then stop before annotation
 p_blastDatabaseStringParam   = re.compile('^-b')   # string listing database(s) to blast against
 p_blastProgramStringParam    = re.compile('^-B')   # string listing hmm program and database(s) to search against
@@ -350,6 +365,12 @@ for i in range(0,argCount):
     match_blastpHitCountParam        = re.search(p_blastpHitCountParam,        argList[i])
     match_blastnHitCountParam        = re.search(p_blastnHitCountParam,        argList[i])
     match_blastThreadsParam          = re.search(p_blastThreadsParam,          argList[i])
+    match_blastBatchSizeParam        = re.search(p_blastBatchSizeParam,        argList[i])
+    match_searchThreadsParam         = re.search(p_searchThreadsParam,         argList[i])
+    match_profileBatchSizeParam      = re.search(p_profileBatchSizeParam,      argList[i])
+    match_hmmThreadsParam            = re.search(p_hmmThreadsParam,            argList[i])
+    match_hmmBatchSizeParam          = re.search(p_hmmBatchSizeParam,          argList[i])
+    match_annotationCacheSizeParam   = re.search(p_annotationCacheSizeParam,   argList[i])
 
     match_blastDatabaseStringParam   = re.search(p_blastDatabaseStringParam,   argList[i]) # blast databases
     match_blastProgramStringParam    = re.search(p_blastProgramStringParam,    argList[i]) # blast programs for blast database search
@@ -452,6 +473,42 @@ for i in range(0,argCount):
             else:
                 blastThreads = 0
 
+    if match_blastBatchSizeParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= -1:
+                blastBatchSize = int(value)
+
+    if match_searchThreadsParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= 0:
+                searchThreads = int(value)
+
+    if match_profileBatchSizeParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= -1:
+                profileBatchSize = int(value)
+
+    if match_hmmThreadsParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= 0:
+                hmmThreads = int(value)
+
+    if match_hmmBatchSizeParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= -1:
+                hmmBatchSize = int(value)
+
+    if match_annotationCacheSizeParam:
+        if i < argCount:
+            value = argList[i+1]
+            if int(value) >= -1:
+                annotationCacheSize = int(value)
+
     # Blast, Hmm, and Profile database processing
 
     if match_blastDatabaseStringParam: # blast databases to use (blast DBs are seq DBs formatted with makeblastdb)
@@ -781,6 +838,12 @@ LOGFILE_H.write("%s%s\n" % ("blastnIdentity is ",blastnIdentity))
 LOGFILE_H.write("%s%s\n" % ("blastpHitCount is ",blastpHitCount))
 LOGFILE_H.write("%s%s\n" % ("blastnHitCount is ",blastnHitCount))
 LOGFILE_H.write("%s%s\n" % ("blastThreads is ",str(blastThreads)))
+LOGFILE_H.write("%s%s\n" % ("blastBatchSize is ",str(blastBatchSize)))
+LOGFILE_H.write("%s%s\n" % ("searchThreads is ",str(searchThreads)))
+LOGFILE_H.write("%s%s\n" % ("profileBatchSize is ",str(profileBatchSize)))
+LOGFILE_H.write("%s%s\n" % ("hmmThreads is ",str(hmmThreads)))
+LOGFILE_H.write("%s%s\n" % ("hmmBatchSize is ",str(hmmBatchSize)))
+LOGFILE_H.write("%s%s\n" % ("annotationCacheSize is ",str(annotationCacheSize)))
 if TRANSLATE_ONLY:
     LOGFILE_H.write("%s\n" % ("Translating only; no annotation."))
 else:
@@ -857,6 +920,11 @@ if PHATE_MESSAGES:
     print("  blastp hit count is", blastpHitCount)
     print("  blastn hit count is", blastnHitCount)
     print("  blastThreads is", blastThreads)
+    print("  searchThreads is", searchThreads)
+    print("  profileBatchSize is", profileBatchSize)
+    print("  hmmThreads is", hmmThreads)
+    print("  hmmBatchSize is", hmmBatchSize)
+    print("  annotationCacheSize is", annotationCacheSize)
     if TRANSLATE_ONLY:
         print("  Translating only; no annotation.")
     else:
@@ -929,9 +997,9 @@ myGenome.genomeName    = genomeName
 myGenome.genomeSpecies = genomeSpecies 
 myGenome.setCodeBaseDir(CODE_BASE_DIR)
 myGenome.setOutputDir(outputDir)
+myGenome.setGeneticCode(geneticCode)
 LOGFILE_H.write("%s\n" % ("Reading sequence into genome object"))
-gLines = GENOME_FILE.read().splitlines()
-myGenome.contigSet.addFastas(gLines,'nt')
+myGenome.contigSet.addFastas(GENOME_FILE,'nt')  # read line by line
 if PHATE_MESSAGES:
     print("phate_sequenceAnnotation_main says, contigName is", myGenome.contigSet.contig)
 
@@ -991,12 +1059,22 @@ if TRANSLATE_ONLY:
     LOGFILE_H.write("%s%s\n" % ("Translating only: computations completed at ",datetime.datetime.now()))
 else:
     ######################################################## ANNOTATE ####################################################
+    # If more than one cpu is allotted to searches, the blast, hmm, and profile objects queue their searches
+    # on a shared scheduler, which runs them all concurrently before the annotations are reported (see below)
+    searchScheduler = None
+    if searchThreads > 1:
+        searchScheduler = phate_scheduler.searchScheduler()
+
+    # If the annotation cache is on, searches are run only for sequences whose results are not already cached
+    phate_annotationCache.getAnnotationCache().setMaxEntries(annotationCacheSize)
+
     # Create a blast object and set parameters
     if RUN_BLAST:
         if PHATE_PROGRESS:
             print("phate_sequenceAnnotation_main says, Preparing for blast...")
         LOGFILE_H.write("%s\n" % ("Creating a blast object"))
         blast = phate_blast.multiBlast()
+        blast.setScheduler(searchScheduler)
 
         if PHATE_PROGRESS:
             print("phate_sequenceAnnotation_main says, Preparing to run", blast.blastFlavor)
@@ -1020,6 +1098,7 @@ else:
             print("phate_sequenceAnnotation_main says, Preparing for hmm...")
         LOGFILE_H.write("%s\n" % ("Creating an hmm object"))
         hmm = phate_hmm.multiHMM()
+        hmm.setScheduler(searchScheduler)
 
         # Create directory for hmm output
         hmmOutputDir = outputDir + 'HMM/'
@@ -1035,6 +1114,7 @@ else:
             print("phate_sequenceAnnotation_main says, Preparing for profile search...")
         LOGFILE_H.write("%s\n" % ("Creating a profile object"))
         profile = phate_profile.multiProfile()
+        profile.setScheduler(searchScheduler)
 
         # Create directories for hmm/profile search output
         profileOutputDir = outputDir + 'PROFILE/'
@@ -1134,6 +1214,7 @@ else:
             'vogsOutDir'          : geneBlastOutputDir,
             'customGeneBlast'     : CUSTOM_GENE_BLAST,
             'blastThreads'        : blastThreads,
+            'blastBatchSize'      : blastBatchSize,
         }
         blast.setBlastParameters(myParamSet)
         blast.setBlastFlavor('blastn') 
@@ -1200,6 +1281,7 @@ else:
             'cazyBlast'             : CAZY_BLAST,
             'customProteinBlast'    : CUSTOM_PROTEIN_BLAST,
             'blastThreads'          : blastThreads,
+            'blastBatchSize'        : blastBatchSize,
         }
         blast.setBlastParameters(myParamSet)
         blast.setBlastFlavor('blastp')
@@ -1258,6 +1340,8 @@ else:
             'hmmProgram'            : '', 
             'phmmerSearch'          : PHMMER_SEARCH,
             'jackhmmerSearch'       : JACKHMMER_SEARCH,
+            'hmmBatchSize'          : hmmBatchSize,
+            'hmmThreads'            : hmmThreads,
             'geneCallDir'           : outputDir,
             'genomeHmmOutDir'       : genomeHmmOutputDir,
             'geneHmmOutDir'         : geneHmmOutputDir,
@@ -1361,6 +1445,8 @@ else:
             'pVOGsOutDir'          : pVOGsOutputDir,
             'VOGsOutDir'           : VOGsOutputDir,
             'hmmscan'              : hmmscan,
+            'profileBatchSize'     : profileBatchSize,
+            'hmmThreads'           : hmmThreads,
             'ncbiVirusProteinHmm'  : NCBI_VIRUS_PROTEIN_HMM,
             'refseqProteinHmm'     : REFSEQ_PROTEIN_HMM,
             'pvogsHmm'             : PVOGS_HMM,
@@ -1388,6 +1474,31 @@ else:
         if PHATE_PROGRESS:
             print("phate_sequenceAnnotation_main says, Skipping HMM profile search.")
 
+    #################################################################################
+    ##### CONCURRENT SEARCHES
+
+    if searchScheduler:
+        # Each search task uses blastThreads cpus (or 1); size the worker pool to fit within searchThreads
+        threadsPerTask = 1
+        if RUN_BLAST:
+            threadsPerTask = blast.blastThreads
+        if (RUN_HMM_SEARCH or RUN_PROFILE_SEARCH) and hmmThreads > int(threadsPerTask):
+            threadsPerTask = hmmThreads
+        searchScheduler.setCpuBudget(searchThreads,threadsPerTask)
+        if PHATE_PROGRESS:
+            print("phate_sequenceAnnotation_main says, Running queued database searches concurrently...")
+        LOGFILE_H.write("%s%s\n" % ("Running queued database searches concurrently at ",datetime.datetime.now()))
+        searchScheduler.printParameters2file(LOGFILE_H)
+        searchScheduler.runTasks()
+        # Merge results onto the genome's fastas in the order that a serial run would have produced them
+        if RUN_BLAST:
+            blast.completeBlast()
+        if RUN_HMM_SEARCH:
+            hmm.completeHmm()
+        if RUN_PROFILE_SEARCH:
+            profile.completeProfile()
+        LOGFILE_H.write("%s%s%s%s%s\n" % ("Concurrent database searches complete at ",datetime.datetime.now(),"; ",searchScheduler.failCount," task(s) failed"))
+
     ##### REPORT OUT 
 
     if PHATE_PROGRESS:
@@ -1404,5 +1515,8 @@ GENOME_FILE.close()
 OUTFILE.close()
 GFFFILE.close()
 
+phate_annotationCatalog.getAnnotationCatalog().printStatistics2file(LOGFILE_H)
+phate_annotationCache.getAnnotationCache().close()
+phate_annotationCache.getAnnotationCache().printStatistics2file(LOGFILE_H)
 LOGFILE_H.write("%s%s\n" % ("Sequence annotation processing complete at ",datetime.datetime.now()))
 LOGFILE_H.close()
@@ -0,0 +1,122 @@
+############################################################################
+#
+# Name:  phate_taxonomy.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# This module looks up NCBI taxonomy identifiers for sequence accessions, using the indexed
+# accession2taxid table built by DatabasePrep/dbPrep_taxonIndex.py (an SQLite file written next
+# to nucl_gb.accession2taxid). Each lookup is a primary-key search, and results are cached, so
+# repeated hits to the same accession cost nothing. lookupList() resolves all of a genome's
+# accessions in a few queries.
+#
+# Accessions may be given with version (NC_005056.1) or without (NC_005056); the latter resolves
+# to the highest version in the table.
+#
+# Classes and Methods:
+#    taxonomyIndex
+#       isAvailable
+#       lookup(accession)
+#       lookupList(accessionList)
+#       close
+#    getTaxonomyIndex(accn2taxidFile)
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import threading
+import sqlite3
+
+INDEX_EXTENSION = ".sqlite"  # must agree with DatabasePrep/dbPrep_taxonIndex.py
+QUERY_CHUNK     = 500        # number of accessions per query in lookupList (sqlite's variable limit is 999)
+
+# Verbosity
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_WARNINGS = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+
+class taxonomyIndex(object):
+
+    def __init__(self,indexFile):
+        self.indexFile  = indexFile
+        self.connection = None
+        self.cache      = {}                # accession => taxID (string); '' if not found
+        self.lock       = threading.Lock()  # searches may annotate hits from concurrent threads (see phate_scheduler)
+        if os.path.exists(indexFile):
+            # Read-only; the connection is shared by threads, under self.lock
+            self.connection = sqlite3.connect("file:" + indexFile + "?mode=ro",uri=True,check_same_thread=False)
+
+    def isAvailable(self):
+        if self.connection:
+            return True
+        return False
+
+    # Must be called under self.lock
+    def _query(self,accession):
+        if '.' in accession:
+            row = self.connection.execute("SELECT taxid FROM accn2taxid WHERE accession_version = ?",(accession,)).fetchone()
+        else:  # no version given; take the highest version ('/' sorts immediately after '.')
+            row = self.connection.execute("SELECT taxid FROM accn2taxid WHERE accession_version > ? AND accession_version < ? ORDER BY accession_version DESC LIMIT 1",(accession + '.',accession + '/')).fetchone()
+        if row:
+            return str(row[0])
+        return ''
+
+    # Return taxonomy id for accession, or '' if not found
+    def lookup(self,accession):
+        if not self.connection:
+            return ''
+        with self.lock:
+            if accession not in self.cache:
+                self.cache[accession] = self._query(accession)
+            return self.cache[accession]
+
+    # Return a dict of accession => taxonomy id ('' if not found) for all accessions in accessionList
+    def lookupList(self,accessionList):
+        taxonDict = {}
+        if not self.connection:
+            return taxonDict
+        with self.lock:
+            versioned = []
+            for accession in set(accessionList):
+                if accession in self.cache:
+                    continue
+                if '.' in accession:
+                    versioned.append(accession)
+                else:
+                    self.cache[accession] = self._query(accession)
+            for i in range(0,len(versioned),QUERY_CHUNK):
+                chunk = versioned[i:i+QUERY_CHUNK]
+                for accession in chunk:
+                    self.cache[accession] = ''
+                command = "SELECT accession_version, taxid FROM accn2taxid WHERE accession_version IN (" + ','.join(['?'] * len(chunk)) + ")"
+                for (accession,taxID) in self.connection.execute(command,chunk):
+                    self.cache[accession] = str(taxID)
+            for accession in accessionList:
+                taxonDict[accession] = self.cache[accession]
+        return taxonDict
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+# One index per accession2taxid file, opened on first use and shared by all annotation records
+TAXONOMY_INDEXES = {}
+TAXONOMY_INDEXES_LOCK = threading.Lock()
+
+def getTaxonomyIndex(accn2taxidFile):
+    with TAXONOMY_INDEXES_LOCK:
+        if accn2taxidFile not in TAXONOMY_INDEXES:
+            index = taxonomyIndex(accn2taxidFile + INDEX_EXTENSION)
+            if not index.isAvailable():
+                if PHATE_WARNINGS:
+                    print("phate_taxonomy says, WARNING: No taxonomy index found for", accn2taxidFile, "; run DatabasePrep/dbPrep_taxonIndex.py")
+            TAXONOMY_INDEXES[accn2taxidFile] = index
+        return TAXONOMY_INDEXES[accn2taxidFile]
@@ -0,0 +1,142 @@
+############################################################################
+#
+# Name:  phate_translation.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# Translates gene sequences to protein in-process, replacing the per-gene calls to EMBOSS transeq.
+# A codonTable is precomputed for an NCBI genetic code: every 3-letter combination of IUPAC
+# nucleotide codes maps directly to its amino acid, so translation is one dictionary lookup per codon.
+# Output follows transeq (-frame=1):
+#    - stop codons are translated as '*' (the terminal '*' is removed later; see cleanUpAfterEMBOSS)
+#    - start codons are not recoded (e.g., GTG is V, not M)
+#    - an ambiguous codon is translated if all of its expansions encode the same residue, as B if they
+#      encode N or D, as Z if they encode Q or E, else 'X'
+#    - a final partial codon of 2 bases is translated likewise (e.g., GC => A), else 'X';
+#      a final single base is dropped
+#
+# Classes and Methods:
+#    codonTable
+#       setGeneticCode(geneticCode)
+#       translate(sequence)
+#       translateSequences(sequenceList)
+#    getCodonTable(geneticCode)
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import itertools
+
+# Verbosity
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_WARNINGS = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+
+DEFAULT_GENETIC_CODE = 11  # bacteria, archaea, and their phages
+
+# NCBI genetic codes, as amino acids for codons in TCAG order (TTT, TTC, TTA, TTG, TCT, ...), per
+# https://www.ncbi.nlm.nih.gov/Taxonomy/Utils/wprintgc.cgi
+GENETIC_CODES = {
+    1  : "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Standard
+    2  : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG",  # Vertebrate Mitochondrial
+    3  : "FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Yeast Mitochondrial
+    4  : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Mold, Protozoan, Mycoplasma/Spiroplasma (TGA=W)
+    5  : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG",  # Invertebrate Mitochondrial
+    6  : "FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Ciliate Nuclear (TAA,TAG=Q)
+    9  : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",  # Echinoderm Mitochondrial
+    10 : "FFLLSSSSYY**CCCWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Euplotid Nuclear
+    11 : "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Bacterial, Archaeal, Plant Plastid
+    12 : "FFLLSSSSYY**CC*WLLLSPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Alternative Yeast Nuclear
+    13 : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSGGVVVVAAAADDEEGGGG",  # Ascidian Mitochondrial
+    14 : "FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",  # Alternative Flatworm Mitochondrial
+    15 : "FFLLSSSSYY*QCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Blepharisma Nuclear (TAG=Q)
+    16 : "FFLLSSSSYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Chlorophycean Mitochondrial
+    21 : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNNKSSSSVVVVAAAADDEEGGGG",  # Trematode Mitochondrial
+    22 : "FFLLSS*SYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Scenedesmus obliquus Mitochondrial
+    23 : "FF*LSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Thraustochytrium Mitochondrial
+    24 : "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG",  # Rhabdopleuridae Mitochondrial
+    25 : "FFLLSSSSYY**CCGWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Candidate Division SR1 and Gracilibacteria (TGA=G)
+}
+
+BASES = "TCAG"
+
+# IUPAC nucleotide codes and the bases each represents
+NUCLEOTIDE_CODES = {
+    'A' : 'A',    'C' : 'C',    'G' : 'G',    'T' : 'T',    'U' : 'T',
+    'R' : 'AG',   'Y' : 'CT',   'S' : 'CG',   'W' : 'AT',   'K' : 'GT',   'M' : 'AC',
+    'B' : 'CGT',  'D' : 'AGT',  'H' : 'ACT',  'V' : 'ACG',  'N' : 'ACGT',
+}
+
+# Ambiguous residues
+AMBIGUOUS_RESIDUES = {
+    frozenset('ND') : 'B',
+    frozenset('QE') : 'Z',
+}
+
+class codonTable(object):
+
+    def __init__(self,geneticCode=DEFAULT_GENETIC_CODE):
+        self.geneticCode = DEFAULT_GENETIC_CODE
+        self.codon2aa    = {}  # codon (any IUPAC codes, upper case) => amino acid
+        self.partial2aa  = {}  # 2-base final partial codon => amino acid
+        self.setGeneticCode(geneticCode)
+
+    def setGeneticCode(self,geneticCode):
+        if int(geneticCode) in GENETIC_CODES:
+            self.geneticCode = int(geneticCode)
+        else:
+            if PHATE_WARNINGS:
+                print("phate_translation says, WARNING: Unrecognized genetic code", geneticCode, "; using", DEFAULT_GENETIC_CODE)
+            self.geneticCode = DEFAULT_GENETIC_CODE
+
+        # Unambiguous codons, per the NCBI table
+        aminoAcids = GENETIC_CODES[self.geneticCode]
+        baseCodons = {}
+        i = 0
+        for (base1,base2,base3) in itertools.product(BASES,repeat=3):
+            baseCodons[base1 + base2 + base3] = aminoAcids[i]
+            i += 1
+
+        # All codons, including ambiguity codes: translate if every expansion gives the same (or an ambiguous) residue
+        self.codon2aa = {}
+        for codon in itertools.product(NUCLEOTIDE_CODES.keys(),repeat=3):
+            residues = set()
+            for expansion in itertools.product(*[NUCLEOTIDE_CODES[code] for code in codon]):
+                residues.add(baseCodons[''.join(expansion)])
+            if len(residues) == 1:
+                self.codon2aa[''.join(codon)] = residues.pop()
+            else:
+                self.codon2aa[''.join(codon)] = AMBIGUOUS_RESIDUES.get(frozenset(residues),'X')
+
+        self.partial2aa = {}
+        for (code1,code2) in itertools.product(NUCLEOTIDE_CODES.keys(),repeat=2):
+            self.partial2aa[code1 + code2] = self.codon2aa[code1 + code2 + 'N']
+
+    def translate(self,sequence):
+        sequence = sequence.upper()
+        codon2aa = self.codon2aa
+        fullLength = len(sequence) - len(sequence) % 3
+        protein = ''.join([codon2aa.get(sequence[i:i+3],'X') for i in range(0,fullLength,3)])
+        if len(sequence) - fullLength == 2:
+            protein += self.partial2aa.get(sequence[fullLength:],'X')
+        return protein
+
+    # Translate a list of sequences in one pass; returns a list of proteins in the same order
+    def translateSequences(self,sequenceList):
+        return [self.translate(sequence) for sequence in sequenceList]
+
+# Codon tables are built once per genetic code, and shared
+CODON_TABLES = {}
+
+def getCodonTable(geneticCode=DEFAULT_GENETIC_CODE):
+    geneticCode = int(geneticCode)
+    if geneticCode not in CODON_TABLES:
+        CODON_TABLES[geneticCode] = codonTable(geneticCode)
+    return CODON_TABLES[geneticCode]
@@ -0,0 +1,149 @@
+############################################################################
+#
+# Name:  phate_vogIndex.py
+#
+# Programmer:  Carol Zhou
+#
+# Last Update:  18 October 2026
+#
+# Description:
+# Indexes a VOG- or pVOG-tagged fasta database (e.g., VOGs.faa, VOGs.fnt, pVOGs.faa) by VOG identifier,
+# so that the member sequences of a VOG group can be written by seeking directly to them, rather than
+# by scanning the whole database for each (query, VOG) pair.
+# The index maps each VOG identifier found in a fasta header to the byte offsets (start, end) of
+# the fasta records listing it. It is built in one pass over the database and cached beside it as
+# <database>.vogidx, which is rebuilt if the database's size or modification time changes.
+# Cache file format:
+#    line 1:        #vogidx<\t>databaseSize<\t>databaseModificationTime
+#    other lines:   VOGid<\t>start:end,start:end,...
+#
+# Classes and Methods:
+#    vogGroupIndex
+#       load
+#       build
+#       save
+#       getMembers(VOG)
+#       writeGroup(FILE_H,VOG)
+#    getVOGgroupIndex(database)
+#
+############################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os, re
+import threading
+
+INDEX_EXTENSION = ".vogidx"
+INDEX_TAG       = "#vogidx"
+
+# Verbosity
+PHATE_WARNINGS_STRING = os.environ["PHATE_PHATE_WARNINGS"]
+PHATE_MESSAGES_STRING = os.environ["PHATE_PHATE_MESSAGES"]
+PHATE_WARNINGS = False
+PHATE_MESSAGES = False
+if PHATE_WARNINGS_STRING.lower() == 'true':
+    PHATE_WARNINGS = True
+if PHATE_MESSAGES_STRING.lower() == 'true':
+    PHATE_MESSAGES = True
+
+p_vogID = re.compile(b'VOG\d+')
+
+class vogGroupIndex(object):
+
+    def __init__(self,database):
+        self.database  = database
+        self.indexFile = database + INDEX_EXTENSION
+        self.offsets   = {}   # VOG identifier => list of (start,end) byte offsets of member fasta records
+        self.signature = ""   # database size and modification time, for validating the cached index
+        if os.path.exists(database):
+            databaseStat = os.stat(database)
+            self.signature = str(databaseStat.st_size) + '\t' + str(int(databaseStat.st_mtime))
+            if not self.load():
+                self.build()
+                self.save()
+        else:
+            if PHATE_WARNINGS:
+                print("phate_vogIndex says, WARNING: VOG database not found:", database)
+
+    # Read the cached index, if it exists and is current; returns True if loaded
+    def load(self):
+        if not os.path.exists(self.indexFile):
+            return False
+        INDEX_H = open(self.indexFile,'r')
+        iLines = INDEX_H.read().splitlines()
+        INDEX_H.close()
+        if not iLines or iLines[0] != INDEX_TAG + '\t' + self.signature:
+            return False
+        for iLine in iLines[1:]:
+            (VOG,offsetString) = iLine.split('\t')
+            offsetList = []
+            for offsetPair in offsetString.split(','):
+                (start,end) = offsetPair.split(':')
+                offsetList.append((int(start),int(end)))
+            self.offsets[VOG] = offsetList
+        return True
+
+    # One pass over the database, recording the byte extent of each record under each VOG in its header
+    def build(self):
+        if PHATE_MESSAGES:
+            print("phate_vogIndex says, Indexing VOG database", self.database)
+        self.offsets = {}
+        vogList = []; start = 0; position = 0
+        DATABASE_H = open(self.database,'rb')
+        for dLine in DATABASE_H:
+            if dLine.startswith(b'>'):
+                for VOG in vogList:
+                    self.offsets.setdefault(VOG,[]).append((start,position))
+                start   = position
+                vogList = []
+                for VOG in re.findall(p_vogID,dLine):
+                    VOG = VOG.decode('utf-8')
+                    if VOG not in vogList:
+                        vogList.append(VOG)
+            position += len(dLine)
+        for VOG in vogList:
+            self.offsets.setdefault(VOG,[]).append((start,position))
+        DATABASE_H.close()
+
+    # Write index beside the database; written to a temporary file first, so readers never see a partial index
+    def save(self):
+        tempFile = self.indexFile + '.' + str(os.getpid())
+        try:
+            INDEX_H = open(tempFile,'w')
+            INDEX_H.write("%s\t%s\n" % (INDEX_TAG,self.signature))
+            for VOG in self.offsets:
+                offsetString = ','.join([str(start) + ':' + str(end) for (start,end) in self.offsets[VOG]])
+                INDEX_H.write("%s\t%s\n" % (VOG,offsetString))
+            INDEX_H.close()
+            os.replace(tempFile,self.indexFile)
+        except OSError:  # e.g., database directory is read-only; the index is still used in memory
+            if PHATE_WARNINGS:
+                print("phate_vogIndex says, WARNING: Could not write VOG index file", self.indexFile)
+
+    def getMembers(self,VOG):
+        if VOG in self.offsets:
+            return self.offsets[VOG]
+        return []
+
+    # Write the member sequences of VOG group to FILE_H, each as a header line and a single sequence line
+    def writeGroup(self,FILE_H,VOG):
+        memberList = self.getMembers(VOG)
+        if not memberList:
+            return
+        DATABASE_H = open(self.database,'rb')
+        for (start,end) in memberList:
+            DATABASE_H.seek(start)
+            record = DATABASE_H.read(end - start).decode('utf-8').splitlines()
+            FILE_H.write("%s\n%s\n" % (record[0],''.join(record[1:])))
+        DATABASE_H.close()
+
+# One index per database, built or loaded on first use
+VOG_GROUP_INDEXES = {}
+VOG_GROUP_INDEXES_LOCK = threading.Lock()
+
+def getVOGgroupIndex(database):
+    with VOG_GROUP_INDEXES_LOCK:
+        if database not in VOG_GROUP_INDEXES:
+            VOG_GROUP_INDEXES[database] = vogGroupIndex(database)
+        return VOG_GROUP_INDEXES[database]
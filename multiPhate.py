@@ -6,7 +6,7 @@
 #
 # Programmer:  Carol L. Ecale Zhou
 #
-# Last Update:  09 December 2020
+# Last Update:  18 October 2026
 #
 # Description: Script multiPhate.py is a driver program that runs the multiPhATE2 bacteriophage annotation system,
 #    which comprises four modules:  Gene Calling, PhATE, Compare Gene Profiles, and Genomics. See the README file
@@ -84,6 +84,7 @@ import subprocess
 import json
 from multiprocessing import Pool
 import platform
+import phate_dbArtifacts
 
 # Because grep works differently in Python 3.x, and works differently on Mac OSX, need to set this environment
 # variable so that grep works correctly in SequenceAnnotation/phate_annotation.py:
@@ -130,8 +131,22 @@ HPC = False  # write to log
 PHATE_THREADS = 0 
 # Set the number of blast threads that blast+ will invoke
 BLAST_THREADS = 0 
+# Set the number of query sequences submitted per blast+ run (0 = one query per run; -1 = all queries in one run)
+BLAST_BATCH_SIZE = 0
+# Set the number of cpus that concurrent blast/hmm/profile database searches may use (0 = run searches one after another)
+SEARCH_THREADS = 0
+# Set the number of query sequences submitted per hmmscan run (0 = one query per run; -1 = all queries in one run)
+PROFILE_BATCH_SIZE = 0
+# Set the number of cpus each hmmer run will use (0 = hmmer's default)
+HMM_THREADS = 0
+# Set the number of query sequences submitted per jackhmmer/phmmer run (0 = one query per run; -1 = all queries in one run)
+HMM_BATCH_SIZE = 0
+# Set the maximum number of per-gene search results kept in the annotation cache (0 = no cache; -1 = no limit)
+ANNOTATION_CACHE_SIZE = 0
 # Set the number of threads for parallelizing CompareGeneProfiles. Ideally this is N*(N-1)/2, where N = number of input genomes.
 CGP_THREADS = 0
+# Set the number of cpus for building the Genomics homology-group HMMs (groups are aligned and built in parallel)
+GENOMICS_THREADS = 0
 
 # 2) If you are running under a linux system, set PHATE_OUT and PHATE_ERR to 'True'. This will capture standard errors to files. Cannot
 # guarantee this will work under other operating systems.
@@ -231,6 +246,7 @@ hmmsearch                = False
 cgpBlastn                = 60
 cgpBlastp                = 60
 runCGP                   = False
+cgpAllVsAll              = False  # if True, CGP derives all genome pairs from one all-vs-all blast
 runGenomics              = False
 # databases to be used (booleans)
 ncbiVirusGenomeHmm       = False
@@ -274,7 +290,14 @@ customHmmDBpath          = 'pathNotSet'
 phateThreads             = PHATE_THREADS  # Value should be a positive integer or ALL
 hpc                      = HPC            # True or False
 blastThreads             = BLAST_THREADS  # positive integer
+blastBatchSize           = BLAST_BATCH_SIZE # 0, -1, or positive integer
+searchThreads            = SEARCH_THREADS # positive integer or 0
+profileBatchSize         = PROFILE_BATCH_SIZE # 0, -1, or positive integer
+hmmThreads               = HMM_THREADS    # positive integer or 0
+hmmBatchSize             = HMM_BATCH_SIZE # 0, -1, or positive integer
+annotationCacheSize      = ANNOTATION_CACHE_SIZE # 0, -1, or positive integer
 cgpThreads               = CGP_THREADS    # positive integer
+genomicsThreads          = GENOMICS_THREADS # positive integer or 0
 
 # Constants; defaults will apply if not specified in config file
 # Leave all this stuff alone!
@@ -298,8 +321,8 @@ CGP_CODE_NAME               = 'cgp_driver.py'        # top-level, driver program
 CGP_CODE                    = CGP_DIR_DEFAULT + CGP_CODE_NAME # absolute path of top-level, driver for CompareGeneProfiles pipeline
 GENOMICS_CODE_NAME          = 'genomics_driver.py'   # top-level, driver program for running Genomics analysis
 GENOMICS_CODE               = GENOMICS_DIR_DEFAULT + GENOMICS_CODE_NAME # absolute path of top-level, drive for Genomics analysis
-VOG_GENE_HEADER_FILENAME    = "vog.gene.headers.lst"  # The headers from the vog.genes.tagged.all.fa file (computed by multiPhate.py)
-VOG_PROTEIN_HEADER_FILENAME = "vog.protein.headers.lst"  # The headers from the vog.proteins.tagged.all.fa file (computed by multiPhate.py)
+VOG_GENE_HEADER_FILENAME    = "vog.gene.headers.lst"  # The headers from the vog.genes.tagged.all.fa file (computed once by multiPhate.py; see phate_dbArtifacts.py)
+VOG_PROTEIN_HEADER_FILENAME = "vog.protein.headers.lst"  # The headers from the vog.proteins.tagged.all.fa file (computed once by multiPhate.py; see phate_dbArtifacts.py)
 VOG_ANNOTATION_FILENAME     = "vog.annotations.tsv"  # The annotations associated with VOG identifiers (downloaded from VOG server)
 PVOG_HEADER_FILENAME        = "pVOGs.headers.lst"
 
@@ -326,6 +349,7 @@ HIT_COUNT_MAX               = 100 #
 CGP_BLASTN_IDENTITY_DEFAULT = 60
 CGP_BLASTP_IDENTITY_DEFAULT = 60
 CGP_IDENTITY_CUTOFF         = 60
+CGP_ALL_VS_ALL              = False
 
 # ENVIRONMENT VARIABLES
 # It is most convenient to locate the supporting software codes and databases in the above-indicated subdirectories.
@@ -462,6 +486,7 @@ os.environ["PHATE_HIT_COUNT_MAX"]                   = str(HIT_COUNT_MAX)  #*** T
 os.environ["CGP_BLASTN"]                            = str(CGP_BLASTN_IDENTITY_DEFAULT)
 os.environ["CGP_BLASTP"]                            = str(CGP_BLASTP_IDENTITY_DEFAULT)
 os.environ["CGP_IDENTITY_CUTOFF"]                   = str(CGP_IDENTITY_CUTOFF)  # Instructs cgp_blastAnalysis.py, unless user config changes it.
+os.environ["CGP_ALL_VS_ALL"]                        = str(CGP_ALL_VS_ALL)       # Instructs cgp_wrapper.py, unless user config changes it.
 
 # CODES - These should be installed globally (via Conda), but if not, locations go here
 os.environ["PHATE_BLAST_HOME"]                      = ""
@@ -572,6 +597,7 @@ p_blastpSearch                = re.compile("blastp='(.*)'")
 p_blastpIdentity              = re.compile("blastp_identity='(\d+)'")  
 p_blastnIdentity              = re.compile("blastn_identity='(\d+)'")   
 p_cgpIdentityCutoff           = re.compile("cgp_identity_cutoff='(\d+)'")
+p_cgpAllVsAll                 = re.compile("cgp_all_vs_all='(.*)'")
 p_blastpHitCount              = re.compile("blastp_hit_count='(\d+)'")
 p_blastnHitCount              = re.compile("blastn_hit_count='(\d+)'")
 # Blast Processes to run (true/false)
@@ -690,7 +716,14 @@ p_hmmerHome                   = re.compile("hmmer_home='(.*)'")
 p_phateThreads                = re.compile("phate_threads='(.*)'")
 p_hpc                         = re.compile("HPC='(.*)'")
 p_blastThreads                = re.compile("blast_threads='(.*)'")
+p_blastBatchSize              = re.compile("blast_batch_size='(.*)'")
+p_searchThreads               = re.compile("search_threads='(.*)'")
+p_profileBatchSize            = re.compile("profile_batch_size='(.*)'")
+p_hmmThreads                  = re.compile("hmm_threads='(.*)'")
+p_hmmBatchSize                = re.compile("hmm_batch_size='(.*)'")
+p_annotationCacheSize         = re.compile("annotation_cache_size='(.*)'")
 p_cgpThreads                  = re.compile("cgp_threads='(.*)'")
+p_genomicsThreads             = re.compile("genomics_threads='(.*)'")
 
 # CHECKPOINTING
 p_checkpoint_phate            = re.compile("checkpoint_phate='(.*)'")
@@ -766,6 +799,8 @@ if fileError:
 
 ##### Read input parameters from configuration file; capture user's parameter choices
 
+databaseSideFiles = []  # (description, database, side file) for side files derived from the user's databases
+
 FIRST_GENOME = True
 DATA_ITEMS_NUM = 6
 genomeDataDict = {
@@ -945,12 +980,20 @@ for cLine in cLines:
     #match_cgpBlastn                 = re.search(p_cgpBlastn,cLine)
     #match_cgpBlastp                 = re.search(p_cgpBlastp,cLine)
     match_cgpIdentityCutoff         = re.search(p_cgpIdentityCutoff,cLine)
+    match_cgpAllVsAll               = re.search(p_cgpAllVsAll,cLine)
 
     # parallelism
     match_phateThreads              = re.search(p_phateThreads,cLine)
     match_hpc                       = re.search(p_hpc,cLine)
     match_blastThreads              = re.search(p_blastThreads,cLine)
+    match_blastBatchSize            = re.search(p_blastBatchSize,cLine)
+    match_searchThreads             = re.search(p_searchThreads,cLine)
+    match_profileBatchSize          = re.search(p_profileBatchSize,cLine)
+    match_hmmThreads                = re.search(p_hmmThreads,cLine)
+    match_hmmBatchSize              = re.search(p_hmmBatchSize,cLine)
+    match_annotationCacheSize       = re.search(p_annotationCacheSize,cLine)
     match_cgpThreads                = re.search(p_cgpThreads,cLine)
+    match_genomicsThreads           = re.search(p_genomicsThreads,cLine)
 
     # checkpointing
     match_checkpointPhate           = re.search(p_checkpoint_phate,cLine)
@@ -1460,6 +1503,12 @@ for cLine in cLines:
             cgpIdentityCutoff = CGP_IDENTITY_CUTOFF
         os.environ["CGP_IDENTITY_CUTOFF"] = str(cgpIdentityCutoff)
 
+    elif match_cgpAllVsAll:               # compare all genome pairs from one all-vs-all blast
+        value = match_cgpAllVsAll.group(1)
+        if value.lower() == 'true' or value.lower() == 'yes' or value.lower() == 'on':
+            cgpAllVsAll = True
+        os.environ["CGP_ALL_VS_ALL"] = str(cgpAllVsAll)
+
     ##### DEPENDENT CODE LOCATIONS #####
 
     elif match_blastPlusHome:
@@ -1528,12 +1577,8 @@ for cLine in cLines:
             os.environ["PHATE_VOG_GENE_BASE_DIR"]    = PHATE_VOG_GENE_BASE_DIR 
             os.environ["PHATE_VOG_GENE_HEADER_FILE"] = os.path.join(PHATE_VOG_GENE_BASE_DIR,VOG_GENE_HEADER_FILENAME)
             os.environ["PHATE_VOG_ANNOTATION_FILE"]  = os.path.join(PHATE_VOG_GENE_BASE_DIR,VOG_ANNOTATION_FILENAME)
-            # Create Vog Gene headers file
-            try:
-                command = "grep '>' " + os.environ["PHATE_VOG_GENE_BLAST_HOME"] + ' > ' + os.environ["PHATE_VOG_GENE_HEADER_FILE"]
-                success = os.system(command)
-            except:
-                print ("multiPhate says, ERROR: Could not create PHATE_VOG_GENE_HEADER_FILE")
+            # Vog Gene headers file is created, if need be, once the config file is read
+            databaseSideFiles.append(("PHATE_VOG_GENE_HEADER_FILE",os.environ["PHATE_VOG_GENE_BLAST_HOME"],os.environ["PHATE_VOG_GENE_HEADER_FILE"]))
 
     elif match_vogProteinDBpath:   
         if match_vogProteinDBpath.group(1) != '':
@@ -1542,12 +1587,8 @@ for cLine in cLines:
             os.environ["PHATE_VOG_PROTEIN_BASE_DIR"]        = PHATE_VOG_PROTEIN_BASE_DIR 
             os.environ["PHATE_VOG_PROTEIN_HEADER_FILE"]     = os.path.join(PHATE_VOG_PROTEIN_BASE_DIR,VOG_PROTEIN_HEADER_FILENAME)
             os.environ["PHATE_VOG_ANNOTATION_FILE"] = os.path.join(PHATE_VOG_PROTEIN_BASE_DIR,VOG_ANNOTATION_FILENAME)
-            # Create Vog Protein headers file
-            try:
-                command = "grep '>' " + os.environ["PHATE_VOG_PROTEIN_BLAST_HOME"] + ' > ' + os.environ["PHATE_VOG_PROTEIN_HEADER_FILE"]
-                success = os.system(command)
-            except:
-                print ("multiPhate says, ERROR: Could not create PHATE_VOG_PROTEIN_HEADER_FILE")
+            # Vog Protein headers file is created, if need be, once the config file is read
+            databaseSideFiles.append(("PHATE_VOG_PROTEIN_HEADER_FILE",os.environ["PHATE_VOG_PROTEIN_BLAST_HOME"],os.environ["PHATE_VOG_PROTEIN_HEADER_FILE"]))
 
     elif match_phantomeDBpath:
         if match_phantomeDBpath.group(1) != '':
@@ -1719,6 +1760,49 @@ for cLine in cLines:
         if int(value) >= 0:
             blastThreads = int(value)
 
+    elif match_blastBatchSize:
+        value = match_blastBatchSize.group(1)
+        if value.lower() == 'all':
+            blastBatchSize = -1
+        elif int(value) >= 0:
+            blastBatchSize = int(value)
+
+    elif match_searchThreads:
+        value = match_searchThreads.group(1)
+        if value.lower() == 'all' or value.lower() == 'max':
+            searchThreads = os.cpu_count()
+        elif int(value) >= 0:
+            searchThreads = int(value)
+        LOG.write("%s%s\n" % ("searchThreads parameter is converted to ",searchThreads))
+
+    elif match_profileBatchSize:
+        value = match_profileBatchSize.group(1)
+        if value.lower() == 'all':
+            profileBatchSize = -1
+        elif int(value) >= 0:
+            profileBatchSize = int(value)
+
+    elif match_hmmThreads:
+        value = match_hmmThreads.group(1)
+        if value.lower() == 'all' or value.lower() == 'max':
+            hmmThreads = os.cpu_count()
+        elif int(value) >= 0:
+            hmmThreads = int(value)
+
+    elif match_hmmBatchSize:
+        value = match_hmmBatchSize.group(1)
+        if value.lower() == 'all':
+            hmmBatchSize = -1
+        elif int(value) >= 0:
+            hmmBatchSize = int(value)
+
+    elif match_annotationCacheSize:
+        value = match_annotationCacheSize.group(1)
+        if value.lower() == 'all':
+            annotationCacheSize = -1
+        elif int(value) >= 0:
+            annotationCacheSize = int(value)
+
     elif match_cgpThreads:
         value = match_cgpThreads.group(1)
         if value.lower() == 'all' or value.lower() == 'max':
@@ -1731,6 +1815,14 @@ for cLine in cLines:
             cgpThreads = 1
         LOG.write("%s%s\n" % ("cgpThreads parameter is converted to ",cgpThreads))
 
+    elif match_genomicsThreads:
+        value = match_genomicsThreads.group(1)
+        if value.lower() == 'all' or value.lower() == 'max':
+            genomicsThreads = os.cpu_count()
+        elif int(value) >= 0:
+            genomicsThreads = int(value)
+        LOG.write("%s%s\n" % ("genomicsThreads parameter is converted to ",genomicsThreads))
+
     ##### CHECKPOINTING #####
 
     elif match_checkpointPhate:
@@ -1831,6 +1923,21 @@ for cLine in cLines:
             LOG.write("%s%s\n" % ("ERROR: Unrecognized line in config file: ", cLine))
         print("multiPhate says, ERROR: unrecognized line in config file:", cLine)
 
+##### Database side files
+# Side files (e.g., VOG header lists) are built from their databases once, and reused while the databases
+# are unchanged: checking each costs a stat of the database and of the side file (see phate_dbArtifacts.py)
+for (description,database,sideFile) in databaseSideFiles:
+    artifact = phate_dbArtifacts.dbArtifact()
+    artifact.setParameters({"database" : database, "sideFile" : sideFile, "builder" : "fastaHeaders"})
+    sideFileStart = time.time()
+    result = artifact.ensure()
+    if result == phate_dbArtifacts.ARTIFACT_FAILED:
+        print("multiPhate says, ERROR: Could not create",description,sideFile,"from database",database)
+    elif result == phate_dbArtifacts.ARTIFACT_BUILT:
+        print("multiPhate says, Created",description,sideFile,"in",round(time.time() - sideFileStart,1),"seconds; it is reused while the database is unchanged")
+    if not HPC:
+        LOG.write("%s%s%s%s%s%s%s%s\n" % ("Database side file ",sideFile," (",description,") is ",result,"; checked in seconds: ",round(time.time() - sideFileStart,3)))
+
 if not HPC: # Skip logging if running in high-throughput, else multiPhate.log files will clash
     LOG.write("%s\n" % ("Input parameters and configurables:"))
     LOG.write("%s%s\n" % ("   BASE_DIR is ",os.environ["PHATE_BASE_DIR"]))
@@ -1956,6 +2063,7 @@ if not HPC: # Skip logging if running in high-throughput, else multiPhate.log fi
         LOG.write("%s%s\n" % ("   Custom hmm database is located in ",os.environ["PHATE_CUSTOM_HMM_HOME"]))
     LOG.write("%s%s\n" % ("   runCGP is ",runCGP))
     LOG.write("%s%s\n" % ("   runGenomics is ",runGenomics))
+    LOG.write("%s%s\n" % ("   cgpAllVsAll is ",cgpAllVsAll))
     LOG.write("%s%s\n" % ("   hmmbuild is ",hmmbuild))
     LOG.write("%s%s\n" % ("   hmmsearch is ",hmmsearch))
     LOG.write("%s%s\n" % ("   cgpBlastn is ",cgpBlastn))
@@ -1964,6 +2072,12 @@ if not HPC: # Skip logging if running in high-throughput, else multiPhate.log fi
     LOG.write("%s%s\n" % ("   HPC is ",HPC))
     LOG.write("%s%s\n" % ("   hpc is ",hpc))
     LOG.write("%s%s\n" % ("   blastThreads is ",blastThreads))
+    LOG.write("%s%s\n" % ("   blastBatchSize is ",blastBatchSize))
+    LOG.write("%s%s\n" % ("   searchThreads is ",searchThreads))
+    LOG.write("%s%s\n" % ("   profileBatchSize is ",profileBatchSize))
+    LOG.write("%s%s\n" % ("   hmmThreads is ",hmmThreads))
+    LOG.write("%s%s\n" % ("   hmmBatchSize is ",hmmBatchSize))
+    LOG.write("%s%s\n" % ("   annotationCacheSize is ",annotationCacheSize))
     LOG.write("%s%s\n" % ("   phate warnings is set to ",os.environ["PHATE_PHATE_WARNINGS"]))
     LOG.write("%s%s\n" % ("   phate messages is set to ",os.environ["PHATE_PHATE_MESSAGES"]))
     LOG.write("%s%s\n" % ("   phate progress is set to ",os.environ["PHATE_PHATE_PROGRESS"]))
@@ -2086,6 +2200,12 @@ for genome in genomeList:
             "customHmmDBname":customHmmDBname,
             "customHmmDBpath":customHmmDBpath,
             "blastThreads":blastThreads,
+            "blastBatchSize":blastBatchSize,
+            "searchThreads":searchThreads,
+            "profileBatchSize":profileBatchSize,
+            "hmmThreads":hmmThreads,
+            "hmmBatchSize":hmmBatchSize,
+            "annotationCacheSize":annotationCacheSize,
             "checkpointPhate":CHECKPOINT_PHATE,
             }
 
@@ -2294,7 +2414,7 @@ if runGenomics and (len(genomeList) > 1):
         print("multiPhate says, Performing gene-correspondence analysis.")
 
     # Invoke the genomics module
-    command = "python3 " + GENOMICS_CODE + ' ' + referenceGenome
+    command = "python3 " + GENOMICS_CODE + ' ' + referenceGenome + ' ' + str(genomicsThreads)
     result = os.system(command)
     if PHATE_MESSAGES:
         print("multiPhate says, Result of genomics processing is:",result)
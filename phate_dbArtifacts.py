@@ -0,0 +1,193 @@
+#################################################################################
+# Module: phate_dbArtifacts.py
+#
+# Programmer:  Carol L. Ecale Zhou
+#
+# Most recent update: 18 October 2026
+#
+# Module comprising classes and data structures for managing database side files: files that are
+#    derived from a database and used in annotation, such as the list of VOG-tagged headers that
+#    is extracted from the VOG gene or VOG protein fasta file. A side file is built once, and is
+#    reused for as long as its database is unchanged.
+#    Beside each side file a record (<sideFile>.artifact.json) holds what the side file was built
+#    from: the builder and its version, and the size, modification time, and sha256 checksum of the
+#    database file. Checking a side file is then a stat of the database and of the side file:
+#       - database and side file as recorded:  the side file is current
+#       - database changed in date only (e.g., copied or touched):  the database is checksummed;
+#         if its content is as recorded, the side file is current, and the record is updated
+#       - side file present with no record, and newer than the database (e.g., built by an earlier
+#         release, or by DatabasePrep/dbPrep_getDBs.py):  the side file is adopted and recorded
+#       - otherwise:  the side file is rebuilt, in one pass over the database that also computes
+#         its checksum, and replaces the previous side file only when it is complete
+#
+# Classes and Methods:
+#    writeHeaderLines
+#    fastaHeaderBuilder
+#    class dbArtifact
+#       setParameters
+#       getRecordFile
+#       loadRecord
+#       writeRecord
+#       getChecksum
+#       build
+#       ensure
+#
+#################################################################################
+
+# This code was developed by Carol L. Ecale Zhou at Lawrence Livermore National Laboratory.
+# THIS CODE IS COVERED BY THE GPL3 LICENSE. SEE INCLUDED FILE GPL-3.PDF FOR DETAILS.
+
+import os
+import json
+import hashlib
+import datetime
+
+ARTIFACT_RECORD_SUFFIX = ".artifact.json"
+HASH_BLOCK_SIZE        = 4 * 1024 * 1024   # bytes read at a time, for checksums and side files
+
+# Results of dbArtifact.ensure
+ARTIFACT_CURRENT  = "current"    # side file reused; database and side file are as recorded
+ARTIFACT_VERIFIED = "verified"   # side file reused; database changed in date only
+ARTIFACT_ADOPTED  = "adopted"    # side file reused; it had no record, and is newer than the database
+ARTIFACT_BUILT    = "built"      # side file (re)built
+ARTIFACT_FAILED   = "failed"     # side file could not be built
+
+# Writes the lines of buffer (whole lines) that include '>' to outFile_h
+def writeHeaderLines(buffer,outFile_h):
+    position = buffer.find(b'>')
+    while position != -1:
+        start = buffer.rfind(b'\n',0,position) + 1
+        stop  = buffer.find(b'\n',position) + 1
+        outFile_h.write(buffer[start:stop])
+        position = buffer.find(b'>',stop)
+    return
+
+# Writes the header lines of a fasta file (lines that include '>', as by grep '>') to outFile_h;
+# returns the sha256 checksum of the fasta file, computed in the same pass. The file is read in
+# blocks; the part-line at the end of a block is carried over to the next
+def fastaHeaderBuilder(fastaFile_h,outFile_h):
+    checksum = hashlib.sha256()
+    remainder = b''
+    block = fastaFile_h.read(HASH_BLOCK_SIZE)
+    while block:
+        checksum.update(block)
+        buffer = remainder + block
+        end = buffer.rfind(b'\n') + 1
+        writeHeaderLines(buffer[:end],outFile_h)
+        remainder = buffer[end:]
+        block = fastaFile_h.read(HASH_BLOCK_SIZE)
+    if remainder:
+        writeHeaderLines(remainder + b'\n',outFile_h)
+    return checksum.hexdigest()
+
+# Builders of side files, by name: (version, function). Changing what a builder writes requires a new
+# version, so that side files written by the previous version are rebuilt
+BUILDERS = {
+    "fastaHeaders" : ("1", fastaHeaderBuilder),
+    }
+
+class dbArtifact(object):
+
+    def __init__(self):
+        self.database = ""               # database (fasta) file from which the side file is derived
+        self.sideFile = ""               # side file, e.g., .../VOGs/vog.gene.headers.lst
+        self.builder  = "fastaHeaders"   # name of builder, in BUILDERS
+        self.record   = {}               # what the side file was built from, as last recorded
+
+    def setParameters(self,kvargs):
+        if "database" in kvargs.keys():
+            self.database = kvargs["database"]
+        if "sideFile" in kvargs.keys():
+            self.sideFile = kvargs["sideFile"]
+        if "builder" in kvargs.keys():
+            self.builder = kvargs["builder"]
+        return
+
+    def getRecordFile(self):
+        return self.sideFile + ARTIFACT_RECORD_SUFFIX
+
+    def loadRecord(self):
+        self.record = {}
+        try:
+            RECORD_H = open(self.getRecordFile(),'r')
+            self.record = json.load(RECORD_H)
+            RECORD_H.close()
+        except (ValueError,OSError):
+            self.record = {}
+        return self.record
+
+    # Record the database's fingerprint and the side file's size and date; written to a temporary file,
+    # then moved into place, so that a partial record is never read
+    def writeRecord(self,databaseStat,checksum):
+        sideFileStat = os.stat(self.sideFile)
+        self.record = {
+            "builder"         : self.builder,
+            "version"         : BUILDERS[self.builder][0],
+            "database"        : os.path.abspath(self.database),
+            "databaseSize"    : databaseStat.st_size,
+            "databaseMtimeNs" : databaseStat.st_mtime_ns,
+            "databaseSha256"  : checksum,
+            "sideFileSize"    : sideFileStat.st_size,
+            "sideFileMtimeNs" : sideFileStat.st_mtime_ns,
+            "recorded"        : datetime.datetime.now().isoformat(timespec='seconds'),
+            }
+        tempFile = self.getRecordFile() + ".tmp." + str(os.getpid())
+        RECORD_H = open(tempFile,'w')
+        json.dump(self.record,RECORD_H,indent=1,sort_keys=True)
+        RECORD_H.write("\n")
+        RECORD_H.close()
+        os.replace(tempFile,self.getRecordFile())
+        return
+
+    def getChecksum(self):
+        checksum = hashlib.sha256()
+        DATABASE_H = open(self.database,'rb')
+        block = DATABASE_H.read(HASH_BLOCK_SIZE)
+        while block:
+            checksum.update(block)
+            block = DATABASE_H.read(HASH_BLOCK_SIZE)
+        DATABASE_H.close()
+        return checksum.hexdigest()
+
+    # Build the side file into a temporary file (named per process, as concurrent runs may share the
+    # database directory), then move it into place; returns the database's checksum
+    def build(self):
+        tempFile = self.sideFile + ".tmp." + str(os.getpid())
+        DATABASE_H = open(self.database,'rb')
+        SIDE_FILE_H = open(tempFile,'wb')
+        checksum = BUILDERS[self.builder][1](DATABASE_H,SIDE_FILE_H)
+        SIDE_FILE_H.close()
+        DATABASE_H.close()
+        os.replace(tempFile,self.sideFile)
+        return checksum
+
+    # Make sure the side file is up to date with its database, building it if need be; returns one of
+    # the ARTIFACT_ results above
+    def ensure(self):
+        try:
+            databaseStat = os.stat(self.database)
+        except OSError:
+            return ARTIFACT_FAILED
+        try:
+            sideFileStat = os.stat(self.sideFile)
+        except OSError:
+            sideFileStat = None
+        record = self.loadRecord()
+        try:
+            if sideFileStat and record:
+                if record.get("builder") == self.builder and record.get("version") == BUILDERS[self.builder][0] \
+                    and record.get("database") == os.path.abspath(self.database) \
+                    and record.get("sideFileSize") == sideFileStat.st_size and record.get("sideFileMtimeNs") == sideFileStat.st_mtime_ns:
+                    if record.get("databaseSize") == databaseStat.st_size and record.get("databaseMtimeNs") == databaseStat.st_mtime_ns:
+                        return ARTIFACT_CURRENT
+                    if record.get("databaseSize") == databaseStat.st_size and record.get("databaseSha256") == self.getChecksum():
+                        self.writeRecord(databaseStat,record["databaseSha256"])
+                        return ARTIFACT_VERIFIED
+            elif sideFileStat and sideFileStat.st_size > 0 and sideFileStat.st_mtime_ns >= databaseStat.st_mtime_ns:
+                self.writeRecord(databaseStat,self.getChecksum())
+                return ARTIFACT_ADOPTED
+            checksum = self.build()
+            self.writeRecord(os.stat(self.database),checksum)
+        except OSError:
+            return ARTIFACT_FAILED
+        return ARTIFACT_BUILT
@@ -243,6 +243,12 @@ blastpIdentity           = 60
 blastnHitCount           = 5
 blastpHitCount           = 5
 blastThreads             = 1
+blastBatchSize           = 0
+searchThreads            = 0
+profileBatchSize         = 0
+hmmThreads               = 0
+hmmBatchSize             = 0
+annotationCacheSize      = 0
 ncbiVirusGenomeBlast     = False
 ncbiVirusProteinBlast    = False
 refseqGeneBlast          = False
@@ -318,6 +324,12 @@ with open(jsonFile, 'r') as jsonParameters:
     blastnHitCount           = parameters["blastnHitCount"]
     blastpHitCount           = parameters["blastpHitCount"]
     blastThreads             = parameters["blastThreads"]
+    blastBatchSize           = parameters["blastBatchSize"]
+    searchThreads            = parameters["searchThreads"]
+    profileBatchSize         = parameters["profileBatchSize"]
+    hmmThreads               = parameters["hmmThreads"]
+    hmmBatchSize             = parameters["hmmBatchSize"]
+    annotationCacheSize      = parameters["annotationCacheSize"]
     ncbiVirusGenomeBlast     = parameters["ncbiVirusGenomeBlast"]
     ncbiVirusProteinBlast    = parameters["ncbiVirusProteinBlast"]
     refseqProteinBlast       = parameters["refseqProteinBlast"]
@@ -433,6 +445,12 @@ if PHATE_MESSAGES:
     print("blastpHitCount is", blastpHitCount) 
     print("blastnHitCount is", blastnHitCount)
     print("blastThreads is", blastThreads)
+    print("blastBatchSize is", blastBatchSize)
+    print("searchThreads is", searchThreads)
+    print("profileBatchSize is", profileBatchSize)
+    print("hmmThreads is", hmmThreads)
+    print("hmmBatchSize is", hmmBatchSize)
+    print("annotationCacheSize is", annotationCacheSize)
     print("ncbiVirusGenomeBlast is", ncbiVirusGenomeBlast)
     print("ncbiVirusProteinBlast is", ncbiVirusProteinBlast)
     print("refseqProteinBlast is", refseqProteinBlast)
@@ -505,6 +523,12 @@ RUNLOG.write("%s%s\n" % ("   blastnIdentity is ",blastnIdentity))
 RUNLOG.write("%s%s\n" % ("   blastpHitCount is ",blastpHitCount))
 RUNLOG.write("%s%s\n" % ("   blastnHitCount is ",blastnHitCount))
 RUNLOG.write("%s%s\n" % ("   blastThreads is ",blastThreads))
+RUNLOG.write("%s%s\n" % ("   blastBatchSize is ",blastBatchSize))
+RUNLOG.write("%s%s\n" % ("   searchThreads is ",searchThreads))
+RUNLOG.write("%s%s\n" % ("   profileBatchSize is ",profileBatchSize))
+RUNLOG.write("%s%s\n" % ("   hmmThreads is ",hmmThreads))
+RUNLOG.write("%s%s\n" % ("   hmmBatchSize is ",hmmBatchSize))
+RUNLOG.write("%s%s\n" % ("   annotationCacheSize is ",annotationCacheSize))
 RUNLOG.write("%s%s\n" % ("   ncbiVirusGenomeBlast is ",ncbiVirusGenomeBlast))
 RUNLOG.write("%s%s\n" % ("   ncbiVirusProteinBlast is ",ncbiVirusProteinBlast))
 RUNLOG.write("%s%s\n" % ("   refseqProteinBlast is ",refseqProteinBlast))
@@ -853,7 +877,7 @@ commandRoot6  = " -h "    + blastpHitCount          + " -H " + blastnHitCount
 commandRoot7  = " -B "    + blastProgramParameterString   + " -b " + blastDatabaseParameterString            # blast and hmm search of blast/sequence database(s)
 commandRoot8  = " -M "    + hmmProgramParameterString     + " -m " + seqDatabaseParameterString              # hmm search of hmm profile database(s)
 commandRoot9  = " -R "    + profileProgramParameterString + " -r " + profileDatabaseParameterString          # program and databases for hmm search
-commandRoot10 = " -z "    + blastThreadsParameterString
+commandRoot10 = " -z "    + blastThreadsParameterString  + " -y " + str(blastBatchSize) + " -T " + str(searchThreads) + " -P " + str(profileBatchSize) + " -u " + str(hmmThreads) + " -Y " + str(hmmBatchSize) + " -A " + str(annotationCacheSize)
 commandRootA  = commandRoot1 + commandRoot2 + commandRoot3 + commandRoot4 + commandRoot5  + commandRoot6
 commandRoot   = commandRootA + commandRoot7 + commandRoot8 + commandRoot9 + commandRoot10
 